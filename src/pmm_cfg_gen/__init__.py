@@ -11,8 +11,15 @@ import jsonpickle
 
 from pmm_cfg_gen.utils.cli_args import globalArgs
 from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr
-from pmm_cfg_gen.utils.logging_utils import setup_logging
+from pmm_cfg_gen.utils.logging_utils import setup_logging, stopLoggingQueue
 from pmm_cfg_gen.utils.plex import PlexLibraryProcessor
+from pmm_cfg_gen.utils.tracing import startTracing, saveTrace, traceSpan
+from pmm_cfg_gen.utils.profiling import startProfiling, saveProfile
+from pmm_cfg_gen.utils.run_history import showRunHistory
+from pmm_cfg_gen.bench.fake_plex import createFakeLibrary, runFakePlexServer
+from pmm_cfg_gen.bench.e2e import runBenchmarkCommand, runConsistencyCheckCommand
+from pmm_cfg_gen.bench.micro import runMicroBenchmarkCommand
+from pmm_cfg_gen.bench.fixture_export import runExportFixtureCommand
 
 #######################################################################
 
@@ -27,6 +34,7 @@ def handler(signum, frame):
     res = readchar.readchar()
     if res == "y":
         print("")
+        stopLoggingQueue()
         os._exit(1)
     else:
         sys.stdin.flush()
@@ -53,8 +61,44 @@ globalSettingsMgr.loadFromFile("config.yaml", globalArgs)
 
 
 def cli():
-    plexMoveLibraryProcessor = PlexLibraryProcessor()
-    plexMoveLibraryProcessor.process()
+    if globalArgs.command == "stats":
+        sys.exit(showRunHistory(globalSettingsMgr.settings.output.historyFile, library=globalArgs.statsLibrary, last=globalArgs.statsLast, asJson=bool(globalArgs.statsJson)))
+
+    if globalArgs.command in ["fake-plex", "bench-e2e"]:
+        libraryArgs = {
+            "preset": globalArgs.fakePreset,
+            "movies": globalArgs.fakeMovies,
+            "shows": globalArgs.fakeShows,
+            "artists": globalArgs.fakeArtists,
+            "collections": globalArgs.fakeCollections,
+            "seed": globalArgs.fakeSeed,
+            "fixture": globalArgs.fakeFixture,
+        }
+
+        if globalArgs.command == "fake-plex":
+            sys.exit(runFakePlexServer(createFakeLibrary(**libraryArgs), globalArgs.fakePlexHost, globalArgs.fakePlexPort, globalArgs.fakeLatency / 1000, globalArgs.fakeJitter / 1000))
+
+        if globalArgs.benchVerify:
+            sys.exit(runConsistencyCheckCommand(libraryArgs, globalArgs.benchJson, bool(globalArgs.benchKeep)))
+
+        sys.exit(runBenchmarkCommand(libraryArgs, globalArgs.fakeLatency / 1000, globalArgs.fakeJitter / 1000, globalArgs.benchJson, bool(globalArgs.benchKeep)))
+
+    if globalArgs.command == "bench":
+        sys.exit(runMicroBenchmarkCommand(globalArgs.filters, globalArgs.benchJson, globalArgs.benchCompare, globalArgs.benchThreshold / 100, globalArgs.benchRounds, globalArgs.benchMinTime, globalArgs.benchFixture))
+
+    if globalArgs.command == "export-fixture":
+        sys.exit(runExportFixtureCommand(globalArgs.exportFixtureFile, globalArgs.exportFixtureSalt))
+
+    startTracing(globalArgs.trace)
+    startProfiling(globalArgs.profile, memory=bool(globalArgs.profileMemory), top=globalArgs.profileTop)
+
+    try:
+        with traceSpan("run", "run"):
+            plexMoveLibraryProcessor = PlexLibraryProcessor()
+            plexMoveLibraryProcessor.process()
+    finally:
+        saveProfile()
+        saveTrace()
 
 
 #######################################################################
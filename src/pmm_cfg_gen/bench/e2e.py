@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import filecmp
+import json
+import logging
+import multiprocessing
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any
+from xml.etree import ElementTree
+
+from plexapi.base import PlexObject
+from plexapi.server import PlexServer
+
+from pmm_cfg_gen.bench.fake_plex import FakePlexServer, createFakeLibrary
+from pmm_cfg_gen.utils.plex import PlexLibraryProcessor
+from pmm_cfg_gen.utils.report_spool import ReportSpool
+from pmm_cfg_gen.utils.settings_utils_v1 import SettingsPlexLibrary, SettingsRender, globalSettingsMgr
+
+###################################################################################################
+
+# Render and output settings compared by the consistency check, every variant has to generate exactly what the first
+# ( serial ) one does
+CONSISTENCY_VARIANTS = {
+    "serial": {"render": {"workers": 0, "enableAsync": False}, "output": {"streaming": False, "writerThreads": 0}},
+    "workers": {"render": {"workers": 2, "enableAsync": False}, "output": {"streaming": False, "writerThreads": 0}},
+    "streaming": {"render": {"workers": 0, "enableAsync": False}, "output": {"streaming": True, "writerThreads": 0}},
+    "async": {"render": {"workers": 0, "enableAsync": True}, "output": {"streaming": False, "writerThreads": 0}},
+    "writer": {"render": {"workers": 0, "enableAsync": False}, "output": {"streaming": False, "writerThreads": 2, "writerQueueSize": 4}},
+    "workers+writer": {"render": {"workers": 2, "enableAsync": False}, "output": {"streaming": False, "writerThreads": 2, "writerQueueSize": 4}},
+}
+
+# Files that legitimately differ between runs ( the run times in the reports and the manifest hashes of those )
+CONSISTENCY_IGNORED_FILES = [".pmm_cfg_gen.manifest.json"]
+
+# Run statistics of the json reports ( times, request and render counts depend on the render mode )
+CONSISTENCY_IGNORED_KEYS = ["stats", "processingTime", "renderCost"]
+
+###################################################################################################
+
+
+class FakePlexProcess:
+    """
+     Runs a L { FakePlexServer } in a child process, so the server neither competes with the processor for the GIL nor
+     adds to its memory. The library is generated in the child
+    """
+    libraryArgs: dict
+    latency: float
+    jitter: float
+
+    url: str | None
+    sections: list[tuple[str, str, int]]
+
+    __process: multiprocessing.Process | None
+    __connection: Connection | None
+
+    def __init__(self, libraryArgs: dict, latency: float = 0, jitter: float = 0) -> None:
+        """
+         @param libraryArgs - Arguments of L { createFakeLibrary }
+         @param latency - Seconds each request takes
+         @param jitter - Maximum random deviation of the latency in seconds
+        """
+        self.libraryArgs = libraryArgs
+        self.latency = latency
+        self.jitter = jitter
+
+        self.url = None
+        self.sections = []
+
+        self.__process = None
+        self.__connection = None
+
+    def start(self):
+        # Fork ( not spawn ), spawn would parse the command line again when importing the package
+        context = multiprocessing.get_context("fork")
+
+        self.__connection, childConnection = context.Pipe()
+        self.__process = context.Process(target=FakePlexProcess._serve, args=(childConnection, self.libraryArgs, self.latency, self.jitter), name="fake-plex", daemon=True)
+        self.__process.start()
+
+        self.url, self.sections = self.__connection.recv()
+
+        return self
+
+    def stop(self) -> dict:
+        """
+         Stop the server
+
+         @return The server statistics ( requests, notFound, peakRssBytes )
+        """
+        result = {}
+
+        if self.__process is not None and self.__connection is not None:
+            self.__connection.send("stop")
+
+            result = self.__connection.recv()
+
+            self.__process.join(10)
+            self.__connection.close()
+
+        self.__process = None
+        self.__connection = None
+
+        return result
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+
+        return False
+
+    @staticmethod
+    def _serve(connection, libraryArgs: dict, latency: float, jitter: float):
+        library = createFakeLibrary(**libraryArgs)
+
+        server = FakePlexServer(library, latency=latency, jitter=jitter)
+        server.startThread()
+
+        connection.send((server.url, [(x.title, x.type, len(x.items)) for x in library.sections]))
+        connection.recv()
+
+        server.shutdown()
+        server.server_close()
+
+        connection.send({"requests": server.requests, "notFound": server.notFound, "peakRssBytes": getPeakRss(resource.RUSAGE_SELF)})
+        connection.close()
+
+###################################################################################################
+
+
+def getPeakRss(who: int = resource.RUSAGE_SELF) -> int:
+    """
+     Get the peak resident set size in bytes ( of the largest child for RUSAGE_CHILDREN )
+    """
+    maxRss = resource.getrusage(who).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes
+    return maxRss if sys.platform == "darwin" else maxRss * 1024
+
+
+def disableOnlineServices():
+    """
+     Change the settings so nothing needs the network ( TMDb, TVDb, Trakt ) or leaves files behind ( caches, stats,
+     history )
+    """
+    settings = globalSettingsMgr.settings
+
+    settings.output.statsFile = None
+    settings.output.metricsFile = None
+    settings.output.historyFile = None
+    settings.output.eventsFile = None
+
+    settings.theMovieDatabase.apiKey = None
+    settings.theMovieDatabase.cacheFile = None
+    settings.theMovieDatabase.exportFile = None
+    settings.theTvDatabase.apiKey = None
+    settings.theTvDatabase.cacheFile = None
+    settings.trakt.clientId = None
+    settings.trakt.cacheFile = None
+
+    settings.plex.cassetteMode = None
+
+
+def useFakePlexServer(server: FakePlexProcess, outputPath: Path):
+    """
+     Point the settings at a fake plex server ( all of its libraries ) and an output folder
+    """
+    settings = globalSettingsMgr.settings
+
+    settings.plex.serverUrl = server.url
+    settings.plex.token = "bench"
+    settings.plex.libraries = [SettingsPlexLibrary(title) for title, _, _ in server.sections]
+    settings.plexMetaManager.cacheExistingFiles = False
+
+    settings.output.path = str(outputPath)
+
+    disableOnlineServices()
+
+
+def runBenchmark(libraryArgs: dict, latency: float = 0, jitter: float = 0, outputFile: str | None = None, keep: bool = False) -> dict:
+    """
+     Generate the configuration of a fake plex server and measure the run. The settings are changed to point at the
+     server and a temporary output folder, everything that would need the network ( TMDb, TVDb, Trakt ) or leave files
+     behind ( caches, history ) is turned off
+
+     @param libraryArgs - Arguments of L { createFakeLibrary }
+     @param latency - Seconds each plex request takes
+     @param outputFile - Json file the result is written to
+     @param keep - Keep the generated configuration ( its path is part of the result )
+
+     @return The result ( wall time, requests, items per second, peak RSS )
+    """
+    logger = logging.getLogger("pmm_cfg_gen")
+    settings = globalSettingsMgr.settings
+
+    outputPath = Path(tempfile.mkdtemp(prefix="pmm_cfg_gen_bench_"))
+
+    with FakePlexProcess(libraryArgs, latency, jitter) as server:
+        logger.info("Fake plex server: {} ({})".format(server.url, ", ".join(["{}: {} {}s".format(*x) for x in server.sections])))
+
+        useFakePlexServer(server, outputPath)
+
+        start = time.perf_counter()
+
+        processor = PlexLibraryProcessor()
+        processor.process()
+
+        seconds = time.perf_counter() - start
+
+        # Render workers have exited by now ( the largest finished child counts ), the server has not
+        childRss = getPeakRss(resource.RUSAGE_CHILDREN)
+
+        serverStats = server.stop()
+
+    stats = processor.stats
+    httpTotal = stats.http.getTotals().get("total")
+    items = stats.countsProgram.items.processed
+
+    result = {
+        "library": {"sections": [{"title": title, "type": type, "items": count} for title, type, count in server.sections], **libraryArgs},
+        "latencyMs": latency * 1000,
+        "jitterMs": jitter * 1000,
+        "seconds": round(seconds, 3),
+        "collections": stats.countsProgram.collections.processed,
+        "items": items,
+        "itemsPerSecond": round(items / seconds, 2) if seconds > 0 else None,
+        "requests": httpTotal.count if httpTotal is not None else 0,
+        "requestErrors": httpTotal.errors if httpTotal is not None else 0,
+        "requestSeconds": round(httpTotal.seconds, 3) if httpTotal is not None else 0,
+        "files": sum([1 for x in outputPath.rglob("*") if x.is_file()]),
+        "peakRssBytes": getPeakRss(resource.RUSAGE_SELF),
+        "peakChildRssBytes": childRss,
+        "server": serverStats,
+        "output": str(outputPath) if keep else None,
+    }
+
+    if not keep:
+        shutil.rmtree(outputPath, ignore_errors=True)
+
+    if outputFile is not None:
+        Path(outputFile).parent.mkdir(parents=True, exist_ok=True)
+
+        with open(outputFile, "w") as fp:
+            json.dump(result, fp, indent=2)
+
+    return result
+
+
+def showBenchmark(result: dict):
+    print("End-to-end benchmark ({})".format(", ".join(["{}: {} {}s".format(x["title"], x["items"], x["type"]) for x in result["library"]["sections"]])))
+    print("  Latency          : {:.0f}ms (+/- {:.0f}ms)".format(result["latencyMs"], result["jitterMs"]))
+    print("  Wall time        : {:.2f}s".format(result["seconds"]))
+    print("  Collections      : {}".format(result["collections"]))
+    print("  Items            : {} ({} items/s)".format(result["items"], result["itemsPerSecond"]))
+    print("  Plex requests    : {} ({} errors, {:.2f}s, {:.2f} per item)".format(
+        result["requests"], result["requestErrors"], result["requestSeconds"], result["requests"] / result["items"] if result["items"] else 0
+    ))
+    print("  Files            : {}".format(result["files"]))
+    print("  Peak RSS         : {:.1f} MB (largest child process: {:.1f} MB)".format(result["peakRssBytes"] / 1048576, result["peakChildRssBytes"] / 1048576))
+
+    if result["output"] is not None:
+        print("  Output           : {}".format(result["output"]))
+
+
+def runBenchmarkCommand(libraryArgs: dict, latency: float = 0, jitter: float = 0, outputFile: str | None = None, keep: bool = False) -> int:
+    """
+     Run and print the end-to-end benchmark
+
+     @return The exit code
+    """
+    showBenchmark(runBenchmark(libraryArgs, latency, jitter, outputFile, keep))
+
+    return 0
+
+
+def _applyVariant(variant: dict):
+    settings = globalSettingsMgr.settings
+
+    render = dict(
+        workers=settings.render.workers,
+        enableAsync=settings.render.enableAsync,
+        concurrency=settings.render.concurrency,
+        reloadCheck=settings.render.reloadCheck,
+    )
+    render.update(variant.get("render", {}))
+
+    settings.render = SettingsRender(**render)
+
+    for name, value in variant.get("output", {}).items():
+        setattr(settings.output, name, value)
+
+
+def _compareOutput(referencePath: Path, outputPath: Path) -> dict:
+    """
+     Compare the files generated by two runs ( content only, the run statistics of the reports are left out )
+
+     @return Lists of the different, missing and extra files ( relative paths )
+    """
+    referenceFiles = set([str(x.relative_to(referencePath)) for x in referencePath.rglob("*") if x.is_file()])
+    outputFiles = set([str(x.relative_to(outputPath)) for x in outputPath.rglob("*") if x.is_file()])
+
+    different = []
+
+    for fileName in sorted(referenceFiles & outputFiles):
+        if Path(fileName).name in CONSISTENCY_IGNORED_FILES or filecmp.cmp(referencePath / fileName, outputPath / fileName, shallow=False):
+            continue
+
+        if _withoutTimings(referencePath / fileName) != _withoutTimings(outputPath / fileName):
+            different.append(fileName)
+
+    return {
+        "different": different,
+        "missing": sorted(referenceFiles - outputFiles),
+        "extra": sorted(outputFiles - referenceFiles),
+    }
+
+
+def _withoutTimings(fileName: Path) -> Any:
+    with open(fileName, "r", encoding="utf-8", errors="replace") as fp:
+        if fileName.suffix == ".json":
+            try:
+                data = json.load(fp)
+
+                return {k: v for k, v in data.items() if k not in CONSISTENCY_IGNORED_KEYS} if isinstance(data, dict) else data
+            except ValueError:
+                fp.seek(0)
+
+        return [x for x in fp if not any([y in x for y in ['"start"', '"end"', '"totalTimeInSeconds"', "Start Time", "End Time", "Total Time"]])]
+
+
+def _getState(value):
+    # Comparable state of report entries ( the attributes and list items of plex objects, without server and parent )
+    if isinstance(value, PlexObject):
+        state = {k: _getState(v) for k, v in value.__dict__.items() if k not in ("_server", "_parent")}
+
+        return (type(value).__name__, state, [_getState(x) for x in value] if isinstance(value, list) else None)
+
+    if isinstance(value, ElementTree.Element):
+        return ElementTree.tostring(value)
+
+    if isinstance(value, dict):
+        return {k: _getState(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [_getState(x) for x in value]
+
+    return value
+
+
+def checkReportSpool(serverUrl: str) -> dict:
+    """
+     Spool the items and collections of each library ( with their children, so the entries hold MediaContainers ) to
+     disk and compare what is read back with the entries kept in memory
+
+     @return The number of entries and the titles of those that differ
+    """
+    plexServer = PlexServer(serverUrl, "bench")
+
+    memory = ReportSpool(plexServer)
+    disk = ReportSpool(plexServer, spoolToDisk=True)
+
+    for section in plexServer.library.sections():
+        for item in section.all()[:20] + section.collections()[:10]:
+            if item.type == "collection":
+                children = item.items()
+            elif item.type == "show":
+                children = item.seasons()
+            elif item.type == "artist":
+                children = item.albums()
+            else:
+                children = []
+
+            entry = {"title": item.title, "metadata": item, "children": children}
+
+            memory.append(item.title, entry)
+            disk.append(item.title, entry)
+
+    memory.sort()
+    disk.sort()
+
+    entries = len(memory)
+    different = [x["title"] for x, y in zip(memory, disk) if _getState(x) != _getState(y)]
+
+    memory.close()
+    disk.close()
+
+    return {"entries": entries, "different": different}
+
+
+def runConsistencyCheck(libraryArgs: dict, variants: dict[str, dict] | None = None, keep: bool = False) -> dict:
+    """
+     Generate the configuration of a fake plex server once per render / output variant and compare the files with those
+     of the first variant ( serial rendering )
+
+     @param libraryArgs - Arguments of L { createFakeLibrary }
+     @param variants - Name and settings of each variant ( default: L { CONSISTENCY_VARIANTS } )
+     @param keep - Keep the generated configurations
+
+     @return The differences of each variant ( see L { _compareOutput } )
+    """
+    logger = logging.getLogger("pmm_cfg_gen")
+
+    variants = variants if variants is not None else CONSISTENCY_VARIANTS
+    rootPath = Path(tempfile.mkdtemp(prefix="pmm_cfg_gen_check_"))
+    result = {"output": str(rootPath) if keep else None, "variants": {}}
+
+    with FakePlexProcess(libraryArgs) as server:
+        result["reportSpool"] = checkReportSpool(server.url)
+
+        referencePath = None
+
+        for name, variant in variants.items():
+            outputPath = rootPath.joinpath(name)
+
+            logger.info("Consistency check: {} ({})".format(name, variant))
+
+            useFakePlexServer(server, outputPath)
+            _applyVariant(variant)
+
+            start = time.perf_counter()
+
+            PlexLibraryProcessor().process()
+
+            entry = {"seconds": round(time.perf_counter() - start, 3), "files": sum([1 for x in outputPath.rglob("*") if x.is_file()])}
+
+            if referencePath is None:
+                referencePath = outputPath
+            else:
+                entry.update(_compareOutput(referencePath, outputPath))
+
+            result["variants"][name] = entry
+
+    if not keep:
+        shutil.rmtree(rootPath, ignore_errors=True)
+
+    return result
+
+
+def runConsistencyCheckCommand(libraryArgs: dict, outputFile: str | None = None, keep: bool = False) -> int:
+    """
+     Run and print the consistency check
+
+     @return The exit code ( 1 if a variant generated different files )
+    """
+    result = runConsistencyCheck(libraryArgs, keep=keep)
+
+    if outputFile is not None:
+        Path(outputFile).parent.mkdir(parents=True, exist_ok=True)
+
+        with open(outputFile, "w") as fp:
+            json.dump(result, fp, indent=2)
+
+    failed = len(result["reportSpool"]["different"]) > 0
+
+    print("Consistency check")
+    print("  {:<16} : {} entries, {} differences".format("report spool", result["reportSpool"]["entries"], len(result["reportSpool"]["different"])))
+
+    for title in result["reportSpool"]["different"]:
+        print("      {:<9} {}".format("different", title))
+
+    for name, entry in result["variants"].items():
+        differences = len(entry.get("different", [])) + len(entry.get("missing", [])) + len(entry.get("extra", []))
+        failed = failed or differences > 0
+
+        print("  {:<16} : {} files, {:.2f}s, {}".format(name, entry["files"], entry["seconds"], "{} differences".format(differences) if "different" in entry else "reference"))
+
+        for status in ["different", "missing", "extra"]:
+            for fileName in entry.get(status, []):
+                print("      {:<9} {}".format(status, fileName))
+
+    if result["output"] is not None:
+        print("  Output           : {}".format(result["output"]))
+
+    return 1 if failed else 0
@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import gzip
+import json
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+###################################################################################################
+
+# Words the generated titles are made of
+TITLE_WORDS = [
+    "the", "last", "night", "city", "of", "dark", "river", "return", "star", "lost", "king", "secret", "house", "blue",
+    "war", "love", "story", "shadow", "fire", "ice", "empire", "legend", "summer", "winter", "island", "code", "man",
+    "woman", "girl", "boy", "ghost", "machine", "dream", "road", "garden", "silent", "broken", "wild", "golden", "iron",
+    "midnight", "ocean", "storm", "heart", "edge", "world", "time", "run", "game", "little", "big", "red", "black",
+]
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Documentary", "Drama", "Family", "Fantasy", "Horror", "Mystery", "Romance", "Science Fiction", "Thriller", "Western"]
+
+CONTENT_RATINGS = ["G", "PG", "PG-13", "R", "TV-14", "TV-MA", "NR"]
+
+# Section types and the plex search type of their items
+SECTION_TYPES = {"movie": 1, "show": 2, "artist": 8}
+
+# Search types of the nested items
+SEARCH_TYPE_SEASON = 3
+SEARCH_TYPE_ALBUM = 9
+SEARCH_TYPE_TRACK = 10
+SEARCH_TYPE_COLLECTION = 18
+
+# Library sizes of the presets ( movies, shows, artists )
+PRESETS = {
+    "1k": (1000, 100, 50),
+    "10k": (10000, 1000, 500),
+    "100k": (100000, 10000, 5000),
+}
+
+
+class FakeSection:
+    """
+     A library section of the fake plex server with its items and collections ( plain dicts, see L { FakeLibrary } )
+    """
+    key: int
+    type: str
+    title: str
+    items: list[dict]
+    collections: list[dict]
+
+    def __init__(self, key: int, type: str, title: str, items: list[dict] | None = None, collections: list[dict] | None = None) -> None:
+        self.key = key
+        self.type = type
+        self.title = title
+        self.items = items if items is not None else []
+        self.collections = collections if collections is not None else []
+
+    def toJson(self):
+        return {
+            "key": self.key,
+            "type": self.type,
+            "title": self.title,
+            "items": self.items,
+            "collections": self.collections,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(int(data["key"]), data["type"], data["title"], data.get("items", []), data.get("collections", []))
+
+
+class FakeLibrary:
+    """
+     The content served by L { FakePlexServer }: movie, show and music sections with collections. Generated ( see
+     L { generate } ) or loaded from a fixture file ( json, optionally gzip compressed )
+    """
+    VERSION = 1
+
+    sections: list[FakeSection]
+
+    __index: dict[int, tuple[FakeSection, str, dict, dict | None]]
+
+    def __init__(self, sections: list[FakeSection]) -> None:
+        self.sections = sections
+        self.__index = {}
+
+        self.__buildIndex()
+
+    @property
+    def itemCount(self) -> int:
+        return sum([len(x.items) for x in self.sections])
+
+    def getSection(self, key: int) -> FakeSection | None:
+        return next((x for x in self.sections if x.key == key), None)
+
+    def lookup(self, ratingKey: int) -> tuple[FakeSection, str, dict, dict | None] | None:
+        """
+         Find an object by its rating key
+
+         @return ( section, object type, object, parent object ) or None
+        """
+        return self.__index.get(ratingKey)
+
+    def toJson(self):
+        return {
+            "version": FakeLibrary.VERSION,
+            "sections": [x.toJson() for x in self.sections],
+        }
+
+    def save(self, fileName: str | Path):
+        """
+         Save the library as a fixture ( gzip compressed if the name ends with .gz )
+        """
+        p = Path(fileName)
+        p.parent.mkdir(parents=True, exist_ok=True)
+
+        with (gzip.open(p, "wt", encoding="utf-8") if p.suffix == ".gz" else open(p, "w", encoding="utf-8")) as fp:
+            json.dump(self.toJson(), fp)
+
+    @classmethod
+    def load(cls, fileName: str | Path):
+        p = Path(fileName)
+
+        with (gzip.open(p, "rt", encoding="utf-8") if p.suffix == ".gz" else open(p, "r", encoding="utf-8")) as fp:
+            data = json.load(fp)
+
+        return cls([FakeSection.from_dict(x) for x in data["sections"]])
+
+    @classmethod
+    def generate(cls, movies: int = 1000, shows: int = 0, artists: int = 0, collections: int | None = None, seed: int = 1):
+        """
+         Generate a library ( the same arguments always generate the same library )
+
+         @param movies - Number of movies ( no movie section if 0 )
+         @param shows - Number of shows
+         @param artists - Number of artists
+         @param collections - Number of collections per section ( default: one per 20 items )
+        """
+        rnd = random.Random(seed)
+        ratingKeys = iter(range(1, 1 << 31))
+
+        sections = []
+
+        for sectionType, title, count in [("movie", "Movies", movies), ("show", "TV Shows", shows), ("artist", "Music", artists)]:
+            if count <= 0:
+                continue
+
+            section = FakeSection(len(sections) + 1, sectionType, title)
+
+            for i in range(count):
+                section.items.append(FakeLibrary.__generateItem(rnd, ratingKeys, sectionType, i))
+
+            FakeLibrary.__generateCollections(rnd, ratingKeys, section, collections if collections is not None else max(1, count // 20))
+
+            sections.append(section)
+
+        return cls(sections)
+
+    def __buildIndex(self):
+        for section in self.sections:
+            for item in section.items:
+                self.__index[item["ratingKey"]] = (section, section.type, item, None)
+
+                for season in item.get("seasons", []):
+                    self.__index[season["ratingKey"]] = (section, "season", season, item)
+
+                for album in item.get("albums", []):
+                    self.__index[album["ratingKey"]] = (section, "album", album, item)
+
+                    for track in album.get("tracks", []):
+                        self.__index[track["ratingKey"]] = (section, "track", track, album)
+
+            for collection in section.collections:
+                self.__index[collection["ratingKey"]] = (section, "collection", collection, None)
+
+    @staticmethod
+    def __generateTitle(rnd: random.Random) -> str:
+        # Mostly short titles with a long tail
+        words = min(1 + int(rnd.expovariate(0.5)), 12)
+
+        return " ".join([rnd.choice(TITLE_WORDS) for _ in range(words)]).title()
+
+    @staticmethod
+    def __generateItem(rnd: random.Random, ratingKeys, sectionType: str, index: int) -> dict:
+        ratingKey = next(ratingKeys)
+        year = rnd.randint(1950, 2023)
+
+        item = {
+            "ratingKey": ratingKey,
+            "title": "{} {}".format(FakeLibrary.__generateTitle(rnd), index) if rnd.random() < 0.05 else FakeLibrary.__generateTitle(rnd),
+            "year": year,
+            "summary": " ".join([rnd.choice(TITLE_WORDS) for _ in range(rnd.randint(5, 60))]),
+            "contentRating": rnd.choice(CONTENT_RATINGS),
+            "genres": sorted(set([rnd.choice(GENRES) for _ in range(rnd.randint(1, 3))])),
+            "labels": [],
+            "addedAt": 1500000000 + ratingKey,
+            "updatedAt": 1690000000 + ratingKey,
+        }
+
+        if sectionType == "movie":
+            item["guids"] = ["tmdb://{}".format(100000 + ratingKey)] + (["imdb://tt{:07d}".format(ratingKey)] if rnd.random() < 0.9 else [])
+            item["editionTitle"] = "Director's Cut" if rnd.random() < 0.02 else None
+            item["duration"] = rnd.randint(70, 180) * 60000
+        elif sectionType == "show":
+            item["guids"] = ["tvdb://{}".format(200000 + ratingKey)] + (["tmdb://{}".format(100000 + ratingKey)] if rnd.random() < 0.8 else [])
+            item["seasons"] = [
+                {"ratingKey": next(ratingKeys), "index": season, "title": "Season {}".format(season), "episodes": rnd.randint(6, 24)}
+                for season in range(1, 1 + min(1 + int(rnd.expovariate(0.3)), 40))
+            ]
+        else:
+            item["guids"] = ["mbid://{:08x}".format(ratingKey)]
+            item["albums"] = []
+
+            for _ in range(min(1 + int(rnd.expovariate(0.5)), 20)):
+                albumKey = next(ratingKeys)
+
+                item["albums"].append({
+                    "ratingKey": albumKey,
+                    "title": FakeLibrary.__generateTitle(rnd),
+                    "year": rnd.randint(1960, 2023),
+                    "tracks": [
+                        {"ratingKey": next(ratingKeys), "index": track, "title": FakeLibrary.__generateTitle(rnd), "duration": rnd.randint(120, 420) * 1000}
+                        for track in range(1, rnd.randint(4, 16))
+                    ],
+                })
+
+        return item
+
+    @staticmethod
+    def __generateCollections(rnd: random.Random, ratingKeys, section: FakeSection, count: int):
+        for c in range(count):
+            # Collection sizes follow a long tail ( most are small, a few are huge )
+            size = min(len(section.items), 2 + int(rnd.paretovariate(1.2)))
+            children = rnd.sample(section.items, size)
+
+            collection = {
+                "ratingKey": next(ratingKeys),
+                "title": "{} Collection".format(FakeLibrary.__generateTitle(rnd)),
+                "summary": "A generated collection",
+                "labels": ["PMM-Fake"] if rnd.random() < 0.2 else [],
+                "children": [x["ratingKey"] for x in children],
+            }
+
+            for child in children:
+                child.setdefault("collections", []).append(collection["title"])
+
+            section.collections.append(collection)
+
+###################################################################################################
+
+
+class FakePlexRequestHandler(BaseHTTPRequestHandler):
+    """
+     Serves the endpoints of the plex api used by L { PlexLibraryProcessor }
+    """
+    server: "FakePlexServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.waitLatency()
+
+        url = urllib.parse.urlsplit(self.path)
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        parts = [x for x in url.path.split("/") if len(x) > 0]
+
+        try:
+            body = self.__route(parts, query)
+        except (ValueError, KeyError, IndexError):
+            body = None
+
+        self.server.countRequest(body is not None)
+
+        if body is None:
+            self.send_error(404)
+
+            return
+
+        data = ('<?xml version="1.0" encoding="UTF-8"?>\n' + body).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml;charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __route(self, parts: list[str], query: dict) -> str | None:
+        library = self.server.library
+
+        if len(parts) == 0:
+            return '<MediaContainer size="0" friendlyName="Fake Plex" machineIdentifier="fake-plex" version="1.40.0.0" myPlex="0" platform="Linux"/>'
+
+        if parts == ["library"]:
+            return '<MediaContainer size="0" title1="Plex Library"/>'
+
+        if parts == ["library", "sections"]:
+            return self.__container([_sectionXml(x) for x in library.sections])
+
+        if parts == ["media", "providers"]:
+            return self.__container([_providerXml(library)])
+
+        if len(parts) >= 3 and parts[:2] == ["library", "sections"]:
+            section = library.getSection(int(parts[2]))
+            if section is None:
+                return None
+
+            if len(parts) == 3:
+                return self.__container([_sectionXml(section)])
+
+            if parts[3] in ["all", "collections"] and query.get("includeMeta") == "1":
+                return self.__container([], extra=_filterMetaXml(section), totalSize=0)
+
+            if parts[3] == "collections" or query.get("type") == str(SEARCH_TYPE_COLLECTION):
+                return self.__page([_collectionXml(section, x) for x in section.collections], librarySectionID=section.key)
+
+            if parts[3] == "all" and query.get("type") == str(SEARCH_TYPE_ALBUM):
+                artistKey = query.get("artist.id")
+                albums = [
+                    _albumXml(section, album, item)
+                    for item in section.items
+                    if artistKey is None or str(item["ratingKey"]) == artistKey
+                    for album in item.get("albums", [])
+                ]
+
+                return self.__page(albums, librarySectionID=section.key)
+
+            if parts[3] == "all" and query.get("type") == str(SEARCH_TYPE_SEASON):
+                seasons = [_seasonXml(section, season, item) for item in section.items for season in item.get("seasons", [])]
+
+                return self.__page(seasons, librarySectionID=section.key)
+
+            if parts[3] == "all" and query.get("type") == str(SEARCH_TYPE_TRACK):
+                tracks = [
+                    _trackXml(section, track, album, item)
+                    for item in section.items
+                    for album in item.get("albums", [])
+                    for track in album.get("tracks", [])
+                ]
+
+                return self.__page(tracks, librarySectionID=section.key)
+
+            if parts[3] == "all":
+                return self.__page([_itemXml(section, x) for x in section.items], librarySectionID=section.key)
+
+            return None
+
+        if len(parts) >= 3 and parts[:2] == ["library", "collections"]:
+            found = library.lookup(int(parts[2]))
+            if found is None or found[1] != "collection":
+                return None
+
+            section, _, collection, _ = found
+
+            if len(parts) == 4 and parts[3] == "children":
+                children = [library.lookup(x) for x in collection["children"]]
+
+                return self.__page([_itemXml(section, x[2]) for x in children if x is not None])
+
+            return self.__container([_collectionXml(section, collection)])
+
+        if len(parts) >= 3 and parts[:2] == ["library", "metadata"]:
+            objects = [library.lookup(int(x)) for x in parts[2].split(",")]
+            objects = [x for x in objects if x is not None]
+
+            if len(objects) == 0:
+                return None
+
+            if len(parts) == 3:
+                return self.__container([_objectXml(*x) for x in objects])
+
+            section, objectType, obj, parent = objects[0]
+
+            if parts[3] == "children":
+                if objectType == "show":
+                    return self.__page([_seasonXml(section, x, obj) for x in obj.get("seasons", [])])
+
+                if objectType == "artist":
+                    return self.__page([_albumXml(section, x, obj) for x in obj.get("albums", [])])
+
+                if objectType == "album":
+                    return self.__page([_trackXml(section, x, obj, parent) for x in obj.get("tracks", [])])
+
+                if objectType == "collection":
+                    children = [library.lookup(x) for x in obj["children"]]
+
+                    return self.__page([_itemXml(section, x[2]) for x in children if x is not None])
+
+                return self.__page([])
+
+            if parts[3] == "allLeaves":
+                if objectType == "artist":
+                    return self.__page([_trackXml(section, track, album, obj) for album in obj.get("albums", []) for track in album.get("tracks", [])])
+
+                if objectType == "album":
+                    return self.__page([_trackXml(section, x, obj, parent) for x in obj.get("tracks", [])])
+
+                return self.__page([])
+
+        return None
+
+    def __page(self, elements: list[str], **attributes) -> str:
+        """
+         Return the requested page of a list ( X-Plex-Container-Start / Size headers or query parameters )
+        """
+        url = urllib.parse.urlsplit(self.path)
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+
+        start = int(self.headers.get("X-Plex-Container-Start") or query.get("X-Plex-Container-Start") or 0)
+        size = self.headers.get("X-Plex-Container-Size") or query.get("X-Plex-Container-Size")
+        size = int(size) if size is not None else len(elements)
+
+        return self.__container(elements[start:start + size], totalSize=len(elements), offset=start, **attributes)
+
+    @staticmethod
+    def __container(elements: list[str], extra: str = "", **attributes) -> str:
+        attributeText = "".join([' {}="{}"'.format(k, v) for k, v in attributes.items()])
+
+        return '<MediaContainer size="{}"{}>{}{}</MediaContainer>'.format(len(elements), attributeText, "".join(elements), extra)
+
+
+class FakePlexServer(ThreadingHTTPServer):
+    """
+     A local stand-in for a plex server that serves a L { FakeLibrary } ( no network or plex account needed ). Every
+     request waits the configured latency first, so the cost of round trips can be simulated
+    """
+    daemon_threads = True
+
+    library: FakeLibrary
+    latency: float
+    jitter: float
+
+    __requests: int
+    __notFound: int
+    __lock: threading.Lock
+    __random: random.Random
+
+    def __init__(self, library: FakeLibrary, host: str = "127.0.0.1", port: int = 0, latency: float = 0, jitter: float = 0, seed: int = 1) -> None:
+        """
+         @param port - The port ( 0 picks a free one, see L { url } )
+         @param latency - Seconds each request takes
+         @param jitter - Maximum random deviation of the latency in seconds
+        """
+        super().__init__((host, port), FakePlexRequestHandler)
+
+        self.library = library
+        self.latency = max(0, latency)
+        self.jitter = max(0, jitter)
+
+        self.__requests = 0
+        self.__notFound = 0
+        self.__lock = threading.Lock()
+        self.__random = random.Random(seed)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+
+        return "http://{}:{}".format(host, port)
+
+    @property
+    def requests(self) -> int:
+        return self.__requests
+
+    @property
+    def notFound(self) -> int:
+        return self.__notFound
+
+    def waitLatency(self):
+        if self.latency <= 0 and self.jitter <= 0:
+            return
+
+        with self.__lock:
+            delay = self.latency + self.__random.uniform(-self.jitter, self.jitter)
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def countRequest(self, found: bool):
+        with self.__lock:
+            self.__requests += 1
+
+            if not found:
+                self.__notFound += 1
+
+    def startThread(self) -> threading.Thread:
+        """
+         Serve requests on a background thread ( stop with shutdown )
+        """
+        thread = threading.Thread(target=self.serve_forever, name="fake-plex", daemon=True)
+        thread.start()
+
+        return thread
+
+###################################################################################################
+
+
+def _attributes(**attributes) -> str:
+    return "".join([" {}={}".format(k, quoteattr(str(v))) for k, v in attributes.items() if v is not None])
+
+
+def _tags(tag: str, values: list[str]) -> str:
+    return "".join(["<{} tag={}/>".format(tag, quoteattr(str(x))) for x in values])
+
+
+def _sectionXml(section: FakeSection) -> str:
+    agent = {"movie": "tv.plex.agents.movie", "show": "tv.plex.agents.series", "artist": "tv.plex.agents.music"}.get(section.type)
+
+    return '<Directory{}><Location id="{}" path="/data/{}"/></Directory>'.format(
+        _attributes(key=section.key, type=section.type, title=section.title, agent=agent, scanner="Plex Scanner", language="en-US", uuid="fake-{}".format(section.key), refreshing=0, updatedAt=1690000000),
+        section.key, escape(section.title),
+    )
+
+
+def _providerXml(library: FakeLibrary) -> str:
+    # Total duration and storage of the sections ( LibrarySection.totalDuration / totalStorage )
+    directories = [
+        '<Directory id="{}" durationTotal="{}" storageTotal="{}"/>'.format(x.key, sum([y.get("duration") or 0 for y in x.items]), len(x.items) * 4000000000)
+        for x in library.sections
+    ]
+
+    return '<MediaProvider identifier="com.plexapp.plugins.library" title="Library"><Feature type="content">{}</Feature></MediaProvider>'.format("".join(directories))
+
+
+def _filterMetaXml(section: FakeSection) -> str:
+    # Filter definitions plexapi validates searches against ( only what the processor uses: the albums of an artist )
+    types = [
+        '<Type key="/library/sections/{0}/all?type={1}" type="{2}" title="{2}" active="0"><Field key="artist.id" title="Artist" type="integer"/></Type>'.format(section.key, searchType, libtype)
+        for libtype, searchType in [(section.type, SECTION_TYPES[section.type]), ("album", SEARCH_TYPE_ALBUM)]
+    ]
+
+    return '<Meta>{}<FieldType type="integer"><Operator key="=" title="is"/></FieldType></Meta>'.format("".join(types))
+
+
+def _itemXml(section: FakeSection, item: dict) -> str:
+    common = dict(
+        ratingKey=item["ratingKey"],
+        title=item["title"],
+        titleSort=item["title"].lower(),
+        year=item.get("year"),
+        summary=item.get("summary"),
+        contentRating=item.get("contentRating"),
+        addedAt=item.get("addedAt"),
+        updatedAt=item.get("updatedAt"),
+        librarySectionID=section.key,
+        librarySectionTitle=section.title,
+    )
+
+    children = (
+        "".join(["<Guid id={}/>".format(quoteattr(x)) for x in item.get("guids", [])])
+        + _tags("Genre", item.get("genres", []))
+        + _tags("Label", item.get("labels", []))
+        + _tags("Collection", item.get("collections", []))
+    )
+
+    if section.type == "movie":
+        return "<Video{}>{}</Video>".format(
+            _attributes(key="/library/metadata/{}".format(item["ratingKey"]), type="movie", guid="plex://movie/{}".format(item["ratingKey"]), editionTitle=item.get("editionTitle"), duration=item.get("duration"), **common),
+            children,
+        )
+
+    if section.type == "show":
+        seasons = item.get("seasons", [])
+
+        return "<Directory{}>{}</Directory>".format(
+            _attributes(key="/library/metadata/{}/children".format(item["ratingKey"]), type="show", guid="plex://show/{}".format(item["ratingKey"]), childCount=len(seasons), leafCount=sum([x["episodes"] for x in seasons]), **common),
+            children,
+        )
+
+    return "<Directory{}>{}</Directory>".format(
+        _attributes(key="/library/metadata/{}/children".format(item["ratingKey"]), type="artist", guid="plex://artist/{}".format(item["ratingKey"]), childCount=len(item.get("albums", [])), **common),
+        children,
+    )
+
+
+def _seasonXml(section: FakeSection, season: dict, show: dict) -> str:
+    return "<Directory{}/>".format(_attributes(
+        ratingKey=season["ratingKey"], key="/library/metadata/{}/children".format(season["ratingKey"]), type="season", title=season["title"], index=season["index"],
+        parentRatingKey=show["ratingKey"], parentTitle=show["title"], parentKey="/library/metadata/{}".format(show["ratingKey"]), leafCount=season["episodes"],
+        librarySectionID=section.key,
+    ))
+
+
+def _albumXml(section: FakeSection, album: dict, artist: dict) -> str:
+    return "<Directory{}/>".format(_attributes(
+        ratingKey=album["ratingKey"], key="/library/metadata/{}/children".format(album["ratingKey"]), type="album", title=album["title"], year=album.get("year"),
+        parentRatingKey=artist["ratingKey"], parentTitle=artist["title"], parentKey="/library/metadata/{}".format(artist["ratingKey"]), leafCount=len(album.get("tracks", [])),
+        librarySectionID=section.key,
+    ))
+
+
+def _trackXml(section: FakeSection, track: dict, album: dict, artist: dict | None) -> str:
+    return "<Track{}/>".format(_attributes(
+        ratingKey=track["ratingKey"], key="/library/metadata/{}".format(track["ratingKey"]), type="track", title=track["title"], index=track["index"], duration=track.get("duration"),
+        parentRatingKey=album["ratingKey"], parentTitle=album["title"],
+        grandparentRatingKey=artist["ratingKey"] if artist is not None else None, grandparentTitle=artist["title"] if artist is not None else None,
+        librarySectionID=section.key,
+    ))
+
+
+def _collectionXml(section: FakeSection, collection: dict) -> str:
+    return "<Directory{}>{}</Directory>".format(
+        _attributes(
+            ratingKey=collection["ratingKey"], key="/library/collections/{}/children".format(collection["ratingKey"]), type="collection", subtype=section.type,
+            title=collection["title"], summary=collection.get("summary"), childCount=len(collection["children"]), smart=0, updatedAt=1690000000,
+            librarySectionID=section.key, librarySectionTitle=section.title,
+        ),
+        _tags("Label", collection.get("labels", [])),
+    )
+
+
+def _objectXml(section: FakeSection, objectType: str, obj: dict, parent: dict | None) -> str:
+    if objectType == "season":
+        return _seasonXml(section, obj, parent)  # type: ignore
+
+    if objectType == "album":
+        return _albumXml(section, obj, parent)  # type: ignore
+
+    if objectType == "track":
+        return _trackXml(section, obj, parent, None)  # type: ignore
+
+    if objectType == "collection":
+        return _collectionXml(section, obj)
+
+    return _itemXml(section, obj)
+
+###################################################################################################
+
+
+def createFakeLibrary(preset: str | None = None, movies: int | None = None, shows: int | None = None, artists: int | None = None, collections: int | None = None, fixture: str | None = None, seed: int = 1) -> FakeLibrary:
+    """
+     Load a fixture or generate a library ( sizes not given are taken from the preset, default "1k" )
+    """
+    if fixture is not None:
+        return FakeLibrary.load(fixture)
+
+    presetMovies, presetShows, presetArtists = PRESETS[preset or "1k"]
+
+    return FakeLibrary.generate(
+        movies=movies if movies is not None else presetMovies,
+        shows=shows if shows is not None else presetShows,
+        artists=artists if artists is not None else presetArtists,
+        collections=collections,
+        seed=seed,
+    )
+
+
+def runFakePlexServer(library: FakeLibrary, host: str = "127.0.0.1", port: int = 32400, latency: float = 0, jitter: float = 0) -> int:
+    """
+     Serve a library until interrupted
+
+     @return The exit code
+    """
+    logger = logging.getLogger("pmm_cfg_gen")
+
+    server = FakePlexServer(library, host, port, latency=latency, jitter=jitter)
+
+    logger.info(
+        "Fake plex server listening on {} ({}). Latency: {:.0f}ms (+/- {:.0f}ms)".format(
+            server.url, ", ".join(["{}: {} {}s".format(x.title, len(x.items), x.type) for x in library.sections]), latency * 1000, jitter * 1000
+        )
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+        logger.info("Requests served: {} ({} not found)".format(server.requests, server.notFound))
+
+    return 0
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import hashlib
+import hmac
+import logging
+import re
+import secrets
+from typing import Any
+
+from plexapi.library import LibrarySection
+from plexapi.server import PlexServer
+
+from pmm_cfg_gen.bench.fake_plex import FakeLibrary, FakeSection, SECTION_TYPES
+from pmm_cfg_gen.utils.plex_cassette import startPlexCassette, getPlexCassette, stopPlexCassette
+from pmm_cfg_gen.utils.plex_http import InstrumentedSession, PlexHttpStats
+from pmm_cfg_gen.utils.plex_utils import PlexItemHelper
+from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr
+
+###################################################################################################
+
+# Season titles plex generates ( everything else is replaced )
+GENERATED_SEASON_TITLE_PATTERN = re.compile(r"^(Season \d+|Specials)$")
+
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+_DIGITS = "0123456789"
+
+
+class Pseudonymizer:
+    """
+     Replaces text with a deterministic pseudonym of the same shape: letters become letters ( same case ), digits become
+     digits, everything else ( spaces, punctuation ) is kept. The same text and salt always give the same pseudonym, so
+     titles referenced in several places stay consistent
+    """
+    __salt: bytes
+    __cache: dict[str, str]
+
+    def __init__(self, salt: str) -> None:
+        self.__salt = salt.encode("utf-8")
+        self.__cache = {}
+
+    def text(self, value: str | None) -> str | None:
+        if value is None or len(value) == 0:
+            return value
+
+        result = self.__cache.get(value)
+
+        if result is None:
+            stream = self.__keyStream(value)
+            chars = []
+
+            for c in value:
+                if c.isdigit():
+                    chars.append(_DIGITS[next(stream) % 10])
+                elif c.isalpha():
+                    x = _LETTERS[next(stream) % 26]
+                    chars.append(x.upper() if c.isupper() else x)
+                else:
+                    chars.append(c)
+
+            result = "".join(chars)
+
+            self.__cache[value] = result
+
+        return result
+
+    def guid(self, value: str) -> str:
+        """
+         Replace the id of a guid ( e.g. imdb://tt0123456 ), the scheme and the imdb prefix are kept
+        """
+        scheme, separator, id = value.partition("://")
+
+        if len(separator) == 0:
+            return self.text(value) or value
+
+        prefix = "tt" if id.startswith("tt") else ""
+
+        return "{}://{}{}".format(scheme, prefix, self.text(id[len(prefix):]))
+
+    def __keyStream(self, value: str):
+        block = 0
+
+        while True:
+            yield from hmac.new(self.__salt, "{}\0{}".format(value, block).encode("utf-8"), hashlib.sha256).digest()
+
+            block += 1
+
+
+class FixtureExporter:
+    """
+     Walks the libraries of a plex server and builds a L { FakeLibrary } with the same structure: item, season, album,
+     track and collection counts, collection membership, guid schemes, genres, ratings, years, durations and the length
+     of every title. Titles, summaries, labels and guids are replaced with pseudonyms and rating keys are renumbered.
+     Items are read from the library listings, the attributes plex leaves out of those are not reloaded
+    """
+    _logger: logging.Logger
+
+    plexServer: PlexServer
+    pseudonymizer: Pseudonymizer
+    http: PlexHttpStats
+
+    __ratingKeys: dict[Any, int]
+
+    def __init__(self, plexServer: PlexServer, salt: str, http: PlexHttpStats) -> None:
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.plexServer = plexServer
+        self.pseudonymizer = Pseudonymizer(salt)
+        self.http = http
+
+        self.__ratingKeys = {}
+
+    def export(self, libraryNames: list[str] | None = None) -> FakeLibrary:
+        """
+         @param libraryNames - The libraries to export ( default: all movie, show and music libraries )
+        """
+        if libraryNames is None:
+            librarySections = [x for x in self.plexServer.library.sections() if x.type in SECTION_TYPES]
+        else:
+            librarySections = [self.plexServer.library.section(x) for x in libraryNames]
+
+        sections = []
+
+        for librarySection in librarySections:
+            if librarySection.type not in SECTION_TYPES:
+                self._logger.warning("Skipping library '{}' ({} libraries are not supported)".format(librarySection.title, librarySection.type))
+
+                continue
+
+            self.http.setPhase(librarySection.title, "export")
+
+            section = self.exportSection(librarySection, len(sections) + 1)
+
+            self._logger.info("Exported library '{}' as '{}': {} items, {} collections".format(librarySection.title, section.title, len(section.items), len(section.collections)))
+
+            sections.append(section)
+
+        return FakeLibrary(sections)
+
+    def exportSection(self, librarySection: LibrarySection, key: int) -> FakeSection:
+        section = FakeSection(key, librarySection.type, self.pseudonymizer.text(librarySection.title) or str(key))
+
+        # Renumber in rating key order, the listing order ( by title ) would leak the real titles
+        items = sorted(librarySection.all(), key=lambda x: int(x.ratingKey))
+        itemsByKey = {}
+
+        for item in items:
+            itemsByKey[item.ratingKey] = self._exportItem(librarySection.type, item)
+
+            section.items.append(itemsByKey[item.ratingKey])
+
+        if librarySection.type == "show":
+            self._exportSeasons(librarySection, itemsByKey)
+        elif librarySection.type == "artist":
+            self._exportAlbums(librarySection, itemsByKey)
+
+        for collection in sorted(librarySection.collections(), key=lambda x: int(x.ratingKey)):
+            section.collections.append(self._exportCollection(collection, itemsByKey))
+
+        return section
+
+    def _exportItem(self, sectionType: str, item) -> dict:
+        # Only what the listing returned, reloading every item would cost a request each
+        item._autoReload = False
+
+        result = {
+            "ratingKey": self.__getRatingKey(item.ratingKey),
+            "title": self.pseudonymizer.text(item.title) or "",
+            "year": getattr(item, "year", None),
+            "summary": self.pseudonymizer.text(item.summary),
+            "contentRating": getattr(item, "contentRating", None),
+            "genres": [x.tag for x in item.genres or []],
+            "labels": [self.__getLabel(x.tag) for x in item.labels or []],
+            "addedAt": _timestamp(item.addedAt),
+            "updatedAt": _timestamp(item.updatedAt),
+            "guids": [self.pseudonymizer.guid(x.id) for x in getattr(item, "guids", None) or []],
+        }
+
+        if sectionType == "movie":
+            result["editionTitle"] = item.editionTitle
+            result["duration"] = item.duration
+        elif sectionType == "show":
+            result["seasons"] = []
+        else:
+            result["albums"] = []
+
+        return result
+
+    def _exportSeasons(self, librarySection: LibrarySection, itemsByKey: dict[Any, dict]):
+        # All seasons of the library at once ( instead of a request per show )
+        for season in sorted(librarySection.search(libtype="season"), key=lambda x: int(x.ratingKey)):
+            show = itemsByKey.get(season.parentRatingKey)
+
+            if show is None:
+                continue
+
+            season._autoReload = False
+
+            show["seasons"].append({
+                "ratingKey": self.__getRatingKey(season.ratingKey),
+                "index": season.index,
+                "title": season.title if GENERATED_SEASON_TITLE_PATTERN.match(season.title or "") else self.pseudonymizer.text(season.title),
+                "episodes": season.leafCount or 0,
+            })
+
+        for show in itemsByKey.values():
+            show["seasons"].sort(key=lambda x: x["index"] if x["index"] is not None else -1)
+
+    def _exportAlbums(self, librarySection: LibrarySection, itemsByKey: dict[Any, dict]):
+        # All albums and tracks of the library at once ( instead of requests per artist and album )
+        albums = {}
+
+        for album in sorted(librarySection.search(libtype="album"), key=lambda x: int(x.ratingKey)):
+            artist = itemsByKey.get(album.parentRatingKey)
+
+            if artist is None:
+                continue
+
+            album._autoReload = False
+
+            albums[album.ratingKey] = {
+                "ratingKey": self.__getRatingKey(album.ratingKey),
+                "title": self.pseudonymizer.text(album.title) or "",
+                "year": album.year,
+                "tracks": [],
+            }
+
+            artist["albums"].append(albums[album.ratingKey])
+
+        for track in sorted(librarySection.search(libtype="track"), key=lambda x: int(x.ratingKey)):
+            album = albums.get(track.parentRatingKey)
+
+            if album is None:
+                continue
+
+            track._autoReload = False
+
+            album["tracks"].append({
+                "ratingKey": self.__getRatingKey(track.ratingKey),
+                "index": track.index,
+                "title": self.pseudonymizer.text(track.title) or "",
+                "duration": track.duration,
+            })
+
+        for album in albums.values():
+            album["tracks"].sort(key=lambda x: x["index"] if x["index"] is not None else -1)
+
+    def _exportCollection(self, collection, itemsByKey: dict[Any, dict]) -> dict:
+        collection._autoReload = False
+
+        title = collection.title if collection.title in PlexItemHelper.PMM_TITLES else self.pseudonymizer.text(collection.title) or ""
+
+        children = [itemsByKey[x.ratingKey] for x in collection.items() if x.ratingKey in itemsByKey]
+
+        for child in children:
+            child.setdefault("collections", []).append(title)
+
+        return {
+            "ratingKey": self.__getRatingKey(collection.ratingKey),
+            "title": title,
+            "summary": self.pseudonymizer.text(collection.summary),
+            "labels": [self.__getLabel(x.tag) for x in collection.labels or []],
+            "children": [x["ratingKey"] for x in children],
+        }
+
+    def __getRatingKey(self, ratingKey) -> int:
+        result = self.__ratingKeys.get(ratingKey)
+
+        if result is None:
+            result = len(self.__ratingKeys) + 1
+
+            self.__ratingKeys[ratingKey] = result
+
+        return result
+
+    def __getLabel(self, label: str) -> str:
+        # Plex meta manager labels are kept, they change how items are processed
+        return label if label in PlexItemHelper.PMM_LABELS else self.pseudonymizer.text(label) or ""
+
+###################################################################################################
+
+
+def _timestamp(value) -> int | None:
+    return int(value.timestamp()) if value is not None else None
+
+
+def exportFixture(fileName: str, salt: str | None = None) -> FakeLibrary:
+    """
+     Export the libraries of the configured plex server ( or plex cassette ) as an anonymized fixture for the fake plex
+     server and the benchmarks
+
+     @param fileName - The fixture file ( gzip compressed if the name ends with .gz )
+     @param salt - Salt of the pseudonyms ( the same salt gives the same pseudonyms, default: random )
+    """
+    logger = logging.getLogger("pmm_cfg_gen")
+    settings = globalSettingsMgr.settings
+
+    if salt is None:
+        salt = secrets.token_hex(16)
+
+    http = PlexHttpStats()
+
+    startPlexCassette(settings.plex.cassetteFile, settings.plex.cassetteMode, settings.plex.cassetteLatency)
+
+    try:
+        logger.info("Connection to plex server: {}".format(settings.plex.serverUrl))
+
+        session = InstrumentedSession(http, getPlexCassette())
+        session.verify = False
+
+        plexServer = PlexServer(settings.plex.serverUrl, settings.plex.token, session=session)
+
+        exporter = FixtureExporter(plexServer, salt, http)
+        library = exporter.export([x.name for x in settings.plex.libraries] if settings.plex.libraries is not None else None)
+    finally:
+        stopPlexCassette()
+
+    library.save(fileName)
+
+    httpTotal = http.getTotals().get("total")
+
+    logger.info("Fixture saved: {} ({} items, {} plex requests)".format(fileName, library.itemCount, httpTotal.count if httpTotal is not None else 0))
+
+    return library
+
+
+def runExportFixtureCommand(fileName: str, salt: str | None = None) -> int:
+    """
+     Export and print the size of a fixture
+
+     @return The exit code
+    """
+    library = exportFixture(fileName, salt)
+
+    print("Fixture: {}".format(fileName))
+
+    for section in library.sections:
+        counts = ["{} {}s".format(len(section.items), section.type), "{} collections".format(len(section.collections))]
+
+        if section.type == "show":
+            counts.append("{} seasons".format(sum([len(x["seasons"]) for x in section.items])))
+        elif section.type == "artist":
+            albums = [album for x in section.items for album in x["albums"]]
+            counts.append("{} albums, {} tracks".format(len(albums), sum([len(x["tracks"]) for x in albums])))
+
+        print("  {:<20} : {}".format(section.title, ", ".join(counts)))
+
+    return 0
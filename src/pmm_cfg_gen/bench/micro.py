@@ -0,0 +1,625 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import datetime
+import fnmatch
+import functools
+import gc
+import itertools
+import json
+import logging
+import platform
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import importlib_resources
+import jsonpickle
+from plexapi.server import PlexServer
+
+from pmm_cfg_gen.bench.fake_plex import TITLE_WORDS, FakeLibrary, FakePlexServer
+from pmm_cfg_gen.bench.e2e import disableOnlineServices
+from pmm_cfg_gen.utils.plex_stats import PlexStatsLibraryTotals
+from pmm_cfg_gen.utils.plex_utils import PlexItemHelper, PlexVideoHelper
+from pmm_cfg_gen.utils.pmm_utils import PlexMetaManagerCache
+from pmm_cfg_gen.utils.render_cost import getRenderCostStats
+from pmm_cfg_gen.utils.settings_utils_v1 import SettingsPlexLibrary, globalSettingsMgr
+from pmm_cfg_gen.utils.template_filters import formatJson, generateTpDbSearchUrl
+from pmm_cfg_gen.utils.template_manager import TemplateManager
+from pmm_cfg_gen.utils.timer import timer
+
+###################################################################################################
+
+# Version of the result file format
+RESULT_VERSION = 1
+
+# Size of the synthetic plex meta manager corpus ( metadata entries, collections )
+PMM_CORPUS_SIZE = (25000, 5000)
+
+
+class MicroBenchmark:
+    """
+     A named function that is called repeatedly. Every call should do the same amount of work ( e.g. format one item,
+     cycling through a list of items ). The function is created by setup when the benchmark runs, so fixtures are only
+     prepared for the benchmarks that are selected
+    """
+    name: str
+    setup: Callable[[], Callable[[], Any]]
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], Any]]) -> None:
+        self.name = name
+        self.setup = setup
+
+
+class MicroBenchmarkResult:
+    """
+     Time per call of a benchmark over several rounds. Comparisons use the fastest round, it is the least affected by
+     other load on the machine
+    """
+    name: str
+    loops: int
+    rounds: list[float]
+    error: str | None
+
+    def __init__(self, name: str, loops: int = 0, rounds: list[float] | None = None, error: str | None = None) -> None:
+        self.name = name
+        self.loops = loops
+        self.rounds = rounds if rounds is not None else []
+        self.error = error
+
+    @property
+    def best(self) -> float | None:
+        return min(self.rounds) if len(self.rounds) > 0 else None
+
+    @property
+    def median(self) -> float | None:
+        return statistics.median(self.rounds) if len(self.rounds) > 0 else None
+
+    def toJson(self):
+        return {
+            "loops": self.loops,
+            "rounds": len(self.rounds),
+            "best": self.best,
+            "median": self.median,
+            "max": max(self.rounds) if len(self.rounds) > 0 else None,
+            "error": self.error,
+        }
+
+###################################################################################################
+
+
+class _Fixtures:
+    """
+     The plex objects and caches the benchmarks run on, prepared on first use. The plex objects come from a
+     L { FakePlexServer } running on a background thread and are fully loaded up front, so the benchmarks don't trigger
+     plex requests
+    """
+    library: FakeLibrary
+    seed: int
+
+    sections: dict[str, Any]
+    libraryJson: dict[str, str]
+    items: dict[str, list]
+    collections: dict[str, list]
+    itemDicts: dict[str, list[dict]]
+
+    pmmNames: list[tuple[str, int]]
+    pmmTitles: list[tuple[str, int]]
+    pmmCollections: list[str]
+
+    __server: FakePlexServer | None
+    __pmmCache: PlexMetaManagerCache | None
+
+    def __init__(self, library: FakeLibrary, seed: int = 1) -> None:
+        self.library = library
+        self.seed = seed
+
+        self.sections = {}
+        self.libraryJson = {}
+        self.items = {}
+        self.collections = {}
+        self.itemDicts = {}
+
+        self.pmmNames = []
+        self.pmmTitles = []
+        self.pmmCollections = []
+
+        self.__server = None
+        self.__pmmCache = None
+
+    def close(self):
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+
+            self.__server = None
+
+    def getSection(self, sectionType: str):
+        """
+         Get a plex library section with its items and collections loaded ( see L { items } and L { collections } )
+        """
+        if self.__server is None:
+            self.__loadPlexObjects()
+
+        return self.sections[sectionType]
+
+    def getPmmCache(self) -> PlexMetaManagerCache:
+        if self.__pmmCache is None:
+            self.__pmmCache = self.__createPmmCorpus()
+
+        return self.__pmmCache
+
+    def __loadPlexObjects(self):
+        self.__server = FakePlexServer(self.library)
+        self.__server.startThread()
+
+        plex = PlexServer(self.__server.url, "bench")
+
+        for section in plex.library.sections():
+            items = section.all()[:50]
+            collections = section.collections()[:20]
+
+            for x in items + collections:
+                x.reload()
+
+            self.sections[section.type] = section
+            self.libraryJson[section.type] = jsonpickle.dumps(section, unpicklable=False)
+            self.items[section.type] = items
+            self.collections[section.type] = collections
+            self.itemDicts[section.type] = [_getItemDict(x) for x in items[:10]]
+
+    def __createPmmCorpus(self) -> PlexMetaManagerCache:
+        """
+         Write a plex meta manager corpus ( metadata and collections spread over a few files ) and load it the way the
+         processor does. The files are written in the flow style ( json ), the loader reads them like any other yaml
+        """
+        rnd = random.Random(self.seed)
+        metadataCount, collectionCount = PMM_CORPUS_SIZE
+        cache = PlexMetaManagerCache()
+
+        with tempfile.TemporaryDirectory(prefix="pmm_cfg_gen_bench_") as path:
+            for fileIndex in range(10):
+                metadata = {}
+                collections = {}
+
+                for i in range(metadataCount // 10):
+                    title = "{} {}".format(" ".join([rnd.choice(TITLE_WORDS) for _ in range(rnd.randint(1, 5))]).title(), fileIndex * metadataCount + i)
+                    year = rnd.randint(1950, 2023)
+                    name = "{} ({})".format(title, year)
+
+                    entry: dict[str, Any] = {"title": title, "year": year}
+
+                    if rnd.random() < 0.3:
+                        entry["variables"] = {"poster": "https://example.com/{}.jpg".format(i)}
+                    else:
+                        entry["url_poster"] = "https://example.com/{}.jpg".format(i)
+
+                    if rnd.random() < 0.2:
+                        entry["seasons"] = {s: {"url_poster": "https://example.com/{}/{}.jpg".format(i, s)} for s in range(1, rnd.randint(2, 8))}
+
+                    metadata[name] = entry
+
+                    if rnd.random() < 0.01:
+                        self.pmmNames.append((name, year))
+                        self.pmmTitles.append((title, year))
+
+                for i in range(collectionCount // 10):
+                    name = "{} Collection {}".format(" ".join([rnd.choice(TITLE_WORDS) for _ in range(rnd.randint(1, 4))]).title(), fileIndex * collectionCount + i)
+
+                    collections[name] = {
+                        "tmdb_collection": rnd.randint(1, 1000000),
+                        "label": "PMM-U-{}".format(rnd.choice(TITLE_WORDS).title()),
+                        "url_poster": "https://example.com/c{}.jpg".format(i),
+                        "sort_title": "+1_{}".format(name),
+                    }
+
+                    if rnd.random() < 0.01:
+                        self.pmmCollections.append(name)
+
+                with open(Path(path, "corpus{}.yml".format(fileIndex)), "w") as fp:
+                    json.dump({"metadata": metadata, "collections": collections}, fp)
+
+            cache.processFolder(path)
+
+        return cache
+
+
+def _setupPathFormat(fixtures: _Fixtures, sectionType: str) -> Callable[[], Any]:
+    section = fixtures.getSection(sectionType)
+    librarySettings = SettingsPlexLibrary(section.title)
+
+    return lambda: PlexItemHelper.formatString(globalSettingsMgr.settings.output.pathFormat, library=section, librarySettings=librarySettings, cleanTitleStrings=True)
+
+
+def _getItemDict(item) -> dict:
+    # Same as the item arguments of the metadata templates in the processor ( without plex meta manager data )
+    itemDict = {"metadata": item, "pmm": None}
+
+    if item.type == "show":
+        itemDict["seasons"] = item.seasons()
+    elif item.type == "artist":
+        itemDict["albums"] = item.albums()
+        itemDict["tracks"] = item.tracks()
+
+    return itemDict
+
+
+def _cycle(values: list, func: Callable[[Any], Any]) -> Callable[[], Any]:
+    """
+     Create a benchmark function that calls func with the next value on each call
+    """
+    it = itertools.cycle(values)
+
+    return lambda: func(next(it))
+
+###################################################################################################
+
+
+def createMicroBenchmarks(fixtures: _Fixtures) -> list[MicroBenchmark]:
+    settings = globalSettingsMgr.settings
+    fileNameFormat = settings.output.fileNameFormat
+
+    benchmarks: list[MicroBenchmark] = []
+
+    def add(name: str, setup: Callable[[], Callable[[], Any]]):
+        benchmarks.append(MicroBenchmark(name, setup))
+
+    def addItems(name: str, sectionType: str, group: str, func: Callable[[Any, Any], Any]):
+        # Call func( section, item ) with the next item or collection of a section
+        def setup():
+            section = fixtures.getSection(sectionType)
+
+            return _cycle(getattr(fixtures, group)[sectionType], lambda x: func(section, x))
+
+        add(name, setup)
+
+    for sectionType in [x.type for x in fixtures.library.sections]:
+        addItems(
+            "formatString.metadata.{}".format(sectionType), sectionType, "items",
+            lambda section, x: PlexItemHelper.formatString(fileNameFormat.metadata, library=section, item=x, cleanTitleStrings=True)
+        )
+        addItems(
+            "formatString.replace.{}".format(sectionType), sectionType, "items",
+            lambda section, x: PlexItemHelper._formatStringReplace(fileNameFormat.metadata, library=section, item=x, cleanTitleStrings=True)
+        )
+        addItems("formatItemTitle.{}".format(sectionType), sectionType, "items", lambda section, x: PlexItemHelper.formatItemTitle(x))
+        addItems("isPMMItem.{}".format(sectionType), sectionType, "items", lambda section, x: PlexItemHelper.isPMMItem(x))
+        addItems("PlexVideoHelper.guids.{}".format(sectionType), sectionType, "items", lambda section, x: PlexVideoHelper(x).guids)
+        addItems("generateTpDbSearchUrl.{}".format(sectionType), sectionType, "items", lambda section, x: generateTpDbSearchUrl(x))
+        addItems("formatJson.metadata.{}".format(sectionType), sectionType, "items", lambda section, x: formatJson(x))
+
+        addItems(
+            "formatString.collection.{}".format(sectionType), sectionType, "collections",
+            lambda section, x: PlexItemHelper.formatString(fileNameFormat.collections, library=section, collection=x, cleanTitleStrings=True)
+        )
+        addItems("formatItemTitle.collection.{}".format(sectionType), sectionType, "collections", lambda section, x: PlexItemHelper.formatItemTitle(x))
+        addItems("isPMMItem.collection.{}".format(sectionType), sectionType, "collections", lambda section, x: PlexItemHelper.isPMMItem(x))
+        addItems("generateTpDbSearchUrl.collection.{}".format(sectionType), sectionType, "collections", lambda section, x: generateTpDbSearchUrl(x))
+
+        add("formatString.path.{}".format(sectionType), functools.partial(_setupPathFormat, fixtures, sectionType))
+
+    def addPmm(name: str, getValues: Callable[[], list], func: Callable[[PlexMetaManagerCache, Any], Any]):
+        def setup():
+            cache = fixtures.getPmmCache()
+
+            return _cycle(getValues(), lambda x: func(cache, x))
+
+        add(name, setup)
+
+    addPmm("PlexMetaManagerCache.metadata.name", lambda: fixtures.pmmNames, lambda cache, x: cache.getMetadataCacheByName(x[0], x[1]))
+    addPmm("PlexMetaManagerCache.metadata.title", lambda: fixtures.pmmTitles, lambda cache, x: cache.getMetadataCacheByName(x[0], x[1]))
+    addPmm("PlexMetaManagerCache.metadata.miss", lambda: fixtures.pmmTitles, lambda cache, x: cache.getMetadataCacheByName("Missing {}".format(x[0]), x[1]))
+    addPmm("PlexMetaManagerCache.metadataItem_to_dict", lambda: fixtures.pmmNames, lambda cache, x: cache.metadataItem_to_dict(x[0], x[1]))
+    addPmm("PlexMetaManagerCache.collection.name", lambda: fixtures.pmmCollections, lambda cache, x: cache.getCollectionCacheByName(x))
+    addPmm("PlexMetaManagerCache.collection.miss", lambda: fixtures.pmmCollections, lambda cache, x: cache.getCollectionCacheByName("Missing {}".format(x)))
+    addPmm("PlexMetaManagerCache.collectionItem_to_dict", lambda: fixtures.pmmCollections, lambda cache, x: cache.collectionItem_to_dict(x))
+
+    addPmm(
+        "formatJson.pmm",
+        lambda: [fixtures.getPmmCache().metadataItem_to_dict(name, year) for name, year in fixtures.pmmNames],
+        lambda cache, x: formatJson(x)
+    )
+
+    benchmarks.extend(createTemplateBenchmarks(fixtures))
+
+    return benchmarks
+
+
+def createTemplateBenchmarks(fixtures: _Fixtures) -> list[MicroBenchmark]:
+    """
+     Create a benchmark for each shipped template, rendered with the same arguments the processor passes ( see
+     L { PlexLibraryProcessor } )
+    """
+    templatePath = Path(str(importlib_resources.files("pmm_cfg_gen").joinpath("templates")))
+    templateManager = TemplateManager(templatePath)
+
+    sectionTypes = {"movie": "movie", "show": "show", "music": "artist"}
+    libraryTypes = [x.type for x in fixtures.library.sections]
+    benchmarks = []
+
+    def getContexts(kind: str, group: str, sectionType: str) -> list[dict]:
+        section = fixtures.getSection(sectionType)
+
+        if kind == "report":
+            return [_getReportArgs(fixtures, section, group)]
+
+        if kind in ["library", "template"]:
+            return [{"library": section}]
+
+        if group == "collection":
+            return [{"library": fixtures.libraryJson[sectionType], "item": {"metadata": x, "pmm": None}} for x in fixtures.collections[sectionType]]
+
+        return [{"library": fixtures.libraryJson[sectionType], "items": [x]} for x in fixtures.itemDicts[sectionType]]
+
+    for templateFile in sorted(templatePath.glob("*.j2")):
+        kind, group = templateFile.name.split(".")[:2]
+
+        # Library wide templates use the movie library
+        sectionType = sectionTypes.get(kind, "movie")
+        if sectionType not in libraryTypes:
+            continue
+
+        benchmarks.append(
+            MicroBenchmark(
+                "render.{}".format(templateFile.name),
+                lambda name=templateFile.name, kind=kind, group=group, sectionType=sectionType: _cycle(
+                    getContexts(kind, group, sectionType), lambda x: templateManager.render(name, dict(x))
+                )
+            )
+        )
+
+    return benchmarks
+
+
+def _getReportArgs(fixtures: _Fixtures, section, group: str) -> dict:
+    items = fixtures.items[section.type]
+    collections = fixtures.collections[section.type]
+
+    stats = PlexStatsLibraryTotals()
+    stats.collections.total = stats.collections.processed = len(collections)
+    stats.items.total = stats.items.processed = len(items)
+    stats.calcTotals()
+
+    processingTime = timer()
+    processingTime.start()
+    processingTime.stop()
+
+    return {
+        "library": section,
+        "collections": [
+            {"title": x.title, "searchUrl": generateTpDbSearchUrl(x), "metadata": x, "pmm": {}}
+            for x in collections
+        ],
+        "items": [
+            {"collection": "", "title": PlexItemHelper.formatItemTitle(x), "searchUrl": generateTpDbSearchUrl(x), "ids": PlexVideoHelper(x).guids, "metadata": x, "pmm": {}}
+            for x in items
+        ],
+        "stats": stats.toJson(),
+        "processingTime": processingTime.to_dict(),
+        "renderCost": getRenderCostStats().toJson(),
+    }
+
+###################################################################################################
+
+
+def measure(benchmark: MicroBenchmark, rounds: int = 5, minTime: float = 0.1) -> MicroBenchmarkResult:
+    """
+     Time a benchmark. The number of calls per round is raised ( 1, 2, 5, 10, ... ) until a round takes at least
+     minTime, then that many calls are timed for each round
+
+     @return The time per call of each round
+    """
+    try:
+        func = benchmark.setup()
+        func()
+
+        loops = 1
+        while True:
+            seconds = _timeLoops(func, loops)
+
+            if seconds >= minTime:
+                break
+
+            loops = next(x for x in _loopSteps() if x > loops)
+
+        return MicroBenchmarkResult(benchmark.name, loops, [_timeLoops(func, loops) / loops for _ in range(rounds)])
+    except Exception as e:
+        return MicroBenchmarkResult(benchmark.name, error="{}: {}".format(type(e).__name__, e))
+
+
+def _timeLoops(func: Callable[[], Any], loops: int) -> float:
+    # Like timeit, keep garbage collection ( of the fixtures ) out of the timings
+    gcEnabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        start = time.perf_counter()
+
+        for _ in range(loops):
+            func()
+
+        return time.perf_counter() - start
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+
+def _loopSteps():
+    for exponent in itertools.count():
+        for step in [1, 2, 5]:
+            yield step * 10 ** exponent
+
+
+def runMicroBenchmarks(filters: list[str] | None = None, rounds: int = 5, minTime: float = 0.1, library: FakeLibrary | None = None, seed: int = 1) -> dict:
+    """
+     Run the micro benchmarks
+
+     @param filters - Only run benchmarks matching one of these patterns ( fnmatch, e.g. "render.*" )
+     @param library - The library the plex objects come from ( default: a small generated one )
+
+     @return The results ( see L { compareResults } )
+    """
+    logger = logging.getLogger("pmm_cfg_gen")
+
+    disableOnlineServices()
+
+    if library is None:
+        library = FakeLibrary.generate(movies=100, shows=20, artists=10, collections=10, seed=seed)
+
+    fixtures = _Fixtures(library, seed)
+
+    results = {}
+
+    try:
+        for benchmark in createMicroBenchmarks(fixtures):
+            if not _isSelected(benchmark.name, filters):
+                continue
+
+            logger.info("Running benchmark '{}'...".format(benchmark.name))
+
+            result = measure(benchmark, rounds, minTime)
+            results[benchmark.name] = result.toJson()
+
+            if result.error is not None:
+                logger.error("Benchmark '{}' failed: {}".format(benchmark.name, result.error))
+            else:
+                logger.debug("%s: %s", benchmark.name, _formatSeconds(result.best))
+    finally:
+        fixtures.close()
+
+    return {
+        "version": RESULT_VERSION,
+        "created": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+
+
+def compareResults(baseline: dict, current: dict, threshold: float = 0.25) -> list[dict]:
+    """
+     Compare the fastest round of each benchmark with a baseline
+
+     @param threshold - Relative slowdown that counts as a regression ( 0.25 = 25% slower )
+
+     @return A row per benchmark with the status "ok", "regressed", "improved", "failed", "new" or "missing" ( "error" if
+     it failed in both )
+    """
+    rows = []
+    baselineBenchmarks = baseline.get("benchmarks", {})
+    currentBenchmarks = current.get("benchmarks", {})
+
+    for name in sorted(set(baselineBenchmarks.keys()).union(currentBenchmarks.keys())):
+        before = baselineBenchmarks.get(name, {}).get("best")
+        after = currentBenchmarks.get(name, {}).get("best")
+
+        if name not in currentBenchmarks:
+            status = "missing"
+        elif after is None:
+            status = "failed" if before is not None else "error"
+        elif before is None:
+            status = "new"
+        elif after > before * (1 + threshold):
+            status = "regressed"
+        elif after * (1 + threshold) < before:
+            status = "improved"
+        else:
+            status = "ok"
+
+        rows.append({
+            "name": name,
+            "baseline": before,
+            "current": after,
+            "change": after / before - 1 if before and after is not None else None,
+            "status": status,
+        })
+
+    return rows
+
+
+def runMicroBenchmarkCommand(filters: list[str] | None = None, outputFile: str | None = None, compareFile: str | None = None, threshold: float = 0.25, rounds: int = 5, minTime: float = 0.1, fixture: str | None = None) -> int:
+    """
+     Run and print the micro benchmarks, optionally compared with a baseline
+
+     @param outputFile - Json file the results are written to ( use it as the baseline of later runs )
+     @param compareFile - Baseline results
+     @param fixture - Fixture file the plex objects come from ( see L { FakeLibrary.load } )
+
+     @return The exit code ( 1 if a benchmark regressed beyond the threshold or failed )
+    """
+    baseline = None
+
+    if compareFile is not None:
+        with open(compareFile, "r") as fp:
+            baseline = json.load(fp)
+
+    if baseline is not None:
+        if filters is None or len(filters) == 0:
+            # Only run what the baseline tracks
+            filters = list(baseline.get("benchmarks", {}).keys())
+        else:
+            baseline = dict(baseline, benchmarks={k: v for k, v in baseline.get("benchmarks", {}).items() if _isSelected(k, filters)})
+
+    current = runMicroBenchmarks(filters, rounds, minTime, library=FakeLibrary.load(fixture) if fixture is not None else None)
+    current["fixture"] = fixture
+
+    if outputFile is not None:
+        Path(outputFile).parent.mkdir(parents=True, exist_ok=True)
+
+        with open(outputFile, "w") as fp:
+            json.dump(current, fp, indent=2)
+
+    if baseline is None:
+        print("{:<55} {:>12} {:>12} {:>10}".format("Benchmark", "Best", "Median", "Loops"))
+
+        for name, result in current["benchmarks"].items():
+            if result["error"] is not None:
+                print("{:<55} {}".format(name, result["error"]))
+            else:
+                print("{:<55} {:>12} {:>12} {:>10}".format(name, _formatSeconds(result["best"]), _formatSeconds(result["median"]), result["loops"]))
+
+        return 0
+
+    if baseline.get("fixture") != fixture:
+        logging.getLogger("pmm_cfg_gen").warning("The baseline was measured with a different library ({}), the results are not comparable".format(baseline.get("fixture") or "generated"))
+
+    rows = compareResults(baseline, current, threshold)
+
+    print("{:<55} {:>12} {:>12} {:>8}  {}".format("Benchmark", "Baseline", "Current", "Change", "Status"))
+
+    for row in rows:
+        print(
+            "{:<55} {:>12} {:>12} {:>8}  {}".format(
+                row["name"], _formatSeconds(row["baseline"]), _formatSeconds(row["current"]),
+                "{:+.0%}".format(row["change"]) if row["change"] is not None else "-", row["status"]
+            )
+        )
+
+    failed = [x["name"] for x in rows if x["status"] in ["regressed", "failed"]]
+
+    if len(failed) > 0:
+        print("{} benchmark(s) regressed more than {:.0%} or failed: {}".format(len(failed), threshold, ", ".join(failed)))
+
+        return 1
+
+    print("No benchmark regressed more than {:.0%}".format(threshold))
+
+    return 0
+
+
+def _isSelected(name: str, filters: list[str] | None) -> bool:
+    return filters is None or len(filters) == 0 or any([fnmatch.fnmatchcase(name, x) for x in filters])
+
+
+def _formatSeconds(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+
+    for unit, factor in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= factor:
+            return "{:.2f} {}".format(seconds / factor, unit)
+
+    return "{:.0f} ns".format(seconds / 1e-9)
@@ -21,20 +21,59 @@ globalArgParser.add_argument(
     nargs="*", 
     help="Comma delimited list of libraries to process"
 )
+globalArgParser.add_argument(
+    "--plex.cassetteMode",
+    choices=["off", "record", "replay"],
+    help="Record every plex request and response into the cassette file, or replay a run from it without a plex server (default: off)"
+)
+globalArgParser.add_argument(
+    "--plex.cassetteFile",
+    help="The plex cassette file (gzip compressed json)"
+)
+globalArgParser.add_argument(
+    "--plex.cassetteLatency",
+    action="store_true",
+    default=None,
+    help="Wait the recorded response time of each request while replaying a cassette"
+)
 globalArgParser.add_argument(
     "--output.path", 
     help="Root path to store generated files (default: ./data)"
 )
 globalArgParser.add_argument(
     "--output.overwrite",
-    default=False,
-    help="Overwrite existing files (default: %(default)s)",
+    action="store_true",
+    default=None,
+    help="Overwrite existing files (default: False)",
+)
+globalArgParser.add_argument(
+    "--output.streaming",
+    action="store_true",
+    default=None,
+    help="Stream rendered templates directly to disk and spool report items to a temporary file to reduce memory usage"
 )
 
 globalArgParser.add_argument(
     "--theMovieDatabase.apiKey",
     help="The Movie Database API Key"
 )
+globalArgParser.add_argument(
+    "--theMovieDatabase.cacheTtl",
+    type=float,
+    help="Days before a cached TMDb lookup is looked up again (0 disables the cache)"
+)
+globalArgParser.add_argument(
+    "--theMovieDatabase.exportFile",
+    help="Local copy of the daily TMDb collection id export (collection_ids_MM_DD_YYYY.json.gz) used to look up collections without querying TMDb"
+)
+globalArgParser.add_argument(
+    "--theTvDatabase.apiKey",
+    help="The TV Database API Key (used to look up TVDb lists of collections)"
+)
+globalArgParser.add_argument(
+    "--trakt.clientId",
+    help="Trakt API client id (used to look up trakt lists of collections)"
+)
 globalArgParser.add_argument(
     "--thePosterDatabase.enablePro",
     action="store_true",
@@ -69,6 +108,125 @@ globalArgParser.add_argument(
     help=argparse.SUPPRESS
 )
 
+globalArgParser.add_argument(
+    "--output.incremental",
+    action="store_true",
+    default=None,
+    help="Only render files whose template, settings or source item changed since the last run"
+)
+
+globalArgParser.add_argument(
+    "--output.writerThreads",
+    type=int,
+    default=None,
+    help="Number of background threads writing generated files (default: 0, write on the render thread)"
+)
+
+globalArgParser.add_argument(
+    "--output.statsFile",
+    type=str,
+    default=None,
+    help="Json file the statistics of the run (counts, timers, plex requests) are written to"
+)
+
+globalArgParser.add_argument(
+    "--output.metricsFile",
+    type=str,
+    default=None,
+    help="Prometheus textfile (.prom) the metrics of the run (counts, timers, cache hit rates, plex requests) are written to"
+)
+
+globalArgParser.add_argument(
+    "--output.historyFile",
+    type=str,
+    default=None,
+    help="SQLite database every run is added to (show the trends with the stats command)"
+)
+
+globalArgParser.add_argument(
+    "--output.eventsFile",
+    type=str,
+    default=None,
+    help="NDJSON file with one event per processed collection and item (fetch, render and write time, plex requests, output files)"
+)
+
+globalArgParser.add_argument(
+    "--output.slowItems",
+    type=int,
+    default=None,
+    help="Number of slowest collections and items listed at the end of the run (default: 10, 0 disables the list)"
+)
+
+globalArgParser.add_argument(
+    "--render.workers",
+    type=int,
+    default=None,
+    help="Number of worker processes used to render collection and metadata templates (default: 0, render serially)"
+)
+
+globalArgParser.add_argument(
+    "--render.async",
+    action="store_true",
+    default=None,
+    help="Render collection and metadata templates asynchronously so network backed filters (TMDb, Plex) run concurrently"
+)
+
+globalArgParser.add_argument(
+    "--render.concurrency",
+    type=int,
+    default=None,
+    help="Maximum number of templates rendered concurrently in async mode (default: 8)"
+)
+
+globalArgParser.add_argument(
+    "--render.reloadCheck",
+    choices=["off", "report", "strict"],
+    default=None,
+    help="Report the template attributes that make plexapi reload items from the server, or fail those templates in strict mode (default: off)"
+)
+
+globalArgParser.add_argument(
+    "--progress.interval",
+    type=float,
+    default=None,
+    help="Seconds between progress reports (default: 10, 0 disables them)"
+)
+
+globalArgParser.add_argument(
+    "--progress.statusFile",
+    type=str,
+    default=None,
+    help="Json file the progress reports are written to"
+)
+
+globalArgParser.add_argument(
+    "--trace",
+    metavar="FILE",
+    default=None,
+    help="Record where the run spends its time (library, collection, item, fetch, render, write) and save it as a Chrome/Perfetto trace file"
+)
+
+globalArgParser.add_argument(
+    "--profile",
+    metavar="DIR",
+    default=None,
+    help="Profile the collection, item, rendering and report phase of each library with cProfile and write the .pstats files and a summary of the top functions to DIR"
+)
+
+globalArgParser.add_argument(
+    "--profileMemory",
+    action="store_true",
+    default=None,
+    help="When profiling also record the peak memory and the top allocation sites of each phase with tracemalloc (slower)"
+)
+
+globalArgParser.add_argument(
+    "--profileTop",
+    type=int,
+    default=30,
+    help="Number of functions and allocation sites listed in the profile summaries (default: %(default)s)"
+)
+
 globalArgParser.add_argument(
     "--logLevel",
     choices=["INFO", "WARN", "DEBUG", "CRITICAL"],
@@ -76,6 +234,214 @@ globalArgParser.add_argument(
     help="Logging Level (default: %(default)s)",
 )
 
+# Commands
+globalCommandParsers = globalArgParser.add_subparsers(dest="command", metavar="COMMAND", help="Command to run instead of generating the configuration")
+
+statsCommandParser = globalCommandParsers.add_parser(
+    "stats",
+    help="Show the trends of the recorded runs per library (duration, items/sec, requests per item)"
+)
+statsCommandParser.add_argument(
+    "--library",
+    dest="statsLibrary",
+    default=None,
+    help="Only show this library"
+)
+statsCommandParser.add_argument(
+    "--last",
+    dest="statsLast",
+    type=int,
+    default=20,
+    help="Number of runs to show (default: %(default)s)"
+)
+statsCommandParser.add_argument(
+    "--json",
+    dest="statsJson",
+    action="store_true",
+    default=None,
+    help="Print the runs as json"
+)
+
+
+def _addFakeLibraryArguments(parser: argparse.ArgumentParser):
+    """
+     Add the arguments that size the generated library of the fake plex server ( or load a fixture instead )
+    """
+    parser.add_argument(
+        "--preset",
+        dest="fakePreset",
+        choices=["1k", "10k", "100k"],
+        default="1k",
+        help="Library size (movies, shows, artists: 1k = 1000/100/50, 10k = 10000/1000/500, 100k = 100000/10000/5000, default: %(default)s)"
+    )
+    parser.add_argument(
+        "--movies",
+        dest="fakeMovies",
+        type=int,
+        default=None,
+        help="Number of movies (overrides the preset, 0 for no movie library)"
+    )
+    parser.add_argument(
+        "--shows",
+        dest="fakeShows",
+        type=int,
+        default=None,
+        help="Number of shows (overrides the preset, 0 for no show library)"
+    )
+    parser.add_argument(
+        "--artists",
+        dest="fakeArtists",
+        type=int,
+        default=None,
+        help="Number of artists (overrides the preset, 0 for no music library)"
+    )
+    parser.add_argument(
+        "--collections",
+        dest="fakeCollections",
+        type=int,
+        default=None,
+        help="Number of collections per library (default: one per 20 items)"
+    )
+    parser.add_argument(
+        "--seed",
+        dest="fakeSeed",
+        type=int,
+        default=1,
+        help="Seed of the generated library (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--fixture",
+        dest="fakeFixture",
+        default=None,
+        help="Serve the library of a fixture file (see export-fixture) instead of a generated one"
+    )
+    parser.add_argument(
+        "--latency",
+        dest="fakeLatency",
+        type=float,
+        default=0,
+        help="Milliseconds each request takes (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--jitter",
+        dest="fakeJitter",
+        type=float,
+        default=0,
+        help="Maximum random deviation of the latency in milliseconds (default: %(default)s)"
+    )
+
+
+fakePlexCommandParser = globalCommandParsers.add_parser(
+    "fake-plex",
+    help="Serve generated movie, show and music libraries as a local stand-in for a plex server"
+)
+_addFakeLibraryArguments(fakePlexCommandParser)
+fakePlexCommandParser.add_argument(
+    "--host",
+    dest="fakePlexHost",
+    default="127.0.0.1",
+    help="Address to listen on (default: %(default)s)"
+)
+fakePlexCommandParser.add_argument(
+    "--port",
+    dest="fakePlexPort",
+    type=int,
+    default=32400,
+    help="Port to listen on (default: %(default)s)"
+)
+
+benchE2eCommandParser = globalCommandParsers.add_parser(
+    "bench-e2e",
+    help="Generate the configuration of a fake plex server and report wall time, requests, items/sec and peak RSS (the render and output settings of the config file apply)"
+)
+_addFakeLibraryArguments(benchE2eCommandParser)
+benchE2eCommandParser.add_argument(
+    "--json",
+    dest="benchJson",
+    default=None,
+    help="Write the result to this json file"
+)
+benchE2eCommandParser.add_argument(
+    "--keep",
+    dest="benchKeep",
+    action="store_true",
+    default=None,
+    help="Keep the generated configuration"
+)
+benchE2eCommandParser.add_argument(
+    "--verify",
+    dest="benchVerify",
+    action="store_true",
+    default=None,
+    help="Instead of timing the run, generate the configuration serially and with each render mode and fail if the files differ"
+)
+
+benchCommandParser = globalCommandParsers.add_parser(
+    "bench",
+    help="Run the micro benchmarks of the format, guid, plex meta manager cache, filter and template rendering helpers"
+)
+benchCommandParser.add_argument(
+    "filters",
+    nargs="*",
+    metavar="PATTERN",
+    help="Only run the benchmarks matching one of these patterns (e.g. 'render.*')"
+)
+benchCommandParser.add_argument(
+    "--json",
+    dest="benchJson",
+    default=None,
+    help="Write the results to this json file (use it as a baseline for --compare)"
+)
+benchCommandParser.add_argument(
+    "--compare",
+    dest="benchCompare",
+    default=None,
+    help="Compare with the results of an earlier run and fail if a benchmark regressed"
+)
+benchCommandParser.add_argument(
+    "--threshold",
+    dest="benchThreshold",
+    type=float,
+    default=25,
+    help="Slowdown in percent that counts as a regression (default: %(default)s)"
+)
+benchCommandParser.add_argument(
+    "--rounds",
+    dest="benchRounds",
+    type=int,
+    default=5,
+    help="Number of timed rounds per benchmark (default: %(default)s)"
+)
+benchCommandParser.add_argument(
+    "--minTime",
+    dest="benchMinTime",
+    type=float,
+    default=0.1,
+    help="Minimum seconds per round (default: %(default)s)"
+)
+benchCommandParser.add_argument(
+    "--fixture",
+    dest="benchFixture",
+    default=None,
+    help="Take the plex objects from a fixture file (see export-fixture) instead of a small generated library"
+)
+
+exportFixtureCommandParser = globalCommandParsers.add_parser(
+    "export-fixture",
+    help="Export the plex libraries as an anonymized fixture for fake-plex, bench-e2e and bench (titles, summaries, labels and guids are replaced, the structure is kept)"
+)
+exportFixtureCommandParser.add_argument(
+    "exportFixtureFile",
+    metavar="FILE",
+    help="The fixture file (gzip compressed if the name ends with .gz)"
+)
+exportFixtureCommandParser.add_argument(
+    "--salt",
+    dest="exportFixtureSalt",
+    default=None,
+    help="Salt of the pseudonyms, exports with the same salt use the same pseudonyms (default: random)"
+)
+
 ###################################################################################################
 
 globalArgs = globalArgParser.parse_args()
@@ -1,35 +1,356 @@
 #!/usr/bin/env python3
 #######################################################################
 
+import hashlib
 import logging
+import os
+import queue
+import threading
 from pathlib import Path
+from typing import Iterable
 
 from pmm_cfg_gen.utils.settings_utils_v1 import SettingsOutput, globalSettingsMgr
 from pmm_cfg_gen.utils.plex_utils import PlexItemHelper
+from pmm_cfg_gen.utils.output_manifest import OutputManifest, hashContent
+from pmm_cfg_gen.utils.tracing import traceFunction, traceSpan
 
 #######################################################################
 
 
+class FileWriter:
+    """
+     Writes files from a bounded queue on background threads. Every file is written to a temporary file in the target
+     directory and moved into place with os.replace, so a reader never sees a partially written file
+    """
+    _logger: logging.Logger
+
+    __queue: queue.Queue
+    __threads: list[threading.Thread]
+    __pending: dict[str, int]
+    __pendingLock: threading.Lock
+    __errors: int
+
+    def __init__(self, threads: int, maxQueued: int = 256) -> None:
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self._logger.debug("Starting file writer. Threads: %s, Queue Size: %s", threads, maxQueued)
+
+        self.__queue = queue.Queue(maxsize=max(1, maxQueued))
+        self.__pending = {}
+        self.__pendingLock = threading.Lock()
+        self.__errors = 0
+        self.__threads = [
+            threading.Thread(target=self.__run, name="pmm_cfg_gen-writer-{}".format(i), daemon=True)
+            for i in range(max(1, threads))
+        ]
+
+        for t in self.__threads:
+            t.start()
+
+    @property
+    def errors(self) -> int:
+        return self.__errors
+
+    def write(self, fileName: str | Path, data: str, digest: str | None = None):
+        """
+         Queue data to be written to file. Blocks while the queue is full
+         
+         @param fileName - Name of file to write
+         @param data - Data to write to file
+         @param digest - Content hash recorded in the output manifest once the file is written
+        """
+        key = str(fileName)
+
+        with self.__pendingLock:
+            self.__pending[key] = self.__pending.get(key, 0) + 1
+
+        self.__queue.put((key, data, digest))
+
+    def isPending(self, fileName: str | Path) -> bool:
+        """
+         Check if a file is queued but not written yet
+         
+         @param fileName - Name of file to check
+        """
+        with self.__pendingLock:
+            return str(fileName) in self.__pending
+
+    def flush(self):
+        """
+         Wait until all queued files are written ( barrier )
+        """
+        self.__queue.join()
+
+    def close(self):
+        self.flush()
+
+        for _ in self.__threads:
+            self.__queue.put(None)
+
+        for t in self.__threads:
+            t.join()
+
+    def __run(self):
+        while True:
+            job = self.__queue.get()
+
+            try:
+                if job is None:
+                    return
+
+                fileName, data, digest = job
+
+                try:
+                    with traceSpan("write.background", "write", file=str(fileName)):
+                        _writeFileAtomic(Path(fileName), data, digest)
+                except:
+                    with self.__pendingLock:
+                        self.__errors += 1
+
+                    self._logger.exception("Error Writing File: {}".format(fileName))
+                finally:
+                    with self.__pendingLock:
+                        self.__pending[fileName] -= 1
+                        if self.__pending[fileName] == 0:
+                            del self.__pending[fileName]
+            finally:
+                self.__queue.task_done()
+
+
+# Directories known to exist ( shared by all writers )
+_createdPaths: set[str] = set()
+
+_backgroundWriter: FileWriter | None = None
+
+_outputManifest: OutputManifest | None = None
+
+
+def openOutputManifest(rootPath: str | Path, readOnly: bool = False) -> OutputManifest:
+    """
+     Load the output manifest. While it is open, files whose content did not change are not rewritten and L { fileExists } is answered from the manifest
+     
+     @param rootPath - The output root path
+     @param readOnly - If True the manifest is never saved ( render worker processes )
+    """
+    global _outputManifest
+
+    _outputManifest = OutputManifest(rootPath, readOnly=readOnly)
+    _outputManifest.load()
+
+    return _outputManifest
+
+
+def getOutputManifest() -> OutputManifest | None:
+    return _outputManifest
+
+
+def closeOutputManifest():
+    """
+     Save and close the output manifest
+    """
+    global _outputManifest
+
+    if _outputManifest is not None:
+        _outputManifest.save()
+        _outputManifest = None
+
+
+def startBackgroundWriter(threads: int, maxQueued: int = 256):
+    """
+     Start writing files on background threads. Until L { stopBackgroundWriter } is called L { writeFile } only queues the data
+     
+     @param threads - Number of writer threads
+     @param maxQueued - Maximum number of files waiting to be written
+    """
+    global _backgroundWriter
+
+    if _backgroundWriter is None:
+        _backgroundWriter = FileWriter(threads, maxQueued)
+
+
+def flushBackgroundWriter():
+    """
+     Wait until all queued files are written. No-op when files are written synchronously
+    """
+    if _backgroundWriter is not None:
+        _backgroundWriter.flush()
+
+
+def resetBackgroundWriter():
+    """
+     Forget the background writer without writing the queued files ( a forked process inherits the writer but not its
+     threads, writing through it would block once the queue is full ). L { writeFile } writes synchronously again
+    """
+    global _backgroundWriter
+
+    _backgroundWriter = None
+
+
+def stopBackgroundWriter():
+    """
+     Write all queued files and stop the writer threads
+    """
+    global _backgroundWriter
+
+    if _backgroundWriter is not None:
+        _backgroundWriter.close()
+        _backgroundWriter = None
+
+
+def fileExists(fileName: str | Path) -> bool:
+    """
+     Check if a file exists or is queued to be written
+     
+     @param fileName - Name of file to check
+    """
+    if _backgroundWriter is not None and _backgroundWriter.isPending(fileName):
+        return True
+
+    if _outputManifest is not None:
+        return _outputManifest.exists(fileName)
+
+    return os.path.exists(fileName)
+
+
+def _ensureParentPath(p: Path):
+    """
+     Create the parent directory of a file. Directories that were already created ( or found ) are cached to avoid a stat per file
+    """
+    parent = str(p.parent)
+
+    if parent in _createdPaths:
+        return
+
+    if not p.parent.exists():
+        logging.getLogger("pmm_cfg_gen").debug(
+            "Creating path: %s", p.parent
+        )
+        p.parent.mkdir(parents=True, exist_ok=True)
+
+    _createdPaths.add(parent)
+
+
+def moveFile(fileName: str | Path, newFileName: str | Path):
+    """
+     Move ( rename ) a generated file. The output manifest entry moves with it
+     
+     @param fileName - Name of the existing file
+     @param newFileName - The new name of the file
+    """
+    logging.getLogger("pmm_cfg_gen").debug("Moving File: %s -> %s", fileName, newFileName)
+
+    p = Path(str(newFileName))
+
+    _ensureParentPath(p)
+
+    os.replace(fileName, p)
+
+    if _outputManifest is not None:
+        _outputManifest.rename(fileName, p)
+
+
+def _tempFileName(p: Path) -> Path:
+    return Path(p.parent, ".{}.{}-{}.tmp".format(p.name, os.getpid(), threading.get_ident()))
+
+
+def _writeFileAtomic(p: Path, data: str, digest: str | None = None):
+    _ensureParentPath(p)
+
+    tmp = _tempFileName(p)
+
+    try:
+        with open(tmp, "w") as f:
+            f.write(data)
+
+        os.replace(tmp, p)
+    except:
+        tmp.unlink(missing_ok=True)
+
+        raise
+
+    if _outputManifest is not None:
+        _outputManifest.record(p, digest, OutputManifest.STATUS_WRITTEN)
+
+
+@traceFunction("write", "write", getArgs=lambda fileName, data: {"file": str(fileName)})
 def writeFile(fileName: str | Path, data: str):
     """
-     Write data to file. If file doesn't exist it will be created. This is to avoid problems with non - existant directories
+     Write data to file. If the parent directory doesn't exist it will be created. The data is written to a temporary file that replaces the target, or queued when the background writer is running. Files whose content matches the output manifest are not rewritten
      
      @param fileName - Name of file to write
-     @param data - Data to write to file ( string or file
+     @param data - Data to write to file
     """
-    logging.getLogger("pmm_cfg_gen").debug("Writing File: {}".format(fileName))
+    digest = None
+
+    if _outputManifest is not None:
+        digest = hashContent(data)
+
+        if _outputManifest.isUnchanged(fileName, digest):
+            logging.getLogger("pmm_cfg_gen").debug("File Unchanged: %s", fileName)
+
+            _outputManifest.record(fileName, digest, OutputManifest.STATUS_UNCHANGED)
+
+            return
+
+    logging.getLogger("pmm_cfg_gen").debug("Writing File: %s", fileName)
+
+    if _backgroundWriter is not None:
+        _backgroundWriter.write(fileName, data, digest)
+    else:
+        _writeFileAtomic(Path(str(fileName)), data, digest)
+
+
+@traceFunction("write.stream", "write", getArgs=lambda fileName, data, bufferSize=None: {"file": str(fileName)})
+def writeFileStream(fileName: str | Path, data: Iterable[str], bufferSize: int = 1024 * 1024):
+    """
+     Write chunks of data to file as they are produced. If the parent directory doesn't exist it will be created. The target is only replaced once all data was written
+     
+     @param fileName - Name of file to write
+     @param data - Iterable of string chunks ( e.g. a jinja2 TemplateStream )
+     @param bufferSize - Size of the write buffer in bytes
+    """
+    logging.getLogger("pmm_cfg_gen").debug("Streaming File: %s", fileName)
 
     p = Path(str(fileName))
 
-    # Create a path to the parent directory if it doesn t exist.
-    if not p.resolve().parent.exists():
-        logging.getLogger("pmm_cfg_gen").debug(
-            "Creating path: {}".format(p.resolve().parent)
-        )
-        p.resolve().parent.mkdir(parents=True, exist_ok=True)
+    # Produce the first chunk before touching the file system so a template that fails immediately leaves nothing behind
+    chunks = iter(data)
+    firstChunk = next(chunks, "")
+
+    _ensureParentPath(p)
+
+    tmp = _tempFileName(p)
+    hasher = hashlib.sha256() if _outputManifest is not None else None
+
+    try:
+        with open(tmp, "w", buffering=bufferSize) as f:
+            f.write(firstChunk)
+
+            if hasher is None:
+                f.writelines(chunks)
+            else:
+                hasher.update(firstChunk.encode("utf-8"))
+
+                for chunk in chunks:
+                    f.write(chunk)
+                    hasher.update(chunk.encode("utf-8"))
+
+        if hasher is not None and _outputManifest.isUnchanged(p, hasher.hexdigest()):  # type: ignore
+            logging.getLogger("pmm_cfg_gen").debug("File Unchanged: %s", fileName)
+
+            tmp.unlink()
+            _outputManifest.record(p, hasher.hexdigest(), OutputManifest.STATUS_UNCHANGED)  # type: ignore
+
+            return
+
+        os.replace(tmp, p)
+    except:
+        tmp.unlink(missing_ok=True)
+
+        raise
 
-    with open(p, "w") as f:
-        f.write(data)
+    if _outputManifest is not None:
+        _outputManifest.record(p, hasher.hexdigest() if hasher is not None else None, OutputManifest.STATUS_WRITTEN)
 
 
 def formatLibraryItemPath(output: SettingsOutput, library=None, collection=None, item=None, pmm=None, librarySettings=None) -> Path:
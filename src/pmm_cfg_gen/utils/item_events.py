@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import contextlib
+import contextvars
+import functools
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+###################################################################################################
+
+# Event kinds ( a collection, a single item and the metadata file of the items of a collection )
+EVENT_COLLECTION = "collection"
+EVENT_ITEM = "item"
+EVENT_COLLECTION_ITEMS = "collection.items"
+
+
+class ItemEvent:
+    """
+     Where the time of one processed collection or item went. The total time includes nested events ( the items of a
+     collection ), the fetch, render and write times only count what happened while this event was the current one or
+     in a render job submitted while it was ( see L { holdEvent } )
+    """
+    __slots__ = [
+        "kind", "library", "ratingKey", "title", "items", "skipReason", "start", "seconds",
+        "fetchSeconds", "renderSeconds", "writeSeconds", "requests", "outputs", "error", "closed", "pending",
+    ]
+
+    def __init__(self, kind: str, library: str | None, ratingKey: Any, title: str | None, items: int = 1) -> None:
+        self.kind = kind
+        self.library = library
+        self.ratingKey = ratingKey
+        self.title = title
+        self.items = items
+        self.skipReason = None
+        self.start = time.time()
+        self.seconds = 0
+        self.fetchSeconds = 0
+        self.renderSeconds = 0
+        self.writeSeconds = 0
+        self.requests = 0
+        self.outputs = []
+        self.error = None
+        self.closed = False
+        self.pending = 0
+
+    def toJson(self):
+        return {
+            "event": self.kind,
+            "library": self.library,
+            "ratingKey": self.ratingKey,
+            "title": self.title,
+            "items": self.items,
+            "skipReason": self.skipReason,
+            "start": round(self.start, 3),
+            "seconds": round(self.seconds, 4),
+            "fetchSeconds": round(self.fetchSeconds, 4),
+            "renderSeconds": round(self.renderSeconds, 4),
+            "writeSeconds": round(self.writeSeconds, 4),
+            "requests": self.requests,
+            "outputs": self.outputs,
+            "error": self.error,
+        }
+
+
+class ItemEventLog:
+    """
+     Writes one json line per processed collection and item ( NDJSON ) and keeps the slowest events of each kind for the
+     end of run summary
+    """
+    _logger: logging.Logger
+
+    fileName: Path | None
+    top: int
+    library: str | None
+
+    __fp: Any
+    __lock: threading.Lock
+    __slowest: dict[str, list[tuple[float, int, ItemEvent]]]
+    __counts: dict[str, int]
+    __sequence: Any
+
+    def __init__(self, fileName: str | Path | None, top: int = 10) -> None:
+        """
+         @param fileName - The NDJSON file ( None to only keep the slowest events )
+         @param top - Number of slowest events kept per kind
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.fileName = Path(fileName) if fileName is not None else None
+        self.top = max(0, top or 0)
+        self.library = None
+
+        self.__lock = threading.Lock()
+        self.__slowest = {}
+        self.__counts = {}
+        self.__sequence = itertools.count()
+        self.__fp = None
+
+        if self.fileName is not None:
+            self.fileName.parent.mkdir(parents=True, exist_ok=True)
+
+            self.__fp = open(self.fileName, "w", encoding="utf-8")
+
+    @property
+    def counts(self) -> dict[str, int]:
+        return self.__counts
+
+    def begin(self, kind: str, ratingKey: Any, title: str | None, items: int = 1) -> ItemEvent:
+        return ItemEvent(kind, self.library, ratingKey, title, items)
+
+    def end(self, event: ItemEvent):
+        """
+         Write the event and keep it if it is one of the slowest of its kind. An event with render jobs in flight is
+         written once the last of them was released
+        """
+        event.closed = True
+
+        if event.pending == 0:
+            self.__write(event)
+
+    def release(self, event: ItemEvent):
+        """
+         Release a render job of the event ( see L { holdEvent } )
+        """
+        event.pending -= 1
+
+        if event.closed and event.pending == 0:
+            self.__write(event)
+
+    def __write(self, event: ItemEvent):
+        line = json.dumps(event.toJson(), default=str) if self.__fp is not None else None
+
+        with self.__lock:
+            self.__counts[event.kind] = self.__counts.get(event.kind, 0) + 1
+
+            if line is not None:
+                self.__fp.write(line)
+                self.__fp.write("\n")
+
+            if self.top > 0:
+                slowest = self.__slowest.setdefault(event.kind, [])
+
+                if len(slowest) < self.top:
+                    heapq.heappush(slowest, (event.seconds, next(self.__sequence), event))
+                elif event.seconds > slowest[0][0]:
+                    heapq.heapreplace(slowest, (event.seconds, next(self.__sequence), event))
+
+    def getSlowest(self, kind: str) -> list[ItemEvent]:
+        """
+         Get the slowest events of a kind ( slowest first )
+        """
+        with self.__lock:
+            return [event for _, _, event in sorted(self.__slowest.get(kind, []), reverse=True)]
+
+    def toJson(self):
+        return {
+            kind: [event.toJson() for event in self.getSlowest(kind)]
+            for kind in [EVENT_COLLECTION, EVENT_COLLECTION_ITEMS, EVENT_ITEM]
+            if kind in self.__slowest
+        }
+
+    def close(self):
+        with self.__lock:
+            if self.__fp is not None:
+                self.__fp.close()
+                self.__fp = None
+
+
+class _EventTimer:
+    __slots__ = ["event", "part", "start", "counted"]
+
+    def __init__(self, event: ItemEvent, part: str) -> None:
+        self.event = event
+        self.part = part
+
+    def __enter__(self):
+        self.counted = _countedSeconds(self.event)
+        self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        seconds = time.perf_counter() - self.start
+
+        # Leave out the time counted inside the block ( e.g. rendering a stream while it is written )
+        addEventTime(self.part, seconds - (_countedSeconds(self.event) - self.counted), self.event)
+
+        return False
+
+
+class _NullTimer:
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+# The collection or item being processed by the current thread ( None outside of one )
+_currentEvent: contextvars.ContextVar[ItemEvent | None] = contextvars.ContextVar("pmm_cfg_gen_item_event", default=None)
+
+_eventLog: ItemEventLog | None = None
+
+###################################################################################################
+
+
+def startItemEvents(fileName: str | Path | None, top: int = 10) -> ItemEventLog | None:
+    """
+     Start recording item events ( does nothing if there is no file and no summary )
+
+     @param fileName - The NDJSON file
+     @param top - Number of slowest events kept per kind for the summary
+    """
+    global _eventLog
+
+    if (fileName is None or len(str(fileName)) == 0) and (top is None or top <= 0):
+        return None
+
+    _eventLog = ItemEventLog(fileName if fileName is not None and len(str(fileName)) > 0 else None, top)
+
+    return _eventLog
+
+
+def getItemEventLog() -> ItemEventLog | None:
+    return _eventLog
+
+
+def setItemEventLibrary(library: str | None):
+    if _eventLog is not None:
+        _eventLog.library = library
+
+
+def stopItemEvents():
+    global _eventLog
+
+    if _eventLog is not None:
+        _eventLog.close()
+        _eventLog = None
+
+
+def itemEvent(kind: str | Callable[..., str], getItem: Callable[..., tuple[Any, str | None, int]]):
+    """
+     Decorator that records an event for every call of a function ( the function is the current event while it runs )
+
+     @param kind - The event kind ( or a function of the arguments returning it )
+     @param getItem - Called with the function arguments, returns ( rating key, title, number of items )
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            eventLog = _eventLog
+
+            if eventLog is None:
+                return func(*args, **kwargs)
+
+            ratingKey, title, items = getItem(*args, **kwargs)
+
+            event = eventLog.begin(kind(*args, **kwargs) if callable(kind) else kind, ratingKey, title, items)
+            token = _currentEvent.set(event)
+
+            start = time.perf_counter()
+
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                event.error = "{}: {}".format(type(e).__name__, e)
+
+                raise
+            finally:
+                event.seconds = time.perf_counter() - start
+
+                _currentEvent.reset(token)
+
+                eventLog.end(event)
+
+        return wrapper
+
+    return decorator
+
+
+def getCurrentEvent() -> ItemEvent | None:
+    return _currentEvent.get()
+
+
+def setEventSkipReason(reason: str):
+    event = _currentEvent.get()
+
+    if event is not None:
+        event.skipReason = reason
+
+
+def addEventOutputs(fileNames: Iterable[str | Path]):
+    event = _currentEvent.get()
+
+    if event is not None:
+        event.outputs.extend([str(x) for x in fileNames])
+
+
+def addEventTime(part: str, seconds: float, event: ItemEvent | None = None):
+    """
+     Add time to the fetch, render or write time of the current event
+
+     @param part - "fetch", "render" or "write"
+    """
+    if event is None:
+        event = _currentEvent.get()
+
+    if event is None or event.closed:
+        return
+
+    if part == "render":
+        event.renderSeconds += seconds
+    elif part == "write":
+        event.writeSeconds += seconds
+    else:
+        event.fetchSeconds += seconds
+
+
+def holdEvent() -> ItemEvent | None:
+    """
+     Keep the current event from being written until L { releaseEvent } is called ( render jobs that finish after the
+     item was processed add their time to it )
+
+     @return The held event ( None outside of an event )
+    """
+    event = _currentEvent.get()
+
+    if event is None or _eventLog is None:
+        return None
+
+    event.pending += 1
+
+    return event
+
+
+def releaseEvent(event: ItemEvent | None, times: dict | None = None):
+    """
+     Add the times of a render job to a held event ( see L { recordEventTimes } ) and write the event if it was the last
+     job of a processed item
+
+     @param event - The event returned by L { holdEvent }
+     @param times - The fetch, render and write seconds and the plex requests of the job ( None if it failed )
+    """
+    if event is None:
+        return
+
+    if times is not None:
+        event.fetchSeconds += times["fetchSeconds"]
+        event.renderSeconds += times["renderSeconds"]
+        event.writeSeconds += times["writeSeconds"]
+        event.requests += times["requests"]
+
+    if _eventLog is not None:
+        _eventLog.release(event)
+    else:
+        event.pending -= 1
+
+
+@contextlib.contextmanager
+def recordEventTimes():
+    """
+     Context manager that records the fetch, render and write time and the plex requests of a block ( a render job ) in
+     a detached event. Yields a dict that holds them once the block is done
+    """
+    event = ItemEvent("render.job", None, None, None)
+    token = _currentEvent.set(event)
+
+    times = {}
+
+    try:
+        yield times
+    finally:
+        _currentEvent.reset(token)
+
+        times.update({
+            "fetchSeconds": event.fetchSeconds,
+            "renderSeconds": event.renderSeconds,
+            "writeSeconds": event.writeSeconds,
+            "requests": event.requests,
+        })
+
+
+def countEventRequest():
+    event = _currentEvent.get()
+
+    if event is not None and not event.closed:
+        event.requests += 1
+
+
+def eventTimer(part: str):
+    """
+     Context manager that adds the time of a block to the current event, less the time counted inside it ( a shared
+     no-op outside of an event )
+    """
+    event = _currentEvent.get()
+
+    if event is None:
+        return _NULL_TIMER
+
+    return _EventTimer(event, part)
+
+
+def _countedSeconds(event: ItemEvent) -> float:
+    return event.fetchSeconds + event.renderSeconds + event.writeSeconds
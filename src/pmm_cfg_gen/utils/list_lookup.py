@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import concurrent.futures
+import logging
+from pathlib import Path
+
+import requests
+
+from pmm_cfg_gen.utils.lookup_cache import LookupCache, LookupCacheStats, normalizeName
+from pmm_cfg_gen.utils.rate_limiter import TokenBucket, createPooledSession, getWithRateLimit
+
+###################################################################################################
+
+
+class ListLookupHelper:
+    """
+     Base of the helpers that resolve collection names to lists of an external service ( TVDb, Trakt ). Lookups go
+     through a persistent TTL cache, all requests share one pooled session and a rate limiter ( 429 responses are
+     retried with backoff ) and all names of a library can be looked up concurrently with L { prefetchLists }
+    """
+    # Kind of lookup used in the cache keys and log messages
+    KIND = "list"
+
+    _logger: logging.Logger
+    _apiUrl: str
+    _session: requests.Session
+
+    __cache: LookupCache | None
+    __memory: dict[str, list[str]]
+    __limiter: TokenBucket
+    __threads: int
+    __maxRetries: int
+
+    def __init__(self, apiUrl: str, cache: LookupCache | None = None, threads: int = 4, rateLimit: float = 0, maxRetries: int = 5) -> None:
+        """
+         @param apiUrl - The api base url
+         @param cache - Cache for lookup results ( None to keep the results in memory for this run only )
+         @param threads - Number of concurrent requests when prefetching
+         @param rateLimit - Maximum number of requests per second ( 0 disables limiting )
+         @param maxRetries - Maximum number of retries of a rate limited request
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+        self._apiUrl = apiUrl.rstrip("/")
+
+        self.__cache = cache
+        self.__memory = {}
+        self.__threads = max(1, threads)
+        self.__maxRetries = maxRetries
+        self.__limiter = TokenBucket(rateLimit)
+
+        self._session = createPooledSession(self.__threads)
+
+    @property
+    def isEnabled(self) -> bool:
+        return False
+
+    @property
+    def cache(self) -> LookupCache | None:
+        return self.__cache
+
+    def close(self):
+        self._session.close()
+
+    def isListCached(self, name: str) -> bool:
+        key = LookupCache.makeKey(self.KIND, name.strip())
+
+        return key in self.__memory or (self.__cache is not None and self.__cache.contains(key))
+
+    def findListsByName(self, name: str) -> list[str]:
+        """
+         Find the lists whose name matches a collection name ( case and whitespace insensitive )
+
+         @param name - The collection name
+
+         @return List of list ids ( empty if none were found or the service is not configured )
+        """
+        if not self.isEnabled:
+            return []
+
+        name = name.strip()
+        key = LookupCache.makeKey(self.KIND, name)
+
+        results = self.__memory.get(key)
+        if results is None and self.__cache is not None:
+            results = self.__cache.get(key)
+
+        if results is not None:
+            return results
+
+        try:
+            results = self.__searchLists(name)
+        except:
+            # A failed lookup is not cached, the list is looked up again next time
+            self._logger.warning("Error looking up {}: '{}'".format(self.KIND, name), exc_info=self._logger.isEnabledFor(logging.DEBUG))
+
+            return []
+
+        self.__store(key, results)
+
+        return results
+
+    def prefetchLists(self, names: list[str]) -> int:
+        """
+         Look up all names that are not cached yet ( concurrently )
+
+         @param names - The collection names
+
+         @return The number of lookups done
+        """
+        if not self.isEnabled:
+            return 0
+
+        pending = {}
+        for name in names:
+            name = name.strip()
+
+            if normalizeName(name) not in pending and not self.isListCached(name):
+                pending[normalizeName(name)] = name
+
+        if len(pending) == 0:
+            return 0
+
+        self._logger.debug("Prefetching %s %ss. Threads: %s, Rate Limit: %s/s", len(pending), self.KIND, self.__threads, self.__limiter.rate)
+
+        count = 0
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.__threads, thread_name_prefix="pmm_cfg_gen-{}".format(self.KIND)) as executor:
+            futures = {executor.submit(self.__searchLists, name): name for name in pending.values()}
+
+            for future in concurrent.futures.as_completed(futures):
+                name = futures[future]
+
+                try:
+                    self.__store(LookupCache.makeKey(self.KIND, name), future.result())
+
+                    count += 1
+                except:
+                    self._logger.warning("Error prefetching {}: '{}'".format(self.KIND, name), exc_info=self._logger.isEnabledFor(logging.DEBUG))
+
+        return count
+
+    def _get(self, path: str, params: dict | None = None) -> requests.Response:
+        """
+         GET a path of the api through the rate limiter
+        """
+        return getWithRateLimit(self._session, self.__limiter, "{}{}".format(self._apiUrl, path), params=params, maxRetries=self.__maxRetries)
+
+    def _search(self, name: str) -> list[tuple[str, str]]:
+        """
+         Search the service for lists ( implemented by the service helpers )
+
+         @param name - The name to search for
+
+         @return List of ( list name, list id )
+        """
+        raise NotImplementedError()
+
+    def __searchLists(self, name: str) -> list[str]:
+        self._logger.debug("Searching for %s: '%s'", self.KIND, name)
+
+        normalized = normalizeName(name)
+
+        # Searches return every list that mentions the name, only lists with the same name belong to the collection
+        return list(dict.fromkeys([id for listName, id in self._search(name) if normalizeName(listName) == normalized]))
+
+    def __store(self, key: str, results: list[str]):
+        if self.__cache is not None:
+            self.__cache.set(key, results)
+        else:
+            self.__memory[key] = results
+
+
+def createLookupCache(cacheFile: str | None, defaultPath: str | Path, defaultFileName: str, cacheTtl: float, cacheNegativeTtl: float) -> LookupCache | None:
+    """
+     Create and load a lookup cache from settings
+
+     @param cacheFile - The configured cache file ( None to use the default file name in the default path )
+     @param cacheTtl - Days before a cached result expires ( 0 disables the cache )
+     @param cacheNegativeTtl - Days before an empty result expires
+
+     @return The cache or None if it is disabled
+    """
+    if cacheTtl is None or cacheTtl <= 0:
+        return None
+
+    if cacheFile is None or len(cacheFile) == 0:
+        cacheFile = str(Path(defaultPath, defaultFileName))
+
+    cache = LookupCache(cacheFile, cacheTtl * 86400, (cacheNegativeTtl or 0) * 86400)
+    cache.load()
+
+    return cache
+
+
+# Helpers created in this process ( see L { registerListLookupHelper } )
+_listLookupHelpers: list[ListLookupHelper] = []
+
+
+def registerListLookupHelper(helper: ListLookupHelper) -> ListLookupHelper:
+    _listLookupHelpers.append(helper)
+
+    return helper
+
+
+def saveListLookupCaches():
+    """
+     Save the caches of all list helpers created in this process
+    """
+    for helper in _listLookupHelpers:
+        if helper.cache is not None:
+            helper.cache.save()
+
+
+def refreshListLookupCaches():
+    """
+     Pick up lookups saved to the cache files by another process ( e.g. prefetched by the main process )
+    """
+    for helper in _listLookupHelpers:
+        if helper.cache is not None:
+            helper.cache.refresh()
+
+
+def getListLookupCacheStats() -> dict[str, LookupCacheStats]:
+    """
+     Get the cache statistics of all list helpers created in this process ( by kind of lookup )
+    """
+    return {helper.KIND: helper.cache.stats for helper in _listLookupHelpers if helper.cache is not None}
+
+###################################################################################################
+
+
+def testListLookups(collections: int = 30, throttleEvery: int = 5):
+    """
+     Run the TVDb and trakt helpers against a local stand-in for both apis. The stand-in expires the first TVDb token
+     and answers every throttleEvery-th search with status 429, the test checks that every name is resolved and that
+     only lists with the same name are returned
+    """
+    import http.server
+    import json
+    import threading
+    import urllib.parse
+
+    from pmm_cfg_gen.utils.trakt_utils import TraktHelper
+    from pmm_cfg_gen.utils.tvdb_utils import TheTvDatabaseHelper
+
+    counters = {"login": 0, "search": 0, "throttled": 0, "unauthorized": 0}
+    lock = threading.Lock()
+
+    class StandInHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            with lock:
+                counters["login"] += 1
+                token = "token-{}".format(counters["login"])
+
+            self.__send(200, {"status": "success", "data": {"token": token}})
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            name = urllib.parse.parse_qs(url.query)["query"][0]
+
+            with lock:
+                counters["search"] += 1
+                throttle = counters["search"] % throttleEvery == 0
+
+            if url.path.startswith("/v4") and self.headers.get("Authorization") == "Bearer token-1":
+                with lock:
+                    counters["unauthorized"] += 1
+
+                self.__send(401, {"status": "failure"})
+            elif throttle:
+                with lock:
+                    counters["throttled"] += 1
+
+                self.__send(429, {}, {"Retry-After": "0.1"})
+            elif url.path == "/v4/search":
+                self.__send(200, {"status": "success", "data": [
+                    {"name": name.upper(), "slug": name.lower().replace(" ", "-")},
+                    {"name": "{} Extended".format(name), "slug": "other"},
+                ]})
+            else:
+                self.__send(200, [
+                    {"type": "list", "list": {"name": name, "ids": {"slug": name.lower().replace(" ", "-")}, "user": {"ids": {"slug": "someone"}}}},
+                    {"type": "list", "list": {"name": "Best of {}".format(name), "ids": {"slug": "other"}, "user": {"ids": {"slug": "someone"}}}},
+                ])
+
+        def __send(self, status: int, data, headers: dict | None = None):
+            body = json.dumps(data).encode("utf-8")
+
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    apiUrl = "http://127.0.0.1:{}".format(server.server_address[1])
+    names = ["List {}".format(i) for i in range(collections)]
+
+    helpers = [
+        TheTvDatabaseHelper("test", None, "{}/v4".format(apiUrl), threads=4, rateLimit=50),
+        TraktHelper("test", apiUrl, threads=4, rateLimit=50),
+    ]
+
+    try:
+        for helper in helpers:
+            count = helper.prefetchLists(names + [x.lower() for x in names])
+            missing = [x for x in names if not helper.isListCached(x)]
+
+            print("{}: Names: {}, Lookups: {}, Missing: {}, Example: {}".format(helper.KIND, collections, count, len(missing), helper.findListsByName(names[0])))
+
+            assert count == collections and len(missing) == 0
+            assert all(len(helper.findListsByName(x)) == 1 for x in names)
+    finally:
+        for helper in helpers:
+            helper.close()
+        server.shutdown()
+
+    print("Requests: {}".format(counters))
+
+    assert counters["login"] == 2 and counters["unauthorized"] >= 1
+
+
+if __name__ == "__main__":
+    testListLookups()
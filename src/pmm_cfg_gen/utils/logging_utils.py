@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 ###################################################################################################
 
+import atexit
 import logging
 import logging.config
 import logging.handlers
 import os
+import queue
 
 import coloredlogs
+import jsonpickle
 import yaml
 import traceback
 
@@ -29,10 +32,102 @@ class RollingFileHanderEx(logging.handlers.RotatingFileHandler):
 
         super().__init__(filename, mode, maxBytes, backupCount, encoding, delay, errors)
 
+class LazyJson:
+    """
+     Log argument that is only serialized ( with jsonpickle ) if the record is emitted, e.g.
+     C { logger.debug("Settings: %s", LazyJson(settings)) }
+    """
+    __slots__ = ["value"]
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def __str__(self) -> str:
+        return str(jsonpickle.dumps(self.value, unpicklable=False))
+
+###################################################################################################
+
+_queueListener: logging.handlers.QueueListener | None = None
+_queueLoggerName: str | None = None
+
+
+def startLoggingQueue(loggerName: str = "pmm_cfg_gen"):
+    """
+     Move the handlers of a logger behind a queue. The logging thread only queues the records, a listener thread
+     formats them and does the console and file I/O. Handler levels are respected by the listener
+
+     @param loggerName - The logger whose handlers are moved
+    """
+    global _queueListener, _queueLoggerName
+
+    logger = logging.getLogger(loggerName)
+
+    handlers = [x for x in logger.handlers if not isinstance(x, logging.handlers.QueueHandler)]
+    if _queueListener is not None or len(handlers) == 0:
+        return
+
+    logQueue = queue.SimpleQueue()
+
+    for handler in handlers:
+        logger.removeHandler(handler)
+
+    logger.addHandler(logging.handlers.QueueHandler(logQueue))  # type: ignore
+
+    _queueListener = logging.handlers.QueueListener(logQueue, *handlers, respect_handler_level=True)  # type: ignore
+    _queueListener.start()
+    _queueLoggerName = loggerName
+
+
+def stopLoggingQueue():
+    """
+     Write all queued records and stop the listener thread. The handlers are attached to the logger again so records
+     logged while shutting down are not lost
+    """
+    global _queueListener
+
+    if _queueListener is None:
+        return
+
+    listener = _queueListener
+    _queueListener = None
+
+    listener.stop()
+
+    logger = logging.getLogger(_queueLoggerName)
+    for handler in [x for x in logger.handlers if isinstance(x, logging.handlers.QueueHandler)]:
+        logger.removeHandler(handler)
+
+    for handler in listener.handlers:
+        logger.addHandler(handler)
+
+
+def _restartLoggingQueueInChild():
+    global _queueListener
+
+    # The listener thread does not survive fork, a forked process ( e.g. a render worker ) starts its own
+    if _queueListener is not None:
+        handlers = _queueListener.handlers
+
+        _queueListener = None
+
+        logger = logging.getLogger(_queueLoggerName)
+        for handler in [x for x in logger.handlers if isinstance(x, logging.handlers.QueueHandler)]:
+            logger.removeHandler(handler)
+        for handler in handlers:
+            logger.addHandler(handler)
+
+        startLoggingQueue(_queueLoggerName)  # type: ignore
+
+
+atexit.register(stopLoggingQueue)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restartLoggingQueueInChild)
+
 ###################################################################################################
 
 def setup_logging(
-    default_path="logging.yaml", default_level=logging.INFO, env_key="LOG_CFG"
+    default_path="logging.yaml", default_level=logging.INFO, env_key="LOG_CFG", use_queue=True
 ):
     """
     | **@author:** Prathyush SP
@@ -71,3 +166,80 @@ def setup_logging(
     
     # Disable plexapi logging for anything but ERROR
     logging.getLogger("plexapi").setLevel(logging.ERROR)
+
+    if use_queue:
+        startLoggingQueue("pmm_cfg_gen")
+
+###################################################################################################
+
+
+def benchmarkLogging(calls: int = 20000):
+    """
+     Time typical hot path log calls ( eager .format() with a dict repr and a jsonpickle dump vs lazy arguments ) at
+     INFO and DEBUG, with the file handler called directly and behind the queue. The caller time is what the
+     processing thread pays, the total includes writing the queued records
+    """
+    import tempfile
+    import time
+
+    class TemplateFile:
+        def __init__(self, i: int) -> None:
+            self.type = "collection.movie"
+            self.format = "yaml"
+            self.fileName = "movie.collection.{}.yaml.j2".format(i)
+            self.fileExtension = "yaml"
+            self.subFolder = None
+
+    entry = {"template": {"name": "tplCommonCollection", "collection": ", ".join(str(x) for x in range(20))}, "variables": {"label": "Some Label", "poster": "https://theposterdb.com/api/assets/12345"}, "sort_title": "+1_Some Collection"}
+    tplFiles = [TemplateFile(i) for i in range(3)]
+
+    def eager(logger: logging.Logger, i: int):
+        logger.debug("Searching Template: '{}'".format(entry))
+        logger.debug("Template Files for Collection Type '{}': {}".format("movie", jsonpickle.dumps(tplFiles, unpicklable=False)))
+        logger.info("Processing Collection: {} of {}".format(i, calls))
+
+    def lazy(logger: logging.Logger, i: int):
+        logger.debug("Searching Template: '%s'", entry)
+        logger.debug("Template Files for Collection Type '%s': %s", "movie", LazyJson(tplFiles))
+        logger.info("Processing Collection: %s of %s", i, calls)
+
+    print("{:<6} {:<6} {:<7} {:>12} {:>12}".format("Level", "Style", "Queue", "Caller us", "Total us"))
+
+    with tempfile.TemporaryDirectory() as tmpPath:
+        for level in [logging.INFO, logging.DEBUG]:
+            for name, func in [("eager", eager), ("lazy", lazy)]:
+                for useQueue in [False, True]:
+                    logger = logging.getLogger("pmm_cfg_gen_benchmark")
+                    logger.propagate = False
+                    logger.setLevel(level)
+
+                    handler = logging.handlers.RotatingFileHandler(os.path.join(tmpPath, "benchmark.log"), maxBytes=10485760, backupCount=1, encoding="utf8")
+                    handler.setFormatter(logging.Formatter("%(asctime)s|%(name)s|%(levelname)s|<PID %(process)d:%(processName)s>|%(name)s.%(funcName)s(%(lineno)s)|%(message)s"))
+
+                    listener = None
+                    if useQueue:
+                        logQueue = queue.SimpleQueue()
+                        logger.addHandler(logging.handlers.QueueHandler(logQueue))  # type: ignore
+                        listener = logging.handlers.QueueListener(logQueue, handler, respect_handler_level=True)  # type: ignore
+                        listener.start()
+                    else:
+                        logger.addHandler(handler)
+
+                    start = time.perf_counter()
+                    for i in range(calls):
+                        func(logger, i)
+                    caller = time.perf_counter() - start
+
+                    if listener is not None:
+                        listener.stop()
+                    total = time.perf_counter() - start
+
+                    for x in list(logger.handlers):
+                        logger.removeHandler(x)
+                    handler.close()
+
+                    print("{:<6} {:<6} {:<7} {:>12.2f} {:>12.2f}".format(logging.getLevelName(level), name, str(useQueue), caller / calls * 1e6, total / calls * 1e6))
+
+
+if __name__ == "__main__":
+    benchmarkLogging()
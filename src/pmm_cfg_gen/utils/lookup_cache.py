@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+###################################################################################################
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalizeName(name: str) -> str:
+    """
+     Normalize a name for use in a cache key ( case and whitespace insensitive )
+    """
+    return WHITESPACE_PATTERN.sub(" ", name.strip()).casefold()
+
+
+class LookupCacheStats:
+    hits: int
+    negativeHits: int
+    misses: int
+    expired: int
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.negativeHits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.negativeHits + self.misses + self.expired
+
+    @property
+    def hitRate(self) -> float:
+        return (self.hits + self.negativeHits) / self.lookups if self.lookups > 0 else 0.0
+
+    def toJson(self):
+        return {
+            "hits": self.hits,
+            "negativeHits": self.negativeHits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hitRate": round(self.hitRate, 4),
+        }
+
+
+class LookupCache:
+    """
+     Persistent cache of lookup results ( e.g. TMDb collections or TVDb / Trakt lists ). Entries expire after a TTL, empty results ( negative entries ) use their
+     own ( usually shorter ) TTL. The file is rewritten atomically and merged with the entries on disk, so several
+     processes can share it
+    """
+    VERSION = 1
+
+    _logger: logging.Logger
+
+    __fileName: Path | None
+    __ttl: float
+    __negativeTtl: float
+    __entries: dict[str, dict]
+    __dirty: set[str]
+    __lock: threading.Lock
+    __mtime: int | None
+
+    stats: LookupCacheStats
+
+    def __init__(self, fileName: str | Path | None, ttl: float, negativeTtl: float) -> None:
+        """
+         @param fileName - The cache file ( None to only cache in memory )
+         @param ttl - Lifetime of an entry in seconds
+         @param negativeTtl - Lifetime of an empty result in seconds
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.__fileName = Path(fileName) if fileName is not None else None
+        self.__ttl = ttl
+        self.__negativeTtl = negativeTtl
+        self.__entries = {}
+        self.__dirty = set()
+        self.__lock = threading.Lock()
+        self.__mtime = None
+
+        self.stats = LookupCacheStats()
+
+    @staticmethod
+    def makeKey(kind: str, name: str, *parts: str | None) -> str:
+        """
+         Make a cache key from the kind of lookup, the normalized name and the other parameters of the lookup
+        """
+        return "|".join([kind, normalizeName(name)] + [x or "" for x in parts])
+
+    def load(self):
+        """
+         Load the cache file ( expired entries are dropped )
+        """
+        if self.__fileName is None:
+            return
+
+        self.__mtime = self.__getFileTime()
+
+        entries = self.__readFile()
+        now = time.time()
+
+        with self.__lock:
+            self.__entries = {k: v for k, v in entries.items() if v.get("expires", 0) > now}
+
+        self._logger.debug("Lookup cache loaded. File: %s, Entries: %s", self.__fileName, len(self.__entries))
+
+    def refresh(self):
+        """
+         Merge the entries saved by another process since the cache was loaded ( only reads the file if it changed )
+        """
+        if self.__fileName is None:
+            return
+
+        mtime = self.__getFileTime()
+        if mtime is None or mtime == self.__mtime:
+            return
+
+        self.__mtime = mtime
+
+        entries = self.__readFile()
+        now = time.time()
+
+        with self.__lock:
+            for k, v in entries.items():
+                if k not in self.__dirty and v.get("expires", 0) > now:
+                    self.__entries[k] = v
+
+    def save(self):
+        """
+         Save the entries added since the cache was loaded. They are merged with the current content of the file
+        """
+        if self.__fileName is None:
+            return
+
+        with self.__lock:
+            if len(self.__dirty) == 0:
+                return
+
+            changes = {k: self.__entries[k] for k in self.__dirty if k in self.__entries}
+            self.__dirty.clear()
+
+        now = time.time()
+
+        entries = {k: v for k, v in self.__readFile().items() if v.get("expires", 0) > now}
+        entries.update(changes)
+
+        self.__fileName.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = Path(self.__fileName.parent, ".{}.{}-{}.tmp".format(self.__fileName.name, os.getpid(), threading.get_ident()))
+
+        try:
+            with open(tmp, "w") as fp:
+                json.dump({"version": LookupCache.VERSION, "entries": entries}, fp, indent=1)
+
+            os.replace(tmp, self.__fileName)
+
+            self.__mtime = self.__getFileTime()
+        except:
+            tmp.unlink(missing_ok=True)
+
+            self._logger.exception("Error saving lookup cache '{}'".format(self.__fileName))
+
+    def contains(self, key: str) -> bool:
+        """
+         Check if a result is cached and not expired ( not counted in the statistics )
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            return entry is not None and entry["expires"] > time.time()
+
+    def get(self, key: str) -> list | None:
+        """
+         Get a cached result
+
+         @param key - The cache key ( see L { makeKey } )
+
+         @return The cached result ( an empty list for a negative entry ) or None if not cached or expired
+        """
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is None:
+                self.stats.misses += 1
+
+                return None
+
+            if entry["expires"] <= time.time():
+                del self.__entries[key]
+                self.stats.expired += 1
+
+                return None
+
+            if len(entry["value"]) == 0:
+                self.stats.negativeHits += 1
+            else:
+                self.stats.hits += 1
+
+            return list(entry["value"])
+
+    def set(self, key: str, value: list):
+        """
+         Cache a result. Empty results are cached with the negative TTL
+
+         @param key - The cache key ( see L { makeKey } )
+         @param value - The result ( must be json serializable )
+        """
+        ttl = self.__ttl if len(value) > 0 else self.__negativeTtl
+
+        if ttl <= 0:
+            return
+
+        with self.__lock:
+            self.__entries[key] = {"value": list(value), "expires": time.time() + ttl}
+            self.__dirty.add(key)
+
+    def __getFileTime(self) -> int | None:
+        try:
+            return os.stat(self.__fileName).st_mtime_ns  # type: ignore
+        except OSError:
+            return None
+
+    def __readFile(self) -> dict[str, dict]:
+        try:
+            with open(self.__fileName, "r") as fp:  # type: ignore
+                data = json.load(fp)
+
+            if data.get("version") == LookupCache.VERSION:
+                return data["entries"]
+
+            self._logger.warning("Unsupported lookup cache version '{}'. Ignoring...".format(self.__fileName))
+        except FileNotFoundError:
+            pass
+        except:
+            self._logger.exception("Invalid lookup cache '{}'. Ignoring...".format(self.__fileName))
+
+        return {}
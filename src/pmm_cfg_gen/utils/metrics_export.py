@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import os
+import time
+from pathlib import Path
+
+from pmm_cfg_gen.utils.plex_http import PlexHttpStatsEntry
+from pmm_cfg_gen.utils.plex_stats import PlexStats
+
+###################################################################################################
+
+# Prefix of all exported metrics
+METRIC_PREFIX = "pmm_cfg_gen_"
+
+
+class PrometheusMetrics:
+    """
+     Metric families in the Prometheus text exposition format ( e.g. for the node exporter textfile collector ). The
+     values of a run are exported as gauges, the plex request latency as a histogram
+    """
+    __families: dict[str, tuple[str, str, list[tuple[str, dict, float]]]]
+
+    def __init__(self) -> None:
+        self.__families = {}
+
+    def add(self, name: str, help: str, value: float | None, labels: dict | None = None, type: str = "gauge", sampleName: str | None = None):
+        """
+         Add a sample
+
+         @param name - The metric family name ( without L { METRIC_PREFIX } )
+         @param help - The help text of the family
+         @param value - The value ( samples without a value are left out )
+         @param sampleName - Name of the sample if it differs from the family ( e.g. the _bucket of a histogram )
+        """
+        if value is None:
+            return
+
+        family = self.__families.get(name)
+        if family is None:
+            family = self.__families[name] = (help, type, [])
+
+        family[2].append((sampleName or name, labels or {}, value))
+
+    def addHistogram(self, name: str, help: str, entry: PlexHttpStatsEntry, labels: dict | None = None):
+        """
+         Add the latency histogram of a request stats entry ( cumulative buckets, sum and count )
+        """
+        labels = labels or {}
+        cumulative = 0
+
+        for bound, count in zip(PlexHttpStatsEntry.BUCKETS + ["+Inf"], entry.buckets):  # type: ignore
+            cumulative += count
+
+            self.add(name, help, cumulative, {**labels, "le": str(bound)}, type="histogram", sampleName="{}_bucket".format(name))
+
+        self.add(name, help, entry.seconds, labels, type="histogram", sampleName="{}_sum".format(name))
+        self.add(name, help, entry.count, labels, type="histogram", sampleName="{}_count".format(name))
+
+    def toText(self) -> str:
+        lines = []
+
+        for name, (help, type, samples) in self.__families.items():
+            lines.append("# HELP {}{} {}".format(METRIC_PREFIX, name, PrometheusMetrics.__escape(help, False)))
+            lines.append("# TYPE {}{} {}".format(METRIC_PREFIX, name, type))
+
+            for sampleName, labels, value in samples:
+                if len(labels) > 0:
+                    labelText = "{" + ",".join(['{}="{}"'.format(k, PrometheusMetrics.__escape(str(v), True)) for k, v in labels.items()]) + "}"
+                else:
+                    labelText = ""
+
+                lines.append("{}{}{} {}".format(METRIC_PREFIX, sampleName, labelText, PrometheusMetrics.__formatValue(value)))
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __escape(value: str, quoted: bool) -> str:
+        value = value.replace("\\", "\\\\").replace("\n", "\\n")
+
+        return value.replace('"', '\\"') if quoted else value
+
+    @staticmethod
+    def __formatValue(value: float) -> str:
+        if isinstance(value, bool):
+            return "1" if value else "0"
+
+        if isinstance(value, int):
+            return str(value)
+
+        return repr(round(float(value), 6))
+
+###################################################################################################
+
+
+def getTimerSeconds(t) -> float | None:
+    """
+     Get the elapsed time of a stopped timer ( None if it never ran )
+    """
+    try:
+        return t.elapsed_time
+    except AttributeError:
+        return None
+
+
+def buildPrometheusMetrics(stats: PlexStats, finished: float | None = None) -> PrometheusMetrics:
+    """
+     Convert the statistics of a run to metrics
+
+     @param finished - End of the run ( unix time, default now )
+    """
+    metrics = PrometheusMetrics()
+
+    metrics.add("run_timestamp_seconds", "Unix time the run finished", finished if finished is not None else time.time())
+    metrics.add("run_duration_seconds", "Duration of the run", getTimerSeconds(stats.timerProgram))
+
+    for libraryName, libraryTimer in stats.timerLibraries.items():
+        metrics.add("library_duration_seconds", "Processing time of a library", getTimerSeconds(libraryTimer), {"library": libraryName})
+
+    for libraryName, counts in stats.countsLibraries.items():
+        for kind, libraryStats in [("collections", counts.collections), ("items", counts.items)]:
+            metrics.add("library_{}".format(kind), "Number of {} in a library by state".format(kind), libraryStats.total, {"library": libraryName, "state": "total"})
+            metrics.add("library_{}".format(kind), "Number of {} in a library by state".format(kind), libraryStats.processed, {"library": libraryName, "state": "processed"})
+            metrics.add("library_{}".format(kind), "Number of {} in a library by state".format(kind), libraryStats.skipped, {"library": libraryName, "state": "skipped"})
+
+        seconds = getTimerSeconds(stats.timerLibraries.get(libraryName))
+        if seconds is not None and seconds > 0:
+            metrics.add("library_items_per_second", "Items processed per second", counts.items.processed / seconds, {"library": libraryName})
+
+    for state, count in stats.files.toJson().items():
+        metrics.add("files", "Number of generated files by state", count, {"state": state})
+
+    caches = {"tmdb": stats.tmdb, **stats.lists}
+    for cache, cacheStats in caches.items():
+        metrics.add("lookup_cache_lookups", "Number of lookups of a lookup cache", cacheStats.lookups, {"cache": cache})
+        metrics.add("lookup_cache_results", "Lookups of a lookup cache by result", cacheStats.hits, {"cache": cache, "result": "hit"})
+        metrics.add("lookup_cache_results", "Lookups of a lookup cache by result", cacheStats.negativeHits, {"cache": cache, "result": "negative_hit"})
+        metrics.add("lookup_cache_results", "Lookups of a lookup cache by result", cacheStats.misses, {"cache": cache, "result": "miss"})
+        metrics.add("lookup_cache_results", "Lookups of a lookup cache by result", cacheStats.expired, {"cache": cache, "result": "expired"})
+        metrics.add("lookup_cache_hit_ratio", "Hit rate of a lookup cache", cacheStats.hitRate, {"cache": cache})
+
+    # Library and phase only, the endpoint classes would make too many series
+    totals: dict[tuple[str, str], PlexHttpStatsEntry] = {}
+    for (libraryName, phase, endpoint), entry in list(stats.http.entries.items()):
+        key = (str(libraryName), phase)
+
+        if key not in totals:
+            totals[key] = PlexHttpStatsEntry()
+
+        totals[key].merge(entry)
+
+    for (libraryName, phase), entry in sorted(totals.items()):
+        labels = {"library": libraryName, "phase": phase}
+
+        metrics.add("plex_requests", "Number of plex requests", entry.count, labels)
+        metrics.add("plex_request_errors", "Number of failed plex requests", entry.errors, labels)
+        metrics.add("plex_response_bytes", "Size of the plex responses", entry.bytes, labels)
+        metrics.addHistogram("plex_request_duration_seconds", "Latency of the plex requests", entry, labels)
+
+    metrics.add("implicit_reloads", "Number of partial plex objects reloaded for a missing attribute", sum([x["count"] for x in stats.reloads]))
+
+    for group, label in [("templates", "template"), ("filters", "filter")]:
+        for name, entry in stats.render.getRanked(group):
+            metrics.add("render_{}_calls".format(group), "Number of calls by {}".format(label), entry.count, {label: name})
+            metrics.add("render_{}_seconds".format(group), "Time spent by {}".format(label), entry.seconds, {label: name})
+
+    return metrics
+
+
+def writePrometheusFile(fileName: str | Path, stats: PlexStats):
+    """
+     Write the statistics of a run as a Prometheus textfile ( replaced atomically, the textfile collector may read it
+     at any time )
+    """
+    p = Path(fileName)
+    p.parent.mkdir(parents=True, exist_ok=True)
+
+    # Files not ending in .prom are ignored by the collector
+    tmp = Path(p.parent, ".{}.{}.tmp".format(p.name, os.getpid()))
+
+    with open(tmp, "w") as fp:
+        fp.write(buildPrometheusMetrics(stats).toText())
+
+    os.replace(tmp, p)
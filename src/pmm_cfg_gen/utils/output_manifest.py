@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+
+###################################################################################################
+
+
+def hashContent(data: str) -> str:
+    """
+     Hash the content of a generated file
+
+     @param data - The file content
+
+     @return The hex digest
+    """
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class OutputManifest:
+    """
+     Content hash per generated file, stored in the output root. It is used to skip writing files whose content did not
+     change and to answer "does this file exist" without a stat per file ( the output root is scanned once when loaded ).
+     Each file can also store the fingerprint of the render that produced it and its source ( item and template ), which
+     is used to skip rendering and to rename outputs when an item's title changes
+    """
+    FILE_NAME = ".pmm_cfg_gen.manifest.json"
+    VERSION = 2
+
+    STATUS_WRITTEN = "written"
+    STATUS_UNCHANGED = "unchanged"
+    STATUS_SKIPPED = "skipped"
+    STATUS_UP_TO_DATE = "upToDate"
+
+    _logger: logging.Logger
+
+    __rootPath: Path
+    __readOnly: bool
+    __hashes: dict[str, str]
+    __fingerprints: dict[str, str]
+    __sources: dict[str, str]
+    __sourceFiles: dict[str, str]
+    __files: set[str]
+    __status: dict[str, str]
+    __lock: threading.Lock
+
+    def __init__(self, rootPath: str | Path, readOnly: bool = False) -> None:
+        """
+         @param rootPath - The output root path
+         @param readOnly - If True L { save } does nothing ( used by render worker processes )
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.__rootPath = Path(rootPath).absolute()
+        self.__readOnly = readOnly
+        self.__hashes = {}
+        self.__fingerprints = {}
+        self.__sources = {}
+        self.__sourceFiles = {}
+        self.__files = set()
+        self.__status = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def fileName(self) -> Path:
+        return Path(self.__rootPath, OutputManifest.FILE_NAME)
+
+    @property
+    def written(self) -> int:
+        return self.__countStatus(OutputManifest.STATUS_WRITTEN)
+
+    @property
+    def unchanged(self) -> int:
+        return self.__countStatus(OutputManifest.STATUS_UNCHANGED)
+
+    @property
+    def skipped(self) -> int:
+        return self.__countStatus(OutputManifest.STATUS_SKIPPED)
+
+    @property
+    def upToDate(self) -> int:
+        return self.__countStatus(OutputManifest.STATUS_UP_TO_DATE)
+
+    def load(self):
+        """
+         Load the manifest and scan the output root for existing files. Entries for files that no longer exist are dropped
+        """
+        self.__hashes.clear()
+        self.__fingerprints.clear()
+        self.__sources.clear()
+        self.__sourceFiles.clear()
+        self.__files.clear()
+
+        if self.__rootPath.exists():
+            for root, dirs, files in os.walk(self.__rootPath):
+                for file in files:
+                    # Skip the manifest and other state files ( e.g. the TMDb cache ) and temporary files
+                    if file.startswith(".pmm_cfg_gen.") or (file.startswith(".") and file.endswith(".tmp")):
+                        continue
+
+                    self.__files.add(os.path.relpath(os.path.join(root, file), self.__rootPath))
+
+        try:
+            with open(self.fileName, "r") as fp:
+                data = json.load(fp)
+
+            if "version" not in data:
+                # Version 1 only stored the content hash per file
+                data = {"files": {k: {"hash": v} for k, v in data.items()}}
+
+            for k, v in data["files"].items():
+                if k not in self.__files:
+                    continue
+
+                if v.get("hash") is not None:
+                    self.__hashes[k] = v["hash"]
+                if v.get("fingerprint") is not None:
+                    self.__fingerprints[k] = v["fingerprint"]
+                if v.get("source") is not None:
+                    self.__sources[k] = v["source"]
+                    self.__sourceFiles[v["source"]] = k
+        except FileNotFoundError:
+            pass
+        except:
+            self._logger.exception("Invalid output manifest '{}'. Ignoring...".format(self.fileName))
+
+        self._logger.debug("Output manifest loaded. Files: %s, Hashes: %s", len(self.__files), len(self.__hashes))
+
+    def save(self):
+        """
+         Save the manifest ( written to a temporary file that replaces the manifest )
+        """
+        if self.__readOnly:
+            return
+
+        self.__rootPath.mkdir(parents=True, exist_ok=True)
+
+        tmp = Path(self.__rootPath, ".{}.{}.tmp".format(OutputManifest.FILE_NAME, os.getpid()))
+
+        with self.__lock:
+            files = {}
+            for k in sorted(set(self.__hashes.keys()) | set(self.__fingerprints.keys())):
+                entry = {"hash": self.__hashes.get(k)}
+
+                if k in self.__fingerprints:
+                    entry["fingerprint"] = self.__fingerprints[k]
+                if k in self.__sources:
+                    entry["source"] = self.__sources[k]
+
+                files[k] = entry
+
+        with open(tmp, "w") as fp:
+            json.dump({"version": OutputManifest.VERSION, "files": files}, fp, indent=1)
+
+        os.replace(tmp, self.fileName)
+
+    def exists(self, fileName: str | Path) -> bool:
+        """
+         Check if a file exists ( found when the manifest was loaded or generated since )
+        """
+        key = self.__key(fileName)
+
+        if key is None:
+            return os.path.exists(fileName)
+
+        with self.__lock:
+            return key in self.__files
+
+    def isUnchanged(self, fileName: str | Path, digest: str) -> bool:
+        """
+         Check if a file exists with the given content hash
+        """
+        key = self.__key(fileName)
+
+        with self.__lock:
+            return key is not None and key in self.__files and self.__hashes.get(key) == digest
+
+    def getEntry(self, fileName: str | Path) -> tuple[str | None, str | None]:
+        """
+         Get the hash and the status ( for this run ) of a file
+
+         @return ( hash, status )
+        """
+        key = self.__key(fileName)
+
+        with self.__lock:
+            return (self.__hashes.get(key), self.__status.get(key)) if key is not None else (None, None)
+
+    def record(self, fileName: str | Path, digest: str | None, status: str):
+        """
+         Record the outcome of generating a file
+
+         @param fileName - The file name
+         @param digest - The content hash ( None if unknown or skipped )
+         @param status - One of STATUS_WRITTEN, STATUS_UNCHANGED, STATUS_SKIPPED or STATUS_UP_TO_DATE
+        """
+        key = self.__key(fileName)
+
+        if key is None:
+            return
+
+        with self.__lock:
+            self.__status[key] = status
+
+            if status == OutputManifest.STATUS_SKIPPED:
+                return
+
+            self.__files.add(key)
+
+            if digest is not None:
+                self.__hashes[key] = digest
+
+    def isUpToDate(self, fileName: str | Path, fingerprint: str) -> bool:
+        """
+         Check if a file exists and was produced by a render with the given fingerprint
+        """
+        key = self.__key(fileName)
+
+        with self.__lock:
+            return key is not None and key in self.__files and self.__fingerprints.get(key) == fingerprint
+
+    def setFingerprint(self, fileName: str | Path, fingerprint: str, source: str | None = None):
+        """
+         Store the fingerprint ( and source ) of the render that produced a file
+
+         @param fileName - The file name
+         @param fingerprint - The render fingerprint
+         @param source - Identifies the item and template the file was rendered from
+        """
+        key = self.__key(fileName)
+
+        if key is None:
+            return
+
+        with self.__lock:
+            self.__fingerprints[key] = fingerprint
+
+            if source is not None:
+                # A source only produces one file
+                oldKey = self.__sourceFiles.get(source)
+                if oldKey is not None and oldKey != key:
+                    self.__sources.pop(oldKey, None)
+
+                self.__sources[key] = source
+                self.__sourceFiles[source] = key
+
+    def findSource(self, source: str) -> Path | None:
+        """
+         Find the existing file produced from a source
+
+         @param source - The source ( see L { setFingerprint } )
+
+         @return The file name or None if there is none
+        """
+        with self.__lock:
+            key = self.__sourceFiles.get(source)
+
+            return Path(self.__rootPath, key) if key is not None and key in self.__files else None
+
+    def rename(self, oldFileName: str | Path, newFileName: str | Path):
+        """
+         Move the manifest entry of a file that was renamed
+        """
+        oldKey = self.__key(oldFileName)
+        newKey = self.__key(newFileName)
+
+        if oldKey is None or newKey is None:
+            return
+
+        with self.__lock:
+            self.__files.discard(oldKey)
+            self.__files.add(newKey)
+
+            for entries in [self.__hashes, self.__fingerprints, self.__sources]:
+                if oldKey in entries:
+                    entries[newKey] = entries.pop(oldKey)
+                else:
+                    entries.pop(newKey, None)
+
+            if newKey in self.__sources:
+                self.__sourceFiles[self.__sources[newKey]] = newKey
+
+    def __key(self, fileName: str | Path) -> str | None:
+        key = os.path.relpath(os.path.abspath(fileName), self.__rootPath)
+
+        # Files outside of the output root are not tracked
+        return None if key.startswith("..") else key
+
+    def __countStatus(self, status: str) -> int:
+        with self.__lock:
+            return len([x for x in self.__status.values() if x == status])
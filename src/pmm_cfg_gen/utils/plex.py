@@ -3,8 +3,8 @@
 
 import json
 import logging
-import os
 from pathlib import Path
+from typing import Any, Callable
 
 import jsonpickle
 import requests
@@ -18,12 +18,33 @@ from plexapi.audio import Artist
 from plexapi.server import PlexServer
 
 from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr, SettingsTemplateLibraryTypeEnum, SettingsTemplateFileFormatEnum, SettingsPlexLibrary
-from pmm_cfg_gen.utils.file_utils import formatLibraryItemPath
+from pmm_cfg_gen.utils.logging_utils import LazyJson
+from pmm_cfg_gen.utils.file_utils import formatLibraryItemPath, fileExists, moveFile, startBackgroundWriter, flushBackgroundWriter, stopBackgroundWriter, openOutputManifest, getOutputManifest, closeOutputManifest
+from pmm_cfg_gen.utils.output_manifest import OutputManifest
+from pmm_cfg_gen.utils.render_fingerprint import hashSettings, hashInputs, combineFingerprint
 from pmm_cfg_gen.utils.plex_stats import PlexStats
+from pmm_cfg_gen.utils.plex_http import InstrumentedSession
+from pmm_cfg_gen.utils.plex_cassette import startPlexCassette, getPlexCassette, stopPlexCassette
+from pmm_cfg_gen.utils.reload_detector import startReloadDetector, stopReloadDetector
+from pmm_cfg_gen.utils.render_cost import startRenderCostStats
+from pmm_cfg_gen.utils.profiling import setProfilePhase, stopProfilePhase
+from pmm_cfg_gen.utils.progress import ProgressReporter
 from pmm_cfg_gen.utils.plex_utils import PlexItemHelper, PlexVideoHelper, PlexCollectionHelper
 from pmm_cfg_gen.utils.template_manager import TemplateManager
 from pmm_cfg_gen.utils.template_filters import generateTpDbSearchUrl
 from pmm_cfg_gen.utils.pmm_utils import PlexMetaManagerCache
+from pmm_cfg_gen.utils.report_spool import ReportSpool
+from pmm_cfg_gen.utils.render_pool import RenderPool
+from pmm_cfg_gen.utils.render_async import AsyncRenderQueue
+from pmm_cfg_gen.utils.tmdb_utils import getTheMovieDatabaseHelper, getTheMovieDatabaseCacheStats, saveTheMovieDatabaseCache
+from pmm_cfg_gen.utils.tmdb_prefetch import TheMovieDatabasePrefetcher
+from pmm_cfg_gen.utils.tvdb_utils import getTheTvDatabaseHelper
+from pmm_cfg_gen.utils.trakt_utils import getTraktHelper
+from pmm_cfg_gen.utils.list_lookup import saveListLookupCaches, getListLookupCacheStats
+from pmm_cfg_gen.utils.tracing import traceFunction, traceSpan
+from pmm_cfg_gen.utils.metrics_export import writePrometheusFile
+from pmm_cfg_gen.utils.run_history import saveRunHistory
+from pmm_cfg_gen.utils.item_events import startItemEvents, stopItemEvents, setItemEventLibrary, itemEvent, setEventSkipReason, addEventOutputs, eventTimer, EVENT_COLLECTION, EVENT_COLLECTION_ITEMS, EVENT_ITEM
 
 ###################################################################################################
 
@@ -35,8 +56,8 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 class PlexLibraryProcessor:
     _logger: logging.Logger
 
-    __collectionProcessedCache: dict[str, list]
-    __itemProcessedCache: dict[str, list]
+    __collectionProcessedCache: dict[str, ReportSpool]
+    __itemProcessedCache: dict[str, ReportSpool]
 
     __plexMetaManagerCache: dict[str, PlexMetaManagerCache]
 
@@ -45,6 +66,9 @@ class PlexLibraryProcessor:
     __stats: PlexStats
 
     templateManager: TemplateManager
+    renderPool: RenderPool | AsyncRenderQueue | None
+
+    __settingsHash: str | None
 
     plexServer: PlexServer
     plexLibrary: LibrarySection
@@ -66,11 +90,30 @@ class PlexLibraryProcessor:
         self.templateManager = TemplateManager(
             globalSettingsMgr.settings.templates.getTemplateRootPath()
         )
+        self.renderPool = None
+        self.__settingsHash = None
+        self.__progress = ProgressReporter(
+            self.__stats,
+            globalSettingsMgr.settings.progress.interval,
+            globalSettingsMgr.settings.progress.statusFile,
+            getWritten=self._getFilesWritten,
+        )
 
     ###############################################################################################
 
+    @property
+    def stats(self) -> PlexStats:
+        return self.__stats
+
     def process(self):
         self.__stats.timerProgram.start()
+        self.__stats.render = startRenderCostStats()
+
+        startPlexCassette(
+            globalSettingsMgr.settings.plex.cassetteFile,
+            globalSettingsMgr.settings.plex.cassetteMode,
+            globalSettingsMgr.settings.plex.cassetteLatency,
+        )
 
         self._connectToServer()
 
@@ -90,13 +133,88 @@ class PlexLibraryProcessor:
                 ",".join([ x.name for x in globalSettingsMgr.settings.plex.libraries ])
             )
         )
-        for library in globalSettingsMgr.settings.plex.libraries:
-            self._processLibrary(library)
+        if globalSettingsMgr.settings.output.manifest:
+            openOutputManifest(globalSettingsMgr.settings.output.path)
+
+        # Build the TMDb export index before render workers start ( they only read it )
+        if globalSettingsMgr.settings.theMovieDatabase.exportFile is not None:
+            getTheMovieDatabaseHelper()
+
+        reloadDetector = startReloadDetector(globalSettingsMgr.settings.render.reloadCheck)
+        itemEvents = startItemEvents(globalSettingsMgr.settings.output.eventsFile, globalSettingsMgr.settings.output.slowItems)
+
+        if globalSettingsMgr.settings.output.writerThreads > 0:
+            startBackgroundWriter(
+                globalSettingsMgr.settings.output.writerThreads,
+                globalSettingsMgr.settings.output.writerQueueSize,
+            )
+
+        if globalSettingsMgr.settings.render.isParallel:
+            self.renderPool = RenderPool(
+                globalSettingsMgr.settings.templates.getTemplateRootPath(),
+                globalSettingsMgr.settings.render.workers,
+                globalSettingsMgr.settings.render.maxInFlight,
+                httpStats=self.__stats.http,
+            )
+        elif globalSettingsMgr.settings.render.isAsync:
+            self.renderPool = AsyncRenderQueue(
+                globalSettingsMgr.settings.templates.getTemplateRootPath(),
+                globalSettingsMgr.settings.render.concurrency,
+                globalSettingsMgr.settings.render.maxInFlight,
+                onDrained=self._flushCaches,
+            )
+
+        self.__progress.start()
+
+        try:
+            for library in globalSettingsMgr.settings.plex.libraries:
+                self._processLibrary(library)
+        finally:
+            if self.renderPool is not None:
+                self.renderPool.close()
+                self.renderPool = None
+
+            stopBackgroundWriter()
+
+            self.__progress.stop()
+
+            manifest = getOutputManifest()
+            if manifest is not None:
+                self.__stats.files.written = manifest.written
+                self.__stats.files.unchanged = manifest.unchanged
+                self.__stats.files.skipped = manifest.skipped
+                self.__stats.files.upToDate = manifest.upToDate
+
+                closeOutputManifest()
+
+            tmdbCacheStats = getTheMovieDatabaseCacheStats()
+            if tmdbCacheStats is not None:
+                self.__stats.tmdb = tmdbCacheStats
+
+            saveTheMovieDatabaseCache()
+
+            self.__stats.lists = getListLookupCacheStats()
+
+            saveListLookupCaches()
+
+            if reloadDetector is not None:
+                self.__stats.reloads = reloadDetector.toJson()
+
+                stopReloadDetector()
+
+            if itemEvents is not None:
+                self.__stats.slowest = itemEvents.toJson()
+
+                stopItemEvents()
+
+            stopPlexCassette()
 
         self.__stats.timerProgram.stop()
         self.__stats.calcTotals()
 
         self._displayStats()
+        self._saveStatsFile()
+        self._saveMetrics()
 
     ###############################################################################################
     def _connectToServer(self):
@@ -106,7 +224,7 @@ class PlexLibraryProcessor:
             )
         )
 
-        self.__session = requests.Session()
+        self.__session = InstrumentedSession(self.__stats.http, getPlexCassette())
         self.__session.verify = False
         self.plexServer = PlexServer(
             globalSettingsMgr.settings.plex.serverUrl,
@@ -114,15 +232,16 @@ class PlexLibraryProcessor:
             session=self.__session,
         )
 
+    @traceFunction("library.load", "library", getArgs=lambda self, library: {"library": library.name})
     def _loadLibrary(self, library: SettingsPlexLibrary) -> LibrarySection:
-        self._logger.debug("Loading plex library: {}".format(library.name))
+        self._logger.debug("Loading plex library: %s", library.name)
 
         self.plexLibrarySettings = library
         self.plexLibrary = self.plexServer.library.section(self.plexLibrarySettings.name)
         
         self.__stats.initLibrary(self.plexLibrarySettings.name)
-        self.__collectionProcessedCache.update({self.plexLibrarySettings.name: list()})
-        self.__itemProcessedCache.update({self.plexLibrarySettings.name: list()})
+        self.__collectionProcessedCache.update({self.plexLibrarySettings.name: ReportSpool(self.plexServer, spoolToDisk=globalSettingsMgr.settings.output.streaming)})
+        self.__itemProcessedCache.update({self.plexLibrarySettings.name: ReportSpool(self.plexServer, spoolToDisk=globalSettingsMgr.settings.output.streaming)})
         self.__plexMetaManagerCache.update({self.plexLibrarySettings.name: PlexMetaManagerCache() })
 
         self.__stats.timerLibraries[self.plexLibrarySettings.name].start()
@@ -136,48 +255,57 @@ class PlexLibraryProcessor:
         globalSettingsMgr.settings.runtime.currentWorkingPath = str(self.pathLibrary)
         globalSettingsMgr.settings.runtime.currentWorkingPathRelative = str(self.pathLibrary.relative_to(Path(globalSettingsMgr.settings.output.path).resolve()))
 
-        self._logger.debug("Library Path: '{}'".format(self.pathLibrary))
+        self._logger.debug("Library Path: '%s'", self.pathLibrary)
 
-        tplFiles = globalSettingsMgr.settings.templates.getTemplateByGroupAndLibraryType("library", self.plexLibrary.type)
+        tplFiles = globalSettingsMgr.settings.templateLookup.getTemplates("library", self.plexLibrary.type)
 
         self._logger.debug(
-            "Template Files for Library Type '{}': {}".format(self.plexLibrary.type, jsonpickle.dumps(tplFiles, unpicklable=False))
+            "Template Files for Library Type '%s': %s", self.plexLibrary.type, LazyJson(tplFiles)
         )
 
         if tplFiles is not None:
-            for tplFile in tplFiles:
-                if globalSettingsMgr.settings.generate.isFormatEnabled(tplFile.format):
-                    fileName = Path(self.pathLibrary, "{}.{}".format(self.plexLibrarySettings.path, tplFile.fileExtension))
+            for tplFile in globalSettingsMgr.settings.templateLookup.getEnabledTemplates("library", self.plexLibrary.type, checkType=False):
+                fileName = Path(self.pathLibrary, "{}.{}".format(self.plexLibrarySettings.path, tplFile.fileExtension))
 
-                    self.templateManager.renderAndSave(
-                        tplFile.fileName, fileName, {"library": self.plexLibrary}
-                    )
+                self.templateManager.renderAndSave(
+                    tplFile.fileName, fileName, {"library": self.plexLibrary}
+                )
 
         if globalSettingsMgr.settings.plexMetaManager.cacheExistingFiles:
             self._logger.debug("Checking for Plex Meta Manager Cache enablement for this library")
             if self.plexLibrarySettings.pmm_path is not None:
                 self._logger.info("-" * 50)
                 self._logger.info("Loading Plex Meta Manager File Cache")
-                self._logger.debug("Plex Meta Manager Path: {}".format(self.plexLibrarySettings.pmm_path))
+                self._logger.debug("Plex Meta Manager Path: %s", self.plexLibrarySettings.pmm_path)
                 self.__plexMetaManagerCache[self.plexLibrarySettings.name].processFolder(self.plexLibrarySettings.pmm_path) 
                 self._logger.info("-" * 50)
                 
         return self.plexLibrary
 
+    @traceFunction("library", "library", getArgs=lambda self, library: {"library": library.name})
     def _processLibrary(self, library: SettingsPlexLibrary):
         self._logger.info("-" * 50)
         self._logger.info("Started Processing Library: '{}'".format(library.name))
 
+        self.__stats.http.setPhase(library.name, "library")
+        setItemEventLibrary(library.name)
+
         self._loadLibrary(library)
 
         self._logger.info("Processing Library Collections")
-        collections = self.plexLibrary.collections()
+        self._setPhase("collections")
+
+        with traceSpan("plex.fetch", "fetch", what="collections"):
+            collections = self.plexLibrary.collections()
 
         self._logger.info(f"Collections - Tota: {len(collections)}")
 
         self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.total = len(collections)
         self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.processed = 0
 
+        self._prefetchTmDbCollections(collections)
+        self._prefetchLists(collections)
+
         self._saveCollectionTemplates()
 
         for collection in collections:
@@ -189,7 +317,10 @@ class PlexLibraryProcessor:
                 )
 
         self._logger.info("Processing Library Items")
-        items = self.plexLibrary.all()
+        self._setPhase("items")
+
+        with traceSpan("plex.fetch", "fetch", what="items"):
+            items = self.plexLibrary.all()
 
         self._logger.info(f"Items - Total: {len(items)}")
 
@@ -203,11 +334,22 @@ class PlexLibraryProcessor:
             except:
                 self._logger.exception("Error Processing Item: {}".format(item.title))
 
+        # All collection and item files need to be rendered before the reports are generated
+        if self.renderPool is not None:
+            self._setPhase("rendering")
+
+            with traceSpan("render.wait", "render"):
+                self.renderPool.wait()
+
+        flushBackgroundWriter()
+
         self.__stats.timerLibraries[self.plexLibrarySettings.name].stop()
 
         self.__stats.countsLibraries[self.plexLibrarySettings.name].calcTotals()
         self.__stats.calcTotals()
 
+        self._setPhase("reports")
+
         self._logger.info("-" * 50)        
         self._sortCache()
         #self._saveCollectionReport()
@@ -216,21 +358,96 @@ class PlexLibraryProcessor:
         self._saveReport("collection", globalSettingsMgr.settings.output.fileNameFormat.collectionsReport)
         self._saveReport("metadata", globalSettingsMgr.settings.output.fileNameFormat.metadataReport)
 
+        self.__collectionProcessedCache[self.plexLibrarySettings.name].close()
+        self.__itemProcessedCache[self.plexLibrarySettings.name].close()
+
+        stopProfilePhase()
+
+    def _setPhase(self, phase: str):
+        """
+         Set the phase of the current library ( reported by the progress, attributed to plex requests and profiled )
+        """
+        self.__progress.setPhase(self.plexLibrarySettings.name, phase)
+        self.__stats.http.setPhase(self.plexLibrarySettings.name, phase)
+
+        setProfilePhase(self.plexLibrarySettings.name, phase)
+
+    @traceFunction("tmdb.prefetch", "fetch")
+    def _prefetchTmDbCollections(self, collections: list[Collection]):
+        """
+         Search TMDb for all collections that will be rendered ( concurrently ), so getTmDbCollectionId reads the results from memory
+        """
+        tmdbSettings = globalSettingsMgr.settings.theMovieDatabase
+
+        if not tmdbSettings.prefetch or not self.templateManager.isFilterUsed("getTmDbCollectionId"):
+            return
+
+        tmdbHelper = getTheMovieDatabaseHelper()
+
+        if not tmdbHelper.isApiEnabled:
+            return
+
+        names = [x.title for x in collections if not (PlexItemHelper.isPMMItem(x) or x.childCount == 0)]
+
+        prefetcher = TheMovieDatabasePrefetcher(
+            tmdbSettings.apiUrl,
+            tmdbSettings.apiKey,
+            tmdbSettings.language,
+            tmdbSettings.region,
+            threads=tmdbSettings.prefetchThreads,
+            rateLimit=tmdbSettings.rateLimit,
+            maxRetries=tmdbSettings.maxRetries,
+        )
+
+        try:
+            count = prefetcher.prefetchCollections(tmdbHelper, names)
+        finally:
+            prefetcher.close()
+
+        self._logger.info("TMDb Collections Prefetched: {} of {}".format(count, len(names)))
+
+        # Render workers pick up the results from the cache file
+        if isinstance(self.renderPool, RenderPool):
+            saveTheMovieDatabaseCache()
+
+    @traceFunction("lists.prefetch", "fetch")
+    def _prefetchLists(self, collections: list[Collection]):
+        """
+         Look up the TVDb and trakt lists of all collections that will be rendered ( concurrently ), so the list filters
+         read the results from memory
+        """
+        names = None
+
+        for helper, filterName in [(getTheTvDatabaseHelper(), "getTvDbListIds"), (getTraktHelper(), "getTraktListUrls")]:
+            if not helper.isEnabled or not self.templateManager.isFilterUsed(filterName):
+                continue
+
+            if names is None:
+                names = [x.title for x in collections if not (PlexItemHelper.isPMMItem(x) or x.childCount == 0)]
+
+            count = helper.prefetchLists(names)
+
+            self._logger.info("Lists Prefetched ({}): {} of {}".format(helper.KIND, count, len(names)))
+
+        # Render workers pick up the results from the cache files
+        if names is not None and isinstance(self.renderPool, RenderPool):
+            saveListLookupCaches()
+
+    @traceFunction("collection", "item", getArgs=lambda self, itemTitle, item: {"title": itemTitle})
+    @itemEvent(EVENT_COLLECTION, getItem=lambda self, itemTitle, item: (item.ratingKey, itemTitle, item.childCount))
     def _processCollection(self, itemTitle: str, item):
         self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.processed += 1
+        self.__stats.countsLibraries[self.plexLibrarySettings.name].fetched += 1
 
         if PlexItemHelper.isPMMItem(item) or item.childCount == 0:
-            self._logger.info(
-                "[{}/{}] Skipping {}: '{}'. [Reason: Dynamic/Empty Collecton]".format(
-                    self.__stats.countsLibraries[
-                        self.plexLibrarySettings.name
-                    ].collections.processed,
-                    self.__stats.countsLibraries[
-                        self.plexLibrarySettings.name
-                    ].collections.total,
-                    item.type,
-                    item.title,
-                )
+            setEventSkipReason("dynamic or empty collection")
+
+            self._logger.debug(
+                "[%s/%s] Skipping %s: '%s'. [Reason: Dynamic/Empty Collecton]",
+                self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.processed,
+                self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.total,
+                item.type,
+                item.title
             )
             return
 
@@ -239,78 +456,88 @@ class PlexLibraryProcessor:
         if pmmItem is not None and self.plexLibrarySettings.pmm_delta is True:
             self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.skipped += 1
 
-            self._logger.info(
-                "[{}/{}] Skipping {}: '{}'. [Reason: Plex Meta Manager Cache Hit. Delta only requested]".format(
-                    self.__stats.countsLibraries[
-                        self.plexLibrarySettings.name
-                    ].collections.processed,
-                    self.__stats.countsLibraries[
-                        self.plexLibrarySettings.name
-                    ].collections.total,
-                    item.type,
-                    item.title,
-                )
+            setEventSkipReason("plex meta manager cache hit")
+
+            self._logger.debug(
+                "[%s/%s] Skipping %s: '%s'. [Reason: Plex Meta Manager Cache Hit. Delta only requested]",
+                self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.processed,
+                self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.total,
+                item.type,
+                item.title
             )
             
             return
         
-        self._logger.info(
-            "[{}/{}] Processing {}: '{}'".format(
-                self.__stats.countsLibraries[
-                    self.plexLibrarySettings.name
-                ].collections.processed,
-                self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.total,
-                item.type,
-                itemTitle,
-            )
+        self._logger.debug(
+            "[%s/%s] Processing %s: '%s'",
+            self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.processed,
+            self.__stats.countsLibraries[self.plexLibrarySettings.name].collections.total,
+            item.type,
+            itemTitle
         )
 
         self._addCollectionToProcessedCache(item, pmmItem)
 
-        tplFiles = globalSettingsMgr.settings.templates.getTemplateByGroupAndLibraryType("collection", self.plexLibrary.type)
+        tplFiles = globalSettingsMgr.settings.templateLookup.getTemplates("collection", self.plexLibrary.type)
         if tplFiles is None:
             self._logger.warn("\tNo Collection Templates for type '{}' specifed".format(self.plexLibrary.type))
 
+            setEventSkipReason("no templates")
+
             return
 
         self._logger.debug(
-            "\tTemplate Files for Collection Type '{}': {}".format(self.plexLibrary.type, jsonpickle.dumps(tplFiles, unpicklable=False))
+            "\tTemplate Files for Collection Type '%s': %s", self.plexLibrary.type, LazyJson(tplFiles)
         )
 
         fileNameBase = PlexItemHelper.formatString(globalSettingsMgr.settings.output.fileNameFormat.collections, library=self.plexLibrary, collection=item, item=None, pmm=pmmItem, cleanTitleStrings=True)
 
-        self._logger.debug("\tBase FileName: {}".format(fileNameBase))
+        self._logger.debug("\tBase FileName: %s", fileNameBase)
+
+        renderTemplates: list[tuple[str, Path]] = []
 
-        for tplFile in tplFiles:
+        for tplFile in globalSettingsMgr.settings.templateLookup.getEnabledTemplates("collection", self.plexLibrary.type):
             try:
-                if globalSettingsMgr.settings.generate.isFormatEnabled(tplFile.format) and globalSettingsMgr.settings.generate.isTypeEnabled(tplFile.type):
+                if tplFile.subFolder is not None:
+                    fileName = Path(self.pathLibrary, "collections", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                else: 
+                    fileName = Path(self.pathLibrary, "collections", "{}.{}".format(fileNameBase, tplFile.fileExtension))
 
-                    if tplFile.subFolder is not None:
-                        fileName = Path(self.pathLibrary, "collections", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
-                    else: 
-                        fileName = Path(self.pathLibrary, "collections", "{}.{}".format(fileNameBase, tplFile.fileExtension))
-
-                    if not os.path.exists(fileName) or globalSettingsMgr.settings.output.overwrite:
-                        self.templateManager.renderAndSave(
-                            tplFile.fileName, fileName, tplArgs={
-                                "library": jsonpickle.dumps(self.plexLibrary, unpicklable=False),
-                                "item": { 
-                                    "metadata": item, 
-                                    "pmm": pmmItem
-                                }
-                            } 
-                        )
-
-                        self._logger.debug("\t\tAdding Collection to Processed Cache: {}".format(PlexItemHelper.formatItemTitle(item)))
-                        self.__stats.itemsLibraries[self.plexLibrarySettings.name].addCollection(PlexItemHelper.formatItemTitle(item), str(fileName))
-                    else:
-                        self._logger.warn("\tCollection File Name '{}' Exists. Skipping...".format(fileNameBase))
+                if self._isFileWriteRequired(fileName):
+                    renderTemplates.append((tplFile.fileName, fileName))
                 else:
-                    self._logger.debug("\tGenerating format '{}' for Collections is not enabled. Skipping...".format(tplFile.format))
+                    self._logger.warn("\tCollection File Name '{}' Exists. Skipping...".format(fileNameBase))
             except:
                 self._logger.exception("\tError Processing Collection Template: {}".format(tplFile.fileName))
 
-        childItems = item.items()
+        if len(renderTemplates) > 0:
+            collectionTitle = PlexItemHelper.formatItemTitle(item)
+            itemsLibrary = self.__stats.itemsLibraries[self.plexLibrarySettings.name]
+
+            def onCollectionSaved(fileName: str):
+                self._logger.debug("\t\tAdding Collection to Processed Cache: %s", collectionTitle)
+                itemsLibrary.addCollection(collectionTitle, fileName)
+
+            self._renderTemplates(
+                "Collection '{}'".format(item.title),
+                "\tError Processing Collection Template: {}",
+                renderTemplates,
+                tplArgs={
+                    "library": jsonpickle.dumps(self.plexLibrary, unpicklable=False),
+                    "item": { 
+                        "metadata": item, 
+                        "pmm": pmmItem
+                    }
+                },
+                onSaved=onCollectionSaved,
+                source="{}/collection/{}".format(self.plexLibrarySettings.name, item.ratingKey),
+                fingerprintInputs={ "metadata": item, "pmm": pmmItem }
+            )
+        else:
+            setEventSkipReason("files exist")
+
+        with traceSpan("plex.fetch", "fetch", what="collection.items"), eventTimer("fetch"):
+            childItems = item.items()
         if len(childItems) > 0:
             self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total = len(
                 childItems
@@ -319,16 +546,25 @@ class PlexLibraryProcessor:
 
             self._processMetadata(collection=item, items=childItems)
 
+        self._flushCaches()
+
+    @traceFunction("item", "item", getArgs=lambda self, collection, items: {"title": collection.title if collection is not None else (items[0].title if len(items) > 0 else None), "items": len(items)})
+    @itemEvent(
+        lambda self, collection, items: EVENT_COLLECTION_ITEMS if collection is not None else EVENT_ITEM,
+        getItem=lambda self, collection, items: (collection.ratingKey, collection.title, len(items)) if collection is not None else ((items[0].ratingKey, items[0].title, len(items)) if len(items) > 0 else (None, None, 0))
+    )
     def _processMetadata(self, collection : Collection | None, items : list[Video]):
 
-        tplFiles = globalSettingsMgr.settings.templates.getTemplateByGroupAndLibraryType("metadata", self.plexLibrary.type)
+        tplFiles = globalSettingsMgr.settings.templateLookup.getTemplates("metadata", self.plexLibrary.type)
         if tplFiles is None:
             self._logger.warn("No Metadata Templates for type '{}' specifed".format(self.plexLibrary.type))
 
+            setEventSkipReason("no templates")
+
             return
 
         self._logger.debug(
-            "Template Files for Metadata Type '{}': {}".format(self.plexLibrary.type, jsonpickle.dumps(tplFiles, unpicklable=False))
+            "Template Files for Metadata Type '%s': %s", self.plexLibrary.type, LazyJson(tplFiles)
         )
 
         itemName: str = ""
@@ -349,59 +585,54 @@ class PlexLibraryProcessor:
 
             return
       
-        self._logger.debug("Base FileName: {}".format(fileNameBase))
+        self._logger.debug("Base FileName: %s", fileNameBase)
 
         itemsWithExtras: list[dict] = []
+        skipReasons: set[str] = set()
         
         for item in items:
             self.__stats.countsLibraries[self.plexLibrarySettings.name].items.processed += 1
+            self.__stats.countsLibraries[self.plexLibrarySettings.name].fetched += 1
 
             if pmmItem is not None and self.plexLibrarySettings.pmm_delta is True:
-                self._logger.info(
-                    "[{}/{}] Skipping {}: '{}'. [Reason: Plex Meta Manager Cache Hit. Delta only requested]".format(
-                        self.__stats.countsLibraries[
-                            self.plexLibrarySettings.name
-                        ].items.processed,
-                        self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total,
-                        item.type,
-                        PlexItemHelper.formatItemTitle(item),
-                    )
+                self._logger.debug(
+                    "[%s/%s] Skipping %s: '%s'. [Reason: Plex Meta Manager Cache Hit. Delta only requested]",
+                    self.__stats.countsLibraries[self.plexLibrarySettings.name].items.processed,
+                    self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total,
+                    item.type,
+                    PlexItemHelper.formatItemTitle(item)
                 )
 
                 self.__stats.countsLibraries[self.plexLibrarySettings.name].items.skipped += 1
 
+                skipReasons.add("plex meta manager cache hit")
             elif PlexItemHelper.isPMMItem(item):
-                self._logger.info(
-                    "[{}/{}] Skipping {}: '{}'. [Reason: Dynamic item]".format(
-                        self.__stats.countsLibraries[
-                            self.plexLibrarySettings.name
-                        ].items.processed,
-                        self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total,
-                        item.type,
-                        PlexItemHelper.formatItemTitle(item),
-                    )
+                self._logger.debug(
+                    "[%s/%s] Skipping %s: '%s'. [Reason: Dynamic item]",
+                    self.__stats.countsLibraries[self.plexLibrarySettings.name].items.processed,
+                    self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total,
+                    item.type,
+                    PlexItemHelper.formatItemTitle(item)
                 )
+
+                skipReasons.add("dynamic item")
             elif self._isItemProcessed(item):
-                self._logger.info(
-                    "[{}/{}] Skipping {}: '{}'. [Reason: Already Processed]".format(
-                        self.__stats.countsLibraries[
-                            self.plexLibrarySettings.name
-                        ].items.processed,
-                        self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total,
-                        item.type,
-                        PlexItemHelper.formatItemTitle(item),
-                    )
+                self._logger.debug(
+                    "[%s/%s] Skipping %s: '%s'. [Reason: Already Processed]",
+                    self.__stats.countsLibraries[self.plexLibrarySettings.name].items.processed,
+                    self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total,
+                    item.type,
+                    PlexItemHelper.formatItemTitle(item)
                 )
+
+                skipReasons.add("already processed")
             else:
-                self._logger.info(
-                    "[{}/{}] Processing {}: '{}'".format(
-                        self.__stats.countsLibraries[
-                            self.plexLibrarySettings.name
-                        ].items.processed,
-                        self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total,
-                        item.type,
-                        PlexItemHelper.formatItemTitle(item),
-                    )
+                self._logger.debug(
+                    "[%s/%s] Processing %s: '%s'",
+                    self.__stats.countsLibraries[self.plexLibrarySettings.name].items.processed,
+                    self.__stats.countsLibraries[self.plexLibrarySettings.name].items.total,
+                    item.type,
+                    PlexItemHelper.formatItemTitle(item)
                 )
 
                 pmmItem = self.__plexMetaManagerCache[self.plexLibrarySettings.name].metadataItem_to_dict(item.title, item.year if isinstance(item, Video) else None)
@@ -414,14 +645,17 @@ class PlexLibraryProcessor:
                     seasons = []
                     if "childCount" in item.__dict__:
                         self._logger.debug("  Loading Seasons...")
-                        seasons = item.seasons()
+                        with traceSpan("plex.fetch", "fetch", what="seasons"), self.__stats.http.phase("seasons"), eventTimer("fetch"):
+                            seasons = item.seasons()
 
                         itemDict.update({"seasons": seasons})
                 elif isinstance(item, Artist):
-                    albums = item.albums()
+                    with traceSpan("plex.fetch", "fetch", what="albums"), self.__stats.http.phase("albums"), eventTimer("fetch"):
+                        albums = item.albums()
                     itemDict.update({"albums": albums})
 
-                    tracks = item.tracks()
+                    with traceSpan("plex.fetch", "fetch", what="tracks"), self.__stats.http.phase("tracks"), eventTimer("fetch"):
+                        tracks = item.tracks()
                     itemDict.update({"tracks": tracks})
 
                 itemsWithExtras.append(itemDict)
@@ -430,48 +664,191 @@ class PlexLibraryProcessor:
         if len(itemsWithExtras) > 0:
             sorted(itemsWithExtras, key=lambda x: x["metadata"].year if x and "year" in x["metadata"].__dict__ else 0)
 
-            for tplFile in tplFiles:
+            renderTemplates: list[tuple[str, Path]] = []
+
+            for tplFile in globalSettingsMgr.settings.templateLookup.getEnabledTemplates("metadata", self.plexLibrary.type):
                 try:
-                    if globalSettingsMgr.settings.generate.isFormatEnabled(tplFile.format) and globalSettingsMgr.settings.generate.isTypeEnabled(tplFile.type):
-                        
-                        if tplFile.subFolder is not None:
-                            fileName = Path(self.pathLibrary, "metadata", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
-                        else: 
-                            fileName = Path(self.pathLibrary, "metadata", "{}.{}".format(fileNameBase, tplFile.fileExtension))
-
-                        if not os.path.exists(fileName) or globalSettingsMgr.settings.output.overwrite:
-                            self.templateManager.renderAndSave(
-                                tplFile.fileName, fileName, tplArgs={
-                                    "library": jsonpickle.dumps(self.plexLibrary, unpicklable=False),
-                                    "items": itemsWithExtras 
-                                } 
-                            )
-
-                            self._logger.debug("  Adding Metadata to Processed Cache: {}".format(PlexItemHelper.formatItemTitle(itemsWithExtras[0]["metadata"])))
-                            self.__stats.itemsLibraries[self.plexLibrarySettings.name].addItem(PlexItemHelper.formatItemTitle(itemsWithExtras[0]["metadata"]), str(fileName))
-                            
-                        else:
-                            self._logger.warn("  Metadata File Name '{}.{}' Exists. Skipping...".format(fileNameBase, tplFile.fileExtension))
+                    if tplFile.subFolder is not None:
+                        fileName = Path(self.pathLibrary, "metadata", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                    else: 
+                        fileName = Path(self.pathLibrary, "metadata", "{}.{}".format(fileNameBase, tplFile.fileExtension))
+
+                    if self._isFileWriteRequired(fileName):
+                        renderTemplates.append((tplFile.fileName, fileName))
                     else:
-                        self._logger.debug("  Generating format '{}' for Metadata is not enabled. Skipping...".format(tplFile.format))
+                        self._logger.warn("  Metadata File Name '{}.{}' Exists. Skipping...".format(fileNameBase, tplFile.fileExtension))
                 except:
                     self._logger.exception("Error Processing Metadata Template: {}".format(tplFile.fileName))
+
+            if len(renderTemplates) > 0:
+                metadataTitle = PlexItemHelper.formatItemTitle(itemsWithExtras[0]["metadata"])
+                itemsLibrary = self.__stats.itemsLibraries[self.plexLibrarySettings.name]
+
+                def onMetadataSaved(fileName: str):
+                    self._logger.debug("  Adding Metadata to Processed Cache: %s", metadataTitle)
+                    itemsLibrary.addItem(metadataTitle, fileName)
+
+                self._renderTemplates(
+                    "Metadata '{}'".format(itemName),
+                    "Error Processing Metadata Template: {}",
+                    renderTemplates,
+                    tplArgs={
+                        "library": jsonpickle.dumps(self.plexLibrary, unpicklable=False),
+                        "items": itemsWithExtras 
+                    },
+                    onSaved=onMetadataSaved,
+                    source="{}/metadata/{}".format(self.plexLibrarySettings.name, ",".join([str(x["metadata"].ratingKey) for x in itemsWithExtras])),
+                    fingerprintInputs=itemsWithExtras
+                )
+            else:
+                setEventSkipReason("files exist")
+        elif len(skipReasons) > 0:
+            setEventSkipReason(", ".join(sorted(skipReasons)))
+
+        self._flushCaches()
                     
-    def _isCollectionProcessed(self, item) -> bool:
-        it = next(
-            (
-                x
-                for x in self.__collectionProcessedCache[self.plexLibrarySettings.name]
-                if x["title"] == item.title
-            ),
-            None,
-        )
+    def _renderTemplates(self, description: str, errorMessage: str, templates: list[tuple[str, Path]], tplArgs: dict, onSaved: Callable[[str], None], source: str | None = None, fingerprintInputs: Any = None):
+        """
+         Render and save templates that share the same arguments. Uses the render pool when one is active
+
+         @param description - Description of the item being rendered ( used for error reporting )
+         @param errorMessage - Format string for the error logged when a template fails ( serial rendering )
+         @param templates - List of ( template name, output file name )
+         @param tplArgs - The template arguments
+         @param onSaved - Called with the file name of each successfully saved file
+         @param source - Identifies the item being rendered ( used by incremental rendering )
+         @param fingerprintInputs - The inputs that determine the output ( used by incremental rendering )
+        """
+        addEventOutputs([fileName for _, fileName in templates])
+
+        manifest = getOutputManifest()
+
+        if globalSettingsMgr.settings.output.incremental and manifest is not None and source is not None:
+            templates, onSaved = self._skipUpToDateTemplates(manifest, templates, onSaved, source, fingerprintInputs)
+
+            if len(templates) == 0:
+                return
+
+        if self.__progress.isEnabled:
+            onSaved = self.__countRendered(onSaved)
+
+        if self.renderPool is not None:
+            self.renderPool.submit(description, templates, tplArgs, onSaved)
+
+            return
+
+        for templateName, fileName in templates:
+            try:
+                self.templateManager.renderAndSave(templateName, fileName, tplArgs=tplArgs)
+
+                onSaved(str(fileName))
+            except:
+                self._logger.exception(errorMessage.format(templateName))
+
+    def _skipUpToDateTemplates(self, manifest: OutputManifest, templates: list[tuple[str, Path]], onSaved: Callable[[str], None], source: str, fingerprintInputs: Any) -> tuple[list[tuple[str, Path]], Callable[[str], None]]:
+        """
+         Remove the templates whose output is up to date ( same template, settings and inputs as the render that produced it ).
+         Outputs of the same source that were saved under a different name ( e.g. the title changed ) are renamed first
+
+         @return The templates that need to be rendered and the onSaved callback that records their fingerprint
+        """
+        if self.__settingsHash is None:
+            self.__settingsHash = hashSettings(globalSettingsMgr.settings)
+
+        inputHash = hashInputs(fingerprintInputs)
+
+        renderTemplates = []
+        fingerprints: dict[str, tuple[str, str]] = {}
+
+        for templateName, fileName in templates:
+            templateHash = self.templateManager.getTemplateHash(templateName)
+            if templateHash is None:
+                renderTemplates.append((templateName, fileName))
+
+                continue
 
-        return it is not None
+            fingerprint = combineFingerprint(templateHash, self.__settingsHash, inputHash)
+            templateSource = "{}/{}".format(source, templateName)
+
+            oldFileName = manifest.findSource(templateSource)
+            if oldFileName is not None and oldFileName != Path(fileName).absolute():
+                self._logger.info("  Renaming '{}' to '{}'".format(oldFileName.name, Path(fileName).name))
+
+                try:
+                    moveFile(oldFileName, fileName)
+                except:
+                    self._logger.exception("Error Renaming File: {}".format(oldFileName))
+
+            if manifest.isUpToDate(fileName, fingerprint):
+                self._logger.debug("  File is up to date: %s", fileName)
+
+                manifest.record(fileName, None, OutputManifest.STATUS_UP_TO_DATE)
+                onSaved(str(fileName))
+            else:
+                renderTemplates.append((templateName, fileName))
+                fingerprints[str(fileName)] = (fingerprint, templateSource)
+
+        def onSavedWithFingerprint(fileName: str):
+            if fileName in fingerprints:
+                manifest.setFingerprint(fileName, *fingerprints[fileName])
+
+            onSaved(fileName)
+
+        return renderTemplates, onSavedWithFingerprint
+
+    def __countRendered(self, onSaved: Callable[[str], None]) -> Callable[[str], None]:
+        progress = self.__progress
+
+        def onSavedWithProgress(fileName: str):
+            progress.addRendered()
+
+            onSaved(fileName)
+
+        return onSavedWithProgress
+
+    def _getFilesWritten(self) -> int | None:
+        """
+         Get the number of files written ( or found unchanged ) so far. Only known if the output manifest is enabled
+        """
+        manifest = getOutputManifest()
+
+        return manifest.written + manifest.unchanged if manifest is not None else None
+
+    def _isFileWriteRequired(self, fileName: str | Path) -> bool:
+        """
+         Check if a file needs to be generated ( it doesn't exist or overwrite is enabled ). Skipped files are counted in the output manifest
+         
+         @param fileName - The file name
+        """
+        if globalSettingsMgr.settings.output.overwrite or not fileExists(fileName):
+            return True
+
+        manifest = getOutputManifest()
+        if manifest is not None:
+            manifest.record(fileName, None, OutputManifest.STATUS_SKIPPED)
+
+        return False
+
+    def _flushCaches(self):
+        """
+         Write the pending report entries of the current library to their spool ( once their templates are rendered )
+        """
+        # Async rendering happens later on the same objects, the renderer flushes once the queued jobs are done
+        if isinstance(self.renderPool, AsyncRenderQueue) and self.renderPool.pending > 0:
+            return
+
+        if self.plexLibrarySettings.name in self.__collectionProcessedCache:
+            self.__collectionProcessedCache[self.plexLibrarySettings.name].flush()
+
+        if self.plexLibrarySettings.name in self.__itemProcessedCache:
+            self.__itemProcessedCache[self.plexLibrarySettings.name].flush()
+
+    def _isCollectionProcessed(self, item) -> bool:
+        return item.title in self.__collectionProcessedCache[self.plexLibrarySettings.name]
 
     def _addCollectionToProcessedCache(self, item, pmmItem):
         if self.plexLibrarySettings.name not in self.__collectionProcessedCache.keys():
-            self.__collectionProcessedCache[self.plexLibrarySettings.name] = []
+            self.__collectionProcessedCache[self.plexLibrarySettings.name] = ReportSpool(self.plexServer, spoolToDisk=globalSettingsMgr.settings.output.streaming)
 
         if not self._isCollectionProcessed(item):
             tpdbEntry = {
@@ -481,26 +858,17 @@ class PlexLibraryProcessor:
                 "pmm": pmmItem if pmmItem is not None else {},
             }
 
-            self.__collectionProcessedCache[self.plexLibrarySettings.name].append(tpdbEntry)
+            self.__collectionProcessedCache[self.plexLibrarySettings.name].append(tpdbEntry["title"], tpdbEntry)
             
 
     def _isItemProcessed(self, item) -> bool:
-        it = next(
-            (
-                x
-                for x in self.__itemProcessedCache[self.plexLibrarySettings.name]
-                if x["title"] == PlexItemHelper.formatItemTitle(item)
-            ),
-            None,
-        )
-
-        return it is not None
+        return PlexItemHelper.formatItemTitle(item) in self.__itemProcessedCache[self.plexLibrarySettings.name]
 
     def _addItemToProcessedCache(self, collection, item, pmmItem):
         pi = PlexVideoHelper(item)
 
         if self.plexLibrarySettings.name not in self.__itemProcessedCache.keys():
-            self.__itemProcessedCache[self.plexLibrarySettings.name] = []
+            self.__itemProcessedCache[self.plexLibrarySettings.name] = ReportSpool(self.plexServer, spoolToDisk=globalSettingsMgr.settings.output.streaming)
 
         if not self._isItemProcessed(item):
             tpdbEntry = {
@@ -512,177 +880,157 @@ class PlexLibraryProcessor:
                 "pmm": pmmItem if pmmItem is not None else {},
             }
 
-            self.__itemProcessedCache[self.plexLibrarySettings.name].append(tpdbEntry)
+            self.__itemProcessedCache[self.plexLibrarySettings.name].append(tpdbEntry["title"], tpdbEntry, sortKey="{}:{}".format(tpdbEntry["collection"], tpdbEntry["title"]))
 
     def _sortCache(self):
-        self.__collectionProcessedCache[self.plexLibrarySettings.name] = sorted(
-            self.__collectionProcessedCache[self.plexLibrarySettings.name],
-            key=lambda x: x["title"],
-        )
-        
-        self.__itemProcessedCache[self.plexLibrarySettings.name] = sorted(
-            self.__itemProcessedCache[self.plexLibrarySettings.name], key=lambda x: "{}:{}".format(x["collection"], x["title"])
-        )
+        self.__collectionProcessedCache[self.plexLibrarySettings.name].sort()
+        self.__itemProcessedCache[self.plexLibrarySettings.name].sort()
 
     def _saveCollectionTemplates(self):
-        if not globalSettingsMgr.settings.generate.isTypeEnabled("collection.template"):
+        if not globalSettingsMgr.settings.templateLookup.isTypeEnabled("collection.template"):
             self._logger.debug("Skipping Collection Templates...")
             return
 
         self._logger.info("Saving Collection Templates...")
 
-        tplFiles = globalSettingsMgr.settings.templates.getTemplateByGroupAndLibraryType("collection", SettingsTemplateLibraryTypeEnum.TEMPLATE)
+        tplFiles = globalSettingsMgr.settings.templateLookup.getTemplates("collection", SettingsTemplateLibraryTypeEnum.TEMPLATE)
         if tplFiles is None:
             self._logger.warn("No Collection Templates for type '{}' specifed".format(self.plexLibrary.type))
 
             return
                     
         self._logger.debug(
-            "Template Files for Template Type '{}': {}".format(self.plexLibrary.type, jsonpickle.dumps(tplFiles, unpicklable=False))
+            "Template Files for Template Type '%s': %s", self.plexLibrary.type, LazyJson(tplFiles)
         )
 
         fileNameBase = PlexItemHelper.formatString(globalSettingsMgr.settings.output.fileNameFormat.template, library=self.plexLibrary, collection=None, item=None, cleanTitleStrings=True)
         
-        for tplFile in tplFiles:
+        for tplFile in globalSettingsMgr.settings.templateLookup.getEnabledTemplates("collection", SettingsTemplateLibraryTypeEnum.TEMPLATE):
             try:
-                if globalSettingsMgr.settings.generate.isFormatEnabled(tplFile.format) and globalSettingsMgr.settings.generate.isTypeEnabled(tplFile.type):
-                    
-                    if tplFile.subFolder is not None:
-                        fileName = Path(self.pathLibrary, "_templates", "{}.{}".format(fileNameBase, tplFile.fileExtension))
-                    else: 
-                        fileName = Path(self.pathLibrary, "_templates", "{}.{}".format(fileNameBase, tplFile.fileExtension))
-
-                    if not os.path.exists(fileName) or globalSettingsMgr.settings.output.overwrite:
-                        self.templateManager.renderAndSave(
-                            tplFile.fileName, fileName, tplArgs={
-                                                                "library": self.plexLibrary,
-                                                                # "settings": globalSettingsMgr.settings
-                                                            }
-                        )
-                    else:
-                        self._logger.warn("  Template File Name '{}' Exists. Skipping...".format(fileNameBase))
+                if tplFile.subFolder is not None:
+                    fileName = Path(self.pathLibrary, "_templates", "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                else: 
+                    fileName = Path(self.pathLibrary, "_templates", "{}.{}".format(fileNameBase, tplFile.fileExtension))
+
+                if self._isFileWriteRequired(fileName):
+                    self.templateManager.renderAndSave(
+                        tplFile.fileName, fileName, tplArgs={
+                                                            "library": self.plexLibrary,
+                                                            # "settings": globalSettingsMgr.settings
+                                                        }
+                    )
                 else:
-                    self._logger.debug("  Generating format '{}' for Template is not enabled. Skipping...".format(tplFile.format))
+                    self._logger.warn("  Template File Name '{}' Exists. Skipping...".format(fileNameBase))
             except:
                 self._logger.exception("Failed generating collection template: '{}'".format(tplFile.fileName))
 
     def _saveCollectionReport(self):
-        if not globalSettingsMgr.settings.generate.isTypeEnabled("report.any"):
+        if not globalSettingsMgr.settings.templateLookup.isTypeEnabled("report.any"):
             self._logger.debug("Skipping Saving Collection Report...")
             return
 
         self._logger.info("Saving Collection Report...")
 
-        tplFiles = globalSettingsMgr.settings.templates.getTemplateByGroupAndLibraryType("collection", SettingsTemplateLibraryTypeEnum.REPORT)
+        tplFiles = globalSettingsMgr.settings.templateLookup.getTemplates("collection", SettingsTemplateLibraryTypeEnum.REPORT)
         if tplFiles is None:
             self._logger.warn("No Collection Report Templates for type '{}' specifed".format(self.plexLibrary.type))
 
             return
                     
         self._logger.debug(
-            "Template Files for Report Type '{}': {}".format(self.plexLibrary.type, jsonpickle.dumps(tplFiles, unpicklable=False))
+            "Template Files for Report Type '%s': %s", self.plexLibrary.type, LazyJson(tplFiles)
         )
 
         fileNameBase = PlexItemHelper.formatString(globalSettingsMgr.settings.output.fileNameFormat.collectionsReport, library=self.plexLibrary, collection=None, item=None, cleanTitleStrings=True)
         
-        for tplFile in tplFiles:
+        for tplFile in globalSettingsMgr.settings.templateLookup.getEnabledTemplates("collection", SettingsTemplateLibraryTypeEnum.REPORT):
             try:
-                if globalSettingsMgr.settings.generate.isFormatEnabled(tplFile.format) and globalSettingsMgr.settings.generate.isTypeEnabled(tplFile.type):
-                    
-                    if tplFile.subFolder is not None:
-                        fileName = Path(self.pathLibrary, "reports", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
-                    else: 
-                        fileName = Path(self.pathLibrary, "reports", "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                if tplFile.subFolder is not None:
+                    fileName = Path(self.pathLibrary, "reports", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                else: 
+                    fileName = Path(self.pathLibrary, "reports", "{}.{}".format(fileNameBase, tplFile.fileExtension))
 
-                    if not os.path.exists(fileName) or globalSettingsMgr.settings.output.overwrite:
-                        self.templateManager.renderAndSave(
-                            tplFile.fileName, fileName, tplArgs=self._getTemplateArgs()
-                        )
-                    else:
-                        self._logger.warn("  Report File Name '{}' Exists. Skipping...".format(fileNameBase))
+                if self._isFileWriteRequired(fileName):
+                    self.templateManager.renderAndSave(
+                        tplFile.fileName, fileName, tplArgs=self._getTemplateArgs()
+                    )
                 else:
-                    self._logger.debug("  Generating format '{}' for Report is not enabled. Skipping...".format(tplFile.format))
+                    self._logger.warn("  Report File Name '{}' Exists. Skipping...".format(fileNameBase))
             except:
                 self._logger.exception("Failed generating collection report: '{}'".format(tplFile.fileName))
 
     def _saveItemReport(self):
-        if not globalSettingsMgr.settings.generate.isTypeEnabled("report.any"):
+        if not globalSettingsMgr.settings.templateLookup.isTypeEnabled("report.any"):
             self._logger.debug("Skipping Saving Item Report...")
             return
 
         self._logger.info("Saving Item Report...")
 
-        tplFiles = globalSettingsMgr.settings.templates.getTemplateByGroupAndLibraryType("metadata", SettingsTemplateLibraryTypeEnum.REPORT)
+        tplFiles = globalSettingsMgr.settings.templateLookup.getTemplates("metadata", SettingsTemplateLibraryTypeEnum.REPORT)
         if tplFiles is None:
             self._logger.warn("No Item Report Templates for type '{}' specifed".format(self.plexLibrary.type))
 
             return
                     
         self._logger.debug(
-            "Template Files for Report Type '{}': {}".format(self.plexLibrary.type, jsonpickle.dumps(tplFiles, unpicklable=False))
+            "Template Files for Report Type '%s': %s", self.plexLibrary.type, LazyJson(tplFiles)
         )
 
         fileNameBase = PlexItemHelper.formatString(globalSettingsMgr.settings.output.fileNameFormat.metadataReport, library=self.plexLibrary, collection=None, item=None, cleanTitleStrings=True)
 
-        for tplFile in tplFiles:
+        for tplFile in globalSettingsMgr.settings.templateLookup.getEnabledTemplates("metadata", SettingsTemplateLibraryTypeEnum.REPORT):
             try:
-                if globalSettingsMgr.settings.generate.isFormatEnabled(tplFile.format) and globalSettingsMgr.settings.generate.isTypeEnabled(tplFile.type):
-                    
-                    if tplFile.subFolder is not None:
-                        fileName = Path(self.pathLibrary, "reports", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
-                    else: 
-                        fileName = Path(self.pathLibrary, "reports", "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                if tplFile.subFolder is not None:
+                    fileName = Path(self.pathLibrary, "reports", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                else: 
+                    fileName = Path(self.pathLibrary, "reports", "{}.{}".format(fileNameBase, tplFile.fileExtension))
 
-                    if not os.path.exists(fileName) or globalSettingsMgr.settings.output.overwrite:
-                        self.templateManager.renderAndSave(
-                            tplFile.fileName, fileName, tplArgs=self._getTemplateArgs()
-                        )
-                    else:
-                        self._logger.warn("  Report File Name '{}' Exists. Skipping...".format(fileNameBase))
+                if self._isFileWriteRequired(fileName):
+                    self.templateManager.renderAndSave(
+                        tplFile.fileName, fileName, tplArgs=self._getTemplateArgs()
+                    )
                 else:
-                    self._logger.debug("  Generating format '{}' for Report is not enabled. Skipping...".format(tplFile.format))
+                    self._logger.warn("  Report File Name '{}' Exists. Skipping...".format(fileNameBase))
             except:
                 self._logger.exception("Failed generating item report: '{}'".format(tplFile.fileName))
 
+    @traceFunction("report", "report", getArgs=lambda self, reportGroup, outputFormatString: {"report": reportGroup})
     def _saveReport(self, reportGroup : str, outputFormatString : str):
-        if not globalSettingsMgr.settings.generate.isTypeEnabled("report.any") and not globalSettingsMgr.settings.generate.isTypeEnabled(f"{reportGroup}.report"):
+        if not globalSettingsMgr.settings.templateLookup.isTypeEnabled("report.any") and not globalSettingsMgr.settings.templateLookup.isTypeEnabled(f"{reportGroup}.report"):
             self._logger.info(f"Skipping Saving {reportGroup} Report...")
             return
 
         self._logger.info(f"Saving {reportGroup} Report...")
 
-        tplFiles = globalSettingsMgr.settings.templates.getTemplateByGroupAndLibraryType(reportGroup, SettingsTemplateLibraryTypeEnum.REPORT)
+        tplFiles = globalSettingsMgr.settings.templateLookup.getTemplates(reportGroup, SettingsTemplateLibraryTypeEnum.REPORT)
         if tplFiles is None:
             self._logger.warn("No Item Report Templates for type '{}' specifed".format(self.plexLibrary.type))
 
             return
                     
         self._logger.debug(
-            "Template Files for Report Type '{}': {}".format(self.plexLibrary.type, jsonpickle.dumps(tplFiles, unpicklable=False))
+            "Template Files for Report Type '%s': %s", self.plexLibrary.type, LazyJson(tplFiles)
         )
 
         fileNameBase = PlexItemHelper.formatString(outputFormatString, library=self.plexLibrary, collection=None, item=None, cleanTitleStrings=True)
 
-        for tplFile in tplFiles:
+        for tplFile in globalSettingsMgr.settings.templateLookup.getEnabledTemplates(reportGroup, SettingsTemplateLibraryTypeEnum.REPORT):
             try:
-                self._logger.debug("Processing Report Template: '{}'".format(tplFile.fileName))
+                self._logger.debug("Processing Report Template: '%s'", tplFile.fileName)
                 
-                if globalSettingsMgr.settings.generate.isFormatEnabled(tplFile.format) and globalSettingsMgr.settings.generate.isTypeEnabled(tplFile.type):
-                    self._logger.info("  Generating format '{}' for Report".format(tplFile.format))
-                    
-                    if tplFile.subFolder is not None:
-                        fileName = Path(self.pathLibrary, "reports", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
-                    else: 
-                        fileName = Path(self.pathLibrary, "reports", "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                self._logger.info("  Generating format '{}' for Report".format(tplFile.format))
+                
+                if tplFile.subFolder is not None:
+                    fileName = Path(self.pathLibrary, "reports", tplFile.subFolder, "{}.{}".format(fileNameBase, tplFile.fileExtension))
+                else: 
+                    fileName = Path(self.pathLibrary, "reports", "{}.{}".format(fileNameBase, tplFile.fileExtension))
 
-                    if not os.path.exists(fileName) or globalSettingsMgr.settings.output.overwrite:
-                        self.templateManager.renderAndSave(
-                            tplFile.fileName, fileName, tplArgs=self._getTemplateArgs()
-                        )
-                    else:
-                        self._logger.warn("  Report File Name '{}' Exists. Skipping...".format(fileNameBase))
+                if self._isFileWriteRequired(fileName):
+                    self.templateManager.renderAndSave(
+                        tplFile.fileName, fileName, tplArgs=self._getTemplateArgs()
+                    )
                 else:
-                    self._logger.info("  Generating format '{}' for Report is not enabled. Skipping...".format(tplFile.format))
+                    self._logger.warn("  Report File Name '{}' Exists. Skipping...".format(fileNameBase))
             except:
                 self._logger.exception("Failed generating report: '{}'".format(tplFile.fileName))
 
@@ -716,6 +1064,32 @@ class PlexLibraryProcessor:
             "  Items Skipped: {}".format(self.__stats.countsProgram.items.skipped)
         )
 
+        self._logger.info(
+            "  Files Written: {}, Unchanged: {}, Up To Date: {}, Skipped: {}".format(
+                self.__stats.files.written, self.__stats.files.unchanged, self.__stats.files.upToDate, self.__stats.files.skipped
+            )
+        )
+
+        if self.__stats.tmdb.lookups > 0:
+            self._logger.info(
+                "  TMDb Lookups: {}, Cache Hits: {} ({} without results), Hit Rate: {:.0%}".format(
+                    self.__stats.tmdb.lookups, self.__stats.tmdb.hits + self.__stats.tmdb.negativeHits, self.__stats.tmdb.negativeHits, self.__stats.tmdb.hitRate
+                )
+            )
+
+        for kind, listStats in self.__stats.lists.items():
+            if listStats.lookups > 0:
+                self._logger.info(
+                    "  Lookups ({}): {}, Cache Hits: {} ({} without results), Hit Rate: {:.0%}".format(
+                        kind, listStats.lookups, listStats.hits + listStats.negativeHits, listStats.negativeHits, listStats.hitRate
+                    )
+                )
+
+        self._displayHttpStats()
+        self._displayReloads()
+        self._displayRenderCosts()
+        self._displaySlowItems()
+
         for libraryName in self.__stats.timerLibraries.keys():
             try:
                 libraryTimer = self.__stats.timerLibraries[libraryName]
@@ -767,13 +1141,157 @@ class PlexLibraryProcessor:
 
         self._logger.info("-" * 50)
 
+    def _displayHttpStats(self, topEndpoints: int = 5):
+        total = self.__stats.http.getTotals().get("total")
+
+        if total is None:
+            return
+
+        self._logger.info(
+            "  Plex Requests: {}, Errors: {}, Time: {:.1f}s, Received: {:.1f} MB, Latency p50: {}, p95: {}, max: {:.0f}ms".format(
+                total.count, total.errors, total.seconds, total.bytes / 1024 / 1024,
+                self.__formatLatency(total.percentile(0.5)), self.__formatLatency(total.percentile(0.95)), total.maxSeconds * 1000
+            )
+        )
+
+        for phase, entry in sorted(self.__stats.http.getTotals("phase").items(), key=lambda x: x[1].seconds, reverse=True):
+            self._logger.info(
+                "    Phase '{}': {} requests, {:.1f}s, {:.1f} KB, p95: {}".format(
+                    phase, entry.count, entry.seconds, entry.bytes / 1024, self.__formatLatency(entry.percentile(0.95))
+                )
+            )
+
+        for endpoint, entry in sorted(self.__stats.http.getTotals("endpoint").items(), key=lambda x: x[1].seconds, reverse=True)[:topEndpoints]:
+            self._logger.info(
+                "    Endpoint '{}': {} requests, {:.1f}s, {:.1f} KB".format(endpoint, entry.count, entry.seconds, entry.bytes / 1024)
+            )
+
+    def _displayReloads(self, top: int = 20):
+        """
+         Show the template attributes that cost the most round trips ( implicit reloads of partial plex objects )
+        """
+        if len(self.__stats.reloads) == 0:
+            return
+
+        self._logger.info(
+            "  Implicit Reloads: {}, Time: {:.1f}s. Top attributes by round trips:".format(
+                sum([x["count"] for x in self.__stats.reloads]), sum([x["seconds"] for x in self.__stats.reloads])
+            )
+        )
+
+        self._logger.info("    {:>7} {:>8}  {:<40} {:<12} {}".format("Count", "Seconds", "Template", "Type", "Attribute"))
+
+        for reload in self.__stats.reloads[:top]:
+            self._logger.info(
+                "    {:>7} {:>8.2f}  {:<40} {:<12} {}".format(reload["count"], reload["seconds"], reload["template"], reload["type"], reload["attribute"])
+            )
+
+    def _displayRenderCosts(self, top: int = 10):
+        """
+         Show the templates and filters that took the most time ( e.g. a filter that is called in a loop )
+        """
+        for group, title in [("templates", "Templates"), ("filters", "Filters")]:
+            ranked = self.__stats.render.getRanked(group)
+
+            if len(ranked) == 0:
+                continue
+
+            self._logger.info(
+                "  Render Cost ({}): {} calls, Time: {:.1f}s. Top {} by time:".format(
+                    title, sum([x[1].count for x in ranked]), sum([x[1].seconds for x in ranked]), len(ranked[:top])
+                )
+            )
+
+            self._logger.info("    {:>7} {:>8} {:>9} {:>9} {:>9}  {}".format("Calls", "Seconds", "Avg ms", "p95 ms", "KB", "Name"))
+
+            for name, entry in ranked[:top]:
+                p95 = entry.percentile(0.95)
+
+                self._logger.info(
+                    "    {:>7} {:>8.2f} {:>9.2f} {:>9.2f} {:>9}  {}{}".format(
+                        entry.count, entry.seconds, entry.seconds / entry.count * 1000, (p95 or 0) * 1000,
+                        "{:.1f}".format(entry.bytes / 1024) if group == "templates" else "-",
+                        name, " ({} errors)".format(entry.errors) if entry.errors > 0 else ""
+                    )
+                )
+
+    def _displaySlowItems(self):
+        """
+         Show the slowest collections and items with the breakdown of their time ( fetch, render, write )
+        """
+        for kind, title in [(EVENT_COLLECTION, "Collections"), (EVENT_COLLECTION_ITEMS, "Collection Items"), (EVENT_ITEM, "Items")]:
+            events = self.__stats.slowest.get(kind, [])
+
+            if len(events) == 0:
+                continue
+
+            self._logger.info("  Slowest {} (top {}):".format(title, len(events)))
+            self._logger.info("    {:>8} {:>8} {:>8} {:>8} {:>8} {:>6}  {}".format("Seconds", "Fetch", "Render", "Write", "Requests", "Items", "Title"))
+
+            for event in events:
+                self._logger.info(
+                    "    {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>8} {:>6}  {} ({}){}".format(
+                        event["seconds"], event["fetchSeconds"], event["renderSeconds"], event["writeSeconds"], event["requests"], event["items"],
+                        event["title"], event["library"], " [Skipped: {}]".format(event["skipReason"]) if event["skipReason"] is not None else ""
+                    )
+                )
+
+    @staticmethod
+    def __formatLatency(seconds: float | None) -> str:
+        return "<= {:.0f}ms".format(seconds * 1000) if seconds is not None else "n/a"
+
+    def _saveStatsFile(self):
+        """
+         Write the statistics of the run to the stats file ( if one is configured )
+        """
+        statsFile = globalSettingsMgr.settings.output.statsFile
+
+        if statsFile is None:
+            return
+
+        try:
+            p = Path(statsFile)
+            p.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(p, "w") as fp:
+                json.dump(self.__stats.toJson(), fp, indent=2)
+
+            self._logger.info("Statistics saved to '{}'".format(p))
+        except:
+            self._logger.exception("Error writing stats file '{}'".format(statsFile))
+
+    def _saveMetrics(self):
+        """
+         Write the metrics of the run to the Prometheus textfile and add the run to the run history ( if configured )
+        """
+        metricsFile = globalSettingsMgr.settings.output.metricsFile
+
+        if metricsFile is not None:
+            try:
+                writePrometheusFile(metricsFile, self.__stats)
+
+                self._logger.info("Metrics saved to '{}'".format(metricsFile))
+            except:
+                self._logger.exception("Error writing metrics file '{}'".format(metricsFile))
+
+        historyFile = globalSettingsMgr.settings.output.historyFile
+
+        if historyFile is not None:
+            try:
+                runId = saveRunHistory(historyFile, self.__stats)
+
+                self._logger.info("Run {} added to the run history '{}'".format(runId, historyFile))
+            except:
+                self._logger.exception("Error adding the run to the run history '{}'".format(historyFile))
+
     def _getTemplateArgs(self):
         return {
             "library": self.plexLibrary,
             "collections": self.__collectionProcessedCache[self.plexLibrarySettings.name],
             "items": self.__itemProcessedCache[self.plexLibrarySettings.name],
             "stats": self.__stats.countsLibraries[self.plexLibrarySettings.name].toJson(),
-            "processingTime": self.__stats.timerLibraries[self.plexLibrarySettings.name].to_dict()
+            "processingTime": self.__stats.timerLibraries[self.plexLibrarySettings.name].to_dict(),
+            "renderCost": self.__stats.render.toJson(),
         }
         
     # def _unlockAllLibraryFields(self):
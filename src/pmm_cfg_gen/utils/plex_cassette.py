@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import base64
+import collections
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+
+###################################################################################################
+
+CASSETTE_VERSION = 1
+
+# Cassette modes ( plex.cassetteMode )
+CASSETTE_RECORD = "record"
+CASSETTE_REPLAY = "replay"
+
+# Query parameters and headers left out of the request key ( the token must never end up in a cassette )
+_IGNORED_PARAMETERS = ["x-plex-token"]
+
+# Headers that select a different response for the same url
+_KEY_HEADERS = ["X-Plex-Container-Start", "X-Plex-Container-Size"]
+
+# Response headers describing the encoding of the body on the wire, the cassette stores the decoded body
+_IGNORED_RESPONSE_HEADERS = ["content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"]
+
+
+def getRequestKey(method: str | None, url: str | None, headers=None, body=None) -> str:
+    """
+     Get the key a request is recorded and replayed by ( method, path and sorted query without the token and the
+     paging headers ). The server address is not part of the key, so a cassette replays against any server url
+    """
+    parts = urllib.parse.urlsplit(url or "")
+
+    parameters = sorted([
+        (name, value)
+        for name, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in _IGNORED_PARAMETERS
+    ])
+
+    for name in _KEY_HEADERS:
+        value = headers.get(name) if headers is not None else None
+
+        if value is not None and not any([x[0] == name for x in parameters]):
+            parameters.append((name, str(value)))
+
+    key = "{} {}".format((method or "GET").upper(), parts.path or "/")
+
+    if len(parameters) > 0:
+        key += "?" + urllib.parse.urlencode(sorted(parameters))
+
+    if body:
+        key += " #{}".format(hashlib.sha1(body if isinstance(body, bytes) else str(body).encode("utf-8")).hexdigest()[:12])
+
+    return key
+
+
+class PlexCassetteInteraction:
+    """
+     A recorded plex request and its response
+    """
+    __slots__ = ["key", "status", "reason", "headers", "content", "seconds"]
+
+    def __init__(self, key: str, status: int, reason: str | None, headers: dict, content: bytes, seconds: float) -> None:
+        self.key = key
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.seconds = seconds
+
+    def toJson(self):
+        data = {
+            "key": self.key,
+            "status": self.status,
+            "reason": self.reason,
+            "headers": self.headers,
+            "seconds": round(self.seconds, 4),
+        }
+
+        try:
+            data["text"] = self.content.decode("utf-8")
+        except UnicodeDecodeError:
+            data["base64"] = base64.b64encode(self.content).decode("ascii")
+
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        if "base64" in data:
+            content = base64.b64decode(data["base64"])
+        else:
+            content = (data.get("text") or "").encode("utf-8")
+
+        return cls(
+            data["key"],
+            data["status"],
+            data.get("reason"),
+            data.get("headers") or {},
+            content,
+            data.get("seconds") or 0,
+        )
+
+    @classmethod
+    def from_response(cls, request: requests.PreparedRequest, response: requests.Response, seconds: float):
+        return cls(
+            getRequestKey(request.method, request.url, request.headers, request.body),
+            response.status_code,
+            response.reason,
+            {name: value for name, value in response.headers.items() if name.lower() not in _IGNORED_RESPONSE_HEADERS},
+            response.content or b"",
+            seconds,
+        )
+
+    def toResponse(self, request: requests.PreparedRequest) -> requests.Response:
+        response = requests.Response()
+        response.status_code = self.status
+        response.reason = self.reason  # type: ignore
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.content
+        response.encoding = "utf-8"
+        response.url = request.url  # type: ignore
+        response.request = request
+
+        return response
+
+
+class PlexCassette:
+    """
+     Every plex request and response of a run. While recording the interactions are kept in memory and written ( gzip
+     compressed json ) when the run ends, while replaying the responses are served in recorded order per request key
+     ( the last one repeats once a key runs out )
+    """
+    _logger: logging.Logger
+
+    fileName: Path | None
+    mode: str
+    latency: bool
+
+    __interactions: list[PlexCassetteInteraction]
+    __replay: dict[str, collections.deque]
+    __lock: threading.Lock
+    __misses: dict[str, int]
+
+    def __init__(self, fileName: str | Path | None, mode: str, latency: bool = False) -> None:
+        """
+         @param fileName - The cassette file
+         @param mode - L { CASSETTE_RECORD } or L { CASSETTE_REPLAY }
+         @param latency - Wait the recorded response time of each request while replaying
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.fileName = Path(fileName) if fileName is not None else None
+        self.mode = mode
+        self.latency = latency
+
+        self.__interactions = []
+        self.__replay = {}
+        self.__lock = threading.Lock()
+        self.__misses = {}
+
+    @property
+    def isRecording(self) -> bool:
+        return self.mode == CASSETTE_RECORD
+
+    @property
+    def isReplaying(self) -> bool:
+        return self.mode == CASSETTE_REPLAY
+
+    @property
+    def interactions(self) -> list[PlexCassetteInteraction]:
+        return self.__interactions
+
+    @property
+    def misses(self) -> dict[str, int]:
+        return self.__misses
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response, seconds: float):
+        interaction = PlexCassetteInteraction.from_response(request, response, seconds)
+
+        with self.__lock:
+            self.__interactions.append(interaction)
+
+    def merge(self, interactions: list[PlexCassetteInteraction]):
+        """
+         Add the interactions recorded by a render worker
+        """
+        with self.__lock:
+            self.__interactions.extend(interactions)
+
+    def drain(self) -> list[PlexCassetteInteraction]:
+        """
+         Take the interactions recorded since the last drain ( render workers return them with each job )
+        """
+        with self.__lock:
+            interactions = self.__interactions
+            self.__interactions = []
+
+        return interactions
+
+    def play(self, request: requests.PreparedRequest) -> requests.Response:
+        """
+         Get the recorded response of a request ( 404 if the request was not recorded )
+        """
+        key = getRequestKey(request.method, request.url, request.headers, request.body)
+
+        with self.__lock:
+            responses = self.__replay.get(key)
+
+            if responses is None or len(responses) == 0:
+                self.__misses[key] = self.__misses.get(key, 0) + 1
+
+                interaction = None
+            elif len(responses) > 1:
+                interaction = responses.popleft()
+            else:
+                interaction = responses[0]
+
+        if interaction is None:
+            self._logger.warning("Request not found in plex cassette: %s", key)
+
+            return PlexCassetteInteraction(key, 404, "Not Found", {}, b"", 0).toResponse(request)
+
+        if self.latency and interaction.seconds > 0:
+            time.sleep(interaction.seconds)
+
+        return interaction.toResponse(request)
+
+    def toJson(self):
+        return {
+            "version": CASSETTE_VERSION,
+            "recorded": datetime.datetime.now().isoformat(timespec="seconds"),
+            "interactions": [x.toJson() for x in self.__interactions],
+        }
+
+    def save(self, fileName: str | Path | None = None):
+        fileName = Path(fileName) if fileName is not None else self.fileName
+
+        if fileName is None:
+            return
+
+        fileName.parent.mkdir(parents=True, exist_ok=True)
+
+        with self.__lock:
+            data = json.dumps(self.toJson())
+
+        with gzip.open(fileName, "wt", encoding="utf-8") as fp:
+            fp.write(data)
+
+        self._logger.info("Plex cassette saved: {} ({} requests)".format(fileName, len(self.__interactions)))
+
+    @classmethod
+    def load(cls, fileName: str | Path, latency: bool = False):
+        """
+         Load a cassette for replaying
+        """
+        with gzip.open(fileName, "rt", encoding="utf-8") as fp:
+            data = json.load(fp)
+
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError("Unsupported plex cassette version: {}".format(data.get("version")))
+
+        cassette = cls(fileName, CASSETTE_REPLAY, latency)
+        cassette.__interactions = [PlexCassetteInteraction.from_dict(x) for x in data["interactions"]]
+
+        for interaction in cassette.__interactions:
+            cassette.__replay.setdefault(interaction.key, collections.deque()).append(interaction)
+
+        cassette._logger.info("Plex cassette loaded: {} ({} requests)".format(fileName, len(cassette.__interactions)))
+
+        return cassette
+
+
+class PlexCassetteAdapter(requests.adapters.BaseAdapter):
+    """
+     Transport adapter answering every request from a cassette ( nothing is sent over the network )
+    """
+    cassette: PlexCassette
+
+    def __init__(self, cassette: PlexCassette) -> None:
+        super().__init__()
+
+        self.cassette = cassette
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        return self.cassette.play(request)
+
+    def close(self):
+        pass
+
+###################################################################################################
+
+_cassette: PlexCassette | None = None
+
+
+def startPlexCassette(fileName: str | None, mode: str | None, latency: bool = False) -> PlexCassette | None:
+    """
+     Start recording or replaying plex requests ( does nothing without a file or mode )
+
+     @param fileName - The cassette file
+     @param mode - L { CASSETTE_RECORD } or L { CASSETTE_REPLAY }
+     @param latency - Wait the recorded response time of each request while replaying
+    """
+    global _cassette
+
+    if fileName is None or mode not in [CASSETTE_RECORD, CASSETTE_REPLAY]:
+        _cassette = None
+    elif mode == CASSETTE_REPLAY:
+        _cassette = PlexCassette.load(fileName, latency)
+    else:
+        _cassette = PlexCassette(fileName, mode)
+
+    return _cassette
+
+
+def getPlexCassette() -> PlexCassette | None:
+    return _cassette
+
+
+def stopPlexCassette():
+    """
+     Stop the cassette, a recorded cassette is saved
+    """
+    global _cassette
+
+    if _cassette is not None:
+        if _cassette.isRecording:
+            _cassette.save()
+        elif len(_cassette.misses) > 0:
+            _cassette._logger.warning("Plex requests not found in cassette: {}".format(sum(_cassette.misses.values())))
+
+        _cassette = None
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+
+import requests
+from plexapi.base import PlexPartialObject
+
+from pmm_cfg_gen.utils.tracing import traceSpan
+from pmm_cfg_gen.utils.item_events import countEventRequest
+from pmm_cfg_gen.utils.plex_cassette import PlexCassette, PlexCassetteAdapter
+
+###################################################################################################
+
+# Rating keys, section ids and image timestamps in a path ( e.g. /library/metadata/123,456/children )
+ID_PATTERN = re.compile(r"/\d+(?:,\d+)*(?=/|$)")
+
+# Phase of requests made by plexapi while loading a missing attribute of a partial object
+PHASE_IMPLICIT_RELOAD = "implicit reload"
+
+# Code of the attribute access that reloads partial objects, see L { isImplicitReload }
+_AUTO_RELOAD_CODE = PlexPartialObject.__getattribute__.__code__
+
+
+def classifyEndpoint(url: str) -> str:
+    """
+     Get the endpoint class of a request ( path without the query, ids replaced by {id} )
+
+     @param url - The request url
+    """
+    return ID_PATTERN.sub("/{id}", urllib.parse.urlsplit(url).path) or "/"
+
+
+def isImplicitReload(maxDepth: int = 40) -> bool:
+    """
+     Check if the current request was made by plexapi reloading a partial object because a missing attribute was read
+    """
+    frame = sys._getframe(1)
+    callee = None
+
+    while frame is not None and maxDepth > 0:
+        # Properties that fetch data also run inside __getattribute__, only a call to _reload from it is a reload ( matched
+        # by name, the reload detector replaces _reload )
+        if frame.f_code is _AUTO_RELOAD_CODE and callee is not None and callee.f_code.co_name == "_reload":
+            return True
+
+        callee = frame
+        frame = frame.f_back
+        maxDepth -= 1
+
+    return False
+
+
+class PlexHttpStatsEntry:
+    """
+     Request count, statuses, latency histogram and response bytes of one endpoint class in one phase
+    """
+    # Upper bounds of the latency buckets in seconds ( the last bucket counts everything slower )
+    BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+    count: int
+    errors: int
+    statuses: dict[str, int]
+    seconds: float
+    maxSeconds: float
+    bytes: int
+    buckets: list[int]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.statuses = {}
+        self.seconds = 0
+        self.maxSeconds = 0
+        self.bytes = 0
+        self.buckets = [0] * (len(PlexHttpStatsEntry.BUCKETS) + 1)
+
+    def add(self, status: str, seconds: float, size: int):
+        """
+         @param status - The http status code ( or the exception name if the request failed )
+         @param seconds - The request latency including reading the response
+         @param size - The response size in bytes
+        """
+        self.count += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.seconds += seconds
+        self.maxSeconds = max(self.maxSeconds, seconds)
+        self.bytes += size
+
+        if not status.isdigit() or int(status) >= 400:
+            self.errors += 1
+
+        bucket = 0
+        while bucket < len(PlexHttpStatsEntry.BUCKETS) and seconds > PlexHttpStatsEntry.BUCKETS[bucket]:
+            bucket += 1
+
+        self.buckets[bucket] += 1
+
+    def merge(self, other: "PlexHttpStatsEntry"):
+        self.count += other.count
+        self.errors += other.errors
+        self.seconds += other.seconds
+        self.maxSeconds = max(self.maxSeconds, other.maxSeconds)
+        self.bytes += other.bytes
+
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+        for bucket, count in enumerate(other.buckets):
+            self.buckets[bucket] += count
+
+    def percentile(self, q: float) -> float | None:
+        """
+         Estimate a latency percentile from the histogram ( upper bound of the bucket it falls in )
+
+         @param q - The percentile ( 0 - 1 )
+        """
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        seen = 0
+
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+
+            if seen >= rank:
+                return PlexHttpStatsEntry.BUCKETS[bucket] if bucket < len(PlexHttpStatsEntry.BUCKETS) else self.maxSeconds
+
+        return self.maxSeconds
+
+    def toJson(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "statuses": dict(sorted(self.statuses.items())),
+            "seconds": round(self.seconds, 4),
+            "maxSeconds": round(self.maxSeconds, 4),
+            "bytes": self.bytes,
+            "histogram": {
+                **{str(bound): count for bound, count in zip(PlexHttpStatsEntry.BUCKETS, self.buckets)},
+                "+Inf": self.buckets[-1],
+            },
+        }
+
+
+class PlexHttpStats:
+    """
+     Statistics of the requests made against the plex server, by library, phase and endpoint class. The processor sets
+     the current library and phase, L { phase } overrides it for the requests of one block of code ( per thread )
+    """
+    library: str | None
+    currentPhase: str
+
+    __entries: dict[tuple[str | None, str, str], PlexHttpStatsEntry]
+    __lock: threading.Lock
+    __local: threading.local
+
+    def __init__(self, phase: str = "connect") -> None:
+        self.library = None
+        self.currentPhase = phase
+
+        self.__entries = {}
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+    @property
+    def entries(self) -> dict[tuple[str | None, str, str], PlexHttpStatsEntry]:
+        return self.__entries
+
+    def setPhase(self, library: str | None, phase: str):
+        self.library = library
+        self.currentPhase = phase
+
+    @contextmanager
+    def phase(self, phase: str):
+        """
+         Attribute the requests made by the current thread inside the block to a phase ( e.g. "seasons" )
+        """
+        previous = getattr(self.__local, "phase", None)
+        self.__local.phase = phase
+
+        try:
+            yield
+        finally:
+            self.__local.phase = previous
+
+    def record(self, endpoint: str, status: str, seconds: float, size: int, implicitReload: bool = False):
+        """
+         Record a request in the current library and phase
+        """
+        if implicitReload:
+            phase = PHASE_IMPLICIT_RELOAD
+        else:
+            phase = getattr(self.__local, "phase", None) or self.currentPhase
+
+        key = (self.library, phase, endpoint)
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                entry = self.__entries[key] = PlexHttpStatsEntry()
+
+            entry.add(status, seconds, size)
+
+    def merge(self, entries: dict[tuple[str | None, str, str], PlexHttpStatsEntry], library: str | None = None):
+        """
+         Merge the entries recorded by another process ( render workers )
+
+         @param library - Library of entries that were recorded without one
+        """
+        with self.__lock:
+            for (entryLibrary, phase, endpoint), other in entries.items():
+                key = (entryLibrary if entryLibrary is not None else library, phase, endpoint)
+
+                entry = self.__entries.get(key)
+                if entry is None:
+                    entry = self.__entries[key] = PlexHttpStatsEntry()
+
+                entry.merge(other)
+
+    def drain(self) -> dict[tuple[str | None, str, str], PlexHttpStatsEntry]:
+        """
+         Take the recorded entries ( and start over )
+        """
+        with self.__lock:
+            entries = self.__entries
+            self.__entries = {}
+
+        return entries
+
+    def getTotals(self, by: str | None = None) -> dict[str, PlexHttpStatsEntry]:
+        """
+         Sum the entries
+
+         @param by - Group by "library", "phase" or "endpoint" ( None for the grand total under the key "total" )
+        """
+        index = {"library": 0, "phase": 1, "endpoint": 2}.get(by) if by is not None else None  # type: ignore
+
+        totals: dict[str, PlexHttpStatsEntry] = {}
+
+        with self.__lock:
+            for key, entry in self.__entries.items():
+                group = str(key[index]) if index is not None else "total"
+
+                if group not in totals:
+                    totals[group] = PlexHttpStatsEntry()
+
+                totals[group].merge(entry)
+
+        return totals
+
+    def toJson(self):
+        total = self.getTotals().get("total", PlexHttpStatsEntry())
+
+        libraries: dict[str, dict] = {}
+
+        with self.__lock:
+            for (library, phase, endpoint), entry in sorted(self.__entries.items(), key=lambda x: (str(x[0][0]), x[0][1], x[0][2])):
+                libraries.setdefault(str(library), {}).setdefault(phase, {})[endpoint] = entry.toJson()
+
+        return {
+            "total": total.toJson(),
+            "phases": {k: v.toJson() for k, v in sorted(self.getTotals("phase").items())},
+            "endpoints": {k: v.toJson() for k, v in sorted(self.getTotals("endpoint").items())},
+            "libraries": libraries,
+        }
+
+
+class InstrumentedSession(requests.Session):
+    """
+     Session that records every request made by plexapi ( endpoint class, status, latency and response size ) in
+     L { PlexHttpStats }, and records them in or replays them from a L { PlexCassette }
+    """
+    stats: PlexHttpStats
+    cassette: PlexCassette | None
+
+    def __init__(self, stats: PlexHttpStats, cassette: PlexCassette | None = None) -> None:
+        super().__init__()
+
+        self.stats = stats
+        self.cassette = cassette
+
+        # Replayed requests never reach the network
+        if self.cassette is not None and self.cassette.isReplaying:
+            adapter = PlexCassetteAdapter(self.cassette)
+
+            self.mount("http://", adapter)
+            self.mount("https://", adapter)
+
+    def send(self, request, **kwargs):
+        endpoint = classifyEndpoint(request.url or "")
+        implicitReload = isImplicitReload()
+
+        countEventRequest()
+
+        start = time.perf_counter()
+
+        try:
+            with traceSpan("plex.request", "http", endpoint=endpoint):
+                response = super().send(request, **kwargs)
+        except Exception as e:
+            self.stats.record(endpoint, type(e).__name__, time.perf_counter() - start, 0, implicitReload)
+
+            raise
+
+        # The body was read by send unless the response is streamed
+        if kwargs.get("stream"):
+            size = int(response.headers.get("Content-Length") or 0)
+        else:
+            size = len(response.content or b"")
+
+        seconds = time.perf_counter() - start
+
+        self.stats.record(endpoint, str(response.status_code), seconds, size, implicitReload)
+
+        if self.cassette is not None and self.cassette.isRecording and not kwargs.get("stream"):
+            self.cassette.record(request, response, seconds)
+
+        return response
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import io
+import pickle
+from typing import Any, Callable
+
+from plexapi.base import PlexObject
+from plexapi.server import PlexServer
+
+###################################################################################################
+
+
+def _restorePlexObject(cls, server: PlexServer | None, state: dict) -> PlexObject:
+    """
+     Rebuild a plex object from the state stored by L { PlexObjectPickler }
+
+     @param cls - The plex object class
+     @param server - The server the object is bound to
+     @param state - The object's attributes ( without server and parent references )
+
+     @return The rebuilt plex object
+    """
+    obj = cls.__new__(cls)
+
+    # Bypass PlexObject.__setattr__ so the stored state is restored as is
+    obj.__dict__.update(state)
+    obj.__dict__["_server"] = server
+    obj.__dict__["_parent"] = None
+
+    return obj
+
+
+class PlexObjectPickler(pickle.Pickler):
+    """
+     Pickler that stores plex objects by their attributes. The server ( and its http session ) is stored by reference
+     and the weak parent reference is dropped, so objects can be written to disk or sent to another process
+    """
+    server: PlexServer | None = None
+
+    def persistent_id(self, obj):
+        """
+         Store the plex server by reference so it is never pickled
+
+         @param obj - The object being pickled
+
+         @return The persistent id for the server or None to pickle the object normally
+        """
+        if isinstance(obj, PlexServer):
+            self.server = obj
+
+            return "server"
+
+        return None
+
+    def reducer_override(self, obj):
+        """
+         Pickle plex objects by their attributes, dropping the server and the ( weak ) parent reference. The items of
+         list based plex objects ( MediaContainer ) are pickled as list items and restored with extend
+
+         @param obj - The object being pickled
+
+         @return The reduce tuple for plex objects or NotImplemented to pickle the object normally
+        """
+        if isinstance(obj, PlexObject) and not isinstance(obj, PlexServer):
+            state = {k: v for k, v in obj.__dict__.items() if k not in ("_server", "_parent")}
+
+            return (_restorePlexObject, (type(obj), obj._server, state), None, iter(obj) if isinstance(obj, list) else None)
+
+        return NotImplemented
+
+
+class PlexObjectUnpickler(pickle.Unpickler):
+    """
+     Unpickler for data written by L { PlexObjectPickler }. Plex objects are bound to the given server, or to the server
+     returned by serverFactory ( only called when the data actually references a server )
+    """
+    __server: PlexServer | None
+    __serverFactory: Callable[[], PlexServer | None] | None
+
+    def __init__(self, file, server: PlexServer | None = None, serverFactory: Callable[[], PlexServer | None] | None = None) -> None:
+        super().__init__(file)
+
+        self.__server = server
+        self.__serverFactory = serverFactory
+
+    def persistent_load(self, pid):
+        if pid != "server":
+            raise pickle.UnpicklingError("Unsupported persistent id: {}".format(pid))
+
+        if self.__server is None and self.__serverFactory is not None:
+            self.__server = self.__serverFactory()
+
+        return self.__server
+
+
+def dumpsPlexObjects(data: Any) -> bytes:
+    """
+     Pickle data that may contain plex objects
+
+     @param data - The data to pickle
+
+     @return The pickled data
+    """
+    buffer = io.BytesIO()
+
+    PlexObjectPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(data)
+
+    return buffer.getvalue()
+
+
+def loadsPlexObjects(data: bytes, server: PlexServer | None = None, serverFactory: Callable[[], PlexServer | None] | None = None) -> Any:
+    """
+     Unpickle data written by L { dumpsPlexObjects }
+
+     @param data - The pickled data
+     @param server - The server plex objects are bound to
+     @param serverFactory - Called to create the server the first time one is needed ( if server is None )
+
+     @return The unpickled data
+    """
+    return PlexObjectUnpickler(io.BytesIO(data), server=server, serverFactory=serverFactory).load()
+
+
+def copyPlexObjects(data: Any) -> Any:
+    """
+     Copy data that may contain plex objects by pickling it ( the copies are bound to the same server ). Later reloads
+     of the original objects do not change the copy
+
+     @param data - The data to copy
+
+     @return The copied data
+    """
+    buffer = io.BytesIO()
+
+    pickler = PlexObjectPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dump(data)
+
+    return PlexObjectUnpickler(io.BytesIO(buffer.getvalue()), server=pickler.server).load()
@@ -7,6 +7,9 @@ import json
 
 import jsonpickle
 from pmm_cfg_gen.utils.timer import timer
+from pmm_cfg_gen.utils.lookup_cache import LookupCacheStats
+from pmm_cfg_gen.utils.plex_http import PlexHttpStats
+from pmm_cfg_gen.utils.render_cost import RenderCostStats, getRenderCostStats
 
 ###################################################################################################
 
@@ -81,11 +84,17 @@ class PlexStatsLibraryTotals:
     collections: PlexStatsLibrary
     items: PlexStatsLibrary
 
+    # Collections and items processed so far, including the children of collections ( the processed counts are reset
+    # for the children of every collection and again for the items, this one only goes up )
+    fetched: int
+
     def __init__(self) -> None:
         self.totals = PlexStatsLibrary()
         self.collections = PlexStatsLibrary()
         self.items = PlexStatsLibrary()
 
+        self.fetched = 0
+
     def calcTotals(self):
         self.totals.total = self.collections.total + self.items.total
         self.totals.processed = self.collections.processed + self.items.processed
@@ -103,6 +112,27 @@ class PlexStatsLibraryTotals:
         }
 
 
+class PlexStatsFiles:
+    written: int
+    unchanged: int
+    upToDate: int
+    skipped: int
+
+    def __init__(self) -> None:
+        self.written = 0
+        self.unchanged = 0
+        self.upToDate = 0
+        self.skipped = 0
+
+    def toJson(self):
+        return {
+            "written": self.written,
+            "unchanged": self.unchanged,
+            "upToDate": self.upToDate,
+            "skipped": self.skipped,
+        }
+
+
 class PlexStats:
     timerProgram: timer
     timerLibraries: dict[str, timer]
@@ -111,6 +141,14 @@ class PlexStats:
     countsLibraries: dict[str, PlexStatsLibraryTotals]
     itemsLibraries: dict[str, PlexStatsLibraryItems]
 
+    files: PlexStatsFiles
+    tmdb: LookupCacheStats
+    lists: dict[str, LookupCacheStats]
+    http: PlexHttpStats
+    reloads: list[dict]
+    render: RenderCostStats
+    slowest: dict[str, list[dict]]
+
     def __init__(self) -> None:
         self.timerProgram = timer()
         self.timerLibraries = {}        
@@ -120,6 +158,14 @@ class PlexStats:
 
         self.itemsLibraries = {}
 
+        self.files = PlexStatsFiles()
+        self.tmdb = LookupCacheStats()
+        self.lists = {}
+        self.http = PlexHttpStats()
+        self.reloads = []
+        self.render = getRenderCostStats()
+        self.slowest = {}
+
     def initLibrary(self, libraryName: str):
         self.timerLibraries[libraryName] = timer()
         self.countsLibraries[libraryName] = PlexStatsLibraryTotals()
@@ -136,6 +182,7 @@ class PlexStats:
                 self.countsLibraries[libraryName].collections
             )
             self.countsProgram.items._addStats(self.countsLibraries[libraryName].items)
+            self.countsProgram.fetched += self.countsLibraries[libraryName].fetched
 
         self.countsProgram.calcTotals()
 
@@ -149,5 +196,12 @@ class PlexStats:
                 "program": json.loads(str(jsonpickle.dumps(self.countsProgram, unpicklable=False))),
                 "libraries": json.loads(str(jsonpickle.dumps(self.countsLibraries, unpicklable=False)))
             },
-            "items": json.loads(str(jsonpickle.dumps(self.itemsLibraries, unpicklable=False)))                
+            "items": json.loads(str(jsonpickle.dumps(self.itemsLibraries, unpicklable=False))),
+            "files": self.files.toJson(),
+            "tmdb": self.tmdb.toJson(),
+            "lists": {k: v.toJson() for k, v in self.lists.items()},
+            "http": self.http.toJson(),
+            "reloads": self.reloads,
+            "render": self.render.toJson(),
+            "slowest": self.slowest,
         }
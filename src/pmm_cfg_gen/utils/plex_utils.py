@@ -15,6 +15,7 @@ import plexapi.utils
 import re
 
 from pmm_cfg_gen.utils.settings_utils_v1 import SettingsPlexLibrary, globalSettingsMgr
+from pmm_cfg_gen.utils.format_string import CompiledFormatString, compileFormatString, cleanString
 
 ###################################################################################################
 
@@ -70,6 +71,24 @@ jsonpickle.handlers.registry.register(PlexObject, PlexJsonHandler, True)
 ###################################################################################################
 
 class PlexItemHelper:
+    # Titles that already end with the year, e.g. "Movie (2001)"
+    YEAR_SUFFIX_PATTERN = re.compile(r"[\s\S]*\([\d]{4}\)$", flags=re.DOTALL)
+
+    LIBRARY_TOKENS = frozenset(["library.title", "library.type", "library.path"])
+
+    # Labels and titles of the items created by plex meta manager ( see L { isPMMItem } )
+    PMM_LABELS = ["Decade", "Emmy Awards", "Golden Globes Awards", "Top Actors", "Top Directors", "Oscars Winners Awards"]
+    PMM_TITLES = [
+        "Golden Globes Best Director Winners",
+        "Golden Globes Best Picture Winners",
+        "Oscars Best Director Winners",
+        "Oscars Best Picture Winners",
+        "Newly Released",
+        "New Episodes",
+        "TMDb Airing Today",
+        "TMDb On The Air",
+    ]
+
     @classmethod
     def isPMMItem(cls, item: PlexPartialObject):
         """
@@ -83,30 +102,14 @@ class PlexItemHelper:
         # Check if the item is a PMM item.
         for label in item.labels:
             # Check if label is a PMM item
-            if str(label.tag).strip() in [
-                "Decade",
-                "Emmy Awards",
-                "Golden Globes Awards",
-                "Top Actors",
-                "Top Directors",
-                "Oscars Winners Awards",
-            ]:
+            if str(label.tag).strip() in cls.PMM_LABELS:
                 logging.getLogger("pmm_cfg_gen").debug(
                     "isPMMItem Found: {} - {}".format(item.title, label.tag)
                 )
                 return True
 
             # Check if item is a PMM item
-            if str(item.title).strip() in [
-                "Golden Globes Best Director Winners",
-                "Golden Globes Best Picture Winners",
-                "Oscars Best Director Winners",
-                "Oscars Best Picture Winners",
-                "Newly Released",
-                "New Episodes",
-                "TMDb Airing Today",
-                "TMDb On The Air",
-            ]:
+            if str(item.title).strip() in cls.PMM_TITLES:
                 logging.getLogger("pmm_cfg_gen").debug(
                     "isPMMItem Found: {} - {}".format(item.title, label.tag)
                 )
@@ -124,7 +127,7 @@ class PlexItemHelper:
          
          @return A string that has all characters in the form of a - zA - Z0 - 9 and underscores
         """
-        return title.replace("/", "-").replace("\\", "-").replace(":", "-").replace("*", "-").replace("?", "-").replace("\"", "-").replace("<", "-").replace(">", "-").replace("|", "-")
+        return cleanString(title)
 
     @classmethod
     def formatString(cls, formatString: str, library : LibrarySection | None = None, collection : Collection | None = None, item : Video | Artist | None = None, pmm : dict | None = None, librarySettings : SettingsPlexLibrary | None = None, cleanTitleStrings : bool = False) -> str:
@@ -138,7 +141,99 @@ class PlexItemHelper:
         
         @return The formatted string if there are placeholders or the original string
         """
+        compiled = compileFormatString(formatString)
+
+        if compiled.isCompiled:
+            result = cls.__formatCompiled(compiled, library=library, collection=collection, item=item, pmm=pmm, librarySettings=librarySettings, cleanTitleStrings=cleanTitleStrings)
+
+            if result is not None:
+                return result
+
+        return cls._formatStringReplace(formatString, library=library, collection=collection, item=item, pmm=pmm, librarySettings=librarySettings, cleanTitleStrings=cleanTitleStrings)
+
+    @classmethod
+    def __formatCompiled(cls, compiled: CompiledFormatString, library : LibrarySection | None = None, collection : Collection | None = None, item : Video | Artist | None = None, pmm : dict | None = None, librarySettings : SettingsPlexLibrary | None = None, cleanTitleStrings : bool = False) -> str | None:
+        """
+         Format a compiled format string in a single pass. Only the attributes for tokens in the format string are read.
+         Values are assigned in the same order ( first one wins ) as L { _formatStringReplace } replaces them
+         
+         @return The formatted string or None if the result could differ from L { _formatStringReplace } ( a value contains braces )
+        """
+        values: dict[str, str] = {}
+        tokens = compiled.tokens
+
+        # Plex attribute access is expensive, only read what the tokens need and read each attribute once
+        if librarySettings is not None and "library.path" in tokens and librarySettings.path:
+            values["library.path"] = librarySettings.path
+
+        if library is not None and tokens.intersection(PlexItemHelper.LIBRARY_TOKENS):
+            libraryTitle = library.title
+            libraryTitle = cls.cleanString(str(libraryTitle)) if cleanTitleStrings else libraryTitle
+
+            if "library.title" in tokens:
+                values["library.title"] = libraryTitle
+            if "library.type" in tokens:
+                libraryType = library.type
+                if libraryType:
+                    values["library.type"] = libraryType
+            if "library.path" in tokens and "library.path" not in values:
+                values["library.path"] = libraryTitle
+
+        if collection is not None:
+            if "collection.title" in tokens:
+                values["collection.title"] = cls.cleanString(collection.title) if cleanTitleStrings else collection.title
+            if "collection.type" in tokens:
+                values["collection.type"] = collection.type or ""
+            if "collection.subtype" in tokens:
+                values["collection.subtype"] = collection.subtype or ""
+            if "collection.minYear" in tokens:
+                minYear = collection.minYear
+                values["collection.minYear"] = str(minYear) if minYear else ""
+
+            if "universe" in tokens:
+                cls.__setUniverse(compiled, values, PlexItemHelper.getNamedCollectionLabels(collection))
 
+        if item is not None:
+            if "item.title" in tokens:
+                values["item.title"] = cls.cleanString(item.title) if cleanTitleStrings else item.title
+            if "item.titleSort" in tokens:
+                values["item.titleSort"] = item.titleSort or ""
+
+            if isinstance(item, Video):
+                if "item.year" in tokens:
+                    year = item.year
+                    values["item.year"] = str(year) if year and str(year) not in item.title else ""
+                if "item.type" in tokens:
+                    values["item.type"] = item.type or ""
+                if "item.contentRating" in tokens:
+                    values["item.contentRating"] = item.contentRating or ""
+                if "item.editionTitle" in tokens:
+                    values["item.editionTitle"] = (item.editionTitle or "") if isinstance(item, Movie) else ""
+
+            if "universe" in tokens and "universe" not in values:
+                cls.__setUniverse(compiled, values, PlexItemHelper.getNamedCollectionLabels(item))
+
+        if pmm is not None and "universe" in tokens and "universe" not in values and "label" in pmm:
+            cls.__setUniverse(compiled, values, pmm["label"])
+
+        # Values are not rescanned for tokens, leave those to the replace based formatter
+        for value in values.values():
+            if type(value) is not str or "{" in value or "}" in value:
+                return None
+
+        return compiled.format(values)
+
+    @classmethod
+    def __setUniverse(cls, compiled: CompiledFormatString, values: dict[str, str], lstLabels: list[str] | None):
+        # Same as the replace based formatter, the label is only used if it isn't part of the result yet
+        if lstLabels is not None and len(lstLabels) > 0:
+            values["universe"] = lstLabels[0] if lstLabels[0] not in compiled.partial(values) else ""
+
+    @classmethod
+    def _formatStringReplace(cls, formatString: str, library : LibrarySection | None = None, collection : Collection | None = None, item : Video | Artist | None = None, pmm : dict | None = None, librarySettings : SettingsPlexLibrary | None = None, cleanTitleStrings : bool = False) -> str:
+        """
+         Format by replacing one token after the other ( used for format strings that can not be compiled )
+        """
         result = formatString
 
         if librarySettings is not None:
@@ -221,7 +316,7 @@ class PlexItemHelper:
             return PlexItemHelper.formatString(strFormat, collection=item)
         else:
             if isinstance(item, Video):
-                if re.match(r"[\s\S]*\([\d]{4}\)$", item.title, flags=re.DOTALL) is None:
+                if PlexItemHelper.YEAR_SUFFIX_PATTERN.match(item.title) is None:
                     strFormat += " ({{item.year}})" if includeYear else ""
                 strFormat += " [{{item.editionTitle}}]" if includeEdition and isinstance(item, Movie) else ""
             elif isinstance(item, Artist): 
@@ -334,8 +429,9 @@ class PlexVideoHelper:
          Parse guids and return a dictionary of guids. This is used to determine which items are part of the
         """
         try:
-            # Set guids to a dict of guids
-            if "guids" in self.__item.__dict__:
+            # Set guids to a dict of guids. plexapi parses them lazily ( a cached property that is only in __dict__ once
+            # it was read ), so the result must not depend on whether something read them before
+            if "guids" in self.__item.__dict__ or hasattr(type(self.__item), "guids"):
                 self.__guids = dict(o.id.split("://") for o in self.__item.guids)
         except:
             pass
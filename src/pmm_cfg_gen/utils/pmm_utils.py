@@ -7,6 +7,8 @@ from pathlib import Path
 from typing import Any
 import ruamel.yaml
 
+from pmm_cfg_gen.utils.tracing import traceFunction
+
 ###################################################################################################
 class PlexMetaManagerCache:
     _logger: logging.Logger
@@ -22,6 +24,7 @@ class PlexMetaManagerCache:
         self.__metadataCache = {}
         self.__overlayCache = {}
 
+    @traceFunction("pmm.load", "pmm", getArgs=lambda self, path: {"path": str(path)})
     def processFolder(self, path):
         self._logger.info("Processing Folder: '{}'".format(path)) 
 
@@ -34,7 +37,7 @@ class PlexMetaManagerCache:
         self._logger.info("Overlays Processed: {}".format(len(self.__overlayCache)))
         
     def loadFile(self, fileName):
-        self._logger.debug("Loading File: '{}'".format(fileName))
+        self._logger.debug("Loading File: '%s'", fileName)
 
         with open(fileName, "r") as fp:
             try:
@@ -72,7 +75,7 @@ class PlexMetaManagerCache:
 
         if data is None: return None
 
-        self._logger.debug("collectionItem_to_dict: {}".format(data))
+        self._logger.debug("collectionItem_to_dict: %s", data)
         
         result = {
             "title": data["title"] if "title" in data else collectionName,
@@ -121,7 +124,7 @@ class PlexMetaManagerCache:
     
     ###################################################################################################
     def getCollectionCacheByName(self, name : str) -> dict | None:
-        self._logger.debug("Getting collection cache by name: '{}'".format(name))
+        self._logger.debug("Getting collection cache by name: '%s'", name)
         
         result = self.__collectionCache[name] if name in self.__collectionCache else None
         if result is None:
@@ -130,13 +133,13 @@ class PlexMetaManagerCache:
         return result
     
     def getMetadataCacheByName(self, name : str, year : int | None) -> dict | None:
-        self._logger.debug("Getting metadata cache by name: '{}'".format(name))
+        self._logger.debug("Getting metadata cache by name: '%s'", name)
         
         result = self.__metadataCache[name] if name in self.__metadataCache else None
 
         if result is None:
             name = name.strip()
-            self._logger.debug("Metadata cache by name: '{}' not found, searching by title".format(name))
+            self._logger.debug("Metadata cache by name: '%s' not found, searching by title", name)
             for k in self.__metadataCache:
                 v = self.__metadataCache[k]
                 #self._logger.info("Metadata cache by name: '{}' checking title: '{}'".format(name, x))
@@ -146,7 +149,7 @@ class PlexMetaManagerCache:
                         
                         break
                     elif year-1 <= v["year"] <= year+1:
-                        self._logger.debug("Metadata cache by name: '{}' found by title".format(name))
+                        self._logger.debug("Metadata cache by name: '%s' found by title", name)
                         result = v
 
                         break
@@ -154,7 +157,7 @@ class PlexMetaManagerCache:
         return result
 
     def getOverlayCacheByName(self, name : str) -> dict | None:
-        self._logger.debug("Getting overlay cache by name: '{}'".format(name))
+        self._logger.debug("Getting overlay cache by name: '%s'", name)
         
         result = self.__overlayCache[name] if name in self.__overlayCache else None
         
@@ -168,7 +171,7 @@ class PlexMetaManagerCache:
         if data is None:
             return None
 
-        self._logger.debug("Getting Poster Url from collection: '{}'".format(collectionName))
+        self._logger.debug("Getting Poster Url from collection: '%s'", collectionName)
         
         return self.__getPosterUrlFromItem(data)
 
@@ -177,7 +180,7 @@ class PlexMetaManagerCache:
         if data is None:
             return None
 
-        self._logger.debug("Getting Poster Url from metadata: '{}'".format(metadataName))
+        self._logger.debug("Getting Poster Url from metadata: '%s'", metadataName)
 
         return self.__getPosterUrlFromItem(data)
 
@@ -186,7 +189,7 @@ class PlexMetaManagerCache:
         if data is None:
             return None
 
-        self._logger.debug("Getting Poster Urls from metadata: '{}'".format(metadataName))
+        self._logger.debug("Getting Poster Urls from metadata: '%s'", metadataName)
 
         result = {}
         if "seasons" in data and data["seasons"] is not None and len(data["seasons"]) > 0:
@@ -245,8 +248,8 @@ class PlexMetaManagerCache:
         if data is None:
             return None
         
-        self._logger.debug("Getting '{}' from collection: '{}'".format(listName, collectionName))
-        self._logger.debug("Data: '{}'".format(data))
+        self._logger.debug("Getting '%s' from collection: '%s'", listName, collectionName)
+        self._logger.debug("Data: '%s'", data)
 
         result = self.__getAttributeListFromItemByName(data, listName)
             
@@ -260,16 +263,16 @@ class PlexMetaManagerCache:
     def __getAttributeFromItemByName(self, data : dict, attribute : str) -> str | None:
         if data is None: return None
         
-        self._logger.debug("Getting '{}' from item".format(attribute))
+        self._logger.debug("Getting '%s' from item", attribute)
 
         result : str | None = None
 
         if attribute in data: 
-            self._logger.debug("Searching Root: '{}'".format(data[attribute]))
+            self._logger.debug("Searching Root: '%s'", data[attribute])
             return data[attribute]
 
         if "template" in data:
-            self._logger.debug("Searching Template: '{}'".format(data["template"]))
+            self._logger.debug("Searching Template: '%s'", data["template"])
 
             if isinstance(data["template"], list) and len(data["template"]) > 0:
                 result = ""
@@ -278,15 +281,15 @@ class PlexMetaManagerCache:
 
                 if result and len(result) > 0: return result.strip()
             elif isinstance(data["template"], dict) and attribute in data["template"]: 
-                self._logger.debug("Found: '{}' in '{}'".format(attribute, data["template"][attribute]))
+                self._logger.debug("Found: '%s' in '%s'", attribute, data["template"][attribute])
                 return data["template"][attribute]
             else:
                 self._logger.error("Invalid template: '{}'".format(data["template"]))
 
         if "variables" in data:
-            self._logger.debug("Searching Variable: '{}'".format(data["variables"]))
+            self._logger.debug("Searching Variable: '%s'", data["variables"])
             if attribute in data["variables"]: 
-                self._logger.debug("Found: '{}' in '{}'".format(attribute, data["variables"][attribute]))
+                self._logger.debug("Found: '%s' in '%s'", attribute, data["variables"][attribute])
                 return data["variables"][attribute]
             
         return result
@@ -294,12 +297,12 @@ class PlexMetaManagerCache:
     def __getPosterUrlFromItem(self, data : dict) -> str | None:
         if data is None: return None
         
-        self._logger.debug("Getting Poster Url from: '{}'".format(data))
+        self._logger.debug("Getting Poster Url from: '%s'", data)
         
         posterUrl = self.__getAttributeListFromItemByName(data, "poster")
         if posterUrl is None or len(posterUrl) == 0 or posterUrl == "": posterUrl = self.__getAttributeListFromItemByName(data, "url_poster")
 
-        self._logger.debug("Poster Url: '{}'".format(posterUrl))
+        self._logger.debug("Poster Url: '%s'", posterUrl)
         
         if posterUrl is None or len(posterUrl) == 0: 
             return None
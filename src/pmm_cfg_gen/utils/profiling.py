@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+###################################################################################################
+
+
+class PhaseProfiler:
+    """
+     Profiles each phase of a library ( collections, items, rendering, reports ) with cProfile and writes a .pstats
+     file plus a text summary of the top functions per phase. The memory mode also records the peak memory of each
+     phase and the top allocation sites with tracemalloc. Only the main thread is profiled ( not render workers or
+     writer threads )
+    """
+    _logger: logging.Logger
+
+    outputPath: Path
+    memory: bool
+    top: int
+
+    __index: int
+    __library: str | None
+    __phase: str | None
+    __profile: cProfile.Profile | None
+    __startTime: float
+    __startSnapshot: tracemalloc.Snapshot | None
+    __phases: list[dict]
+
+    def __init__(self, outputPath: str | Path, memory: bool = False, top: int = 30) -> None:
+        """
+         @param outputPath - Directory the profiles are written to
+         @param memory - Also trace memory allocations ( slower )
+         @param top - Number of functions / allocation sites in the summaries
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.outputPath = Path(outputPath)
+        self.memory = memory
+        self.top = top if top is not None and top > 0 else 30
+
+        self.__index = 0
+        self.__library = None
+        self.__phase = None
+        self.__profile = None
+        self.__startTime = 0
+        self.__startSnapshot = None
+        self.__phases = []
+
+        self.outputPath.mkdir(parents=True, exist_ok=True)
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @property
+    def phases(self) -> list[dict]:
+        return self.__phases
+
+    def setPhase(self, library: str | None, phase: str):
+        """
+         Stop profiling the current phase ( if any ) and start profiling the next one
+        """
+        self.stopPhase()
+
+        self.__index += 1
+        self.__library = library
+        self.__phase = phase
+
+        if self.memory:
+            tracemalloc.reset_peak()
+            self.__startSnapshot = PhaseProfiler.__takeSnapshot()
+
+        self.__startTime = time.perf_counter()
+
+        self.__profile = cProfile.Profile()
+
+        try:
+            self.__profile.enable()
+        except ValueError:
+            # Another profiler ( e.g. a debugger ) is active
+            self._logger.warning("Unable to profile phase '{}': another profiler is active".format(phase))
+
+            self.__profile = None
+
+    def stopPhase(self):
+        """
+         Stop profiling the current phase and write its profile and summaries
+        """
+        if self.__phase is None:
+            return
+
+        profile = self.__profile
+        if profile is not None:
+            profile.disable()
+
+        seconds = time.perf_counter() - self.__startTime
+
+        fileNameBase = "{:02d}-{}-{}".format(self.__index, PhaseProfiler.__cleanName(self.__library or "run"), PhaseProfiler.__cleanName(self.__phase))
+
+        phase = {
+            "library": self.__library,
+            "phase": self.__phase,
+            "seconds": round(seconds, 3),
+        }
+
+        try:
+            # Memory first, so the allocations of the profile summary are not included
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+
+                phase["memory"] = {"current": current, "peak": peak}
+                phase["memorySummary"] = "{}.memory.txt".format(fileNameBase)
+
+                with open(Path(self.outputPath, phase["memorySummary"]), "w") as fp:
+                    fp.write(self.__formatMemory(phase))
+
+            if profile is not None:
+                profile.dump_stats(Path(self.outputPath, "{}.pstats".format(fileNameBase)))
+
+                phase["pstats"] = "{}.pstats".format(fileNameBase)
+                phase["summary"] = "{}.txt".format(fileNameBase)
+
+                with open(Path(self.outputPath, phase["summary"]), "w") as fp:
+                    fp.write(self.__formatProfile(profile, phase))
+        except:
+            self._logger.warning("Error saving profile of phase '{}'".format(self.__phase), exc_info=self._logger.isEnabledFor(logging.DEBUG))
+
+        self.__phases.append(phase)
+
+        self.__phase = None
+        self.__profile = None
+        self.__startSnapshot = None
+
+    def save(self):
+        """
+         Stop profiling and write the index of all profiled phases ( profile.json )
+        """
+        self.stopPhase()
+
+        with open(Path(self.outputPath, "profile.json"), "w") as fp:
+            json.dump({"memory": self.memory, "phases": self.__phases}, fp, indent=2)
+
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def __formatProfile(self, profile: cProfile.Profile, phase: dict) -> str:
+        stream = io.StringIO()
+
+        stream.write("Library: {}, Phase: {}, Time: {:.3f}s\n\n".format(phase["library"], phase["phase"], phase["seconds"]))
+
+        stats = pstats.Stats(profile, stream=stream)
+
+        for sortKey in [pstats.SortKey.CUMULATIVE, pstats.SortKey.TIME]:
+            stream.write("Top {} functions by {} time\n".format(self.top, "cumulative" if sortKey == pstats.SortKey.CUMULATIVE else "own"))
+            stats.sort_stats(sortKey).print_stats(self.top)
+
+        return stream.getvalue()
+
+    def __formatMemory(self, phase: dict) -> str:
+        snapshot = PhaseProfiler.__takeSnapshot()
+
+        lines = [
+            "Library: {}, Phase: {}, Current: {:.1f} MB, Peak: {:.1f} MB".format(
+                phase["library"], phase["phase"], phase["memory"]["current"] / 1024 / 1024, phase["memory"]["peak"] / 1024 / 1024
+            ),
+            "",
+            "Top {} allocation sites by growth during the phase".format(self.top),
+        ]
+
+        if self.__startSnapshot is not None:
+            for stat in snapshot.compare_to(self.__startSnapshot, "lineno")[:self.top]:
+                lines.append("  {}".format(stat))
+
+        lines.extend(["", "Top {} allocation sites by size".format(self.top)])
+
+        for stat in snapshot.statistics("lineno")[:self.top]:
+            lines.append("  {}".format(stat))
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __takeSnapshot() -> tracemalloc.Snapshot:
+        # Leave out the allocations of the profilers themselves
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, pstats.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+    @staticmethod
+    def __cleanName(name: str) -> str:
+        return re.sub(r"[^\w.-]+", "_", name).strip("_") or "_"
+
+
+_profiler: PhaseProfiler | None = None
+
+###################################################################################################
+
+
+def startProfiling(outputPath: str | Path | None, memory: bool = False, top: int = 30) -> PhaseProfiler | None:
+    """
+     Start profiling the phases of the run ( does nothing if outputPath is None )
+    """
+    global _profiler
+
+    if outputPath is None or len(str(outputPath)) == 0:
+        return None
+
+    _profiler = PhaseProfiler(outputPath, memory=memory, top=top)
+
+    return _profiler
+
+
+def setProfilePhase(library: str | None, phase: str):
+    if _profiler is not None:
+        _profiler.setPhase(library, phase)
+
+
+def stopProfilePhase():
+    if _profiler is not None:
+        _profiler.stopPhase()
+
+
+def saveProfile():
+    """
+     Stop profiling and write the profile index
+    """
+    global _profiler
+
+    if _profiler is None:
+        return
+
+    profiler = _profiler
+    _profiler = None
+
+    profiler.save()
+
+    logging.getLogger("pmm_cfg_gen").info("Profiles saved to '{}'. Phases: {}".format(profiler.outputPath, len(profiler.phases)))
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from pmm_cfg_gen.utils.plex_stats import PlexStats
+
+###################################################################################################
+
+
+class ProgressReporter:
+    """
+     Periodically reports the progress of a run ( instead of a log line per item ). The counts are read from
+     L { PlexStats.countsLibraries } ( fetched items from L { PlexStatsLibraryTotals.fetched } ), rendered templates are counted by L { addRendered } and written files are read
+     from the output manifest. Each report logs the items/sec, the fetch / render / write rates and the ETA of the
+     current phase and can be written to a json status file that monitoring can poll
+    """
+    PHASES = ["collections", "items", "rendering", "reports", "finished"]
+
+    _logger: logging.Logger
+
+    __stats: PlexStats
+    __interval: float
+    __statusFile: Path | None
+    __getWritten: Callable[[], int | None]
+    __clock: Callable[[], float]
+
+    __startTime: float
+    __startedAt: str
+    __library: str | None
+    __phase: str
+    __phaseStartTime: float
+    __phaseStartCount: int
+    __rendered: int
+    __lastTime: float
+    __lastCounts: tuple[int, int, int | None]
+    __renderedLock: threading.Lock
+    __stopEvent: threading.Event
+    __thread: threading.Thread | None
+
+    def __init__(self, stats: PlexStats, interval: float = 10, statusFile: str | Path | None = None, getWritten: Callable[[], int | None] | None = None, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+         @param stats - The stats of the run
+         @param interval - Seconds between reports ( 0 disables reporting )
+         @param statusFile - Json file the reports are written to ( None to only log them )
+         @param getWritten - Returns the number of files written so far ( None if unknown )
+         @param clock - Monotonic clock ( for testing )
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.__stats = stats
+        self.__interval = interval if interval is not None and interval > 0 else 0
+        self.__statusFile = Path(statusFile) if statusFile is not None and len(str(statusFile)) > 0 else None
+        self.__getWritten = getWritten if getWritten is not None else lambda: None
+        self.__clock = clock
+
+        self.__startTime = clock()
+        self.__startedAt = datetime.datetime.now().isoformat(timespec="seconds")
+        self.__library = None
+        self.__phase = "collections"
+        self.__phaseStartTime = self.__startTime
+        self.__phaseStartCount = 0
+        self.__rendered = 0
+        self.__lastTime = self.__startTime
+        self.__lastCounts = (0, 0, 0)
+        self.__renderedLock = threading.Lock()
+        self.__stopEvent = threading.Event()
+        self.__thread = None
+
+    @property
+    def isEnabled(self) -> bool:
+        return self.__interval > 0
+
+    def start(self):
+        """
+         Start reporting in a background thread
+        """
+        if not self.isEnabled or self.__thread is not None:
+            return
+
+        self.__stopEvent.clear()
+        self.__thread = threading.Thread(target=self.__run, name="pmm_cfg_gen-progress", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+         Stop reporting. The final snapshot is written to the status file
+        """
+        if self.__thread is not None:
+            self.__stopEvent.set()
+            self.__thread.join()
+            self.__thread = None
+
+        if self.isEnabled:
+            self.setPhase(self.__library, "finished")
+            self.report(log=False)
+
+    def setPhase(self, library: str | None, phase: str):
+        """
+         Set the library and phase being processed ( rates and the ETA are calculated per phase )
+
+         @param library - The library name
+         @param phase - One of L { PHASES }
+        """
+        self.__library = library
+        self.__phase = phase
+        self.__phaseStartTime = self.__clock()
+        self.__phaseStartCount = self.__getPhaseCounts()[0]
+
+    def addRendered(self, count: int = 1):
+        """
+         Count rendered templates ( called for every saved file, from any thread )
+        """
+        with self.__renderedLock:
+            self.__rendered += count
+
+    def snapshot(self) -> dict:
+        """
+         Get the current progress
+
+         @return Progress dictionary ( the content of the status file )
+        """
+        now = self.__clock()
+
+        fetched = self.__getFetched()
+        rendered = self.__rendered
+        written = self.__getWritten()
+
+        lastFetched, lastRendered, lastWritten = self.__lastCounts
+        interval = now - self.__lastTime
+
+        self.__lastTime = now
+        self.__lastCounts = (fetched, rendered, written)
+
+        phaseProcessed, phaseTotal = self.__getPhaseCounts()
+        phaseElapsed = now - self.__phaseStartTime
+        phaseRate = (phaseProcessed - self.__phaseStartCount) / phaseElapsed if phaseElapsed > 0 else 0
+
+        # The final snapshot reports the average of the run
+        if self.__phase == "finished" and now > self.__startTime:
+            phaseRate = fetched / (now - self.__startTime)
+
+        eta = None
+        if phaseTotal > 0 and phaseRate > 0:
+            eta = max(0, phaseTotal - phaseProcessed) / phaseRate
+
+        return {
+            "state": "finished" if self.__phase == "finished" else "running",
+            "startedAt": self.__startedAt,
+            "updatedAt": datetime.datetime.now().isoformat(timespec="seconds"),
+            "elapsed": round(now - self.__startTime, 1),
+            "library": self.__library,
+            "phase": self.__phase,
+            "processed": phaseProcessed,
+            "total": phaseTotal,
+            "percentage": int(phaseProcessed / phaseTotal * 100) if phaseTotal > 0 else None,
+            "eta": round(eta, 1) if eta is not None else None,
+            "counts": {
+                "fetched": fetched,
+                "rendered": rendered,
+                "written": written,
+            },
+            "rates": {
+                "fetch": ProgressReporter.__rate(fetched, lastFetched, interval),
+                "render": ProgressReporter.__rate(rendered, lastRendered, interval),
+                "write": ProgressReporter.__rate(written, lastWritten, interval),
+                "itemsPerSecond": round(phaseRate, 2),
+            },
+        }
+
+    def report(self, log: bool = True) -> dict:
+        """
+         Log the current progress and write it to the status file
+        """
+        progress = self.snapshot()
+
+        if log:
+            self._logger.info(
+                "Progress [%s - %s]: %s / %s%s | %.1f items/s | fetch %s/s, render %s/s, write %s/s | ETA: %s",
+                progress["library"],
+                progress["phase"],
+                progress["processed"],
+                progress["total"],
+                " ({}%)".format(progress["percentage"]) if progress["percentage"] is not None else "",
+                progress["rates"]["itemsPerSecond"],
+                ProgressReporter.__formatRate(progress["rates"]["fetch"]),
+                ProgressReporter.__formatRate(progress["rates"]["render"]),
+                ProgressReporter.__formatRate(progress["rates"]["write"]),
+                str(datetime.timedelta(seconds=int(progress["eta"]))) if progress["eta"] is not None else "n/a",
+            )
+
+        if self.__statusFile is not None:
+            try:
+                self.__writeStatusFile(progress)
+            except:
+                self._logger.warning("Error writing status file '{}'".format(self.__statusFile), exc_info=self._logger.isEnabledFor(logging.DEBUG))
+
+        return progress
+
+    def __run(self):
+        while not self.__stopEvent.wait(self.__interval):
+            try:
+                self.report()
+            except:
+                self._logger.debug("Error reporting progress", exc_info=True)
+
+    def __getFetched(self) -> int:
+        # Not the processed counts, those are reset for the children of each collection
+        return sum([x.fetched for x in list(self.__stats.countsLibraries.values())])
+
+    def __getPhaseCounts(self) -> tuple[int, int]:
+        counts = self.__stats.countsLibraries.get(self.__library) if self.__library is not None else None  # type: ignore
+
+        if counts is None:
+            return (0, 0)
+
+        if self.__phase == "collections":
+            return (counts.collections.processed, counts.collections.total)
+
+        if self.__phase == "items":
+            return (counts.items.processed, counts.items.total)
+
+        return (counts.collections.processed + counts.items.processed, counts.collections.total + counts.items.total)
+
+    def __writeStatusFile(self, progress: dict):
+        self.__statusFile.parent.mkdir(parents=True, exist_ok=True)  # type: ignore
+
+        tmp = Path(self.__statusFile.parent, ".{}.{}.tmp".format(self.__statusFile.name, os.getpid()))  # type: ignore
+
+        with open(tmp, "w") as fp:
+            json.dump(progress, fp, indent=2)
+
+        os.replace(tmp, self.__statusFile)  # type: ignore
+
+    @staticmethod
+    def __rate(current: int | None, last: int | None, interval: float) -> float | None:
+        if current is None or last is None or interval <= 0:
+            return None
+
+        return round((current - last) / interval, 2)
+
+    @staticmethod
+    def __formatRate(rate: float | None) -> str:
+        return "{:.1f}".format(rate) if rate is not None else "n/a"
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+###################################################################################################
+
+
+class TokenBucket:
+    """
+     Thread safe token bucket rate limiter. Tokens are added at a fixed rate up to the capacity ( the allowed burst ),
+     every request takes one token and waits until one is available
+    """
+    __rate: float
+    __capacity: float
+    __tokens: float
+    __updated: float
+    __lock: threading.Lock
+    __clock: Callable[[], float]
+    __sleep: Callable[[float], None]
+
+    def __init__(self, rate: float, capacity: float | None = None, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+         @param rate - Tokens added per second ( 0 or less disables limiting )
+         @param capacity - Maximum number of tokens ( defaults to the rate, i.e. one second of requests )
+         @param clock - Monotonic clock ( replaceable for testing )
+         @param sleep - Sleep function ( replaceable for testing )
+        """
+        self.__rate = rate
+        self.__capacity = capacity if capacity is not None and capacity > 0 else max(1.0, rate)
+        self.__tokens = self.__capacity
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__updated = clock()
+        self.__lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.__rate
+
+    def acquire(self) -> float:
+        """
+         Take a token, waiting until one is available
+
+         @return The time waited in seconds
+        """
+        if self.__rate <= 0:
+            return 0.0
+
+        with self.__lock:
+            now = self.__clock()
+
+            self.__tokens = min(self.__capacity, self.__tokens + (now - self.__updated) * self.__rate)
+            self.__updated = now
+
+            # Reserve the token now ( the balance may go negative ) so waiting threads are served in order
+            self.__tokens -= 1
+            wait = -self.__tokens / self.__rate if self.__tokens < 0 else 0.0
+
+        if wait > 0:
+            self.__sleep(wait)
+
+        return wait
+
+    def pause(self, seconds: float):
+        """
+         Stop handing out tokens for a while ( e.g. when the server asked to retry later )
+        """
+        if self.__rate <= 0 or seconds <= 0:
+            return
+
+        with self.__lock:
+            self.__tokens = min(self.__tokens, 0.0) - seconds * self.__rate
+
+
+def createPooledSession(poolSize: int) -> requests.Session:
+    """
+     Create a session that keeps up to poolSize connections per host open ( shared by all threads )
+    """
+    session = requests.Session()
+
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, poolSize))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def _retryAfter(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def getWithRateLimit(session: requests.Session, limiter: TokenBucket, url: str, params: dict | None = None, maxRetries: int = 5, backoff: float = 1.0, timeout: float = 30, sleep: Callable[[float], None] = time.sleep) -> requests.Response:
+    """
+     GET a url through a rate limiter. Responses with status 429 ( too many requests ) are retried after the
+     Retry-After delay, or an exponential backoff with jitter if the server did not send one
+
+     @param session - The ( pooled ) session
+     @param limiter - The rate limiter
+     @param url - The url
+     @param params - Query parameters
+     @param maxRetries - Maximum number of retries
+     @param backoff - Initial backoff in seconds ( doubled on each retry )
+     @param timeout - Request timeout in seconds
+
+     @return The response ( the last 429 response if all retries failed )
+    """
+    attempt = 0
+
+    while True:
+        limiter.acquire()
+
+        response = session.get(url, params=params, timeout=timeout)
+
+        if response.status_code != 429 or attempt >= maxRetries:
+            return response
+
+        delay = _retryAfter(response)
+        if delay is None:
+            delay = backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+        logging.getLogger("pmm_cfg_gen").debug("Rate limited by {}. Retrying in {:.2f}s".format(url, delay))
+
+        # Every thread sharing the limiter backs off ( including this one when it acquires the next token )
+        if limiter.rate > 0:
+            limiter.pause(delay)
+        else:
+            sleep(delay)
+
+        attempt += 1
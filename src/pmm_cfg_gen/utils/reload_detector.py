@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+
+from plexapi.base import PlexPartialObject
+
+###################################################################################################
+
+# Template scope of requests made outside of a template ( e.g. by the processor )
+NO_TEMPLATE = "(no template)"
+
+
+class ImplicitReloadError(Exception):
+    """
+     Raised in strict mode instead of reloading a partial object for a missing attribute
+    """
+    pass
+
+
+class ImplicitReloadEntry:
+    """
+     Number and duration of the reloads triggered by one attribute of one object type in one template
+    """
+    count: int
+    seconds: float
+
+    def __init__(self, count: int = 0, seconds: float = 0) -> None:
+        self.count = count
+        self.seconds = seconds
+
+    def toJson(self):
+        return {
+            "count": self.count,
+            "seconds": round(self.seconds, 4),
+        }
+
+
+class ImplicitReloadDetector:
+    """
+     Detects plexapi reloading a partial object because a template read an attribute that was not loaded ( every
+     reload is a round trip to the plex server ). The templates rendered by L { TemplateManager } run inside a
+     L { templateScope }, so each reload is recorded with the template name, the object type and the attribute. In
+     strict mode the reload raises L { ImplicitReloadError } instead
+    """
+    MODES = ["off", "report", "strict"]
+
+    _logger: logging.Logger
+
+    mode: str
+
+    __entries: dict[tuple[str, str, str], ImplicitReloadEntry]
+    __lock: threading.Lock
+    __originalReload: object | None
+    __hadOwnReload: bool
+
+    def __init__(self, mode: str = "report") -> None:
+        """
+         @param mode - One of L { MODES }
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.mode = mode if mode in ImplicitReloadDetector.MODES else "off"
+
+        self.__entries = {}
+        self.__lock = threading.Lock()
+        self.__originalReload = None
+        self.__hadOwnReload = False
+
+    @property
+    def isEnabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def isStrict(self) -> bool:
+        return self.mode == "strict"
+
+    @property
+    def entries(self) -> dict[tuple[str, str, str], ImplicitReloadEntry]:
+        return self.__entries
+
+    def install(self):
+        """
+         Intercept the reloads of partial objects ( PlexPartialObject._reload )
+        """
+        if not self.isEnabled or self.__originalReload is not None:
+            return
+
+        detector = self
+        originalReload = PlexPartialObject._reload
+
+        # Named like the method it replaces, see L { plex_http.isImplicitReload }
+        def _reload(obj, *args, **kwargs):
+            caller = sys._getframe(1)
+
+            if caller.f_code is not _AUTO_RELOAD_CODE:
+                return originalReload(obj, *args, **kwargs)
+
+            return detector.__onImplicitReload(originalReload, obj, caller.f_locals.get("attr", "?"), args, kwargs)
+
+        self.__originalReload = originalReload
+        self.__hadOwnReload = "_reload" in PlexPartialObject.__dict__
+
+        PlexPartialObject._reload = _reload  # type: ignore
+
+    def uninstall(self):
+        if self.__originalReload is None:
+            return
+
+        # Partial objects inherit _reload from PlexObject
+        if self.__hadOwnReload:
+            PlexPartialObject._reload = self.__originalReload  # type: ignore
+        else:
+            del PlexPartialObject._reload
+
+        self.__originalReload = None
+
+    def record(self, template: str, objectType: str, attribute: str, seconds: float):
+        key = (template, objectType, attribute)
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                entry = self.__entries[key] = ImplicitReloadEntry()
+
+            entry.count += 1
+            entry.seconds += seconds
+
+    def merge(self, entries: dict[tuple[str, str, str], ImplicitReloadEntry]):
+        """
+         Merge the reloads recorded by another process ( render workers )
+        """
+        with self.__lock:
+            for key, other in entries.items():
+                entry = self.__entries.get(key)
+                if entry is None:
+                    entry = self.__entries[key] = ImplicitReloadEntry()
+
+                entry.count += other.count
+                entry.seconds += other.seconds
+
+    def drain(self) -> dict[tuple[str, str, str], ImplicitReloadEntry]:
+        with self.__lock:
+            entries = self.__entries
+            self.__entries = {}
+
+        return entries
+
+    def getRanked(self) -> list[tuple[str, str, str, ImplicitReloadEntry]]:
+        """
+         Get the reloads ranked by the number of round trips ( then by time )
+
+         @return List of ( template, object type, attribute, entry )
+        """
+        with self.__lock:
+            items = list(self.__entries.items())
+
+        return [(template, objectType, attribute, entry) for (template, objectType, attribute), entry in sorted(items, key=lambda x: (x[1].count, x[1].seconds), reverse=True)]
+
+    def toJson(self):
+        return [
+            {"template": template, "type": objectType, "attribute": attribute, **entry.toJson()}
+            for template, objectType, attribute, entry in self.getRanked()
+        ]
+
+    def __onImplicitReload(self, originalReload, obj, attribute: str, args, kwargs):
+        template = _templateScope.get() or NO_TEMPLATE
+        objectType = type(obj).__name__
+
+        if self.isStrict and template != NO_TEMPLATE:
+            self.record(template, objectType, attribute, 0)
+
+            raise ImplicitReloadError(
+                "Template '{}' read '{}' of {} '{}', which is not loaded (strict reload check)".format(
+                    template, attribute, objectType, obj.__dict__.get("title", obj.__dict__.get("name", ""))
+                )
+            )
+
+        start = time.perf_counter()
+
+        try:
+            return originalReload(obj, *args, **kwargs)
+        finally:
+            self.record(template, objectType, attribute, time.perf_counter() - start)
+
+
+class _TemplateScope:
+    __slots__ = ["templateName", "token"]
+
+    def __init__(self, templateName: str) -> None:
+        self.templateName = templateName
+
+    def __enter__(self):
+        self.token = _templateScope.set(self.templateName)
+
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        _templateScope.reset(self.token)
+
+        return False
+
+
+class _NullScope:
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+_AUTO_RELOAD_CODE = PlexPartialObject.__getattribute__.__code__
+
+# The template being rendered by the current thread / async task
+_templateScope: contextvars.ContextVar[str | None] = contextvars.ContextVar("pmm_cfg_gen_template_scope", default=None)
+
+_detector: ImplicitReloadDetector | None = None
+
+###################################################################################################
+
+
+def startReloadDetector(mode: str | None) -> ImplicitReloadDetector | None:
+    """
+     Start detecting implicit reloads ( does nothing if the mode is None or "off" )
+    """
+    global _detector
+
+    if mode is None or mode == "off":
+        return None
+
+    if _detector is None:
+        _detector = ImplicitReloadDetector(mode)
+        _detector.install()
+
+    return _detector
+
+
+def getReloadDetector() -> ImplicitReloadDetector | None:
+    return _detector
+
+
+def stopReloadDetector():
+    global _detector
+
+    if _detector is not None:
+        _detector.uninstall()
+        _detector = None
+
+
+def _clearReloadsInChild():
+    # A forked worker inherits the reloads recorded by the main process, it only reports its own
+    if _detector is not None:
+        _detector.drain()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_clearReloadsInChild)
+
+
+def templateScope(templateName):
+    """
+     Context manager that attributes the reloads inside it to a template ( a shared no-op when detection is off )
+    """
+    if _detector is None:
+        return _NULL_SCOPE
+
+    return _TemplateScope(str(templateName))
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import asyncio
+import contextvars
+import logging
+from pathlib import Path
+from typing import Callable
+
+from pmm_cfg_gen.utils.item_events import ItemEvent, holdEvent, releaseEvent, recordEventTimes
+from pmm_cfg_gen.utils.plex_pickle import copyPlexObjects
+from pmm_cfg_gen.utils.template_manager import TemplateManager
+from pmm_cfg_gen.utils.tracing import isTracing, setTraceLane, traceSpan
+
+###################################################################################################
+
+
+class AsyncRenderQueue:
+    """
+     Renders templates asynchronously in the main process. Jobs are queued and rendered in batches that are gathered
+     concurrently ( bounded by a semaphore ), so network backed filters of one job do not block the others. The queued
+     arguments are copies ( see L { copyPlexObjects } ), items processed before the batch is rendered cannot change them
+    """
+    _logger: logging.Logger
+
+    __templateManager: TemplateManager
+    __concurrency: int
+    __maxPending: int
+    __pending: list[tuple[str, list[tuple[str, Path]], dict, Callable[[str], None] | None, ItemEvent | None]]
+    __onDrained: Callable[[], None] | None
+
+    def __init__(self, templatePath: str | Path, concurrency: int, maxPending: int, onDrained: Callable[[], None] | None = None) -> None:
+        """
+         @param templatePath - The template root path
+         @param concurrency - Maximum number of jobs rendered at the same time
+         @param maxPending - Number of queued jobs that triggers rendering a batch
+         @param onDrained - Called after each batch has been rendered
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self._logger.info("Starting async renderer. Concurrency: {}, Max Pending: {}".format(concurrency, maxPending))
+
+        self.__templateManager = TemplateManager(templatePath, enableAsync=True)
+        self.__concurrency = max(1, concurrency)
+        self.__maxPending = max(1, maxPending)
+        self.__pending = []
+        self.__onDrained = onDrained
+
+    @property
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    def submit(self, description: str, templates: list[tuple[str, Path]], tplArgs: dict, onSaved: Callable[[str], None] | None = None):
+        """
+         Queue a render job. The queued jobs are rendered once the maximum number of pending jobs is reached. The
+         arguments are copied as they are now, exactly like the render pool pickles them
+
+         @param description - Description of the job used for error reporting
+         @param templates - List of ( template name, output file name ) rendered ( in order ) with the same context
+         @param tplArgs - The template arguments
+         @param onSaved - Called with the file name of each successfully saved file
+        """
+        if len(templates) == 0:
+            return
+
+        # The item is done before the job is, its event is written once the times of the job were added
+        self.__pending.append((description, templates, copyPlexObjects(tplArgs), onSaved, holdEvent()))
+
+        if len(self.__pending) >= self.__maxPending:
+            self.wait()
+
+    def wait(self):
+        """
+         Render all queued jobs ( barrier )
+        """
+        if len(self.__pending) == 0:
+            return
+
+        jobs = self.__pending
+        self.__pending = []
+
+        # Render in a new context, the item that filled the queue is not the one being rendered ( see L { item_events } )
+        contextvars.Context().run(asyncio.run, self.__renderBatch(jobs))
+
+        if self.__onDrained is not None:
+            self.__onDrained()
+
+    def close(self):
+        self.wait()
+
+    async def __renderBatch(self, jobs: list):
+        semaphore = asyncio.Semaphore(self.__concurrency)
+
+        # Trace lanes of the running jobs ( one per concurrent slot )
+        lanes = list(range(self.__concurrency, 0, -1))
+
+        await asyncio.gather(*[self.__renderJob(semaphore, lanes, *job) for job in jobs])
+
+    async def __renderJob(self, semaphore: asyncio.Semaphore, lanes: list[int], description: str, templates: list[tuple[str, Path]], tplArgs: dict, onSaved: Callable[[str], None] | None, event: ItemEvent | None):
+        async with semaphore:
+            lane = lanes.pop()
+
+            if isTracing():
+                setTraceLane(lane, "render-async-{}".format(lane))
+
+            try:
+                with traceSpan("render.job", "render", job=description), recordEventTimes() as times:
+                    for templateName, fileName in templates:
+                        try:
+                            await self.__templateManager.renderAndSaveAsync(templateName, fileName, tplArgs)
+
+                            if onSaved is not None:
+                                onSaved(str(fileName))
+                        except:
+                            self._logger.exception("Error Processing Template '{}' for {}".format(templateName, description))
+            finally:
+                lanes.append(lane)
+
+            releaseEvent(event, times)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import functools
+import inspect
+import os
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+from pmm_cfg_gen.utils.item_events import addEventTime
+
+###################################################################################################
+
+
+class RenderCostEntry:
+    """
+     Calls, time ( cumulative, max and a p95 estimate ) and output size of one template or filter
+    """
+    # Upper bounds of the latency buckets in seconds ( 10us doubling up to ~40s, the last bucket counts everything slower )
+    BUCKETS = [0.00001 * 2 ** i for i in range(22)]
+
+    count: int
+    errors: int
+    seconds: float
+    maxSeconds: float
+    bytes: int
+    buckets: list[int]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0
+        self.maxSeconds = 0
+        self.bytes = 0
+        self.buckets = [0] * (len(RenderCostEntry.BUCKETS) + 1)
+
+    def add(self, seconds: float, size: int = 0, error: bool = False):
+        self.count += 1
+        self.seconds += seconds
+        self.bytes += size
+
+        if seconds > self.maxSeconds:
+            self.maxSeconds = seconds
+
+        if error:
+            self.errors += 1
+
+        bucket = 0
+        while bucket < len(RenderCostEntry.BUCKETS) and seconds > RenderCostEntry.BUCKETS[bucket]:
+            bucket += 1
+
+        self.buckets[bucket] += 1
+
+    def merge(self, other: "RenderCostEntry"):
+        self.count += other.count
+        self.errors += other.errors
+        self.seconds += other.seconds
+        self.maxSeconds = max(self.maxSeconds, other.maxSeconds)
+        self.bytes += other.bytes
+
+        for bucket, count in enumerate(other.buckets):
+            self.buckets[bucket] += count
+
+    def percentile(self, q: float) -> float | None:
+        """
+         Estimate a percentile from the histogram ( upper bound of the bucket it falls in, at most the maximum )
+        """
+        if self.count == 0:
+            return None
+
+        rank = q * self.count
+        seen = 0
+
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+
+            if seen >= rank and bucket < len(RenderCostEntry.BUCKETS):
+                return min(RenderCostEntry.BUCKETS[bucket], self.maxSeconds)
+
+        return self.maxSeconds
+
+    def toJson(self):
+        p95 = self.percentile(0.95)
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 6),
+            "averageSeconds": round(self.seconds / self.count, 6) if self.count > 0 else None,
+            "p95Seconds": round(p95, 6) if p95 is not None else None,
+            "maxSeconds": round(self.maxSeconds, 6),
+            "bytes": self.bytes,
+        }
+
+
+class RenderCostStats:
+    """
+     Render cost per template ( renders, time, output size ) and per template filter ( calls and time, including the
+     filters and requests they call ). Async renders and filters are timed by wall clock, so their time includes
+     waiting for other renders
+    """
+    __templates: dict[str, RenderCostEntry]
+    __filters: dict[str, RenderCostEntry]
+    __lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.__templates = {}
+        self.__filters = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def templates(self) -> dict[str, RenderCostEntry]:
+        return self.__templates
+
+    @property
+    def filters(self) -> dict[str, RenderCostEntry]:
+        return self.__filters
+
+    def addTemplate(self, templateName: str, seconds: float, size: int = 0, error: bool = False):
+        self.__add(self.__templates, templateName, seconds, size, error)
+
+    def addFilter(self, filterName: str, seconds: float, error: bool = False):
+        self.__add(self.__filters, filterName, seconds, 0, error)
+
+    def merge(self, other: dict[str, dict[str, RenderCostEntry]]):
+        """
+         Merge the costs recorded by another process ( see L { drain } )
+        """
+        with self.__lock:
+            for target, entries in [(self.__templates, other.get("templates", {})), (self.__filters, other.get("filters", {}))]:
+                for name, entry in entries.items():
+                    if name not in target:
+                        target[name] = RenderCostEntry()
+
+                    target[name].merge(entry)
+
+    def drain(self) -> dict[str, dict[str, RenderCostEntry]]:
+        """
+         Take the recorded costs ( and start over )
+        """
+        with self.__lock:
+            drained = {"templates": self.__templates, "filters": self.__filters}
+
+            self.__templates = {}
+            self.__filters = {}
+
+        return drained
+
+    def getRanked(self, group: str) -> list[tuple[str, RenderCostEntry]]:
+        """
+         Get the templates or filters ranked by cumulative time
+
+         @param group - "templates" or "filters"
+        """
+        with self.__lock:
+            items = list((self.__templates if group == "templates" else self.__filters).items())
+
+        return sorted(items, key=lambda x: x[1].seconds, reverse=True)
+
+    def toJson(self):
+        return {
+            "templates": {name: entry.toJson() for name, entry in self.getRanked("templates")},
+            "filters": {name: entry.toJson() for name, entry in self.getRanked("filters")},
+        }
+
+    def __add(self, target: dict[str, RenderCostEntry], name: str, seconds: float, size: int, error: bool):
+        with self.__lock:
+            entry = target.get(name)
+            if entry is None:
+                entry = target[name] = RenderCostEntry()
+
+            entry.add(seconds, size, error)
+
+
+# Costs of all template managers of this process
+_renderCostStats = RenderCostStats()
+
+###################################################################################################
+
+
+def startRenderCostStats() -> RenderCostStats:
+    """
+     Start recording the render costs of a run ( the costs recorded by earlier runs in the same process are left out )
+    """
+    global _renderCostStats
+
+    _renderCostStats = RenderCostStats()
+
+    return _renderCostStats
+
+
+def getRenderCostStats() -> RenderCostStats:
+    return _renderCostStats
+
+
+def countFilterCalls(filterName: str, func: Callable) -> Callable:
+    """
+     Wrap a template filter so its calls and time are recorded ( keeps the jinja pass_context / pass_environment
+     markers and async filters async )
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def asyncWrapper(*args, **kwargs) -> Any:
+            start = time.perf_counter()
+            error = True
+
+            try:
+                result = await func(*args, **kwargs)
+                error = False
+
+                return result
+            finally:
+                _renderCostStats.addFilter(filterName, time.perf_counter() - start, error)
+
+        return asyncWrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> Any:
+        start = time.perf_counter()
+        error = True
+
+        try:
+            result = func(*args, **kwargs)
+            error = False
+
+            return result
+        finally:
+            _renderCostStats.addFilter(filterName, time.perf_counter() - start, error)
+
+    return wrapper
+
+
+def countStream(templateName: str, chunks: Iterable[str]) -> Iterable[str]:
+    """
+     Wrap a template stream so the time spent producing its chunks ( not writing them ) and its size are recorded
+    """
+    iterator = iter(chunks)
+    seconds = 0
+    size = 0
+    error = False
+
+    try:
+        while True:
+            start = time.perf_counter()
+
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            except:
+                error = True
+
+                raise
+            finally:
+                seconds += time.perf_counter() - start
+
+            size += len(chunk.encode("utf-8"))
+
+            yield chunk
+    finally:
+        _renderCostStats.addTemplate(templateName, seconds, size, error)
+
+        addEventTime("render", seconds)
+
+
+def _clearRenderCostsInChild():
+    # A forked worker inherits the costs recorded by the main process, it only reports its own
+    _renderCostStats.drain()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_clearRenderCostsInChild)
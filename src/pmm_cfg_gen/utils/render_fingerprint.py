@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import hashlib
+import json
+from typing import Any
+
+import jsonpickle
+from plexapi.base import PlexObject
+
+from pmm_cfg_gen.utils.settings_utils_v1 import Settings
+
+###################################################################################################
+
+# Attributes of plex objects that identify the item and change when plex updates it
+PLEX_FINGERPRINT_ATTRIBUTES = ["ratingKey", "title", "guid", "updatedAt", "childCount", "leafCount"]
+
+# Child elements of plex objects that are part of the fingerprint ( the external imdb / tmdb / tvdb ids, a rematch
+# changes them )
+PLEX_FINGERPRINT_ELEMENTS = ["Guid"]
+
+
+def hashSettings(settings: Settings) -> str:
+    """
+     Hash the settings that influence the content or location of generated files ( runtime, render and writer
+     settings are left out so changing them does not invalidate every output )
+
+     @param settings - The settings
+
+     @return The hex digest
+    """
+    relevant = {
+        "version": settings.version,
+        "libraries": settings.plex.libraries,
+        "plexMetaManager": settings.plexMetaManager,
+        "thePosterDatabase": settings.thePosterDatabase,
+        "theMovieDatabase": settings.theMovieDatabase,
+        "theTvDatabase": settings.theTvDatabase,
+        "trakt": settings.trakt,
+        "templates": settings.templates,
+        "generate": settings.generate,
+        "output": {
+            "pathFormat": settings.output.pathFormat,
+            "sharedTemplatePathFormat": settings.output.sharedTemplatePathFormat,
+            "fileNameFormat": settings.output.fileNameFormat,
+        },
+    }
+
+    return hashlib.sha256(str(jsonpickle.dumps(relevant, unpicklable=False)).encode("utf-8")).hexdigest()
+
+
+def _fingerprintElements(value: PlexObject) -> list[str]:
+    # Read from the xml data, the ( lazy ) attributes would reload a partial object
+    data = value.__dict__.get("_data")
+
+    if data is None:
+        return []
+
+    return sorted(["{}:{}".format(x.tag, x.attrib.get("id")) for x in data if x.tag in PLEX_FINGERPRINT_ELEMENTS])
+
+
+def _fingerprintValue(value: Any) -> Any:
+    if isinstance(value, PlexObject):
+        return [type(value).__name__] + [str(value.__dict__.get(x)) for x in PLEX_FINGERPRINT_ATTRIBUTES] + _fingerprintElements(value)
+
+    if isinstance(value, dict):
+        return {str(k): _fingerprintValue(v) for k, v in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        return [_fingerprintValue(x) for x in value]
+
+    return value
+
+
+def hashInputs(inputs: Any) -> str:
+    """
+     Hash the inputs of a render. Plex objects are reduced to their identity, external ids and update time
+     ( see L { PLEX_FINGERPRINT_ATTRIBUTES } and L { PLEX_FINGERPRINT_ELEMENTS } ) so nothing is fetched from the server, everything else ( e.g. the PMM entry ) is hashed by value
+
+     @param inputs - The render inputs ( plex objects, dicts and lists )
+
+     @return The hex digest
+    """
+    return hashlib.sha256(json.dumps(_fingerprintValue(inputs), sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def combineFingerprint(templateHash: str, settingsHash: str, inputHash: str) -> str:
+    """
+     Combine the template, settings and input hashes into the fingerprint of an output file
+    """
+    return hashlib.sha256("{}:{}:{}".format(templateHash, settingsHash, inputHash).encode("utf-8")).hexdigest()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import logging
+import traceback
+import concurrent.futures
+import multiprocessing.util
+from pathlib import Path
+from typing import Callable
+
+from plexapi.server import PlexServer
+
+from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr, Settings
+from pmm_cfg_gen.utils.template_manager import TemplateManager
+from pmm_cfg_gen.utils.plex_pickle import dumpsPlexObjects, loadsPlexObjects
+from pmm_cfg_gen.utils.plex_http import InstrumentedSession, PlexHttpStats
+from pmm_cfg_gen.utils.plex_cassette import startPlexCassette, getPlexCassette
+from pmm_cfg_gen.utils.file_utils import openOutputManifest, getOutputManifest, resetBackgroundWriter
+from pmm_cfg_gen.utils.tmdb_utils import saveTheMovieDatabaseCache, refreshTheMovieDatabaseCache
+from pmm_cfg_gen.utils.list_lookup import saveListLookupCaches, refreshListLookupCaches
+from pmm_cfg_gen.utils.logging_utils import stopLoggingQueue
+from pmm_cfg_gen.utils.reload_detector import startReloadDetector, getReloadDetector
+from pmm_cfg_gen.utils.render_cost import getRenderCostStats
+from pmm_cfg_gen.utils.item_events import ItemEvent, holdEvent, releaseEvent, recordEventTimes
+from pmm_cfg_gen.utils.tracing import startTracing, saveTracePart, getTraceFile, traceFunction
+
+###################################################################################################
+# Worker process state
+
+_workerTemplateManager: TemplateManager | None = None
+_workerPlexServer: PlexServer | None = None
+
+# Plex requests made by the worker, returned ( and reset ) with the results of each job
+_workerHttpStats = PlexHttpStats(phase="rendering")
+
+
+def _initWorker(settings: Settings, templatePath: str, traceFile: str | None = None):
+    """
+     Initialize a render worker process. Each worker holds its own template manager ( and compiled template cache )
+
+     @param settings - The active settings of the main process
+     @param templatePath - The template root path
+     @param traceFile - The trace file of the main process ( None if tracing is off )
+    """
+    global _workerTemplateManager
+
+    globalSettingsMgr.settings = settings
+
+    _workerTemplateManager = TemplateManager(templatePath)
+
+    # A forked worker inherits the background writer of the main process without its threads, workers write their
+    # files synchronously ( they already run in parallel )
+    resetBackgroundWriter()
+
+    # Workers compare against the manifest as loaded at start up, the results are recorded by the main process
+    if settings.output.manifest:
+        openOutputManifest(settings.output.path, readOnly=True)
+
+    # Lookups cached by the worker are merged into the TMDb cache file when the worker exits
+    multiprocessing.util.Finalize(None, saveTheMovieDatabaseCache, exitpriority=10)
+    multiprocessing.util.Finalize(None, saveListLookupCaches, exitpriority=10)
+
+    # Requests recorded by the worker are returned with the results of each job, a replayed cassette is shared with
+    # the main process unless the worker was not forked
+    cassette = getPlexCassette()
+    if cassette is None or cassette.isRecording:
+        startPlexCassette(settings.plex.cassetteFile, settings.plex.cassetteMode, settings.plex.cassetteLatency)
+
+    # The reloads seen by the worker are returned with the results of each job
+    startReloadDetector(settings.render.reloadCheck)
+
+    # The spans of the worker are merged into the trace file by the main process
+    if startTracing(traceFile) is not None:
+        multiprocessing.util.Finalize(None, saveTracePart, exitpriority=5)
+
+    # Workers exit without running atexit handlers, write the queued log records last
+    multiprocessing.util.Finalize(None, stopLoggingQueue, exitpriority=0)
+
+
+def _getWorkerPlexServer() -> PlexServer:
+    """
+     Connect the worker to the plex server. This only happens the first time a render context references the server
+    """
+    global _workerPlexServer
+
+    if _workerPlexServer is None:
+        session = InstrumentedSession(_workerHttpStats, getPlexCassette())
+        session.verify = False
+
+        _workerPlexServer = PlexServer(
+            globalSettingsMgr.settings.plex.serverUrl,
+            globalSettingsMgr.settings.plex.token,
+            session=session,
+        )
+
+    return _workerPlexServer
+
+
+@traceFunction("render.job", "render", getArgs=lambda templates, tplArgsData, recordTimes=False: {"templates": len(templates)})
+def _renderJob(templates: list[tuple[str, str]], tplArgsData: bytes, recordTimes: bool = False) -> tuple[list[tuple[str, str, str | None, tuple]], dict]:
+    """
+     Render all templates of a job using the same context ( in order, exactly like the serial path does )
+
+     @param templates - List of ( template name, output file name )
+     @param tplArgsData - The pickled template arguments
+     @param recordTimes - Return the fetch, render and write time of the job ( for the event of the item )
+
+     @return List of ( template name, output file name, error, manifest entry ) where error is None on success and the
+      stats of the job ( plex requests, implicit reloads, render costs and times, see L { _drainWorkerStats } )
+    """
+    if not recordTimes:
+        return _renderTemplates(templates, tplArgsData), _drainWorkerStats()
+
+    with recordEventTimes() as times:
+        results = _renderTemplates(templates, tplArgsData)
+
+    return results, _drainWorkerStats(times)
+
+
+def _renderTemplates(templates: list[tuple[str, str]], tplArgsData: bytes) -> list[tuple[str, str, str | None, tuple]]:
+    results = []
+
+    try:
+        tplArgs = loadsPlexObjects(tplArgsData, serverFactory=_getWorkerPlexServer)
+    except:
+        error = traceback.format_exc()
+
+        return [(templateName, fileName, error, (None, None)) for templateName, fileName in templates]
+
+    manifest = getOutputManifest()
+
+    # Use the TMDb and list lookups prefetched by the main process
+    refreshTheMovieDatabaseCache()
+    refreshListLookupCaches()
+
+    for templateName, fileName in templates:
+        try:
+            _workerTemplateManager.renderAndSave(templateName, fileName, tplArgs)  # type: ignore
+
+            results.append((templateName, fileName, None, manifest.getEntry(fileName) if manifest is not None else (None, None)))
+        except:
+            results.append((templateName, fileName, traceback.format_exc(), (None, None)))
+
+    return results
+
+
+def _drainWorkerStats(times: dict | None = None) -> dict:
+    """
+     Take the plex requests, implicit reloads, render costs and cassette interactions recorded by the worker since the
+     last job
+
+     @param times - The times of the job ( see L { recordEventTimes } )
+    """
+    detector = getReloadDetector()
+    cassette = getPlexCassette()
+
+    return {
+        "http": _workerHttpStats.drain(),
+        "reloads": detector.drain() if detector is not None else {},
+        "render": getRenderCostStats().drain(),
+        "cassette": cassette.drain() if cassette is not None and cassette.isRecording else [],
+        "times": times,
+    }
+
+###################################################################################################
+
+
+class RenderPool:
+    """
+     Renders templates in a pool of worker processes. Jobs are submitted with a picklable context ( plex objects are
+     pickled by state, see L { PlexObjectPickler } ) and the number of jobs in flight is bounded
+    """
+    _logger: logging.Logger
+
+    __executor: concurrent.futures.ProcessPoolExecutor
+    __maxInFlight: int
+    __inFlight: dict[concurrent.futures.Future, tuple[str, Callable[[str], None] | None, ItemEvent | None]]
+    __httpStats: PlexHttpStats | None
+
+    def __init__(self, templatePath: str | Path, workers: int, maxInFlight: int, httpStats: PlexHttpStats | None = None) -> None:
+        """
+         @param httpStats - Stats the plex requests of the workers are merged into ( attributed to the current library )
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self._logger.info("Starting render pool. Workers: {}, Max In Flight: {}".format(workers, maxInFlight))
+
+        self.__maxInFlight = max(1, maxInFlight)
+        self.__inFlight = {}
+        self.__httpStats = httpStats
+        self.__executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_initWorker,
+            initargs=(globalSettingsMgr.settings, str(templatePath), getTraceFile()),
+        )
+
+    def submit(self, description: str, templates: list[tuple[str, Path]], tplArgs: dict, onSaved: Callable[[str], None] | None = None):
+        """
+         Submit a render job. Blocks while the maximum number of jobs are in flight
+
+         @param description - Description of the job used for error reporting
+         @param templates - List of ( template name, output file name ) rendered with the same context
+         @param tplArgs - The template arguments
+         @param onSaved - Called ( in the main process ) with the file name of each successfully saved file
+        """
+        if len(templates) == 0:
+            return
+
+        while len(self.__inFlight) >= self.__maxInFlight:
+            self.__waitForJobs(concurrent.futures.FIRST_COMPLETED)
+
+        # The item is done before the job is, its event is written once the times of the job were added
+        event = holdEvent()
+
+        future = self.__executor.submit(
+            _renderJob,
+            [(str(templateName), str(fileName)) for templateName, fileName in templates],
+            dumpsPlexObjects(tplArgs),
+            event is not None,
+        )
+
+        self.__inFlight[future] = (description, onSaved, event)
+
+    def wait(self):
+        """
+         Wait for all submitted jobs to complete ( barrier )
+        """
+        while len(self.__inFlight) > 0:
+            self.__waitForJobs(concurrent.futures.ALL_COMPLETED)
+
+    def close(self):
+        self.wait()
+
+        self.__executor.shutdown()
+
+    def __waitForJobs(self, returnWhen: str):
+        done, _ = concurrent.futures.wait(self.__inFlight.keys(), return_when=returnWhen)
+
+        for future in done:
+            description, onSaved, event = self.__inFlight.pop(future)
+
+            try:
+                results, workerStats = future.result()
+            except:
+                self._logger.exception("Render job failed: {}".format(description))
+
+                releaseEvent(event)
+
+                continue
+
+            releaseEvent(event, workerStats["times"])
+
+            if self.__httpStats is not None:
+                self.__httpStats.merge(workerStats["http"], library=self.__httpStats.library)
+
+            detector = getReloadDetector()
+            if detector is not None:
+                detector.merge(workerStats["reloads"])
+
+            getRenderCostStats().merge(workerStats["render"])
+
+            cassette = getPlexCassette()
+            if cassette is not None and cassette.isRecording:
+                cassette.merge(workerStats["cassette"])
+
+            manifest = getOutputManifest()
+
+            for templateName, fileName, error, (digest, status) in results:
+                if error is not None:
+                    self._logger.error("Error Processing Template '{}' for {}:\n{}".format(templateName, description, error))
+
+                    continue
+
+                if manifest is not None and status is not None:
+                    manifest.record(fileName, digest, status)
+
+                if onSaved is not None:
+                    onSaved(fileName)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import logging
+import os
+import pickle
+import tempfile
+from typing import Any, Iterator
+
+from plexapi.server import PlexServer
+
+from pmm_cfg_gen.utils.plex_pickle import PlexObjectPickler, PlexObjectUnpickler
+
+###################################################################################################
+
+
+class ReportSpool:
+    """
+     Append only store for report entries. Entries are either kept in memory or pickled to a temporary file and
+     read back lazily ( in sort order ) when the report is rendered, so report memory does not grow with the library.
+     Appended entries stay in memory until L { flush } is called so they are written with their final state
+    """
+    _logger: logging.Logger
+
+    __server: PlexServer | None
+    __titles: set[str]
+    __index: list[list]
+    __pending: list[int]
+    __file: Any
+
+    def __init__(self, server: PlexServer | None = None, spoolToDisk: bool = False) -> None:
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.__server = server
+        self.__titles = set()
+        self.__index = []
+        self.__pending = []
+        self.__file = tempfile.TemporaryFile(prefix="pmm_cfg_gen_", suffix=".spool") if spoolToDisk else None
+
+    @property
+    def spoolToDisk(self) -> bool:
+        return self.__file is not None
+
+    def append(self, title: str, entry: dict, sortKey: str | None = None):
+        """
+         Add an entry to the spool
+
+         @param title - The title used to detect duplicates ( see L { __contains__ } )
+         @param entry - The report entry
+         @param sortKey - The key used by L { sort }. Defaults to the title
+        """
+        self.__titles.add(title)
+        self.__index.append([sortKey if sortKey is not None else title, entry])
+
+        if self.__file is not None:
+            self.__pending.append(len(self.__index) - 1)
+
+    def flush(self):
+        """
+         Write all pending entries to the spool file ( no-op when the spool is kept in memory )
+        """
+        if self.__file is None or len(self.__pending) == 0:
+            return
+
+        self.__file.seek(0, os.SEEK_END)
+
+        for pos in self.__pending:
+            offset = self.__file.tell()
+
+            PlexObjectPickler(self.__file, protocol=pickle.HIGHEST_PROTOCOL).dump(self.__index[pos][1])
+
+            self.__index[pos][1] = offset
+
+        self.__pending.clear()
+
+    def sort(self):
+        self.flush()
+
+        self.__index.sort(key=lambda x: x[0])
+
+    def close(self):
+        self.__titles.clear()
+        self.__index.clear()
+        self.__pending.clear()
+
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.__titles
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def __iter__(self) -> Iterator[dict]:
+        if self.__file is None:
+            for _, entry in self.__index:
+                yield entry
+
+            return
+
+        self.flush()
+
+        for _, offset in self.__index:
+            self.__file.seek(offset)
+
+            yield PlexObjectUnpickler(self.__file, self.__server).load()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import datetime
+import json
+import logging
+import sqlite3
+import statistics
+from pathlib import Path
+
+from pmm_cfg_gen.utils.plex_stats import PlexStats
+from pmm_cfg_gen.utils.metrics_export import getTimerSeconds
+
+###################################################################################################
+
+
+class RunHistory:
+    """
+     SQLite database with a row per run and per library of a run ( duration, counts, plex requests ), used to track
+     regressions across runs ( see L { showRunHistory } ). The full statistics of each run are kept as json
+    """
+    VERSION = 1
+
+    _logger: logging.Logger
+
+    fileName: Path
+
+    __connection: sqlite3.Connection
+
+    def __init__(self, fileName: str | Path) -> None:
+        """
+         @param fileName - The database file ( created if it does not exist )
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.fileName = Path(fileName)
+        self.fileName.parent.mkdir(parents=True, exist_ok=True)
+
+        self.__connection = sqlite3.connect(str(self.fileName), timeout=30)
+        self.__connection.row_factory = sqlite3.Row
+
+        self.__createSchema()
+
+    def close(self):
+        self.__connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+        return False
+
+    def addRun(self, stats: PlexStats, finished: datetime.datetime | None = None) -> int:
+        """
+         Add the statistics of a run
+
+         @return The run id
+        """
+        finished = finished if finished is not None else datetime.datetime.now().astimezone()
+        seconds = getTimerSeconds(stats.timerProgram) or 0
+
+        httpByLibrary = stats.http.getTotals("library")
+        httpTotal = stats.http.getTotals().get("total")
+
+        with self.__connection:
+            cursor = self.__connection.execute(
+                "INSERT INTO runs (started, finished, seconds, collections, items, itemsSkipped, filesWritten, requests, requestSeconds, stats) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (finished - datetime.timedelta(seconds=seconds)).isoformat(timespec="seconds"),
+                    finished.isoformat(timespec="seconds"),
+                    seconds,
+                    stats.countsProgram.collections.processed,
+                    stats.countsProgram.items.processed,
+                    stats.countsProgram.items.skipped,
+                    stats.files.written,
+                    httpTotal.count if httpTotal is not None else 0,
+                    httpTotal.seconds if httpTotal is not None else 0,
+                    json.dumps(stats.toJson(), default=str),
+                ),
+            )
+
+            runId = int(cursor.lastrowid)  # type: ignore
+
+            for libraryName, counts in stats.countsLibraries.items():
+                http = httpByLibrary.get(libraryName)
+
+                self.__connection.execute(
+                    "INSERT INTO libraries (runId, library, seconds, collections, collectionsSkipped, items, itemsSkipped, requests, requestErrors, requestSeconds, responseBytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        runId,
+                        libraryName,
+                        getTimerSeconds(stats.timerLibraries.get(libraryName)),
+                        counts.collections.processed,
+                        counts.collections.skipped,
+                        counts.items.processed,
+                        counts.items.skipped,
+                        http.count if http is not None else 0,
+                        http.errors if http is not None else 0,
+                        http.seconds if http is not None else 0,
+                        http.bytes if http is not None else 0,
+                    ),
+                )
+
+        return runId
+
+    def getLibraries(self) -> list[str]:
+        return [row["library"] for row in self.__connection.execute("SELECT DISTINCT library FROM libraries ORDER BY library")]
+
+    def getLibraryRuns(self, library: str, last: int = 20) -> list[dict]:
+        """
+         Get the latest runs of a library ( oldest first ) with the items per second and requests per item
+
+         @param last - Number of runs
+        """
+        rows = self.__connection.execute(
+            """
+            SELECT runs.id AS runId, runs.finished, libraries.*
+            FROM libraries JOIN runs ON runs.id = libraries.runId
+            WHERE libraries.library = ?
+            ORDER BY runs.id DESC LIMIT ?
+            """,
+            (library, last),
+        ).fetchall()
+
+        result = []
+
+        for row in reversed(rows):
+            run = dict(row)
+
+            run["itemsPerSecond"] = run["items"] / run["seconds"] if run["seconds"] else None
+            run["requestsPerItem"] = run["requests"] / run["items"] if run["items"] else None
+
+            result.append(run)
+
+        return result
+
+    def __createSchema(self):
+        version = self.__connection.execute("PRAGMA user_version").fetchone()[0]
+
+        if version >= RunHistory.VERSION:
+            return
+
+        with self.__connection:
+            self.__connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    started TEXT NOT NULL,
+                    finished TEXT NOT NULL,
+                    seconds REAL NOT NULL,
+                    collections INTEGER NOT NULL,
+                    items INTEGER NOT NULL,
+                    itemsSkipped INTEGER NOT NULL,
+                    filesWritten INTEGER NOT NULL,
+                    requests INTEGER NOT NULL,
+                    requestSeconds REAL NOT NULL,
+                    stats TEXT
+                )
+                """
+            )
+            self.__connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS libraries (
+                    runId INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+                    library TEXT NOT NULL,
+                    seconds REAL,
+                    collections INTEGER NOT NULL,
+                    collectionsSkipped INTEGER NOT NULL,
+                    items INTEGER NOT NULL,
+                    itemsSkipped INTEGER NOT NULL,
+                    requests INTEGER NOT NULL,
+                    requestErrors INTEGER NOT NULL,
+                    requestSeconds REAL NOT NULL,
+                    responseBytes INTEGER NOT NULL,
+                    PRIMARY KEY (runId, library)
+                )
+                """
+            )
+            self.__connection.execute("CREATE INDEX IF NOT EXISTS libraries_library ON libraries (library, runId)")
+            self.__connection.execute("PRAGMA user_version = {}".format(RunHistory.VERSION))
+
+###################################################################################################
+
+
+def saveRunHistory(fileName: str | Path, stats: PlexStats) -> int:
+    """
+     Add the statistics of a run to the run history database
+
+     @return The run id
+    """
+    with RunHistory(fileName) as history:
+        return history.addRun(stats)
+
+
+def showRunHistory(fileName: str | Path | None, library: str | None = None, last: int = 20, asJson: bool = False) -> int:
+    """
+     Print the trend of the latest runs per library ( duration, items per second, requests per item ). The last run
+     is compared with the median of the runs before it
+
+     @return The exit code
+    """
+    if fileName is None or not Path(fileName).exists():
+        print("No run history found{}. Set output.historyFile to record one".format(" at '{}'".format(fileName) if fileName is not None else ""))
+
+        return 1
+
+    with RunHistory(fileName) as history:
+        libraries = [library] if library is not None else history.getLibraries()
+        runs = {libraryName: history.getLibraryRuns(libraryName, last) for libraryName in libraries}
+
+    if asJson:
+        print(json.dumps(runs, indent=2))
+
+        return 0
+
+    for libraryName, libraryRuns in runs.items():
+        print("Library: '{}' (last {} runs)".format(libraryName, len(libraryRuns)))
+
+        if len(libraryRuns) == 0:
+            continue
+
+        print("  {:>5}  {:<25} {:>9} {:>7} {:>9} {:>9} {:>9}".format("Run", "Finished", "Duration", "Items", "Items/s", "Requests", "Req/item"))
+
+        for run in libraryRuns:
+            print(
+                "  {:>5}  {:<25} {:>8.1f}s {:>7} {:>9} {:>9} {:>9}".format(
+                    run["runId"], run["finished"], run["seconds"] or 0, run["items"],
+                    _formatNumber(run["itemsPerSecond"]), run["requests"], _formatNumber(run["requestsPerItem"])
+                )
+            )
+
+        if len(libraryRuns) > 1:
+            latest = libraryRuns[-1]
+            changes = []
+
+            for key, title in [("seconds", "Duration"), ("itemsPerSecond", "Items/s"), ("requestsPerItem", "Req/item")]:
+                previous = [run[key] for run in libraryRuns[:-1] if run[key] is not None]
+
+                if len(previous) == 0 or latest[key] is None:
+                    continue
+
+                median = statistics.median(previous)
+
+                if median > 0:
+                    changes.append("{} {:+.0%}".format(title, latest[key] / median - 1))
+
+            if len(changes) > 0:
+                print("  Last run vs median of the previous runs: {}".format(", ".join(changes)))
+
+    return 0
+
+
+def _formatNumber(value: float | None) -> str:
+    return "{:.2f}".format(value) if value is not None else "-"
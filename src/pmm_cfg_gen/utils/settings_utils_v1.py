@@ -15,6 +15,9 @@ import jsonpickle
 from dotenv import load_dotenv
 from expandvars import expandvars
 
+from pmm_cfg_gen.utils.format_string import compileFormatString
+from pmm_cfg_gen.utils.logging_utils import LazyJson
+
 #######################################################################
 
 class SettingsTemplateFileFormatEnum(Enum):
@@ -47,7 +50,7 @@ class SettingsGenerate:
 
         formatValue = str(formatValue).lower()
 
-        logging.getLogger("pmm_cfg_gen").debug(f"Checking if format '{formatValue}' is enabled (formats: {self.formats})")
+        logging.getLogger("pmm_cfg_gen").debug("Checking if format '%s' is enabled (formats: %s)", formatValue, self.formats)
 
         return formatValue in self.formats
         
@@ -57,7 +60,7 @@ class SettingsGenerate:
 
         typeValue = str(typeValue).lower()
 
-        logging.getLogger("pmm_cfg_gen").debug(f"Checking if type '{typeValue}' is enabled (types: {self.types})")
+        logging.getLogger("pmm_cfg_gen").debug("Checking if type '%s' is enabled (types: %s)", typeValue, self.types)
 
         typeValueParts = typeValue.split(".")
         if len(typeValueParts) > 1:
@@ -96,13 +99,43 @@ class SettingsOutput:
     sharedTemplatePathFormat: str
     fileNameFormat: SettingsOutputFileNames
     overwrite: bool
-
-    def __init__(self, path: str, pathFormat: str, sharedTemplatePathFormat: str, overwrite : bool, fileNameFormat: SettingsOutputFileNames) -> None:
+    streaming: bool
+    writerThreads: int
+    writerQueueSize: int
+    manifest: bool
+    incremental: bool
+    statsFile: str | None
+    metricsFile: str | None
+    historyFile: str | None
+    eventsFile: str | None
+    slowItems: int
+
+    def __init__(self, path: str, pathFormat: str, sharedTemplatePathFormat: str, overwrite : bool, fileNameFormat: SettingsOutputFileNames, streaming : bool = False, writerThreads : int = 0, writerQueueSize : int = 256, manifest : bool = True, incremental : bool = False, statsFile : str | None = None, metricsFile : str | None = None, historyFile : str | None = None, eventsFile : str | None = None, slowItems : int = 10) -> None:
         self.path = path
         self.pathFormat = pathFormat
         self.sharedTemplatePathFormat = sharedTemplatePathFormat
         self.fileNameFormat = fileNameFormat
         self.overwrite = overwrite
+        self.streaming = streaming
+        self.writerThreads = writerThreads if writerThreads is not None and writerThreads > 0 else 0
+        self.writerQueueSize = writerQueueSize if writerQueueSize is not None and writerQueueSize > 0 else 256
+        self.manifest = manifest
+
+        # Parse the path and file name formats once, formatting uses the cached compiled versions
+        for formatString in [self.pathFormat, self.sharedTemplatePathFormat] + list(vars(self.fileNameFormat).values()):
+            if isinstance(formatString, str):
+                compileFormatString(formatString)
+
+        # Incremental rendering stores its fingerprints in the manifest
+        self.incremental = incremental
+        if self.incremental:
+            self.manifest = True
+
+        self.statsFile = expandvars(statsFile.strip()) if statsFile is not None and len(statsFile.strip()) > 0 else None
+        self.metricsFile = expandvars(metricsFile.strip()) if metricsFile is not None and len(metricsFile.strip()) > 0 else None
+        self.historyFile = expandvars(historyFile.strip()) if historyFile is not None and len(historyFile.strip()) > 0 else None
+        self.eventsFile = expandvars(eventsFile.strip()) if eventsFile is not None and len(eventsFile.strip()) > 0 else None
+        self.slowItems = slowItems if slowItems is not None and slowItems > 0 else 0
 
 
 class SettingsPmmDefaults:
@@ -131,11 +164,18 @@ class SettingsPlexServer:
     serverUrl: str
     token: str
     libraries: list[SettingsPlexLibrary]
+    cassetteMode: str | None
+    cassetteFile: str | None
+    cassetteLatency: bool
 
-    def __init__(self, serverUrl: str, token: str, libraries: List, pmmDefaults: SettingsPmmDefaults | None = None) -> None:
+    def __init__(self, serverUrl: str, token: str, libraries: List, pmmDefaults: SettingsPmmDefaults | None = None, cassetteMode: str | None = None, cassetteFile: str | None = None, cassetteLatency: bool = False) -> None:
         self.serverUrl = serverUrl
         self.token = token
 
+        self.cassetteMode = cassetteMode.strip().lower() if cassetteMode is not None and cassetteMode.strip().lower() in ["record", "replay"] else None
+        self.cassetteFile = expandvars(cassetteFile.strip()) if cassetteFile is not None and len(cassetteFile.strip()) > 0 else None
+        self.cassetteLatency = cassetteLatency
+
         if libraries is not None:
             self.libraries = []
             
@@ -274,13 +314,146 @@ class SettingsTemplateGroups:
         return None
 
 
+class SettingsTemplateLookup:
+    """
+     Lookup tables compiled once from the template and generate settings. The templates of every ( group, library type )
+     are selected and checked against the enabled formats and types while compiling, so the render loops only do
+     dictionary lookups
+    """
+    GROUPS = ["library", "collection", "metadata", "overlay"]
+
+    __generate: SettingsGenerate
+    __templates: dict[tuple, tuple[SettingsTemplateFile, ...]]
+    __enabledTemplates: dict[tuple, tuple[SettingsTemplateFile, ...]]
+    __formatEnabledTemplates: dict[tuple, tuple[SettingsTemplateFile, ...]]
+    __typeEnabled: dict[str, bool]
+
+    def __init__(self, templates: SettingsTemplateGroups, generate: SettingsGenerate) -> None:
+        self.__generate = generate
+        self.__templates = {}
+        self.__enabledTemplates = {}
+        self.__formatEnabledTemplates = {}
+        self.__typeEnabled = {}
+
+        for group in SettingsTemplateLookup.GROUPS:
+            templateGroupList = templates.getTemplateByGroupName(group) or []
+
+            # Library types are matched by the templates' types, types without templates of their own get the "any" templates
+            libraryTypes = set([x.value for x in SettingsTemplateLibraryTypeEnum])
+            for x in templateGroupList:
+                typeParts = x.type.lower().split(".", 1)
+                if len(typeParts) > 1 and typeParts[0] == group:
+                    libraryTypes.add(typeParts[1])
+
+            for libraryType in libraryTypes:
+                strGroupLibrary = f"{group}.{libraryType}"
+                strGroupAny = f"{group}.any"
+
+                self.__add(group, libraryType, [x for x in templateGroupList if x.type.lower() == strGroupLibrary or x.type.lower() == strGroupAny])
+
+            self.__add(group, None, [x for x in templateGroupList if x.type.lower() == f"{group}.any"])
+
+    def getTemplates(self, group: str, libraryType: SettingsTemplateLibraryTypeEnum | str) -> tuple[SettingsTemplateFile, ...] | None:
+        """
+         Get the templates configured for a group and library type ( see L { SettingsTemplateGroups.getTemplateByGroupAndLibraryType } )
+
+         @return The templates or None if there are none
+        """
+        return self.__lookup(self.__templates, group, libraryType) or None
+
+    def getEnabledTemplates(self, group: str, libraryType: SettingsTemplateLibraryTypeEnum | str, checkType: bool = True) -> tuple[SettingsTemplateFile, ...]:
+        """
+         Get the templates of a group and library type whose format ( and type ) are enabled
+
+         @param checkType - If False only the format has to be enabled
+
+         @return The templates ( empty if there are none )
+        """
+        return self.__lookup(self.__enabledTemplates if checkType else self.__formatEnabledTemplates, group, libraryType)
+
+    def isTypeEnabled(self, typeValue: SettingsTemplateLibraryTypeEnum | str) -> bool:
+        result = self.__typeEnabled.get(typeValue)  # type: ignore
+
+        if result is None:
+            result = self.__generate.isTypeEnabled(typeValue)
+            self.__typeEnabled[typeValue] = result  # type: ignore
+
+        return result
+
+    def __add(self, group: str, libraryType: str | None, templateFiles: list[SettingsTemplateFile]):
+        formatEnabled = tuple([x for x in templateFiles if self.__generate.isFormatEnabled(x.format)])
+        enabled = tuple([x for x in formatEnabled if self.isTypeEnabled(x.type)])
+
+        for x in templateFiles:
+            if x not in enabled:
+                logging.getLogger("pmm_cfg_gen").debug("Template '{}' ( type: '{}', format: '{}' ) is not enabled for '{}.{}'".format(x.fileName, x.type, x.format, group, libraryType or "*"))
+
+        keys = [(group, libraryType)]
+        if libraryType in SettingsTemplateLibraryTypeEnum._value2member_map_:
+            keys.append((group, SettingsTemplateLibraryTypeEnum(libraryType)))
+
+        for key in keys:
+            self.__templates[key] = tuple(templateFiles)
+            self.__enabledTemplates[key] = enabled
+            self.__formatEnabledTemplates[key] = formatEnabled
+
+    def __lookup(self, table: dict[tuple, tuple[SettingsTemplateFile, ...]], group: str, libraryType: SettingsTemplateLibraryTypeEnum | str) -> tuple[SettingsTemplateFile, ...]:
+        result = table.get((group, libraryType))
+
+        if result is None:
+            if group not in SettingsTemplateLookup.GROUPS:
+                raise ValueError("Unknown template group name: '{}".format(group))
+
+            result = table.get((group, str(libraryType).lower().strip()), table[(group, None)])
+
+        return result
+
+
 class SettingsTheTvDatabase:
     apiKey: str | None
     pin: str | None
-
-    def __init__(self, apiKey: str | None, pin: str | None) -> None:
+    apiUrl: str
+    cacheFile: str | None
+    cacheTtl: float
+    cacheNegativeTtl: float
+    prefetchThreads: int
+    rateLimit: float
+    maxRetries: int
+
+    def __init__(self, apiKey: str | None, pin: str | None, apiUrl: str = "https://api4.thetvdb.com/v4", cacheFile: str | None = None, cacheTtl: float = 7, cacheNegativeTtl: float = 1, prefetchThreads: int = 4, rateLimit: float = 10, maxRetries: int = 5) -> None:
         self.apiKey = apiKey
         self.pin = pin
+        self.apiUrl = apiUrl if apiUrl is not None and len(apiUrl) > 0 else "https://api4.thetvdb.com/v4"
+        self.cacheFile = cacheFile
+        # TTLs are in days, a cacheTtl of 0 disables the cache
+        self.cacheTtl = cacheTtl if cacheTtl is not None and cacheTtl > 0 else 0
+        self.cacheNegativeTtl = cacheNegativeTtl if cacheNegativeTtl is not None and cacheNegativeTtl > 0 else 0
+        self.prefetchThreads = prefetchThreads if prefetchThreads is not None and prefetchThreads > 0 else 4
+        self.rateLimit = rateLimit if rateLimit is not None and rateLimit > 0 else 0
+        self.maxRetries = maxRetries if maxRetries is not None and maxRetries >= 0 else 5
+
+
+class SettingsTrakt:
+    clientId: str | None
+    apiUrl: str
+    cacheFile: str | None
+    cacheTtl: float
+    cacheNegativeTtl: float
+    prefetchThreads: int
+    rateLimit: float
+    maxRetries: int
+
+    def __init__(self, clientId: str | None, apiUrl: str = "https://api.trakt.tv", cacheFile: str | None = None, cacheTtl: float = 7, cacheNegativeTtl: float = 1, prefetchThreads: int = 4, rateLimit: float = 3, maxRetries: int = 5) -> None:
+        self.clientId = clientId
+        self.apiUrl = apiUrl if apiUrl is not None and len(apiUrl) > 0 else "https://api.trakt.tv"
+        self.cacheFile = cacheFile
+        # TTLs are in days, a cacheTtl of 0 disables the cache
+        self.cacheTtl = cacheTtl if cacheTtl is not None and cacheTtl > 0 else 0
+        self.cacheNegativeTtl = cacheNegativeTtl if cacheNegativeTtl is not None and cacheNegativeTtl > 0 else 0
+        self.prefetchThreads = prefetchThreads if prefetchThreads is not None and prefetchThreads > 0 else 4
+        # Trakt allows 1000 GET requests every 5 minutes
+        self.rateLimit = rateLimit if rateLimit is not None and rateLimit > 0 else 0
+        self.maxRetries = maxRetries if maxRetries is not None and maxRetries >= 0 else 5
 
 
 class SettingsTheMovieDatabase:
@@ -288,12 +461,33 @@ class SettingsTheMovieDatabase:
     apiKey: str
     language: str
     region: str
-
-    def __init__(self, limitCollectionResults: int, apiKey: str, language: str, region: str) -> None:
+    cacheFile: str | None
+    cacheTtl: float
+    cacheNegativeTtl: float
+    apiUrl: str
+    prefetch: bool
+    prefetchThreads: int
+    rateLimit: float
+    maxRetries: int
+    exportFile: str | None
+    exportIndexFile: str | None
+
+    def __init__(self, limitCollectionResults: int, apiKey: str, language: str, region: str, cacheFile: str | None = None, cacheTtl: float = 30, cacheNegativeTtl: float = 1, apiUrl: str = "https://api.themoviedb.org/3", prefetch: bool = True, prefetchThreads: int = 8, rateLimit: float = 20, maxRetries: int = 5, exportFile: str | None = None, exportIndexFile: str | None = None) -> None:
         self.limitCollectionResults = limitCollectionResults
         self.apiKey = apiKey
         self.language = language
         self.region = region
+        self.cacheFile = cacheFile
+        # TTLs are in days, a cacheTtl of 0 disables the cache
+        self.cacheTtl = cacheTtl if cacheTtl is not None and cacheTtl > 0 else 0
+        self.cacheNegativeTtl = cacheNegativeTtl if cacheNegativeTtl is not None and cacheNegativeTtl > 0 else 0
+        self.apiUrl = apiUrl if apiUrl is not None and len(apiUrl) > 0 else "https://api.themoviedb.org/3"
+        self.prefetch = prefetch if prefetch is not None else True
+        self.prefetchThreads = prefetchThreads if prefetchThreads is not None and prefetchThreads > 0 else 8
+        self.rateLimit = rateLimit if rateLimit is not None and rateLimit > 0 else 0
+        self.maxRetries = maxRetries if maxRetries is not None and maxRetries >= 0 else 5
+        self.exportFile = exportFile
+        self.exportIndexFile = exportIndexFile
 
 
 class SettingsThePosterDatabase:
@@ -309,6 +503,49 @@ class SettingsThePosterDatabase:
         self.dbAssetUrl = dbAssetUrl
 
 
+class SettingsRender:
+    workers: int
+    maxInFlight: int
+    enableAsync: bool
+    concurrency: int
+    reloadCheck: str
+
+    def __init__(self, workers: int = 0, maxInFlight: int = 0, enableAsync: bool = False, concurrency: int = 8, reloadCheck: str | bool = "off") -> None:
+        self.workers = workers if workers is not None and workers > 0 else 0
+        self.enableAsync = enableAsync if enableAsync is not None else False
+        self.concurrency = concurrency if concurrency is not None and concurrency > 0 else 8
+
+        # Detect templates reading attributes plexapi has to reload ( off, report or strict ). An unquoted off is read as False
+        reloadCheck = str(reloadCheck).lower() if reloadCheck not in [None, False] else "off"
+        self.reloadCheck = reloadCheck if reloadCheck in ["off", "report", "strict"] else "off"
+
+        if maxInFlight is not None and maxInFlight > 0:
+            self.maxInFlight = maxInFlight
+        elif self.isParallel:
+            self.maxInFlight = self.workers * 2
+        else:
+            self.maxInFlight = self.concurrency * 4
+
+    @property
+    def isParallel(self) -> bool:
+        return self.workers > 0
+
+    @property
+    def isAsync(self) -> bool:
+        # The process pool takes precedence over async rendering
+        return self.enableAsync and not self.isParallel
+
+
+class SettingsProgress:
+    interval: float
+    statusFile: str | None
+
+    def __init__(self, interval: float = 10, statusFile: str | None = None) -> None:
+        # Seconds between progress reports, 0 disables them
+        self.interval = interval if interval is not None and interval > 0 else 0
+        self.statusFile = statusFile if statusFile is not None and len(statusFile) > 0 else None
+
+
 class SettingsRunTime:
     currentWorkingPath: str
     currentWorkingPathRelative: str
@@ -323,23 +560,33 @@ class Settings:
     thePosterDatabase: SettingsThePosterDatabase
     theMovieDatabase: SettingsTheMovieDatabase
     theTvDatabase: SettingsTheTvDatabase
+    trakt: SettingsTrakt
     templates: SettingsTemplateGroups
     output: SettingsOutput
     generate: SettingsGenerate
+    render: SettingsRender
+    progress: SettingsProgress
     runtime: SettingsRunTime
+    templateLookup: SettingsTemplateLookup
 
-    def __init__(self, version: str, plex: SettingsPlexServer, plexMetaManager: SettingsPlexMetaManager, thePosterDatabase: SettingsThePosterDatabase, theMovieDatabase: SettingsTheMovieDatabase,  theTvDatabase : SettingsTheTvDatabase, templates: SettingsTemplateGroups, output: SettingsOutput, generate: SettingsGenerate, runtime: SettingsRunTime) -> None:
+    def __init__(self, version: str, plex: SettingsPlexServer, plexMetaManager: SettingsPlexMetaManager, thePosterDatabase: SettingsThePosterDatabase, theMovieDatabase: SettingsTheMovieDatabase,  theTvDatabase : SettingsTheTvDatabase, trakt: SettingsTrakt, templates: SettingsTemplateGroups, output: SettingsOutput, generate: SettingsGenerate, render: SettingsRender, progress: SettingsProgress, runtime: SettingsRunTime) -> None:
         self.version = version
         self.plex = plex
         self.plexMetaManager = plexMetaManager
         self.thePosterDatabase = thePosterDatabase
         self.theMovieDatabase = theMovieDatabase
         self.theTvDatabase = theTvDatabase
+        self.trakt = trakt
         self.templates = templates
         self.output = output
         self.generate = generate
+        self.render = render
+        self.progress = progress
         self.runtime = runtime
 
+        # Compiled once, the template and generate settings are not changed after loading
+        self.templateLookup = SettingsTemplateLookup(templates, generate)
+
 #######################################################################
 
 class SettingsManager:
@@ -385,7 +632,7 @@ class SettingsManager:
         )
 
         self._logger.debug("Loaded Configuration:")
-        self._logger.debug(jsonpickle.dumps(self._config, unpicklable=False))
+        self._logger.debug("%s", LazyJson(self._config))
 
         self.settings = Settings(
             version=self._config["version"].get(confuse.Optional(str)),  # type: ignore
@@ -396,7 +643,10 @@ class SettingsManager:
                 pmmDefaults=SettingsPmmDefaults(
                     deltaOnly=self._config["pmm"]["deltaOnly"].get(confuse.Optional(bool, default=None)),  # type: ignore
                     basePath=self._config["pmm"]["basePath"].get(confuse.Optional(str, default=None)),  # type: ignore
-                )
+                ),
+                cassetteMode=self._config["plex"]["cassetteMode"].get(confuse.Optional(str, default=None)),  # type: ignore
+                cassetteFile=self._config["plex"]["cassetteFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                cassetteLatency=bool(self._config["plex"]["cassetteLatency"].get(confuse.Optional(bool, default=False))),
             ),
             thePosterDatabase=SettingsThePosterDatabase(
                 searchUrl=expandvars(
@@ -417,10 +667,37 @@ class SettingsManager:
                 language=self._config["theMovieDatabase"]["language"].get(confuse.Optional(None)),  # type: ignore
                 region=self._config["theMovieDatabase"]["region"].get(confuse.Optional(None)),  # type: ignore
                 limitCollectionResults=self._config["theMovieDatabase"]["limitCollectionResults"].get(confuse.Optional(None)),  # type: ignore
+                cacheFile=self._config["theMovieDatabase"]["cacheFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                cacheTtl=self._config["theMovieDatabase"]["cacheTtl"].get(confuse.Optional(confuse.Number(), default=30)),  # type: ignore
+                cacheNegativeTtl=self._config["theMovieDatabase"]["cacheNegativeTtl"].get(confuse.Optional(confuse.Number(), default=1)),  # type: ignore
+                apiUrl=self._config["theMovieDatabase"]["apiUrl"].get(confuse.Optional(str, default=None)),  # type: ignore
+                prefetch=self._config["theMovieDatabase"]["prefetch"].get(confuse.Optional(bool, default=True)),  # type: ignore
+                prefetchThreads=self._config["theMovieDatabase"]["prefetchThreads"].get(confuse.Optional(int, default=8)),  # type: ignore
+                rateLimit=self._config["theMovieDatabase"]["rateLimit"].get(confuse.Optional(confuse.Number(), default=20)),  # type: ignore
+                maxRetries=self._config["theMovieDatabase"]["maxRetries"].get(confuse.Optional(int, default=5)),  # type: ignore
+                exportFile=self._config["theMovieDatabase"]["exportFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                exportIndexFile=self._config["theMovieDatabase"]["exportIndexFile"].get(confuse.Optional(str, default=None)),  # type: ignore
             ),
             theTvDatabase=SettingsTheTvDatabase(
                 apiKey=self._config["theTvDatabase"]["apiKey"].get(confuse.Optional(None)),  # type: ignore
                 pin=self._config["theTvDatabase"]["pin"].get(confuse.Optional(None)),  # type: ignore
+                apiUrl=self._config["theTvDatabase"]["apiUrl"].get(confuse.Optional(str, default=None)),  # type: ignore
+                cacheFile=self._config["theTvDatabase"]["cacheFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                cacheTtl=self._config["theTvDatabase"]["cacheTtl"].get(confuse.Optional(confuse.Number(), default=7)),  # type: ignore
+                cacheNegativeTtl=self._config["theTvDatabase"]["cacheNegativeTtl"].get(confuse.Optional(confuse.Number(), default=1)),  # type: ignore
+                prefetchThreads=self._config["theTvDatabase"]["prefetchThreads"].get(confuse.Optional(int, default=4)),  # type: ignore
+                rateLimit=self._config["theTvDatabase"]["rateLimit"].get(confuse.Optional(confuse.Number(), default=10)),  # type: ignore
+                maxRetries=self._config["theTvDatabase"]["maxRetries"].get(confuse.Optional(int, default=5)),  # type: ignore
+            ),
+            trakt=SettingsTrakt(
+                clientId=self._config["trakt"]["clientId"].get(confuse.Optional(None)),  # type: ignore
+                apiUrl=self._config["trakt"]["apiUrl"].get(confuse.Optional(str, default=None)),  # type: ignore
+                cacheFile=self._config["trakt"]["cacheFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                cacheTtl=self._config["trakt"]["cacheTtl"].get(confuse.Optional(confuse.Number(), default=7)),  # type: ignore
+                cacheNegativeTtl=self._config["trakt"]["cacheNegativeTtl"].get(confuse.Optional(confuse.Number(), default=1)),  # type: ignore
+                prefetchThreads=self._config["trakt"]["prefetchThreads"].get(confuse.Optional(int, default=4)),  # type: ignore
+                rateLimit=self._config["trakt"]["rateLimit"].get(confuse.Optional(confuse.Number(), default=3)),  # type: ignore
+                maxRetries=self._config["trakt"]["maxRetries"].get(confuse.Optional(int, default=5)),  # type: ignore
             ),
             templates=SettingsTemplateGroups(
                 collection=SettingsTemplateFile.from_list_dict(self._config["templates"]["collection"].get(confuse.Optional(list))),  # type: ignore
@@ -434,6 +711,16 @@ class SettingsManager:
                 pathFormat=str(self._config["output"]["pathFormat"].as_str()),
                 sharedTemplatePathFormat=str(self._config["output"]["sharedTemplatePathFormat"].as_str()),
                 overwrite=bool(self._config["output"]["overwrite"].get(confuse.Optional(False))),
+                streaming=bool(self._config["output"]["streaming"].get(confuse.Optional(False))),
+                writerThreads=self._config["output"]["writerThreads"].get(confuse.Optional(int, default=0)),  # type: ignore
+                writerQueueSize=self._config["output"]["writerQueueSize"].get(confuse.Optional(int, default=256)),  # type: ignore
+                manifest=bool(self._config["output"]["manifest"].get(confuse.Optional(True))),
+                incremental=bool(self._config["output"]["incremental"].get(confuse.Optional(False))),
+                statsFile=self._config["output"]["statsFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                metricsFile=self._config["output"]["metricsFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                historyFile=self._config["output"]["historyFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                eventsFile=self._config["output"]["eventsFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+                slowItems=self._config["output"]["slowItems"].get(confuse.Optional(int, default=10)),  # type: ignore
                 fileNameFormat=SettingsOutputFileNames(
                     library=str(
                         self._config["output"]["fileNameFormat"]["library"].get(
@@ -473,6 +760,17 @@ class SettingsManager:
                 types=self._config["generate"]["types"].get(confuse.Optional(list)),  # type: ignore
                 formats=self._config["generate"]["formats"].get(confuse.Optional(list)),  # type: ignore
             ),
+            render=SettingsRender(
+                workers=self._config["render"]["workers"].get(confuse.Optional(int, default=0)),  # type: ignore
+                maxInFlight=self._config["render"]["maxInFlight"].get(confuse.Optional(int, default=0)),  # type: ignore
+                enableAsync=bool(self._config["render"]["async"].get(confuse.Optional(False))),
+                concurrency=self._config["render"]["concurrency"].get(confuse.Optional(int, default=8)),  # type: ignore
+                reloadCheck=self._config["render"]["reloadCheck"].get(confuse.Optional(confuse.OneOf([bool, confuse.Choice(["off", "report", "strict"])]), default="off")),  # type: ignore
+            ),
+            progress=SettingsProgress(
+                interval=self._config["progress"]["interval"].get(confuse.Optional(confuse.Number(), default=10)),  # type: ignore
+                statusFile=self._config["progress"]["statusFile"].get(confuse.Optional(str, default=None)),  # type: ignore
+            ),
             plexMetaManager=SettingsPlexMetaManager.from_dict(self._config["plexMetaManager"].get(confuse.Optional(dict))),  # type: ignore
             runtime=SettingsRunTime(
                 currentWorkingPath=os.path.curdir
@@ -480,7 +778,7 @@ class SettingsManager:
         )
 
         self._logger.debug("Active Settings:")
-        self._logger.debug(jsonpickle.dumps(self.settings, unpicklable=False))
+        self._logger.debug("%s", LazyJson(self.settings))
 
 
 #######################################################################
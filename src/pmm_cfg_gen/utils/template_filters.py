@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 #######################################################################
 
+import asyncio
 import json
 import logging
 import jsonpickle
@@ -18,8 +19,10 @@ from plexapi.video import Video, Movie, Show
 
 from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr
 from pmm_cfg_gen.utils.plex_utils import PlexItemHelper, PlexVideoHelper, PlexCollectionHelper
-from pmm_cfg_gen.utils.tmdb_utils import TheMovieDatabaseHelper
-# from pmm_cfg_gen.utils.tvdb_utils import TheTvDatabaseHelper
+from pmm_cfg_gen.utils.tmdb_utils import getTheMovieDatabaseHelper
+from pmm_cfg_gen.utils.tvdb_utils import getTheTvDatabaseHelper
+from pmm_cfg_gen.utils.trakt_utils import getTraktHelper
+from pmm_cfg_gen.utils.tracing import traceFunction
 
 #######################################################################
 # Jinja2 filters and utilitiy methods
@@ -220,6 +223,7 @@ def getItemGuidByName(item, guidName: str) -> str | None:
 def getNamedCollectionLabels(item) -> list[str] | None:
     return PlexItemHelper.getNamedCollectionLabels(item)
 
+@traceFunction("plex.fetch", "fetch", getArgs=lambda collection, guidName: {"what": "guids", "collection": collection.title})
 def getCollectionGuidsByName(collection, guidName: str) -> list | None:
     """
      Get a list of Guid's from a PlexCollection. This is a convenience function to call L { PlexCollectionHelper }'s C { getGuidByName } method
@@ -233,6 +237,7 @@ def getCollectionGuidsByName(collection, guidName: str) -> list | None:
 
     return pch.getGuidByName(guidName)
 
+@traceFunction("tmdb.lookup", "fetch", getArgs=lambda collection, tryExactMatch=True: {"collection": collection.title})
 def getTmDbCollectionId(collection, tryExactMatch : bool = True) -> list[int] | None:
     """
      Get Tmdb collection ID. This is a wrapper around the TMDb findCollectionByName function to allow searching for collections by title
@@ -243,10 +248,35 @@ def getTmDbCollectionId(collection, tryExactMatch : bool = True) -> list[int] |
      @return Collection ID or None if not found or no collection could be found in the TMDb ( not an exception
     """
     
-    tmdbHelper = TheMovieDatabaseHelper()
+    tmdbHelper = getTheMovieDatabaseHelper()
 
     return tmdbHelper.findCollectionByName(collection.title, tryExactMatch)
 
+async def getCollectionGuidsByNameAsync(collection, guidName: str) -> list | None:
+    """
+     Async version of L { getCollectionGuidsByName } ( used when rendering asynchronously ). The plex fetch runs in a worker thread
+     
+     @param collection - A collection object
+     @param guidName - The name of the Guid
+     
+     @return A list of Guid's
+    """
+    return await asyncio.to_thread(getCollectionGuidsByName, collection, guidName)
+
+@traceFunction("tmdb.lookup", "fetch", getArgs=lambda collection, tryExactMatch=True: {"collection": collection.title})
+async def getTmDbCollectionIdAsync(collection, tryExactMatch : bool = True) -> list[int] | None:
+    """
+     Async version of L { getTmDbCollectionId } ( used when rendering asynchronously )
+     
+     @param collection - Collection to be looked up
+     @param tryExactMatch - If True try to find exact match
+     
+     @return Collection ID or None if not found
+    """
+    tmdbHelper = getTheMovieDatabaseHelper()
+
+    return await tmdbHelper.findCollectionByNameAsync(collection.title, tryExactMatch)
+
 def getPMMSeason(pmm : dict[str, dict], seasonNumber, attribute : str | None = None):
     """
      Get the poster URL for a season from the Plex Meta Manager season dictionary
@@ -276,7 +306,36 @@ def getPMMAttributeByName(pmm : dict[str, dict], attribute : str | None = None):
 
     return None
 
-# def getTvDbListId(collection) -> list[int] | str | None:
-#     tvDbHelper = TheTvDatabaseHelper()
+@traceFunction("tvdb.lookup", "fetch", getArgs=lambda collection: {"collection": collection.title})
+def getTvDbListIds(collection) -> list[str]:
+    """
+     Get the TVDb lists named like a collection ( empty if theTvDatabase is not configured )
+     
+     @param collection - Collection to be looked up
+     
+     @return List of TVDb list ids
+    """
+    return getTheTvDatabaseHelper().findListByName(collection.title)
+
+@traceFunction("trakt.lookup", "fetch", getArgs=lambda collection: {"collection": collection.title})
+def getTraktListUrls(collection) -> list[str]:
+    """
+     Get the trakt lists named like a collection ( empty if trakt is not configured )
+     
+     @param collection - Collection to be looked up
+     
+     @return List of trakt list urls
+    """
+    return getTraktHelper().getListByName(collection.title)
 
-#     return tvDbHelper.findListByName(collection.title)
+async def getTvDbListIdsAsync(collection) -> list[str]:
+    """
+     Async version of L { getTvDbListIds } ( used when rendering asynchronously ). The lookup runs in a worker thread
+    """
+    return await asyncio.to_thread(getTvDbListIds, collection)
+
+async def getTraktListUrlsAsync(collection) -> list[str]:
+    """
+     Async version of L { getTraktListUrls } ( used when rendering asynchronously ). The lookup runs in a worker thread
+    """
+    return await asyncio.to_thread(getTraktListUrls, collection)
@@ -1,45 +1,61 @@
 #!/usr/bin/env python3
 #######################################################################
 
+import hashlib
 import logging
+import re
+import time
 from pathlib import Path
+from typing import Iterable
 
 import jinja2
 import jinja2.exceptions
 
 from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr
-from pmm_cfg_gen.utils.file_utils import writeFile
+from pmm_cfg_gen.utils.file_utils import writeFile, writeFileStream
+from pmm_cfg_gen.utils.tracing import traceFunction
+from pmm_cfg_gen.utils.reload_detector import templateScope
+from pmm_cfg_gen.utils.render_cost import getRenderCostStats, countFilterCalls, countStream
+from pmm_cfg_gen.utils.item_events import addEventTime, eventTimer
 from pmm_cfg_gen.utils.plex_utils import PlexItemHelper, PlexVideoHelper, PlexCollectionHelper
 import pmm_cfg_gen.utils.template_filters as template_filters
 
 #######################################################################
 
 class TemplateManager:
+    # Number of template events grouped into a single chunk when streaming
+    STREAM_BUFFER_SIZE = 64
+
     __tplEnv: jinja2.Environment
     __cachedTemplates: dict
+    __templateHashes: dict[str, str]
+    __filtersUsed: dict[str, bool]
+    __enableAsync: bool
 
     #######################################################################
-    def __init__(self, templatePath: str | Path) -> None:
+    def __init__(self, templatePath: str | Path, enableAsync: bool = False) -> None:
         self._logger = logging.getLogger("pmm_cfg_gen")
 
         self._logger.debug(
-            "Initializing Template Environment.  Template Path: '{}'".format(
-                templatePath
-            )
+            "Initializing Template Environment.  Template Path: '%s' (async: %s)", templatePath, enableAsync
         )
 
-        self.__tplEnv = jinja2.Environment(loader=jinja2.FileSystemLoader(templatePath))
+        self.__enableAsync = enableAsync
+        self.__tplEnv = jinja2.Environment(loader=jinja2.FileSystemLoader(templatePath), enable_async=enableAsync)
 
         self.__cachedTemplates = {}
+        self.__templateHashes = {}
+        self.__filtersUsed = {}
         self.__registerFilters()
 
+    @traceFunction("render", "render", getArgs=lambda self, templateName, tplArgs: {"template": str(templateName)})
     def render(self, templateName: str | Path, tplArgs: dict) -> str | None:
-        self._logger.debug("Render data using template '{}'".format(templateName))
+        self._logger.debug("Render data using template '%s'", templateName)
 
         tpl = self.__getTemplate(templateName)
 
         if tpl is None:
-            self._logger.debug("Unable to load requested template: '{}'".format(templateName))
+            self._logger.debug("Unable to load requested template: '%s'", templateName)
 
             return None
 
@@ -47,36 +63,172 @@ class TemplateManager:
             tplArgs.update({"settings": globalSettingsMgr.settings})
 
         # self._logger.info("tplArgs: {}".format(tplArgs))
-        return tpl.render(tplArgs)
+        start = time.perf_counter()
+
+        try:
+            with templateScope(templateName):
+                tplResult = tpl.render(tplArgs)
+        except:
+            getRenderCostStats().addTemplate(str(templateName), time.perf_counter() - start, error=True)
+
+            raise
+
+        seconds = time.perf_counter() - start
+
+        getRenderCostStats().addTemplate(str(templateName), seconds, len(tplResult.encode("utf-8")))
+        addEventTime("render", seconds)
+
+        return tplResult
+
+    def renderStream(self, templateName: str | Path, tplArgs: dict) -> Iterable[str] | None:
+        self._logger.debug("Render data as a stream using template '%s'", templateName)
+
+        tpl = self.__getTemplate(templateName)
+
+        if tpl is None:
+            self._logger.debug("Unable to load requested template: '%s'", templateName)
+
+            return None
+
+        if "settings" not in tplArgs.keys():
+            tplArgs.update({"settings": globalSettingsMgr.settings})
+
+        tplStream = tpl.stream(tplArgs)
+        tplStream.enable_buffering(TemplateManager.STREAM_BUFFER_SIZE)
+
+        # Only the time spent rendering the chunks is counted, not writing them
+        return countStream(str(templateName), tplStream)
+
+    def getTemplateHash(self, templateName: str | Path) -> str | None:
+        """
+         Hash the source of a template ( used to fingerprint the files rendered from it )
+         
+         @param templateName - The template name
+         
+         @return The hex digest or None if the template does not exist
+        """
+        key = str(templateName)
+
+        if key not in self.__templateHashes:
+            try:
+                source, _, _ = self.__tplEnv.loader.get_source(self.__tplEnv, key)  # type: ignore
+            except jinja2.exceptions.TemplateNotFound:
+                return None
+
+            self.__templateHashes[key] = hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+        return self.__templateHashes[key]
+
+    def isFilterUsed(self, filterName: str) -> bool:
+        """
+         Check if any template in the template path applies a filter ( e.g. to skip prefetching data nobody uses )
+         
+         @param filterName - The filter name
+        """
+        if filterName not in self.__filtersUsed:
+            pattern = re.compile(r"\|\s*{}\b".format(re.escape(filterName)))
+
+            used = False
+            for templateName in self.__tplEnv.list_templates():
+                try:
+                    source, _, _ = self.__tplEnv.loader.get_source(self.__tplEnv, templateName)  # type: ignore
+                except (jinja2.exceptions.TemplateNotFound, UnicodeDecodeError):
+                    continue
+
+                if pattern.search(source):
+                    used = True
+                    break
+
+            self.__filtersUsed[filterName] = used
+
+        return self.__filtersUsed[filterName]
+
+    @traceFunction("render", "render", getArgs=lambda self, templateName, tplArgs: {"template": str(templateName)})
+    async def renderAsync(self, templateName: str | Path, tplArgs: dict) -> str | None:
+        self._logger.debug("Render data asynchronously using template '%s'", templateName)
+
+        if not self.__enableAsync:
+            raise RuntimeError("Template environment was not created with async support")
+
+        tpl = self.__getTemplate(templateName)
+
+        if tpl is None:
+            self._logger.debug("Unable to load requested template: '%s'", templateName)
+
+            return None
+
+        if "settings" not in tplArgs.keys():
+            tplArgs.update({"settings": globalSettingsMgr.settings})
+
+        start = time.perf_counter()
+
+        try:
+            with templateScope(templateName):
+                tplResult = await tpl.render_async(tplArgs)
+        except:
+            getRenderCostStats().addTemplate(str(templateName), time.perf_counter() - start, error=True)
+
+            raise
+
+        seconds = time.perf_counter() - start
+
+        getRenderCostStats().addTemplate(str(templateName), seconds, len(tplResult.encode("utf-8")))
+        addEventTime("render", seconds)
+
+        return tplResult
+
+    async def renderAndSaveAsync(self, templateName: str | Path, fileName: str | Path, tplArgs: dict):
+        if templateName is None or templateName == "None":
+            return
+
+        self._logger.debug(
+            "Render data asynchronously using template '%s' and save to '%s'", templateName, fileName
+        )
+
+        tplResult = await self.renderAsync(templateName, tplArgs)
+
+        if tplResult is not None:
+            with eventTimer("write"):
+                writeFile(fileName, tplResult)
 
     def renderAndSave(
-        self, templateName: str | Path, fileName: str | Path, tplArgs: dict
+        self, templateName: str | Path, fileName: str | Path, tplArgs: dict, stream: bool | None = None
     ):
         if templateName is None or templateName == "None":
             return
 
+        if stream is None:
+            stream = globalSettingsMgr.settings.output.streaming
+
         self._logger.debug(
-            "Render data using template '{}' and save to '{}'".format(
-                templateName, fileName
-            )
+            "Render data using template '%s' and save to '%s' (stream: %s)", templateName, fileName, stream
         )
 
-        tplResult = self.render(templateName, tplArgs)
+        if stream:
+            tplStream = self.renderStream(templateName, tplArgs)
 
-        if tplResult is not None:
-            writeFile(fileName, tplResult)
+            # The stream is rendered while it is written
+            if tplStream is not None:
+                with templateScope(templateName), eventTimer("write"):
+                    writeFileStream(fileName, tplStream)
+        else:
+            tplResult = self.render(templateName, tplArgs)
+
+            if tplResult is not None:
+                with eventTimer("write"):
+                    writeFile(fileName, tplResult)
 
     #######################################################################
     def __getTemplate(self, templateName: str | Path) -> jinja2.Template | None:
         if not templateName in self.__cachedTemplates.keys():
-            self._logger.debug("Loading template into cache: {}".format(templateName))
+            self._logger.debug("Loading template into cache: %s", templateName)
 
             try:
                 tpl = self.__tplEnv.get_template(str(templateName))
 
                 self.__cachedTemplates[templateName] = tpl
             except jinja2.exceptions.TemplateNotFound:
-                self._logger.debug("Requested Template does not exist: '{}'".format(templateName))
+                self._logger.debug("Requested Template does not exist: '%s'", templateName)
 
                 return None
             except (
@@ -104,12 +256,14 @@ class TemplateManager:
 
         else:
             self._logger.debug(
-                "Retrieving template from cache: {}".format(templateName)
+                "Retrieving template from cache: %s", templateName
             )
 
         return self.__cachedTemplates[templateName]
 
     def __registerFilters(self):
+        builtinFilters = set(self.__tplEnv.filters.keys())
+
         self.__tplEnv.filters["formatJson"] = template_filters.formatJson
         self.__tplEnv.filters["concat"] = template_filters.concat
         self.__tplEnv.filters["quote"] = template_filters.quote
@@ -122,7 +276,20 @@ class TemplateManager:
         self.__tplEnv.filters["generateTpDbSearchUrl"] = template_filters.generateTpDbSearchUrl
         self.__tplEnv.filters["getItemGuidByName"] = template_filters.getItemGuidByName
         self.__tplEnv.filters["getNamedCollectionLabels"] = template_filters.getNamedCollectionLabels
-        self.__tplEnv.filters["getCollectionGuidsByName"] = template_filters.getCollectionGuidsByName
-        self.__tplEnv.filters["getTmDbCollectionId"] = template_filters.getTmDbCollectionId
+        if self.__enableAsync:
+            # Network backed filters are awaited so other renders can run while a request is in flight
+            self.__tplEnv.filters["getCollectionGuidsByName"] = template_filters.getCollectionGuidsByNameAsync
+            self.__tplEnv.filters["getTmDbCollectionId"] = template_filters.getTmDbCollectionIdAsync
+            self.__tplEnv.filters["getTvDbListIds"] = template_filters.getTvDbListIdsAsync
+            self.__tplEnv.filters["getTraktListUrls"] = template_filters.getTraktListUrlsAsync
+        else:
+            self.__tplEnv.filters["getCollectionGuidsByName"] = template_filters.getCollectionGuidsByName
+            self.__tplEnv.filters["getTmDbCollectionId"] = template_filters.getTmDbCollectionId
+            self.__tplEnv.filters["getTvDbListIds"] = template_filters.getTvDbListIds
+            self.__tplEnv.filters["getTraktListUrls"] = template_filters.getTraktListUrls
         self.__tplEnv.filters["getPMMAttributeByName"] = template_filters.getPMMAttributeByName
-        # self.__tplEnv.filters["getTvDbListId"] = template_filters.getTvDbListId
+
+        # Count the calls and time of our filters ( not the jinja builtins )
+        for filterName, func in list(self.__tplEnv.filters.items()):
+            if filterName not in builtinFilters:
+                self.__tplEnv.filters[filterName] = countFilterCalls(filterName, func)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from pmm_cfg_gen.utils.lookup_cache import normalizeName
+
+###################################################################################################
+
+
+class TheMovieDatabaseExportIndex:
+    """
+     Name index of the TMDb collection id export ( the daily collection_ids_MM_DD_YYYY.json.gz file, one json object
+     with "id" and "name" per line ). The export is stream parsed once into a sqlite index next to it, the index is
+     rebuilt when the export file changes. Lookups match the exact name or the normalized name ( see L { normalizeName } )
+    """
+    VERSION = 1
+
+    _logger: logging.Logger
+
+    __exportFile: Path
+    __indexFile: Path
+    __connections: threading.local
+
+    def __init__(self, exportFile: str | Path, indexFile: str | Path) -> None:
+        """
+         @param exportFile - The ( gzip'd ) export file
+         @param indexFile - The index file ( built if it does not exist or is out of date )
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.__exportFile = Path(exportFile)
+        self.__indexFile = Path(indexFile)
+        self.__connections = threading.local()
+
+    def open(self) -> bool:
+        """
+         Build the index if it is missing or out of date
+
+         @return True if the index can be used
+        """
+        if not self.__exportFile.exists():
+            self._logger.warning("TMDb export file '{}' not found. Ignoring...".format(self.__exportFile))
+
+            return False
+
+        if not self.__isIndexCurrent():
+            try:
+                self.build()
+            except:
+                self._logger.exception("Error building TMDb export index '{}'".format(self.__indexFile))
+
+                return False
+
+        return True
+
+    def build(self) -> int:
+        """
+         Stream parse the export file into the index. The index is written to a temporary file that replaces the index
+
+         @return The number of collections indexed
+        """
+        self._logger.info("Building TMDb export index '{}' from '{}'".format(self.__indexFile, self.__exportFile))
+
+        self.__indexFile.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = Path(self.__indexFile.parent, ".{}.{}-{}.tmp".format(self.__indexFile.name, os.getpid(), threading.get_ident()))
+        tmp.unlink(missing_ok=True)
+
+        count = 0
+
+        try:
+            db = sqlite3.connect(tmp)
+
+            try:
+                db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                db.execute("CREATE TABLE collections (normalized TEXT NOT NULL, name TEXT NOT NULL, id INTEGER NOT NULL)")
+
+                batch = []
+                for id, name in self.__readExport():
+                    batch.append((normalizeName(name), name, id))
+
+                    if len(batch) >= 10000:
+                        db.executemany("INSERT INTO collections VALUES (?, ?, ?)", batch)
+                        count += len(batch)
+                        batch = []
+
+                db.executemany("INSERT INTO collections VALUES (?, ?, ?)", batch)
+                count += len(batch)
+
+                # Creating the index after inserting is a lot faster than maintaining it
+                db.execute("CREATE INDEX collections_normalized ON collections (normalized)")
+                db.executemany("INSERT INTO meta VALUES (?, ?)", self.__sourceMeta().items())
+                db.commit()
+            finally:
+                db.close()
+
+            os.replace(tmp, self.__indexFile)
+        except:
+            tmp.unlink(missing_ok=True)
+
+            raise
+
+        self._logger.info("TMDb export index built. Collections: {}".format(count))
+
+        return count
+
+    def findCollection(self, name: str, exactMatch: bool = False) -> list[int]:
+        """
+         Find collections by name. Names are matched with and without a " Collection" suffix
+
+         @param name - The collection name
+         @param exactMatch - If True prefer collections whose name matches exactly ( case sensitive )
+
+         @return List of TMDb collection ids ( empty if not found )
+        """
+        name = name.strip()
+
+        rows = self.__getConnection().execute(
+            "SELECT id, name FROM collections WHERE normalized IN (?, ?) ORDER BY id",
+            (normalizeName(name), normalizeName(f"{name} Collection")),
+        ).fetchall()
+
+        results = []
+
+        if exactMatch:
+            results = [id for id, resultName in rows if resultName == name or resultName == f"{name} Collection"]
+
+        if not exactMatch or len(results) == 0:
+            results = [id for id, _ in rows]
+
+        return results
+
+    def close(self):
+        db = getattr(self.__connections, "db", None)
+
+        if db is not None:
+            db.close()
+            self.__connections.db = None
+
+    def __getConnection(self) -> sqlite3.Connection:
+        # sqlite connections can only be used by the thread that created them
+        db = getattr(self.__connections, "db", None)
+
+        if db is None:
+            db = sqlite3.connect("file:{}?mode=ro".format(self.__indexFile.absolute()), uri=True)
+            self.__connections.db = db
+
+        return db
+
+    def __readExport(self):
+        opener = gzip.open if self.__exportFile.suffix == ".gz" else open
+
+        with opener(self.__exportFile, "rt", encoding="utf-8") as fp:  # type: ignore
+            for line in fp:
+                line = line.strip()
+
+                if len(line) == 0:
+                    continue
+
+                try:
+                    data = json.loads(line)
+
+                    yield (int(data["id"]), str(data["name"]))
+                except (ValueError, KeyError, TypeError):
+                    self._logger.debug("Skipping invalid TMDb export line: {}".format(line))
+
+    def __sourceMeta(self) -> dict[str, str]:
+        stat = self.__exportFile.stat()
+
+        return {
+            "version": str(TheMovieDatabaseExportIndex.VERSION),
+            "source": str(self.__exportFile.absolute()),
+            "size": str(stat.st_size),
+            "mtime": str(stat.st_mtime_ns),
+        }
+
+    def __isIndexCurrent(self) -> bool:
+        if not self.__indexFile.exists():
+            return False
+
+        try:
+            db = sqlite3.connect("file:{}?mode=ro".format(self.__indexFile.absolute()), uri=True)
+
+            try:
+                meta = dict(db.execute("SELECT key, value FROM meta").fetchall())
+            finally:
+                db.close()
+        except sqlite3.Error:
+            return False
+
+        return meta == self.__sourceMeta()
+
+###################################################################################################
+
+
+def benchmarkExportIndex(collections: int = 150000, lookups: int = 20000):
+    """
+     Build an index from a generated export file and time lookups
+    """
+    import random
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmpPath:
+        exportFile = Path(tmpPath, "collection_ids.json.gz")
+
+        with gzip.open(exportFile, "wt", encoding="utf-8") as fp:
+            for i in range(collections):
+                fp.write(json.dumps({"id": i, "name": "Collection Number {} Collection".format(i)}) + "\n")
+
+        index = TheMovieDatabaseExportIndex(exportFile, Path(tmpPath, "collection_ids.sqlite"))
+
+        start = time.perf_counter()
+        index.open()
+        print("Build: {} collections in {:.2f}s, index size: {:.1f} MB".format(collections, time.perf_counter() - start, os.path.getsize(Path(tmpPath, "collection_ids.sqlite")) / 1024 / 1024))
+
+        names = ["collection number  {}".format(random.randrange(collections * 2)) for _ in range(lookups)]
+
+        start = time.perf_counter()
+        found = len([x for x in names if len(index.findCollection(x, True)) > 0])
+        elapsed = time.perf_counter() - start
+
+        print("Lookups: {} ({} found) in {:.2f}s, {:.1f} us per lookup".format(lookups, found, elapsed, elapsed / lookups * 1e6))
+
+        index.close()
+
+
+if __name__ == "__main__":
+    benchmarkExportIndex()
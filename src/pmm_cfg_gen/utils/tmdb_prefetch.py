@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import concurrent.futures
+import logging
+import time
+
+from pmm_cfg_gen.utils.rate_limiter import TokenBucket, createPooledSession, getWithRateLimit
+from pmm_cfg_gen.utils.lookup_cache import normalizeName
+from pmm_cfg_gen.utils.tmdb_utils import TheMovieDatabaseHelper
+
+###################################################################################################
+
+
+class TheMovieDatabasePrefetcher:
+    """
+     Resolves TMDb collection searches for many collections concurrently before rendering. All threads share one pooled
+     HTTP session and a token bucket limiter, responses with status 429 are retried with backoff. The results are stored
+     in the TMDb helper ( and its cache ), so templates read them from memory
+    """
+    _logger: logging.Logger
+
+    __apiUrl: str
+    __apiKey: str
+    __language: str | None
+    __region: str | None
+    __threads: int
+    __maxRetries: int
+    __limiter: TokenBucket
+
+    def __init__(self, apiUrl: str, apiKey: str, language: str | None, region: str | None, threads: int = 8, rateLimit: float = 20, maxRetries: int = 5) -> None:
+        """
+         @param apiUrl - The TMDb api base url ( e.g. https://api.themoviedb.org/3 )
+         @param apiKey - The TMDb api key
+         @param language - The search language
+         @param region - The search region
+         @param threads - Number of concurrent requests
+         @param rateLimit - Maximum number of requests per second ( 0 disables limiting )
+         @param maxRetries - Maximum number of retries of a rate limited request
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.__apiUrl = apiUrl.rstrip("/")
+        self.__apiKey = apiKey
+        self.__language = language
+        self.__region = region
+        self.__threads = max(1, threads)
+        self.__maxRetries = maxRetries
+        self.__limiter = TokenBucket(rateLimit)
+        self.__session = createPooledSession(self.__threads)
+
+    def close(self):
+        self.__session.close()
+
+    def searchCollection(self, name: str) -> list[tuple[int, str]]:
+        """
+         Search for a collection by name ( first page of results )
+
+         @param name - The collection name
+
+         @return List of ( TMDb collection id, collection name )
+        """
+        params = {"api_key": self.__apiKey, "query": name}
+
+        if self.__language is not None:
+            params["language"] = self.__language
+        if self.__region is not None:
+            params["region"] = self.__region
+
+        response = getWithRateLimit(self.__session, self.__limiter, "{}/search/collection".format(self.__apiUrl), params=params, maxRetries=self.__maxRetries)
+        response.raise_for_status()
+
+        return [(x["id"], x["name"]) for x in response.json().get("results", [])]
+
+    def prefetchCollections(self, tmdbHelper: TheMovieDatabaseHelper, names: list[str]) -> int:
+        """
+         Search for all collections that are not cached yet and store the results in the helper. Failed searches are
+         logged and left to the template filters
+
+         @param tmdbHelper - The helper the results are stored in
+         @param names - The collection names
+
+         @return The number of searches done
+        """
+        pending = {}
+        for name in names:
+            name = name.strip()
+
+            if normalizeName(name) not in pending and not tmdbHelper.isCollectionCached(name):
+                pending[normalizeName(name)] = name
+
+        if len(pending) == 0:
+            return 0
+
+        self._logger.debug("Prefetching {} TMDb collections. Threads: {}, Rate Limit: {}/s".format(len(pending), self.__threads, self.__limiter.rate))
+
+        count = 0
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.__threads, thread_name_prefix="pmm_cfg_gen-tmdb") as executor:
+            futures = {executor.submit(self.searchCollection, name): name for name in pending.values()}
+
+            for future in concurrent.futures.as_completed(futures):
+                name = futures[future]
+
+                try:
+                    tmdbHelper.storeCollectionSearch(name, future.result())
+
+                    count += 1
+                except:
+                    self._logger.warning("Error prefetching TMDb collection '{}'".format(name), exc_info=self._logger.isEnabledFor(logging.DEBUG))
+
+        return count
+
+###################################################################################################
+
+
+def testPrefetchCollections(collections: int = 60, rateLimit: float = 20, throttleEvery: int = 7):
+    """
+     Run the prefetcher against a local stand-in for the TMDb api. Every throttleEvery-th request is answered with
+     status 429, the test checks that every collection is resolved and that the request rate stays within the limit
+    """
+    import http.server
+    import json
+    import threading
+    import urllib.parse
+
+    requestTimes = []
+    lock = threading.Lock()
+
+    class StandInHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            query = urllib.parse.parse_qs(url.query)
+
+            with lock:
+                requestTimes.append(time.monotonic())
+                throttle = len(requestTimes) % throttleEvery == 0
+
+            if throttle:
+                body = b"{}"
+                self.send_response(429)
+                self.send_header("Retry-After", "0.25")
+            else:
+                name = query["query"][0]
+                body = json.dumps({"page": 1, "results": [{"id": abs(hash(name)) % 100000, "name": name}, {"id": 1, "name": "Other"}]}).encode("utf-8")
+                self.send_response(200)
+
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    tmdbHelper = TheMovieDatabaseHelper()
+    names = ["Collection {}".format(i) for i in range(collections)]
+
+    prefetcher = TheMovieDatabasePrefetcher("http://127.0.0.1:{}/3".format(server.server_address[1]), "test", "en-us", "us", threads=8, rateLimit=rateLimit)
+
+    start = time.monotonic()
+    try:
+        count = prefetcher.prefetchCollections(tmdbHelper, names)
+    finally:
+        prefetcher.close()
+        server.shutdown()
+
+    elapsed = time.monotonic() - start
+
+    missing = [x for x in names if not tmdbHelper.isCollectionCached(x)]
+
+    # Burst allowance is one second of requests, after that the rate has to hold
+    maxWindow = max([len([t for t in requestTimes if s <= t < s + 1.0]) for s in requestTimes])
+
+    print("Collections: {}, Searches: {}, Requests: {} ({} throttled), Time: {:.2f}s, Max Requests in 1s: {}, Missing: {}".format(
+        collections, count, len(requestTimes), len(requestTimes) // throttleEvery, elapsed, maxWindow, len(missing)
+    ))
+
+    assert count == collections and len(missing) == 0
+    assert maxWindow <= 2 * rateLimit + 1
+
+
+if __name__ == "__main__":
+    testPrefetchCollections()
@@ -4,18 +4,35 @@
 import themoviedb
 import logging
 import jsonpickle
+from pathlib import Path
 
 from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr
+from pmm_cfg_gen.utils.lookup_cache import LookupCache, LookupCacheStats
+from pmm_cfg_gen.utils.tmdb_export import TheMovieDatabaseExportIndex
 
 ###################################################################################################
 
 
 class TheMovieDatabaseHelper:
+    CACHE_FILE_NAME = ".pmm_cfg_gen.tmdb_cache.json"
+    EXPORT_INDEX_FILE_NAME = ".pmm_cfg_gen.tmdb_export.sqlite"
+
     __logger: logging.Logger
     __tmdbApi: themoviedb.TMDb | None
+    __tmdbApiAsync: themoviedb.aioTMDb | None
+    __cache: LookupCache | None
+    __prefetched: dict[str, list[int]]
+    __exportIndex: TheMovieDatabaseExportIndex | None
 
-    def __init__(self) -> None:
+    def __init__(self, cache: LookupCache | None = None, exportIndex: TheMovieDatabaseExportIndex | None = None) -> None:
+        """
+         @param cache - Cache for lookup results ( None to always query TMDb )
+         @param exportIndex - Index of the TMDb collection export searched before TMDb is queried
+        """
         self.__logger = logging.getLogger("pmm-cfg-gen")
+        self.__cache = cache
+        self.__exportIndex = exportIndex
+        self.__prefetched = {}
 
         self.__loggerFunc = self.__logger.debug
         # self.__loggerFunc = print
@@ -33,11 +50,65 @@ class TheMovieDatabaseHelper:
         else:
             self.__tmdbApi = None
 
+        # The async client is only created when an async lookup is requested
+        self.__tmdbApiAsync = None
+
+    @property
+    def cache(self) -> LookupCache | None:
+        return self.__cache
+
+    @property
+    def isEnabled(self) -> bool:
+        return self.__tmdbApi is not None or self.__exportIndex is not None
+
+    @property
+    def isApiEnabled(self) -> bool:
+        return self.__tmdbApi is not None
+
+    def isCollectionCached(self, name: str) -> bool:
+        """
+         Check if a collection can be found without querying TMDb ( in the export index, cached or prefetched )
+        """
+        name = name.strip()
+        cacheKey = self.__makeCollectionKey(name, True)
+
+        if cacheKey in self.__prefetched or (self.__cache is not None and self.__cache.contains(cacheKey)):
+            return True
+
+        return self.__exportIndex is not None and len(self.__exportIndex.findCollection(name)) > 0
+
+    def storeCollectionSearch(self, name: str, searchResults: list[tuple[int, str]]):
+        """
+         Store the results of a collection search done elsewhere ( e.g. prefetched ), so L { findCollectionByName } does
+         not have to search again. Results are stored for both exact and non exact matching
+
+         @param name - The collection name that was searched for
+         @param searchResults - List of ( TMDb collection id, collection name )
+        """
+        name = name.strip()
+
+        for exactMatch in [True, False]:
+            cacheKey = self.__makeCollectionKey(name, exactMatch)
+            results = TheMovieDatabaseHelper._matchCollections(name, searchResults, exactMatch)
+
+            if self.__cache is not None:
+                self.__cache.set(cacheKey, results)
+            else:
+                self.__prefetched[cacheKey] = results
+
     def findCollectionByName(self, name: str, exactMatch: bool = False) -> list[int]:
+        name = name.strip()
+
+        results = self.__findExportCollection(name, exactMatch)
+        if results is not None:
+            return self.__limitCollectionResults(results)
+
         if self.__tmdbApi is None:
             return []
 
-        name = name.strip()
+        cacheKey, results = self.__getCachedCollection(name, exactMatch)
+        if results is not None:
+            return self.__limitCollectionResults(results)
         
         self.__loggerFunc("Searching for collection: '{}'".format(name))
 
@@ -45,19 +116,108 @@ class TheMovieDatabaseHelper:
             name
         ) 
 
+        return self.__cacheCollectionResults(cacheKey, self.__filterCollectionResults(name, searchResults, exactMatch))
+
+    async def findCollectionByNameAsync(self, name: str, exactMatch: bool = False) -> list[int]:
+        """
+         Async version of L { findCollectionByName }. The search is awaited so other renders can run while the request is in flight
+
+         @param name - The collection name
+         @param exactMatch - If True prefer results whose name matches exactly
+
+         @return List of TMDb collection ids
+        """
+        name = name.strip()
+
+        results = self.__findExportCollection(name, exactMatch)
+        if results is not None:
+            return self.__limitCollectionResults(results)
+
+        if self.__tmdbApi is None:
+            return []
+
+        if self.__tmdbApiAsync is None:
+            self.__tmdbApiAsync = themoviedb.aioTMDb(
+                key=globalSettingsMgr.settings.theMovieDatabase.apiKey,
+                language=globalSettingsMgr.settings.theMovieDatabase.language,
+                region=globalSettingsMgr.settings.theMovieDatabase.region,
+            )
+
+        cacheKey, results = self.__getCachedCollection(name, exactMatch)
+        if results is not None:
+            return self.__limitCollectionResults(results)
+        
+        self.__loggerFunc("Searching for collection (async): '{}'".format(name))
+
+        searchResults = await self.__tmdbApiAsync.search().collections(
+            name
+        )
+
+        return self.__cacheCollectionResults(cacheKey, self.__filterCollectionResults(name, searchResults, exactMatch))
+
+    def __findExportCollection(self, name: str, exactMatch: bool) -> list[int] | None:
+        if self.__exportIndex is None:
+            return None
+
+        results = self.__exportIndex.findCollection(name, exactMatch)
+        if len(results) == 0:
+            return None
+
+        self.__loggerFunc("Found collection in export index: '{}' -> {}".format(name, results))
+
+        return results
+
+    def __makeCollectionKey(self, name: str, exactMatch: bool) -> str:
+        return LookupCache.makeKey(
+            "collection",
+            name,
+            "exact" if exactMatch else "any",
+            globalSettingsMgr.settings.theMovieDatabase.language,
+            globalSettingsMgr.settings.theMovieDatabase.region,
+        )
+
+    def __getCachedCollection(self, name: str, exactMatch: bool) -> tuple[str, list[int] | None]:
+        cacheKey = self.__makeCollectionKey(name, exactMatch)
+
+        results = self.__prefetched.get(cacheKey)
+        if results is None and self.__cache is not None:
+            results = self.__cache.get(cacheKey)
+
+        if results is not None:
+            self.__loggerFunc("Found collection in cache: '{}' -> {}".format(name, results))
+
+        return (cacheKey, results)
+
+    def __cacheCollectionResults(self, cacheKey: str, results: list[int]) -> list[int]:
+        # The unlimited results are cached so changing limitCollectionResults does not require new lookups
+        if self.__cache is not None:
+            self.__cache.set(cacheKey, results)
+
+        return self.__limitCollectionResults(results)
+
+    def __filterCollectionResults(self, name: str, searchResults, exactMatch: bool) -> list[int]:
         self.__loggerFunc(
             "tmdb result: {}".format(jsonpickle.dumps(searchResults, unpicklable=False))
         )
 
+        if searchResults is None or searchResults.results is None:
+            return []
+
+        return TheMovieDatabaseHelper._matchCollections(name, [(x.id, x.name) for x in searchResults.results], exactMatch)
+
+    @staticmethod
+    def _matchCollections(name: str, searchResults: list[tuple[int, str]], exactMatch: bool) -> list[int]:
         results = []
-        
-        if searchResults is not None and searchResults.results is not None:
-            if exactMatch:
-                results = [x.id for x in searchResults.results if x.name == name or x.name == f"{name} Collection" ]
 
-            if not exactMatch or len(results) == 0:
-                results = [x.id for x in searchResults.results]
+        if exactMatch:
+            results = [id for id, resultName in searchResults if resultName == name or resultName == f"{name} Collection" ]
+
+        if not exactMatch or len(results) == 0:
+            results = [id for id, _ in searchResults]
+
+        return results
 
+    def __limitCollectionResults(self, results: list[int]) -> list[int]:
         if (
             globalSettingsMgr.settings.theMovieDatabase.limitCollectionResults is not None
             and globalSettingsMgr.settings.theMovieDatabase.limitCollectionResults > 0
@@ -69,3 +229,66 @@ class TheMovieDatabaseHelper:
             ]
         
         return results if results is not None else []
+
+
+_theMovieDatabaseHelper: TheMovieDatabaseHelper | None = None
+
+
+def getTheMovieDatabaseHelper() -> TheMovieDatabaseHelper:
+    """
+     Get the shared TMDb helper ( one client, lookup cache and export index per process ). The cache and export index
+     are created from the theMovieDatabase settings the first time the helper is requested
+    """
+    global _theMovieDatabaseHelper
+
+    if _theMovieDatabaseHelper is None:
+        tmdbSettings = globalSettingsMgr.settings.theMovieDatabase
+
+        cache = None
+        if tmdbSettings.cacheTtl > 0:
+            cacheFile = tmdbSettings.cacheFile
+            if cacheFile is None or len(cacheFile) == 0:
+                cacheFile = Path(globalSettingsMgr.settings.output.path, TheMovieDatabaseHelper.CACHE_FILE_NAME)
+
+            cache = LookupCache(cacheFile, tmdbSettings.cacheTtl * 86400, tmdbSettings.cacheNegativeTtl * 86400)
+            cache.load()
+
+        exportIndex = None
+        if tmdbSettings.exportFile is not None and len(tmdbSettings.exportFile) > 0:
+            exportIndexFile = tmdbSettings.exportIndexFile
+            if exportIndexFile is None or len(exportIndexFile) == 0:
+                exportIndexFile = Path(globalSettingsMgr.settings.output.path, TheMovieDatabaseHelper.EXPORT_INDEX_FILE_NAME)
+
+            exportIndex = TheMovieDatabaseExportIndex(tmdbSettings.exportFile, exportIndexFile)
+            if not exportIndex.open():
+                exportIndex = None
+
+        _theMovieDatabaseHelper = TheMovieDatabaseHelper(cache, exportIndex)
+
+    return _theMovieDatabaseHelper
+
+
+def saveTheMovieDatabaseCache():
+    """
+     Save the lookup cache of the shared TMDb helper ( if one was created )
+    """
+    if _theMovieDatabaseHelper is not None and _theMovieDatabaseHelper.cache is not None:
+        _theMovieDatabaseHelper.cache.save()
+
+
+def refreshTheMovieDatabaseCache():
+    """
+     Pick up lookups saved to the cache file by another process ( e.g. prefetched by the main process )
+    """
+    if _theMovieDatabaseHelper is not None and _theMovieDatabaseHelper.cache is not None:
+        _theMovieDatabaseHelper.cache.refresh()
+
+
+def getTheMovieDatabaseCacheStats() -> LookupCacheStats | None:
+    """
+     Get the lookup cache statistics of the shared TMDb helper ( None if no helper or cache was created )
+    """
+    if _theMovieDatabaseHelper is not None and _theMovieDatabaseHelper.cache is not None:
+        return _theMovieDatabaseHelper.cache.stats
+
+    return None
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+###################################################################################################
+
+import contextvars
+import functools
+import glob
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+###################################################################################################
+
+
+class TraceRecorder:
+    """
+     Records named, nested spans ( library -> collection / item -> fetch / render / write ) as complete events and saves
+     them as a Chrome / Perfetto trace ( open the file in chrome://tracing or https://ui.perfetto.dev ). Spans nest by
+     time on each thread, recording a span costs two clock reads and a list append
+    """
+    _logger: logging.Logger
+
+    fileName: Path
+    pid: int
+
+    __events: list[tuple]
+    __threadNames: dict[int, str]
+
+    def __init__(self, fileName: str | Path) -> None:
+        """
+         @param fileName - The trace file
+        """
+        self._logger = logging.getLogger("pmm_cfg_gen")
+
+        self.fileName = Path(fileName)
+        self.pid = os.getpid()
+
+        self.__events = []
+        self.__threadNames = {}
+
+    @property
+    def count(self) -> int:
+        return len(self.__events)
+
+    def addSpan(self, name: str, category: str, start: int, end: int, tid: int, args: dict | None):
+        """
+         Record a span
+
+         @param start - Start time in ns ( time.perf_counter_ns, shared by all processes of the run )
+         @param end - End time in ns
+         @param tid - The thread ( or render lane ) the span ran on
+        """
+        if tid not in self.__threadNames:
+            self.__threadNames[tid] = threading.current_thread().name
+
+        self.__events.append((name, category, start, end, tid, args))
+
+    def setThreadName(self, tid: int, name: str):
+        self.__threadNames[tid] = name
+
+    def clear(self):
+        self.__events = []
+        self.__threadNames = {}
+        self.pid = os.getpid()
+
+    def toChromeEvents(self) -> list[dict]:
+        """
+         Convert the recorded spans to trace events ( complete "X" events plus process and thread names )
+        """
+        events: list[dict] = [
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": "pmm_cfg_gen ({})".format(self.pid)}},
+        ]
+
+        for tid, threadName in list(self.__threadNames.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": threadName}})
+
+        for name, category, start, end, tid, args in list(self.__events):
+            event = {"name": name, "cat": category, "ph": "X", "ts": start / 1000, "dur": (end - start) / 1000, "pid": self.pid, "tid": tid}
+
+            if args:
+                event["args"] = args
+
+            events.append(event)
+
+        return events
+
+    def savePart(self):
+        """
+         Save the spans of this process next to the trace file ( merged into it by L { save } of the main process )
+        """
+        fileName = Path(self.fileName.parent, "{}.{}.part".format(self.fileName.name, self.pid))
+
+        with open(fileName, "w") as fp:
+            json.dump(self.toChromeEvents(), fp, default=str)
+
+    def save(self) -> int:
+        """
+         Save the trace file, including the spans saved by other processes ( render workers )
+
+         @return The number of events
+        """
+        events = self.toChromeEvents()
+
+        for partFile in sorted(glob.glob(glob.escape(str(self.fileName)) + ".*.part")):
+            try:
+                with open(partFile, "r") as fp:
+                    events.extend(json.load(fp))
+
+                os.unlink(partFile)
+            except:
+                self._logger.warning("Error merging trace file '{}'".format(partFile), exc_info=self._logger.isEnabledFor(logging.DEBUG))
+
+        self.fileName.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp = Path(self.fileName.parent, ".{}.{}.tmp".format(self.fileName.name, os.getpid()))
+
+        with open(tmp, "w") as fp:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fp, default=str)
+
+        os.replace(tmp, self.fileName)
+
+        return len(events)
+
+
+class _Span:
+    __slots__ = ["recorder", "name", "category", "args", "start"]
+
+    def __init__(self, recorder: TraceRecorder, name: str, category: str, args: dict | None) -> None:
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        end = time.perf_counter_ns()
+
+        if excType is not None:
+            self.args = dict(self.args or {}, error=excType.__name__)
+
+        lane = _traceLane.get()
+
+        self.recorder.addSpan(self.name, self.category, self.start, end, lane if lane is not None else threading.get_ident(), self.args)
+
+        return False
+
+
+class _NullSpan:
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+# Spans of concurrent async render jobs share a thread, each job gets its own lane in the trace
+_traceLane: contextvars.ContextVar[int | None] = contextvars.ContextVar("pmm_cfg_gen_trace_lane", default=None)
+
+_recorder: TraceRecorder | None = None
+
+###################################################################################################
+
+
+def startTracing(fileName: str | Path | None) -> TraceRecorder | None:
+    """
+     Start recording spans ( does nothing if fileName is None )
+
+     @param fileName - The trace file written by L { saveTrace }
+    """
+    global _recorder
+
+    if fileName is None or len(str(fileName)) == 0:
+        return None
+
+    if _recorder is None or _recorder.fileName != Path(fileName):
+        _recorder = TraceRecorder(fileName)
+
+    return _recorder
+
+
+def isTracing() -> bool:
+    return _recorder is not None
+
+
+def getTraceFile() -> str | None:
+    return str(_recorder.fileName) if _recorder is not None else None
+
+
+def saveTrace():
+    """
+     Save the trace file ( main process ) and stop recording
+    """
+    global _recorder
+
+    if _recorder is None:
+        return
+
+    recorder = _recorder
+    _recorder = None
+
+    count = recorder.save()
+
+    logging.getLogger("pmm_cfg_gen").info("Trace saved to '{}'. Events: {}".format(recorder.fileName, count))
+
+
+def saveTracePart():
+    """
+     Save the spans recorded by a worker process ( merged into the trace file by the main process )
+    """
+    if _recorder is not None:
+        _recorder.savePart()
+
+
+def setTraceLane(lane: int, name: str):
+    """
+     Record the spans of the current async task ( and the threads it starts ) on their own lane
+
+     @param lane - The lane id ( shown in place of the thread id )
+     @param name - The lane name shown in the trace viewer
+    """
+    _traceLane.set(lane)
+
+    if _recorder is not None:
+        _recorder.setThreadName(lane, name)
+
+
+def traceSpan(name: str, category: str = "pmm_cfg_gen", **args):
+    """
+     Context manager that records a span, e.g. C { with traceSpan("plex.fetch", what="collections"): ... }. Returns a
+     shared no-op context manager when tracing is off
+    """
+    recorder = _recorder
+
+    if recorder is None:
+        return _NULL_SPAN
+
+    return _Span(recorder, name, category, args if len(args) > 0 else None)
+
+
+def traceFunction(name: str, category: str = "pmm_cfg_gen", getArgs: Callable[..., dict] | None = None):
+    """
+     Decorator that records a span for every call of a function ( or coroutine function )
+
+     @param name - The span name
+     @param getArgs - Called with the function arguments, returns the span arguments ( e.g. the item title )
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def asyncWrapper(*args, **kwargs) -> Any:
+                recorder = _recorder
+
+                if recorder is None:
+                    return await func(*args, **kwargs)
+
+                with _Span(recorder, name, category, getArgs(*args, **kwargs) if getArgs is not None else None):
+                    return await func(*args, **kwargs)
+
+            return asyncWrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs) -> Any:
+            recorder = _recorder
+
+            if recorder is None:
+                return func(*args, **kwargs)
+
+            with _Span(recorder, name, category, getArgs(*args, **kwargs) if getArgs is not None else None):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _clearTraceInChild():
+    # A forked worker inherits the spans of the main process, it only saves its own
+    if _recorder is not None:
+        _recorder.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_clearTraceInChild)
+
+###################################################################################################
+
+
+def benchmarkTracing(calls: int = 200000):
+    """
+     Time the overhead of a span with tracing off and on
+    """
+    import tempfile
+
+    global _recorder
+
+    def work():
+        pass
+
+    @traceFunction("decorated", getArgs=lambda x: {"x": x})
+    def decorated(x):
+        pass
+
+    with tempfile.TemporaryDirectory() as tmpPath:
+        for enabled in [False, True]:
+            _recorder = TraceRecorder(Path(tmpPath, "trace.json")) if enabled else None
+
+            start = time.perf_counter()
+            for i in range(calls):
+                with traceSpan("span", title="x"):
+                    work()
+            spanTime = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for i in range(calls):
+                decorated(i)
+            decoratedTime = time.perf_counter() - start
+
+            print("Tracing: {:<5} span: {:.3f} us, decorated: {:.3f} us".format(str(enabled), spanTime / calls * 1e6, decoratedTime / calls * 1e6))
+
+            if enabled:
+                start = time.perf_counter()
+                count = _recorder.save()  # type: ignore
+                print("Saved {} events in {:.2f}s ({:.1f} MB)".format(count, time.perf_counter() - start, os.path.getsize(Path(tmpPath, "trace.json")) / 1024 / 1024))
+
+        _recorder = None
+
+
+if __name__ == "__main__":
+    benchmarkTracing()
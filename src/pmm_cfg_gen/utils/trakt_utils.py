@@ -1,40 +1,87 @@
 #!/usr/bin/env python3
 ###################################################################################################
 
-# import trakt
-import logging
-import jsonpickle
-
 from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr
+from pmm_cfg_gen.utils.list_lookup import ListLookupHelper, createLookupCache, registerListLookupHelper
+from pmm_cfg_gen.utils.lookup_cache import LookupCache
 
 ###################################################################################################
 
 
-# https://pytrakt.readthedocs.io/en/latest/getstarted.html
-# https://github.com/moogar0880/PyTrakt
-class TraktHelper:
-    __logger: logging.Logger
+# https://trakt.docs.apiary.io/#reference/search
+class TraktHelper(ListLookupHelper):
+    KIND = "trakt-list"
+    CACHE_FILE_NAME = ".pmm_cfg_gen.trakt_cache.json"
+    SITE_URL = "https://trakt.tv"
+
+    __clientId: str | None
+
+    def __init__(self, clientId: str | None, apiUrl: str, cache: LookupCache | None = None, threads: int = 4, rateLimit: float = 3, maxRetries: int = 5) -> None:
+        """
+         @param clientId - The client id of the trakt api app
+        """
+        super().__init__(apiUrl, cache=cache, threads=threads, rateLimit=rateLimit, maxRetries=maxRetries)
+
+        self.__clientId = clientId
+
+        self._session.headers.update({
+            "Content-Type": "application/json",
+            "trakt-api-version": "2",
+            "trakt-api-key": clientId or "",
+        })
+
+    @property
+    def isEnabled(self) -> bool:
+        return self.__clientId is not None and len(self.__clientId) > 0
+
+    def getListByName(self, name: str) -> list[str]:
+        """
+         Find the trakt lists named like a collection
+
+         @return List of list urls ( the format used by trakt_list in PMM )
+        """
+        return self.findListsByName(name)
+
+    def _search(self, name: str) -> list[tuple[str, str]]:
+        response = self._get("/search/list", params={"query": name})
+        response.raise_for_status()
+
+        results = []
+
+        for x in response.json() or []:
+            traktList = x.get("list") or {}
+            userSlug = ((traktList.get("user") or {}).get("ids") or {}).get("slug")
+            listSlug = (traktList.get("ids") or {}).get("slug")
+
+            if userSlug and listSlug:
+                results.append((traktList.get("name", ""), "{}/users/{}/lists/{}".format(TraktHelper.SITE_URL, userSlug, listSlug)))
+
+        return results
+
 
-    def __init__(self) -> None:
-        self.__logger = logging.getLogger("pmm-cfg-gen")
+_traktHelper: TraktHelper | None = None
 
-        # self.__loggerFunc = self.__logger.debug
-        self.__loggerFunc = print
 
-        if (
-            globalSettingsMgr.settings.theTvDatabase.apiKey is not None
-            and len(globalSettingsMgr.settings.theTvDatabase.apiKey) > 0
-            and globalSettingsMgr.settings.theTvDatabase.pin is not None
-        ):
-            self.__loggerFunc("Initalizing trakt connection")
-        else:
-            self.__tvdbApi = None
+def getTraktHelper() -> TraktHelper:
+    """
+     Get the shared trakt helper ( one session, rate limiter and lookup cache per process )
+    """
+    global _traktHelper
 
-    def getListByName(self, name: str) -> str | None:
-        self.__loggerFunc("Searching for trakt list: {}".format(name))
+    if _traktHelper is None:
+        traktSettings = globalSettingsMgr.settings.trakt
 
-        # result = self.__tvdbApi.get_all_lists(meta= { "menu[type]" : "list", "query": name } )
+        cache = None
+        if traktSettings.clientId is not None and len(traktSettings.clientId) > 0:
+            cache = createLookupCache(traktSettings.cacheFile, globalSettingsMgr.settings.output.path, TraktHelper.CACHE_FILE_NAME, traktSettings.cacheTtl, traktSettings.cacheNegativeTtl)
 
-        # self.__loggerFunc("trakt result: {}".format(jsonpickle.dumps(result, unpicklable=False)))
+        _traktHelper = registerListLookupHelper(TraktHelper(
+            traktSettings.clientId,
+            traktSettings.apiUrl,
+            cache=cache,
+            threads=traktSettings.prefetchThreads,
+            rateLimit=traktSettings.rateLimit,
+            maxRetries=traktSettings.maxRetries,
+        ))  # type: ignore
 
-        return ""
+    return _traktHelper  # type: ignore
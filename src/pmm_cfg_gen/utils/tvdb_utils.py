@@ -1,36 +1,111 @@
-# #!/usr/bin/env python3
-# ###################################################################################################
+#!/usr/bin/env python3
+###################################################################################################
 
-# import tvdb_v4_official
-# import logging
-# import jsonpickle
-# from pmm_cfg_gen.utils.settings_yml import globalSettingsMgr
+import threading
 
-# ###################################################################################################
+from pmm_cfg_gen.utils.settings_utils_v1 import globalSettingsMgr
+from pmm_cfg_gen.utils.list_lookup import ListLookupHelper, createLookupCache, registerListLookupHelper
+from pmm_cfg_gen.utils.lookup_cache import LookupCache
 
-# class TheTvDatabaseHelper:
-#     __logger: logging.Logger
-#     __tvdbApi : tvdb_v4_official.TVDB | None
+###################################################################################################
 
-#     def __init__(self) -> None:
-#         self.__logger = logging.getLogger("pmm-cfg-gen")
 
-#         #self.__loggerFunc = self.__logger.debug
-#         self.__loggerFunc = print
+# https://thetvdb.github.io/v4-api/
+class TheTvDatabaseHelper(ListLookupHelper):
+    KIND = "tvdb-list"
+    CACHE_FILE_NAME = ".pmm_cfg_gen.tvdb_cache.json"
 
-#         if globalSettingsMgr.settings.theTvDatabase.apiKey is not None and len(globalSettingsMgr.settings.theTvDatabase.apiKey) > 0 and globalSettingsMgr.settings.theTvDatabase.pin is not None:
-#             self.__loggerFunc("Initalizing tvdb connection")
-#             self.__tvdbApi = tvdb_v4_official.TVDB(globalSettingsMgr.settings.theTvDatabase.apiKey, pin=globalSettingsMgr.settings.theTvDatabase.pin)
-#         else:
-#             self.__tvdbApi = None
+    __apiKey: str | None
+    __pin: str | None
+    __token: str | None
+    __tokenLock: threading.Lock
 
-#     def findListByName(self, name : str) -> list[int] | str:
-#         if self.__tvdbApi is None: return ""
+    def __init__(self, apiKey: str | None, pin: str | None, apiUrl: str, cache: LookupCache | None = None, threads: int = 4, rateLimit: float = 10, maxRetries: int = 5) -> None:
+        """
+         @param apiKey - The TVDb api key
+         @param pin - The TVDb subscriber pin ( only required for user supported keys )
+        """
+        super().__init__(apiUrl, cache=cache, threads=threads, rateLimit=rateLimit, maxRetries=maxRetries)
 
-#         self.__loggerFunc("Searching for tvdb list: {}".format(name))
+        self.__apiKey = apiKey
+        self.__pin = pin
+        self.__token = None
+        self.__tokenLock = threading.Lock()
 
-#         result = self.__tvdbApi.get_all_lists(meta= { "menu[type]" : "list", "query": name } )
+    @property
+    def isEnabled(self) -> bool:
+        return self.__apiKey is not None and len(self.__apiKey) > 0
 
-#         self.__loggerFunc("tvdb result: {}".format(jsonpickle.dumps(result, unpicklable=False)))
+    def findListByName(self, name: str) -> list[str]:
+        return self.findListsByName(name)
 
-#         return ""
+    def _search(self, name: str) -> list[tuple[str, str]]:
+        params = {"query": name, "type": "list"}
+
+        response = self._get("/search", params=params)
+
+        # The token expires after a month, log in again once
+        if response.status_code == 401:
+            self.__login(expiredToken=self.__token)
+
+            response = self._get("/search", params=params)
+
+        response.raise_for_status()
+
+        return [
+            (x.get("name", ""), str(x.get("slug") or x.get("tvdb_id") or x.get("id")))
+            for x in response.json().get("data") or []
+        ]
+
+    def _get(self, path: str, params: dict | None = None):
+        if self.__token is None:
+            self.__login()
+
+        return super()._get(path, params=params)
+
+    def __login(self, expiredToken: str | None = None):
+        with self.__tokenLock:
+            # Another thread already logged in
+            if self.__token is not None and self.__token != expiredToken:
+                return
+
+            self._logger.debug("Logging in to tvdb")
+
+            data = {"apikey": self.__apiKey}
+            if self.__pin is not None and len(self.__pin) > 0:
+                data["pin"] = self.__pin
+
+            response = self._session.post("{}/login".format(self._apiUrl), json=data, timeout=30)
+            response.raise_for_status()
+
+            self.__token = response.json()["data"]["token"]
+            self._session.headers.update({"Authorization": "Bearer {}".format(self.__token)})
+
+
+_theTvDatabaseHelper: TheTvDatabaseHelper | None = None
+
+
+def getTheTvDatabaseHelper() -> TheTvDatabaseHelper:
+    """
+     Get the shared TVDb helper ( one session, rate limiter and lookup cache per process )
+    """
+    global _theTvDatabaseHelper
+
+    if _theTvDatabaseHelper is None:
+        tvdbSettings = globalSettingsMgr.settings.theTvDatabase
+
+        cache = None
+        if tvdbSettings.apiKey is not None and len(tvdbSettings.apiKey) > 0:
+            cache = createLookupCache(tvdbSettings.cacheFile, globalSettingsMgr.settings.output.path, TheTvDatabaseHelper.CACHE_FILE_NAME, tvdbSettings.cacheTtl, tvdbSettings.cacheNegativeTtl)
+
+        _theTvDatabaseHelper = registerListLookupHelper(TheTvDatabaseHelper(
+            tvdbSettings.apiKey,
+            tvdbSettings.pin,
+            tvdbSettings.apiUrl,
+            cache=cache,
+            threads=tvdbSettings.prefetchThreads,
+            rateLimit=tvdbSettings.rateLimit,
+            maxRetries=tvdbSettings.maxRetries,
+        ))  # type: ignore
+
+    return _theTvDatabaseHelper  # type: ignore